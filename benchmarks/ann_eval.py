@@ -0,0 +1,187 @@
+"""Recall and latency of the IVF index of the NumPy vector store against brute force.
+
+Usage::
+
+    python benchmarks/ann_eval.py --vectors 1M --nprobe 4,16,64 --compression int8
+    python benchmarks/ann_eval.py --vectors 200k --dim 384 --nlist 1024 --output ann.json
+
+Synthetic, normalized embeddings are drawn around random cluster centres,
+which resembles sentence embeddings of folder listings more than uniform
+noise does. The queries are perturbed stored vectors. For every nprobe the
+report shows the fraction of the exact 10 nearest neighbours (by float32
+brute force) that the index finds (the same check as
+NumpyVectorStore.measure_recall), and the query latency; the "exact" row is
+the brute-force scan itself.
+"""
+
+import argparse
+import functools
+import json
+import os
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Optional
+
+import numpy as np
+
+# Add project root to sys.path to allow imports when running as a script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.run_benchmarks import parse_size
+from semantic_backup_explorer.rag.vector_store import NumpyVectorStore
+
+ADD_BATCH = 10_000
+
+
+@dataclass
+class AnnResult:
+    """Recall and latency of one search configuration."""
+
+    name: str
+    vectors: int
+    recall: float
+    latency_p50_ms: float
+    latency_p95_ms: float
+
+
+def make_vectors(count: int, dim: int, clusters: int = 1000, seed: int = 0) -> np.ndarray:
+    """
+    Creates clustered, normalized float32 vectors.
+
+    Args:
+        count: Number of vectors.
+        dim: Dimension.
+        clusters: Number of cluster centres.
+        seed: Random seed.
+
+    Returns:
+        Array of shape (count, dim).
+    """
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(clusters, dim)).astype(np.float32)
+    vectors = np.empty((count, dim), dtype=np.float32)
+    for start in range(0, count, ADD_BATCH):
+        size = min(ADD_BATCH, count - start)
+        block = centres[rng.integers(0, clusters, size)] + 1.5 * rng.normal(size=(size, dim)).astype(np.float32)
+        vectors[start : start + size] = block / np.linalg.norm(block, axis=1, keepdims=True)
+    return vectors
+
+
+def build_store(
+    directory: Path, vectors: np.ndarray, compression: str, nlist: int, progress: Optional[Callable[[str], None]] = None
+) -> tuple[NumpyVectorStore, float]:
+    """
+    Adds the vectors to a new IVF store in batches and trains the index.
+
+    Args:
+        directory: Store directory.
+        vectors: The vectors.
+        compression: Compression of the store.
+        nlist: Number of inverted lists (0 for automatic).
+        progress: Optional callback receiving status messages.
+
+    Returns:
+        The store and the build time in seconds.
+    """
+    store = NumpyVectorStore(directory, compression=compression, index="ivf", nlist=nlist)
+    store.clear()
+    start_time = time.perf_counter()
+    for start in range(0, len(vectors), ADD_BATCH):
+        block = vectors[start : start + ADD_BATCH]
+        ids = [str(i) for i in range(start, start + len(block))]
+        store.add(ids, block, [""] * len(block), [{}] * len(block))
+    store.flush()
+    build_seconds = time.perf_counter() - start_time
+    if progress:
+        progress(f"Built store with {len(store)} vectors and {store.nlist} lists in {build_seconds:.1f} s")
+    return store, build_seconds
+
+
+def _latencies(search: Callable[[np.ndarray], object], queries: np.ndarray) -> tuple[float, float]:
+    """Median and 95th percentile latency of search over the queries, in ms."""
+    times = []
+    for query in queries:
+        start = time.perf_counter()
+        search(query)
+        times.append((time.perf_counter() - start) * 1000)
+    return float(np.percentile(times, 50)), float(np.percentile(times, 95))
+
+
+def evaluate_store(store: NumpyVectorStore, queries: np.ndarray, nprobes: list[int], k: int = 10) -> list[AnnResult]:
+    """
+    Measures recall against brute force and latency for several nprobe values.
+
+    Args:
+        store: A trained store.
+        queries: Query vectors.
+        nprobes: Inverted lists to scan.
+        k: Nearest neighbours per query.
+
+    Returns:
+        One result per nprobe, followed by the brute-force scan.
+    """
+    exact = [store.brute_force(q, k) for q in queries]
+    p50, p95 = _latencies(lambda q: store.brute_force(q, k), queries[:10])
+    results = []
+    for nprobe in nprobes:
+        found = sum(len(np.intersect1d(store.search(q, k, nprobe)[0], e)) for q, e in zip(queries, exact, strict=True))
+        recall = found / max(1, sum(len(e) for e in exact))
+        ivf_p50, ivf_p95 = _latencies(functools.partial(store.search, n_results=k, nprobe=nprobe), queries)
+        results.append(AnnResult(f"ivf nprobe={nprobe}", len(store), recall, ivf_p50, ivf_p95))
+    results.append(AnnResult("exact", len(store), 1.0, p50, p95))
+    return results
+
+
+def format_results(results: list[AnnResult]) -> str:
+    """
+    Formats results as a table.
+
+    Args:
+        results: Evaluation results.
+
+    Returns:
+        The table.
+    """
+    header = f"{'Configuration':<20} | {'Vectors':>9} | {'Recall':>6} | {'p50 ms':>8} | {'p95 ms':>8}"
+    lines = [header, "-" * len(header)]
+    for r in results:
+        lines.append(f"{r.name:<20} | {r.vectors:>9} | {r.recall:>6.3f} | {r.latency_p50_ms:>8.2f} | {r.latency_p95_ms:>8.2f}")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    """Main entry point for the ANN evaluation."""
+    parser = argparse.ArgumentParser(description="Measure IVF recall and latency against brute force.")
+    parser.add_argument("--vectors", default="200k", help="Number of vectors, e.g. 200k or 2M.")
+    parser.add_argument("--dim", type=int, default=384, help="Vector dimension.")
+    parser.add_argument("--queries", type=int, default=100, help="Number of queries.")
+    parser.add_argument("--k", type=int, default=10, help="Nearest neighbours per query.")
+    parser.add_argument("--nprobe", default="1,4,16,64", help="Comma-separated inverted lists to scan.")
+    parser.add_argument("--nlist", type=int, default=0, help="Inverted lists (0: square root of the vector count).")
+    parser.add_argument("--compression", default="int8", help="Vector compression (none, float16, int8).")
+    parser.add_argument("--workdir", default="data/benchmarks", help="Directory for the store.")
+    parser.add_argument("--output", help="Write results as JSON to this file.")
+    args = parser.parse_args()
+
+    vectors = make_vectors(parse_size(args.vectors), args.dim)
+    rng = np.random.default_rng(1)
+    picks = rng.choice(len(vectors), min(args.queries, len(vectors)), replace=False)
+    queries = vectors[picks] + 0.05 * rng.normal(size=(len(picks), args.dim)).astype(np.float32)
+
+    Path(args.workdir).mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(prefix="ann_", dir=args.workdir) as tmp:
+        store, _ = build_store(Path(tmp) / "store", vectors, args.compression, args.nlist, progress=print)
+        results = evaluate_store(store, queries, [int(n) for n in args.nprobe.split(",")], args.k)
+        del store
+    print(format_results(results))
+
+    if args.output:
+        Path(args.output).write_text(json.dumps([asdict(r) for r in results], indent=2), encoding="utf-8")
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
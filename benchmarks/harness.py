@@ -0,0 +1,180 @@
+"""Minimal timing harness producing pytest-benchmark style statistics."""
+
+import gc
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+
+@dataclass
+class BenchmarkResult:
+    """Timing and memory statistics of one benchmark."""
+
+    name: str
+    rounds: int
+    min: float
+    max: float
+    mean: float
+    median: float
+    stddev: float
+    peak_memory: int
+    extra: dict[str, Any]
+
+
+def measure(
+    name: str,
+    func: Callable[[], Any],
+    rounds: int = 3,
+    warmup: int = 0,
+    setup: Optional[Callable[[], Any]] = None,
+    extra: Optional[dict[str, Any]] = None,
+) -> BenchmarkResult:
+    """
+    Times func over several rounds and measures its peak Python memory.
+
+    Memory is traced in a separate, untimed round because tracemalloc slows
+    down allocation-heavy code considerably.
+
+    Args:
+        name: Benchmark name.
+        func: The code under test.
+        rounds: Number of timed rounds.
+        warmup: Number of untimed warm-up rounds.
+        setup: Optional untimed callable run before every round.
+        extra: Additional information stored with the result.
+
+    Returns:
+        The benchmark result.
+    """
+    for _ in range(warmup):
+        if setup:
+            setup()
+        func()
+
+    timings = []
+    for _ in range(rounds):
+        if setup:
+            setup()
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    if setup:
+        setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return BenchmarkResult(
+        name=name,
+        rounds=rounds,
+        min=min(timings),
+        max=max(timings),
+        mean=statistics.mean(timings),
+        median=statistics.median(timings),
+        stddev=statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        peak_memory=peak,
+        extra=extra or {},
+    )
+
+
+def save_results(path: str | Path, results: list[BenchmarkResult]) -> None:
+    """
+    Stores results as JSON (similar to ``pytest --benchmark-json``).
+
+    Args:
+        path: Output file.
+        results: The benchmark results.
+    """
+    data = {
+        "machine_info": {
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+        },
+        "datetime": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "benchmarks": [asdict(r) for r in results],
+    }
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+
+
+def load_results(path: str | Path) -> dict[str, dict[str, Any]]:
+    """
+    Loads stored results keyed by benchmark name.
+
+    Args:
+        path: A file written by save_results.
+
+    Returns:
+        Mapping of benchmark name to its stored statistics.
+    """
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    return {b["name"]: b for b in data.get("benchmarks", [])}
+
+
+def compare_to_baseline(
+    results: list[BenchmarkResult],
+    baseline: dict[str, dict[str, Any]],
+    threshold: float = 0.25,
+    memory_threshold: Optional[float] = None,
+) -> list[str]:
+    """
+    Finds benchmarks that got slower (or bigger) than the baseline.
+
+    The median is compared since it is the most robust statistic for the small
+    round counts used here.
+
+    Args:
+        results: Current results.
+        baseline: Baseline results as returned by load_results.
+        threshold: Allowed relative slowdown (0.25 = 25 %).
+        memory_threshold: Allowed relative peak memory growth (default: same as threshold).
+
+    Returns:
+        Human-readable descriptions of all regressions.
+    """
+    memory_threshold = threshold if memory_threshold is None else memory_threshold
+    regressions = []
+    for result in results:
+        base = baseline.get(result.name)
+        if base is None:
+            continue
+        if base["median"] > 0 and result.median > base["median"] * (1 + threshold):
+            regressions.append(
+                f"{result.name}: median {result.median:.4f}s vs. baseline {base['median']:.4f}s "
+                f"(+{(result.median / base['median'] - 1) * 100:.0f}%)"
+            )
+        if base["peak_memory"] > 0 and result.peak_memory > base["peak_memory"] * (1 + memory_threshold):
+            regressions.append(
+                f"{result.name}: peak memory {result.peak_memory / 1e6:.1f} MB vs. baseline {base['peak_memory'] / 1e6:.1f} MB"
+            )
+    return regressions
+
+
+def format_table(results: list[BenchmarkResult]) -> str:
+    """
+    Formats results as a plain-text table.
+
+    Args:
+        results: The benchmark results.
+
+    Returns:
+        The table.
+    """
+    lines = [f"{'Name':<40} | {'Min (s)':>9} | {'Median (s)':>10} | {'Max (s)':>9} | {'Peak MB':>8}", "-" * 88]
+    for r in results:
+        lines.append(f"{r.name:<40} | {r.min:>9.4f} | {r.median:>10.4f} | {r.max:>9.4f} | {r.peak_memory / 1e6:>8.1f}")
+    return "\n".join(lines)
@@ -0,0 +1,531 @@
+"""Offline retrieval quality and latency evaluation for the RAG stack.
+
+Usage::
+
+    python benchmarks/rag_eval.py --files 5000 --questions 200 --k 1,3,5
+    python benchmarks/rag_eval.py --depths 2,4,6 --backends exact,chroma --embedders hashing,minilm
+    python benchmarks/rag_eval.py --depths 4 --backends exact,numpy-float16,numpy-int8,numpy-int8-pca128
+
+Questions ("Wo finde ich die Datei ...?") are generated from a synthetic index,
+together with the file they refer to. A retrieved chunk counts as a hit if it
+contains that file's index entry. The default hashing embedder and stub LLM
+need neither model downloads nor network access.
+
+Backends named numpy-<compression>[-pca<dim>][-norescore] use the compressed
+NumpyVectorStore, e.g. numpy-int8-pca128-norescore; the report includes the
+memory of the searched vectors, so compression settings can be weighed
+against their recall and latency. The "Batch" column is the time per
+question when all questions are embedded with embed_queries and searched
+with query_many at once, next to the p50/p95 of one question at a time.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import numpy as np
+
+# Add project root to sys.path to allow imports when running as a script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("TQDM_DISABLE", "1")
+
+from benchmarks.synthetic_tree import TreeSpec, generate_tree
+from semantic_backup_explorer.chunking.folder_chunker import chunk_markdown
+from semantic_backup_explorer.indexer.scan_backup import scan_backup
+from semantic_backup_explorer.rag.embedder import HAS_SENTENCE_TRANSFORMERS, Embedder
+from semantic_backup_explorer.rag.rag_pipeline import RAGPipeline
+from semantic_backup_explorer.rag.retriever import HAS_CHROMADB, Retriever
+from semantic_backup_explorer.rag.vector_store import NumpyVectorStore
+from semantic_backup_explorer.utils.index_utils import iter_index_entries
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9äöüß]+")
+
+
+class HashingEmbedder:
+    """
+    Deterministic bag-of-tokens embedder (feature hashing).
+
+    Stands in for the SentenceTransformer model so that the evaluation runs
+    offline and fast. It only captures token overlap, which is what most file
+    name lookups need anyway.
+    """
+
+    def __init__(self, dim: int = 512) -> None:
+        """
+        Initialize the embedder.
+
+        Args:
+            dim: Embedding dimension.
+        """
+        self.dim = dim
+
+    def _embed(self, text: str) -> list[float]:
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for token in TOKEN_PATTERN.findall(text.lower()):
+            digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+            value = int.from_bytes(digest, "little")
+            vec[value % self.dim] += 1.0 if value & (1 << 63) else -1.0
+        norm = float(np.linalg.norm(vec))
+        if norm > 0:
+            vec /= norm
+        return [float(x) for x in vec]
+
+    def embed_query(self, text: str) -> list[float]:
+        """Embed a single query string."""
+        return self._embed(text)
+
+    def embed_queries(self, texts: list[str]) -> list[list[float]]:
+        """Embed several query strings."""
+        return [self._embed(t) for t in texts]
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        """Embed a list of document strings."""
+        return [self._embed(t) for t in texts]
+
+
+class StubLLM:
+    """LLM client replacement that answers with the first line of the context."""
+
+    def __init__(self) -> None:
+        """Initialize the stub."""
+        self.calls = 0
+
+    def chat_completion(self, messages: list[dict[str, str]]) -> str:
+        """
+        Returns a canned answer without any network access.
+
+        Args:
+            messages: Chat messages in OpenAI format.
+
+        Returns:
+            The answer text.
+        """
+        self.calls += 1
+        prompt = messages[-1]["content"]
+        context = prompt.split("Kontext:", 1)[-1].strip()
+        return context.splitlines()[0] if context else "Das weiß ich nicht."
+
+
+class ExactRetriever:
+    """In-memory brute-force cosine retriever with the Retriever interface."""
+
+    def __init__(self) -> None:
+        """Initialize an empty store."""
+        self.clear()
+
+    def clear(self) -> None:
+        """Removes all stored chunks."""
+        self.matrix = np.zeros((0, 0), dtype=np.float32)
+        self.documents: list[str] = []
+        self.metadatas: list[dict[str, Any]] = []
+
+    def add_chunks(self, chunks: list[dict[str, Any]], embeddings: list[list[float]]) -> None:
+        """
+        Add document chunks with their embeddings.
+
+        Args:
+            chunks: List of chunk dictionaries, each containing 'content' and 'metadata'.
+            embeddings: List of embedding vectors, one per chunk.
+
+        Raises:
+            ValueError: If lengths of chunks and embeddings don't match.
+        """
+        if len(chunks) != len(embeddings):
+            raise ValueError(f"Chunk count ({len(chunks)}) must match embedding count ({len(embeddings)})")
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1, norms)
+        self.matrix = vectors if self.matrix.size == 0 else np.vstack([self.matrix, vectors])
+        self.documents.extend(c["content"] for c in chunks)
+        self.metadatas.extend(c["metadata"] for c in chunks)
+
+    def query(self, query_embedding: list[float], n_results: int = 5) -> dict[str, Any]:
+        """
+        Returns the n_results most similar chunks in ChromaDB's result layout.
+
+        Args:
+            query_embedding: The embedding vector of the query.
+            n_results: Number of results to return.
+
+        Returns:
+            Dictionary with ids, documents, metadatas and distances (one query).
+        """
+        return self.query_many([query_embedding], n_results)[0]
+
+    def query_many(self, query_embeddings: list[list[float]], n_results: int = 5) -> list[dict[str, Any]]:
+        """
+        Returns the n_results most similar chunks of several queries with one matrix product.
+
+        Args:
+            query_embeddings: The embedding vectors of the queries.
+            n_results: Number of results per query.
+
+        Returns:
+            One dictionary per query, in the layout of query().
+        """
+        if not self.documents:
+            return [{"ids": [[]], "documents": [[]], "metadatas": [[]], "distances": [[]]} for _ in query_embeddings]
+        queries = np.asarray(query_embeddings, dtype=np.float32).reshape(len(query_embeddings), -1)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        all_scores = (queries / np.where(norms == 0, 1, norms)) @ self.matrix.T
+        n = min(n_results, self.matrix.shape[0])
+        results = []
+        for scores in all_scores:
+            top = np.argpartition(-scores, n - 1)[:n]
+            top = top[np.argsort(-scores[top])]
+            results.append(
+                {
+                    "ids": [[f"chunk_{i}" for i in top]],
+                    "documents": [[self.documents[i] for i in top]],
+                    "metadatas": [[self.metadatas[i] for i in top]],
+                    "distances": [[float(1 - scores[i]) for i in top]],
+                }
+            )
+        return results
+
+
+@dataclass
+class EvalQuestion:
+    """A question together with the index entry that answers it."""
+
+    question: str
+    expected_entry: str
+    expected_folder: str
+
+
+@dataclass
+class EvalResult:
+    """Quality and latency of one configuration."""
+
+    name: str
+    chunks: int
+    questions: int
+    recall: dict[int, float]
+    mrr: float
+    latency_p50_ms: float
+    latency_p95_ms: float
+    build_seconds: float
+    memory_mb: float = 0.0
+    batch_ms_per_query: float = 0.0
+
+
+QUESTION_TEMPLATES = [
+    "Wo finde ich die Datei {name}?",
+    "In welchem Ordner liegt {name}?",
+    "Ich suche {words} {number}",
+    "Wo ist {words} {number} gespeichert?",
+]
+
+
+def generate_questions(index_path: Path, count: int, seed: int = 0) -> list[EvalQuestion]:
+    """
+    Creates file lookup questions from the entries of an index.
+
+    Args:
+        index_path: Markdown or compact index.
+        count: Number of questions.
+        seed: Random seed.
+
+    Returns:
+        The questions.
+    """
+    files = [(path, folder) for folder, path, is_dir, _ in _entries_with_folder(index_path) if not is_dir]
+    rng = random.Random(seed)
+    questions = []
+    for path, folder in rng.sample(files, min(count, len(files))):
+        name = os.path.basename(path)
+        stem = os.path.splitext(name)[0]
+        parts = stem.split("_")
+        number = parts[-1] if parts[-1].isdigit() else ""
+        words = " ".join(p for p in parts if not p.isdigit())
+        template = rng.choice(QUESTION_TEMPLATES)
+        questions.append(EvalQuestion(template.format(name=name, words=words, number=number), path, folder))
+    return questions
+
+
+def _entries_with_folder(index_path: Path) -> list[tuple[str, str, bool, float]]:
+    """Returns (folder, path, is_dir, mtime) for all index entries."""
+    entries = []
+    for path, is_dir, mtime in iter_index_entries(index_path):
+        entries.append((os.path.dirname(path.rstrip("/\\")), path, is_dir, mtime))
+    return entries
+
+
+def _percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(q * len(ordered))) - 1))]
+
+
+def evaluate(
+    name: str,
+    chunks: list[dict[str, Any]],
+    questions: list[EvalQuestion],
+    embedder: Any,
+    retriever: Any,
+    ks: list[int],
+    build_seconds: float = 0.0,
+) -> EvalResult:
+    """
+    Runs all questions against one embedder/retriever combination.
+
+    Args:
+        name: Configuration name for the report.
+        chunks: Chunks already stored in the retriever.
+        questions: Evaluation questions.
+        embedder: Object providing embed_query (and embed_queries for the batch timing).
+        retriever: Object providing query (and query_many for the batch timing).
+        ks: Cut-offs for recall@k.
+        build_seconds: Time spent embedding and storing the chunks.
+
+    Returns:
+        The evaluation result.
+    """
+    max_k = max(ks)
+    hits_at = {k: 0 for k in ks}
+    reciprocal_ranks = []
+    latencies = []
+    for q in questions:
+        start = time.perf_counter()
+        result = retriever.query(embedder.embed_query(q.question), n_results=max_k)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+        documents = (result.get("documents") or [[]])[0]
+        rank = next((i + 1 for i, doc in enumerate(documents) if f"- {q.expected_entry} |" in doc), None)
+        reciprocal_ranks.append(1.0 / rank if rank else 0.0)
+        for k in ks:
+            if rank is not None and rank <= k:
+                hits_at[k] += 1
+
+    # The same questions in one batched encode and one matrix search
+    batch_ms = 0.0
+    if questions and hasattr(embedder, "embed_queries") and hasattr(retriever, "query_many"):
+        start = time.perf_counter()
+        retriever.query_many(embedder.embed_queries([q.question for q in questions]), n_results=max_k)
+        batch_ms = (time.perf_counter() - start) * 1000 / len(questions)
+
+    n = max(1, len(questions))
+    return EvalResult(
+        name=name,
+        chunks=len(chunks),
+        questions=len(questions),
+        recall={k: hits_at[k] / n for k in ks},
+        mrr=sum(reciprocal_ranks) / n,
+        latency_p50_ms=statistics.median(latencies) if latencies else 0.0,
+        latency_p95_ms=_percentile(latencies, 0.95),
+        build_seconds=build_seconds,
+        memory_mb=_memory_bytes(retriever) / 2**20,
+        batch_ms_per_query=batch_ms,
+    )
+
+
+def _memory_bytes(retriever: Any) -> int:
+    """Bytes of the vectors a retriever searches in memory (0 if unknown, e.g. for ChromaDB)."""
+    if isinstance(retriever, ExactRetriever):
+        return int(retriever.matrix.nbytes)
+    store = getattr(retriever, "store", None)
+    return store.memory_bytes if isinstance(store, NumpyVectorStore) else 0
+
+
+def make_embedder(name: str) -> Any:
+    """
+    Creates an embedder by name.
+
+    Args:
+        name: "hashing" or "minilm" (the default SentenceTransformer model).
+
+    Returns:
+        The embedder.
+
+    Raises:
+        ValueError: For unknown names.
+    """
+    if name == "hashing":
+        return HashingEmbedder()
+    if name == "minilm":
+        return Embedder()
+    raise ValueError(f"Unknown embedder: {name}")
+
+
+def make_retriever(name: str, workdir: Path) -> Any:
+    """
+    Creates an empty retriever backend by name.
+
+    Args:
+        name: "exact" (in-memory NumPy), "chroma" or numpy-<compression>[-pca<dim>][-norescore].
+        workdir: Directory for persistent backends.
+
+    Returns:
+        The retriever.
+
+    Raises:
+        ValueError: For unknown names.
+    """
+    if name == "exact":
+        return ExactRetriever()
+    if name == "chroma":
+        retriever = Retriever(persist_directory=tempfile.mkdtemp(prefix="chroma_", dir=workdir))
+        retriever.clear()
+        return retriever
+    if name.startswith("numpy-"):
+        compression, *options = name.split("-")[1:]
+        pca_dim = next((int(o[3:]) for o in options if o.startswith("pca")), 0)
+        directory = tempfile.mkdtemp(prefix="numpy_", dir=workdir)
+        return Retriever(directory, compression=compression, pca_dim=pca_dim, rescore="norescore" not in options)
+    raise ValueError(f"Unknown backend: {name}")
+
+
+def available(backends: list[str], embedders: list[str]) -> tuple[list[str], list[str]]:
+    """Drops backends and embedders whose optional dependencies are missing."""
+    backends = [b for b in backends if b != "chroma" or HAS_CHROMADB]
+    embedders = [e for e in embedders if e != "minilm" or HAS_SENTENCE_TRANSFORMERS]
+    return backends, embedders
+
+
+def run_matrix(
+    index_path: Path,
+    questions: list[EvalQuestion],
+    depths: list[int],
+    backends: list[str],
+    embedders: list[str],
+    ks: list[int],
+    workdir: Path,
+    progress: Optional[Callable[[str], None]] = None,
+) -> list[EvalResult]:
+    """
+    Evaluates every combination of chunking depth, embedder and backend.
+
+    Args:
+        index_path: The index to chunk.
+        questions: Evaluation questions.
+        depths: max_depth values for chunk_markdown.
+        backends: Retriever backend names.
+        embedders: Embedder names.
+        ks: Cut-offs for recall@k.
+        workdir: Directory for persistent backends.
+        progress: Optional callback receiving status messages.
+
+    Returns:
+        One result per combination.
+    """
+    results = []
+    for embedder_name in embedders:
+        embedder = make_embedder(embedder_name)
+        for depth in depths:
+            chunks = chunk_markdown(index_path, max_depth=depth)
+            start = time.perf_counter()
+            embeddings = embedder.embed_documents([c["content"] for c in chunks])
+            embed_seconds = time.perf_counter() - start
+            for backend in backends:
+                name = f"{embedder_name}/depth{depth}/{backend}"
+                if progress:
+                    progress(f"Evaluating {name} ({len(chunks)} chunks)...")
+                retriever = make_retriever(backend, workdir)
+                start = time.perf_counter()
+                retriever.add_chunks(chunks, embeddings)
+                if hasattr(retriever, "flush"):
+                    retriever.flush()
+                build = embed_seconds + time.perf_counter() - start
+                results.append(evaluate(name, chunks, questions, embedder, retriever, ks, build))
+    return results
+
+
+def answer_smoke_test(index_path: Path, question: EvalQuestion) -> str:
+    """
+    Runs one question end-to-end through RAGPipeline with stub components.
+
+    Args:
+        index_path: The index to chunk.
+        question: The question to ask.
+
+    Returns:
+        The (stub) answer.
+    """
+    embedder = HashingEmbedder()
+    retriever = ExactRetriever()
+    chunks = chunk_markdown(index_path)
+    retriever.add_chunks(chunks, embedder.embed_documents([c["content"] for c in chunks]))
+    pipeline = RAGPipeline(embedder=embedder, retriever=retriever, client=StubLLM())
+    answer, _ = pipeline.answer_question(question.question)
+    return answer
+
+
+def format_results(results: list[EvalResult], ks: list[int]) -> str:
+    """
+    Formats results as a side-by-side table.
+
+    Args:
+        results: Evaluation results.
+        ks: Cut-offs for recall@k.
+
+    Returns:
+        The table.
+    """
+    recall_cols = " | ".join(f"{'R@' + str(k):>6}" for k in ks)
+    header = (
+        f"{'Configuration':<44} | {'Chunks':>6} | {recall_cols} | {'MRR':>6} | {'p50 ms':>7} | {'p95 ms':>7}"
+        f" | {'Batch':>7} | {'Mem MB':>7}"
+    )
+    lines = [header, "-" * len(header)]
+    for r in results:
+        recalls = " | ".join(f"{r.recall[k]:>6.3f}" for k in ks)
+        lines.append(
+            f"{r.name:<44} | {r.chunks:>6} | {recalls} | {r.mrr:>6.3f} | {r.latency_p50_ms:>7.2f} | {r.latency_p95_ms:>7.2f}"
+            f" | {r.batch_ms_per_query:>7.2f} | {r.memory_mb:>7.2f}"
+        )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    """Main entry point for the RAG evaluation."""
+    parser = argparse.ArgumentParser(description="Evaluate retrieval quality and latency offline.")
+    parser.add_argument("--files", type=int, default=5000, help="Files in the synthetic tree.")
+    parser.add_argument("--depth", type=int, default=5, help="Directory depth of the synthetic tree.")
+    parser.add_argument("--fanout", type=int, default=4, help="Sub-directories per directory.")
+    parser.add_argument("--questions", type=int, default=200, help="Number of generated questions.")
+    parser.add_argument("--k", default="1,3,5", help="Comma-separated cut-offs for recall@k.")
+    parser.add_argument("--depths", default="2,4,6", help="Comma-separated chunking depths to compare.")
+    parser.add_argument("--backends", default="exact,chroma", help="Comma-separated retriever backends.")
+    parser.add_argument("--embedders", default="hashing", help="Comma-separated embedders (hashing, minilm).")
+    parser.add_argument("--workdir", default="data/benchmarks", help="Directory for generated trees.")
+    parser.add_argument("--output", help="Write results as JSON to this file.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for question generation.")
+    args = parser.parse_args()
+
+    ks = sorted(int(k) for k in args.k.split(","))
+    depths = [int(d) for d in args.depths.split(",")]
+    backends, embedders = available(args.backends.split(","), args.embedders.split(","))
+
+    workdir = Path(args.workdir)
+    workdir.mkdir(parents=True, exist_ok=True)
+    spec = TreeSpec(files=args.files, depth=args.depth, fanout=args.fanout)
+    tree = generate_tree(workdir / f"rag_tree_{args.files}", spec).resolve()
+    index_file = workdir / f"rag_index_{args.files}.md"
+    scan_backup(tree, index_file)
+
+    questions = generate_questions(index_file, args.questions, seed=args.seed)
+    print(f"{len(questions)} questions, e.g. {questions[0].question!r} -> {questions[0].expected_folder}")
+    print(f"Stub pipeline answer: {answer_smoke_test(index_file, questions[0])!r}")
+
+    results = run_matrix(index_file, questions, depths, backends, embedders, ks, workdir, progress=print)
+    print(format_results(results, ks))
+
+    if args.output:
+        Path(args.output).write_text(json.dumps([asdict(r) for r in results], indent=2), encoding="utf-8")
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""Benchmarks for scanning, index parsing, chunking, diffing and syncing.
+
+Usage::
+
+    python benchmarks/run_benchmarks.py --sizes 10k,100k --output benchmarks/results.json
+    python benchmarks/run_benchmarks.py --sizes 10k --baseline benchmarks/results.json
+
+Synthetic trees are generated once per size in the work directory and reused
+by later runs.
+"""
+
+import argparse
+import functools
+import logging
+import os
+import shutil
+import sys
+from pathlib import Path
+
+# Add project root to sys.path to allow imports when running as a script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Progress bars would distort the timings; tqdm reads this when it is imported
+os.environ.setdefault("TQDM_DISABLE", "1")
+
+from benchmarks.harness import BenchmarkResult, compare_to_baseline, format_table, load_results, measure, save_results
+from benchmarks.synthetic_tree import TreeSpec, generate_tree
+from semantic_backup_explorer.chunking.folder_chunker import chunk_markdown
+from semantic_backup_explorer.compare.folder_diff import compare_folders
+from semantic_backup_explorer.compare.local_walk import DEFAULT_WALK_WORKERS, walk_folder
+from semantic_backup_explorer.indexer.scan_backup import scan_backup
+from semantic_backup_explorer.sync.sync_missing import sync_files
+from semantic_backup_explorer.utils.index_utils import get_all_files_from_index
+
+SYNC_FILE_LIMIT = 2000
+
+
+def parse_size(text: str) -> int:
+    """
+    Parses a file count like ``10k`` or ``1M``.
+
+    Args:
+        text: The size string.
+
+    Returns:
+        The number of files.
+    """
+    text = text.strip().lower()
+    factor = 1
+    if text.endswith("k"):
+        factor, text = 1_000, text[:-1]
+    elif text.endswith("m"):
+        factor, text = 1_000_000, text[:-1]
+    return int(float(text) * factor)
+
+
+def run_size(spec: TreeSpec, workdir: Path, rounds: int, index_suffix: str) -> list[BenchmarkResult]:
+    """
+    Runs all stage benchmarks for one tree size.
+
+    Args:
+        spec: Shape of the synthetic tree.
+        workdir: Directory for trees, indexes and sync targets.
+        rounds: Timed rounds per benchmark.
+        index_suffix: ".md" or ".sbi" to select the index format.
+
+    Returns:
+        The results of all stages.
+    """
+    label = f"{spec.files // 1000}k" if spec.files < 1_000_000 else f"{spec.files / 1_000_000:g}M"
+    tree = generate_tree(workdir / f"tree_{spec.files}", spec).resolve()
+    index_file = workdir / f"index_{spec.files}{index_suffix}"
+    info = {"files": spec.files, "depth": spec.depth, "fanout": spec.fanout, "format": index_suffix}
+    results = []
+
+    results.append(measure(f"scan_backup[{label}]", lambda: scan_backup(tree, index_file), rounds, extra=info))
+    results.append(measure(f"chunk_markdown[{label}]", lambda: chunk_markdown(index_file), rounds, extra=info))
+    results.append(
+        measure(f"get_all_files_from_index[{label}]", lambda: get_all_files_from_index(tree, index_file), rounds, extra=info)
+    )
+
+    for workers in (1, DEFAULT_WALK_WORKERS):
+        results.append(
+            measure(
+                f"walk_folder[{label},workers={workers}]",
+                functools.partial(walk_folder, tree, workers),
+                rounds,
+                extra=info,
+            )
+        )
+
+    # Drop every 10th file from the "backup" so that the diff has work to do
+    backup_files = get_all_files_from_index(tree, index_file)
+    for i, key in enumerate(list(backup_files)):
+        if i % 10 == 0:
+            del backup_files[key]
+    results.append(measure(f"compare_folders[{label}]", lambda: compare_folders(tree, backup_files), rounds, extra=info))
+
+    to_sync = sorted(compare_folders(tree, backup_files)["only_local"])[:SYNC_FILE_LIMIT]
+    target = workdir / f"sync_target_{spec.files}"
+
+    def reset_target() -> None:
+        shutil.rmtree(target, ignore_errors=True)
+        target.mkdir(parents=True)
+
+    results.append(
+        measure(
+            f"sync_files[{label}]",
+            lambda: sync_files(to_sync, tree, target),
+            rounds,
+            setup=reset_target,
+            extra={**info, "synced_files": len(to_sync)},
+        )
+    )
+    shutil.rmtree(target, ignore_errors=True)
+    return results
+
+
+def main() -> None:
+    """Main entry point for the benchmark runner."""
+    parser = argparse.ArgumentParser(description="Benchmark scanning, parsing, diffing and syncing.")
+    parser.add_argument("--sizes", default="10k", help="Comma-separated file counts, e.g. 10k,100k,1M.")
+    parser.add_argument("--depth", type=int, default=4, help="Directory depth of the synthetic tree.")
+    parser.add_argument("--fanout", type=int, default=6, help="Sub-directories per directory.")
+    parser.add_argument(
+        "--names", default="realistic", choices=["realistic", "random", "long"], help="File name distribution."
+    )
+    parser.add_argument("--file_size", type=int, default=0, help="Size of each synthetic file in bytes.")
+    parser.add_argument("--format", default="md", choices=["md", "sbi"], help="Index format to benchmark.")
+    parser.add_argument("--rounds", type=int, default=3, help="Timed rounds per benchmark.")
+    parser.add_argument("--workdir", default="data/benchmarks", help="Directory for generated trees.")
+    parser.add_argument("--output", help="Write results as JSON to this file.")
+    parser.add_argument("--baseline", help="Compare against results stored in this JSON file.")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed relative slowdown vs. baseline.")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+
+    workdir = Path(args.workdir)
+    workdir.mkdir(parents=True, exist_ok=True)
+    results: list[BenchmarkResult] = []
+    for size in args.sizes.split(","):
+        spec = TreeSpec(
+            files=parse_size(size),
+            depth=args.depth,
+            fanout=args.fanout,
+            name_distribution=args.names,
+            file_size=args.file_size,
+        )
+        print(f"Running benchmarks for {spec.files} files...")
+        results.extend(run_size(spec, workdir, args.rounds, f".{args.format}"))
+
+    print(format_table(results))
+
+    if args.output:
+        save_results(args.output, results)
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        regressions = compare_to_baseline(results, load_results(args.baseline), threshold=args.threshold)
+        if regressions:
+            print("\nRegressions against baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("\nNo regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Generator for synthetic backup trees used by the benchmarks."""
+
+import json
+import os
+import random
+import shutil
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+SPEC_FILE = ".synthetic_tree.json"
+
+EXTENSIONS = [".jpg", ".pdf", ".docx", ".txt", ".mp3", ".xlsx", ".png", ".zip"]
+WORDS = ["Urlaub", "Rechnung", "Projekt", "Bericht", "IMG", "Scan", "Vertrag", "Notizen", "Backup", "Entwurf", "final"]
+
+
+@dataclass(frozen=True)
+class TreeSpec:
+    """Shape of a synthetic backup tree."""
+
+    files: int = 10_000
+    depth: int = 4
+    fanout: int = 6
+    name_distribution: str = "realistic"
+    file_size: int = 0
+    seed: int = 42
+
+
+def _file_name(rng: random.Random, index: int, distribution: str) -> str:
+    """
+    Creates a file name following the requested distribution.
+
+    Args:
+        rng: Random number generator.
+        index: Running file number (keeps names unique within a folder).
+        distribution: "realistic" (word-based names of varying length),
+            "random" (short random names) or "long" (long names with spaces).
+
+    Returns:
+        The file name.
+    """
+    ext = rng.choice(EXTENSIONS)
+    if distribution == "random":
+        return f"{rng.getrandbits(32):08x}_{index}{ext}"
+    if distribution == "long":
+        words = " ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 10)))
+        return f"{words} {index:07d}{ext}"
+    words = "_".join(rng.choice(WORDS) for _ in range(rng.randint(1, 3)))
+    return f"{words}_{index:05d}{ext}"
+
+
+def _directories(root: Path, spec: TreeSpec) -> list[Path]:
+    """Returns all directories of the tree in breadth-first order."""
+    dirs = [root]
+    level = [root]
+    for depth in range(spec.depth):
+        next_level = []
+        for parent in level:
+            for i in range(spec.fanout):
+                next_level.append(parent / f"Ordner_{depth}_{i:02d}")
+        dirs.extend(next_level)
+        level = next_level
+    return dirs
+
+
+def generate_tree(root: str | Path, spec: TreeSpec) -> Path:
+    """
+    Creates (or reuses) a synthetic backup tree.
+
+    Files are spread evenly across all directories. A tree previously generated
+    with the same spec in root is reused, since creating 1M files takes a while;
+    any other content of root is deleted.
+
+    Args:
+        root: Directory to create the tree in.
+        spec: Shape of the tree.
+
+    Returns:
+        The root path of the tree.
+    """
+    root = Path(root)
+    spec_file = root / SPEC_FILE
+    if spec_file.exists():
+        try:
+            if json.loads(spec_file.read_text(encoding="utf-8")) == asdict(spec):
+                return root
+        except ValueError:
+            pass
+    if root.exists():
+        # Stale or partially generated tree
+        shutil.rmtree(root)
+
+    rng = random.Random(spec.seed)
+    dirs = _directories(root, spec)
+    for d in dirs:
+        d.mkdir(parents=True, exist_ok=True)
+
+    payload = b"x" * spec.file_size
+    # Fixed, deterministic mtimes so that repeated runs produce identical indexes
+    base_mtime = 1_600_000_000.0
+    for i in range(spec.files):
+        path = dirs[i % len(dirs)] / _file_name(rng, i, spec.name_distribution)
+        with open(path, "wb") as f:
+            f.write(payload)
+        mtime = base_mtime + i
+        os.utime(path, (mtime, mtime))
+
+    # Written inside the tree on purpose: it is indexed like any other file
+    spec_file.write_text(json.dumps(asdict(spec)), encoding="utf-8")
+    return root
@@ -12,58 +12,319 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from tqdm import tqdm
 
-from semantic_backup_explorer.compare.folder_diff import get_folder_content
+from semantic_backup_explorer.compare.local_snapshot import LocalSnapshotCache, get_local_snapshot_cache
+from semantic_backup_explorer.core.async_sync import (
+    DEFAULT_WRITERS_PER_DEVICE,
+    AsyncSyncOrchestrator,
+    FolderSyncResult,
+    SyncProgress,
+)
 from semantic_backup_explorer.core.backup_operations import BackupOperations
 from semantic_backup_explorer.exceptions import BackupExplorerError
 from semantic_backup_explorer.indexer.scan_backup import scan_backup
-from semantic_backup_explorer.sync.sync_missing import sync_files
-from semantic_backup_explorer.utils.config import BackupConfig
+from semantic_backup_explorer.sync.copy_engine import DEFAULT_BUFFER_SIZE
+from semantic_backup_explorer.sync.delta import DeltaSync, get_delta_sync
+from semantic_backup_explorer.sync.snapshot import SnapshotStore, without_snapshots
+from semantic_backup_explorer.sync.sync_missing import rename_files, sync_files
+from semantic_backup_explorer.sync.throttle import Throttle, get_throttle, lower_io_priority
+from semantic_backup_explorer.sync.watch_daemon import (
+    DEFAULT_DEBOUNCE,
+    DEFAULT_INDEX_MERGE_INTERVAL,
+    DEFAULT_SYNC_INTERVAL,
+    SyncDaemon,
+    WatchedFolder,
+)
+from semantic_backup_explorer.utils.config import BackupConfig, parse_config, parse_exclusions
 from semantic_backup_explorer.utils.drive_utils import get_volume_label
+from semantic_backup_explorer.utils.exclusions import ExclusionConfig
 from semantic_backup_explorer.utils.index_utils import get_index_metadata
 from semantic_backup_explorer.utils.logging_utils import setup_logging
+from semantic_backup_explorer.utils.metrics import get_metrics_registry, inc, timer
+from semantic_backup_explorer.utils.profiling import StageProfiler
 
 
-def parse_config(config_path: Path) -> list[str]:
+def write_metrics_report(json_path: Optional[str], prom_path: Optional[str]) -> None:
     """
-    Parses the markdown config file for source folders.
+    Writes the collected metrics of this run.
 
     Args:
-        config_path: Path to the backup configuration file.
+        json_path: Target of the JSON run report (skipped if None).
+        prom_path: Target of the Prometheus textfile (skipped if None).
+    """
+    registry = get_metrics_registry()
+    if json_path:
+        registry.write_json(json_path)
+    if prom_path:
+        registry.write_prometheus(prom_path)
+
+
+def sync_folders_sequential(
+    operations: BackupOperations,
+    backup_drive: Path,
+    source_folders: list[str],
+    profiler: StageProfiler,
+    buffer_size: int = DEFAULT_BUFFER_SIZE,
+    throttle: Optional[Throttle] = None,
+    delta: Optional[DeltaSync] = None,
+) -> list[FolderSyncResult]:
+    """
+    Syncs the source folders one after another.
+
+    Args:
+        operations: Operations used to plan each folder.
+        backup_drive: Root of the backup drive.
+        source_folders: Folders from the config file.
+        profiler: Profiler for the compare and sync stages.
+        buffer_size: Copy buffer size where no in-kernel copy is possible.
+        throttle: Optional bandwidth and file rate limit.
+        delta: Optional delta transfer for large modified files.
 
     Returns:
-        A list of folder paths to synchronize.
+        One result per folder.
     """
-    folders = []
-    if not config_path.exists():
-        return folders
-    with open(config_path, "r", encoding="utf-8") as f:
-        for line in f:
-            # Look for lines starting with '- ' or '* ' followed by a path
-            stripped = line.strip()
-            if stripped.startswith("- ") or stripped.startswith("* "):
-                folder = stripped[2:].strip()
-                folders.append(folder)
-    return folders
+    logger = logging.getLogger(__name__)
+    results = []
+    for local_path_str in source_folders:
+        local_path = Path(local_path_str)
+        logger.info(f"Processing {local_path}...")
 
+        with profiler.stage("compare"):
+            plan = operations.plan_sync(local_path, backup_drive)
+        if plan.status is not None or plan.target_root is None:
+            results.append(FolderSyncResult(local_path, None, 0, plan.status or "Error"))
+            continue
 
-def main() -> None:
-    """Main entry point for the auto_sync script."""
-    parser = argparse.ArgumentParser(description="Auto Sync local folders to backup.")
-    parser.add_argument("--config", default="backup_config.md", help="Path to backup config markdown file.")
-    parser.add_argument("--backup_path", help="Path to backup drive/folder root (overrides config).")
-    parser.add_argument("--force", action="store_true", help="Force indexing even if drive label mismatches existing index.")
-    parser.add_argument("--verbose", action="store_true", help="Enable verbose logging.")
-    args = parser.parse_args()
+        files_to_sync = plan.files_to_sync
+        if not files_to_sync and not plan.renames:
+            logger.info("Everything up to date.")
+            results.append(FolderSyncResult(local_path, plan.target_root, 0, "Up to date"))
+            continue
 
-    # Setup logging
-    log_level = logging.DEBUG if args.verbose else logging.INFO
-    setup_logging(level=log_level)
+        renamed: list[str] = []
+        if plan.renames:
+            logger.info(f"Renaming {len(plan.renames)} moved files in {plan.target_root}...")
+            with profiler.stage("sync"):
+                renamed, rename_errors = rename_files(plan.renames, plan.target_root)
+            # Files that could not be moved are copied instead
+            files_to_sync = files_to_sync + [rel_path for rel_path, _ in rename_errors]
+
+        synced: list[str] = []
+        errors: list[tuple[str, str]] = []
+        if files_to_sync:
+            synced, errors = _sync_with_progress(
+                local_path, plan.target_root, files_to_sync, profiler, buffer_size, throttle, delta
+            )
+
+        inc("auto_sync.folders_synced")
+        status = f"{len(errors)} errors" if errors else "OK"
+        results.append(FolderSyncResult(local_path, plan.target_root, len(synced), status, renamed=len(renamed)))
+    return results
+
+
+def _sync_with_progress(
+    local_path: Path,
+    target_root: Path,
+    files_to_sync: list[str],
+    profiler: StageProfiler,
+    buffer_size: int,
+    throttle: Optional[Throttle],
+    delta: Optional[DeltaSync],
+) -> tuple[list[str], list[tuple[str, str]]]:
+    """Copies the files of one folder with a file and a byte progress bar."""
+    logger = logging.getLogger(__name__)
+    logger.info(f"Syncing {len(files_to_sync)} files to {target_root}...")
+
+    def sync_callback(current: int, total: int, filename: str, error: Optional[str] = None) -> None:
+        if error:
+            tqdm.write(f"  [ERROR] {filename}: {error}")
+        else:
+            tqdm.write(f"  [OK] {filename}")
+        pbar.update(1)
+        # Skip the rest of a failed file, so the byte bar stays in step
+        byte_bar.update(sizes.get(filename, 0) - copied.pop(filename, 0))
+
+    copied: dict[str, int] = {}
+
+    def byte_callback(filename: str, bytes_done: int, bytes_total: int, bytes_per_sec: float) -> None:
+        byte_bar.update(bytes_done - copied.get(filename, 0))
+        copied[filename] = bytes_done
+        byte_bar.set_postfix_str(f"{bytes_per_sec / 1024**2:.1f} MB/s", refresh=False)
+
+    sizes = _file_sizes(local_path, files_to_sync)
+    with (
+        tqdm(total=len(files_to_sync), desc=f"Syncing {local_path.name}", unit="file") as pbar,
+        tqdm(total=sum(sizes.values()), unit="B", unit_scale=True, unit_divisor=1024, leave=False) as byte_bar,
+    ):
+        with profiler.stage("sync"):
+            synced, errors = sync_files(
+                files_to_sync,
+                local_path,
+                target_root,
+                callback=sync_callback,
+                byte_callback=byte_callback,
+                buffer_size=buffer_size,
+                throttle=throttle,
+                delta=delta,
+            )
+    return synced, errors
+
+
+def _file_sizes(root: Path, rel_paths: list[str]) -> dict[str, int]:
+    """Returns the sizes of the files to copy (0 for unreadable files)."""
+    sizes = {}
+    for rel_path in rel_paths:
+        try:
+            sizes[rel_path] = (root / rel_path).stat().st_size
+        except OSError:
+            sizes[rel_path] = 0
+    return sizes
+
+
+def sync_folders_parallel(
+    operations: BackupOperations,
+    backup_drive: Path,
+    source_folders: list[str],
+    args: argparse.Namespace,
+    buffer_size: int = DEFAULT_BUFFER_SIZE,
+    throttle: Optional[Throttle] = None,
+    delta: Optional[DeltaSync] = None,
+) -> list[FolderSyncResult]:
+    """
+    Syncs the source folders concurrently with a single aggregated progress bar.
+
+    Args:
+        operations: Operations used to plan each folder.
+        backup_drive: Root of the backup drive.
+        source_folders: Folders from the config file.
+        args: Parsed command line arguments (parallel, writers_per_device).
+        buffer_size: Copy buffer size where no in-kernel copy is possible.
+        throttle: Optional limits shared by all concurrent copies.
+        delta: Optional delta transfer for large modified files.
+
+    Returns:
+        One result per folder, in config order.
+    """
+    with tqdm(total=0, desc=f"Syncing {len(source_folders)} folders", unit="file") as pbar:
+
+        def on_update(progress: SyncProgress, filename: str, error: Optional[str]) -> None:
+            if error:
+                tqdm.write(f"  [ERROR] {filename}: {error}")
+            else:
+                tqdm.write(f"  [OK] {filename}")
+            # The total grows while folders are still being compared
+            pbar.total = progress.files_total
+            pbar.update(1)
+
+        orchestrator = AsyncSyncOrchestrator(
+            operations,
+            backup_drive,
+            max_workers=args.parallel,
+            writers_per_device=args.writers_per_device,
+            progress=SyncProgress(on_update),
+            buffer_size=buffer_size,
+            throttle=throttle,
+            delta=delta,
+        )
+        return orchestrator.run_sync([Path(folder) for folder in source_folders])
+
+
+def sync_folders_snapshot(
+    store: SnapshotStore,
+    source_folders: list[str],
+    profiler: StageProfiler,
+    buffer_size: int = DEFAULT_BUFFER_SIZE,
+    throttle: Optional[Throttle] = None,
+    local_cache: Optional[LocalSnapshotCache] = None,
+    exclusions: Optional[ExclusionConfig] = None,
+) -> list[FolderSyncResult]:
+    """
+    Backs up the source folders into a new dated snapshot.
+
+    Args:
+        store: The snapshot store on the backup drive.
+        source_folders: Folders from the config file.
+        profiler: Profiler for the sync stage.
+        buffer_size: Copy buffer size where no in-kernel copy is possible.
+        throttle: Optional bandwidth and file rate limit.
+        local_cache: Optional snapshot cache for listing the source folders.
+        exclusions: Optional exclusion patterns of the source folders.
+
+    Returns:
+        One result per folder.
+    """
+    logger = logging.getLogger(__name__)
+
+    def sync_callback(current: int, total: int, filename: str, error: Optional[str] = None) -> None:
+        if error:
+            tqdm.write(f"  [ERROR] {filename}: {error}")
+        else:
+            tqdm.write(f"  [OK] {filename} ({current}/{total})")
+
+    run = store.begin()
+    logger.info(f"Creating snapshot {run.path}...")
+    results = []
+    for local_path_str in source_folders:
+        local_path = Path(local_path_str)
+        if not local_path.is_dir():
+            logger.warning(f"Local path {local_path} does not exist. Skipping.")
+            results.append(FolderSyncResult(local_path, None, 0, "Not Found Locally"))
+            continue
+
+        logger.info(f"Processing {local_path}...")
+        with profiler.stage("sync"):
+            result = run.sync_folder(
+                local_path,
+                sync_callback,
+                buffer_size=buffer_size,
+                throttle=throttle,
+                local_cache=local_cache,
+                exclude=exclusions.for_folder(local_path) if exclusions else None,
+            )
+        inc("auto_sync.folders_synced")
+        status = f"{len(result.errors)} errors" if result.errors else "OK"
+        results.append(
+            FolderSyncResult(local_path, result.snapshot_path, len(result.copied), f"{status} ({result.linked} linked)")
+        )
+    run.commit()
+    return results
+
+
+def print_protocol(results: list[FolderSyncResult]) -> None:
+    """
+    Prints the summary table of a run.
+
+    Args:
+        results: One result per source folder.
+    """
+    print("\n" + "=" * 71)
+    print("BACKUP PROTOCOL")
+    print("=" * 71)
+    print(f"{'Local Folder':<35} | {'Synced':<8} | {'Renamed':<8} | {'Status'}")
+    print("-" * 71)
+    for result in results:
+        display_folder = str(result.local_path)
+        if len(display_folder) > 35:
+            display_folder = "..." + display_folder[-32:]
+        print(f"{display_folder:<35} | {result.synced:<8} | {result.renamed:<8} | {result.status}")
+    print("=" * 71)
+
+
+def run_auto_sync(args: argparse.Namespace, profiler: StageProfiler) -> None:
+    """
+    Scans the backup drive and syncs all configured source folders.
+
+    Args:
+        args: Parsed command line arguments.
+        profiler: Profiler for the scan, compare and sync stages.
+    """
     logger = logging.getLogger(__name__)
 
     # Load Config
     config = BackupConfig()
     if args.backup_path:
         config.backup_drive = Path(args.backup_path)
+    if args.config:
+        config.backup_config_path = Path(args.config)
 
     try:
         config.validate_backup_drive()
@@ -71,6 +332,20 @@ def main() -> None:
         logger.error(f"Backup drive validation failed: {e}")
         sys.exit(1)
 
+    # Command line limits override the configured ones
+    try:
+        throttle = get_throttle(
+            args.bandwidth_limit if args.bandwidth_limit is not None else config.throttle_bandwidth,
+            args.files_per_sec if args.files_per_sec is not None else config.throttle_files_per_sec,
+            args.throttle_schedule if args.throttle_schedule is not None else config.throttle_schedule,
+        )
+    except ValueError as e:
+        logger.error(f"Invalid throttle settings: {e}")
+        sys.exit(1)
+    if args.low_priority or config.low_io_priority:
+        # Before any thread pool is started, so all copy threads inherit it
+        lower_io_priority()
+
     # 1. Safety check: Verify drive label against existing index
     if config.index_path.exists() and not args.force:
         metadata = get_index_metadata(config.index_path)
@@ -84,83 +359,152 @@ def main() -> None:
                 logger.error("Bitte schließe das richtige Laufwerk an oder nutze --force zum Überschreiben des Index.")
                 sys.exit(1)
 
-    # 2. Scan backup
+    # 2. Scan backup, without the globally excluded files and the snapshot trees
+    exclusions = parse_exclusions(config.backup_config_path)
     logger.info(f"Scanning backup drive at {config.backup_drive}...")
     try:
-        scan_backup(config.backup_drive, config.index_path)
+        with profiler.stage("scan"):
+            scan_backup(
+                config.backup_drive,
+                config.index_path,
+                exclude=without_snapshots(config.snapshot_dir, exclusions.global_rules()),
+            )
     except Exception as e:
         logger.error(f"Error scanning backup drive: {e}")
         sys.exit(1)
 
     # 2. Load config
-    config_file = Path(args.config)
-    source_folders = parse_config(config_file)
+    source_folders = parse_config(config.backup_config_path)
     if not source_folders:
-        logger.warning(f"No source folders found in {args.config}. Please add folders under '## Source Folders' as a list.")
+        logger.warning(
+            f"No source folders found in {config.backup_config_path}. Please add folders under '## Source Folders' as a list."
+        )
         return
 
-    operations = BackupOperations(index_path=config.index_path)
-    results = []
+    local_cache = get_local_snapshot_cache(
+        config.local_cache_path, config.local_cache_trust_dir_mtime, config.local_cache_max_age_hours
+    )
+    operations = BackupOperations(
+        index_path=config.index_path,
+        local_cache=local_cache,
+        detect_renames=config.detect_renames,
+        verify_renames=config.verify_renames,
+        exclusions=exclusions,
+    )
+    buffer_size = config.copy_buffer_mb * 1024 * 1024
+    delta = get_delta_sync(
+        args.delta or config.delta_sync,
+        config.delta_min_size_mb,
+        config.delta_block_kb,
+        config.delta_cache_path,
+        config.delta_in_place,
+    )
 
     # 3. Process folders
-    for local_path_str in source_folders:
-        local_path = Path(local_path_str)
-        logger.info(f"Processing {local_path}...")
+    snapshot_mode = args.snapshot or config.snapshot_sync
+    if snapshot_mode:
+        store = SnapshotStore(config.backup_drive / config.snapshot_dir)
+        results = sync_folders_snapshot(store, source_folders, profiler, buffer_size, throttle, local_cache, exclusions)
+        store.prune(config.snapshot_keep)
+    elif args.parallel > 1:
+        results = sync_folders_parallel(operations, config.backup_drive, source_folders, args, buffer_size, throttle, delta)
+    else:
+        results = sync_folders_sequential(
+            operations, config.backup_drive, source_folders, profiler, buffer_size, throttle, delta
+        )
+    watched = [
+        WatchedFolder(r.local_path, r.target_root, exclusions.for_folder(r.local_path) or None)
+        for r in results
+        if r.target_root is not None
+    ]
+    if snapshot_mode and args.daemon:
+        # The daemon updates files in place, which would change files shared with older snapshots
+        logger.warning("--daemon is not supported for snapshot backups.")
+        watched = []
 
-        if not local_path.exists():
-            logger.warning(f"Local path {local_path} does not exist. Skipping.")
-            results.append((str(local_path), 0, "Not Found Locally"))
-            continue
+    # 4. Print protocol
+    print_protocol(results)
 
-        result = operations.find_and_compare(local_path)
+    # 5. Keep watching for changes
+    if args.daemon and watched:
+        daemon = SyncDaemon(
+            watched,
+            index_path=config.index_path,
+            debounce=args.debounce,
+            sync_interval=args.sync_interval,
+            index_merge_interval=args.index_merge_interval,
+            local_cache=local_cache,
+            force_polling=args.poll,
+            throttle=throttle,
+            delta=delta,
+        )
+        try:
+            daemon.run_forever()
+        except KeyboardInterrupt:
+            logger.info("Stopping daemon...")
+            daemon.stop()
 
-        if result.error:
-            logger.warning(f"Comparison error for {local_path}: {result.error}")
-            # If not found in index, we might want to default to creating a new one
-            if "No matching backup folder found" in result.error:
-                target_root = config.backup_drive / local_path.name
-                logger.info(f"Defaulting to new folder: {target_root}")
-                files_to_sync = sorted(list(get_folder_content(local_path)))
-            else:
-                results.append((str(local_path), 0, f"Error: {result.error}"))
-                continue
-        else:
-            target_root = result.backup_path  # type: ignore
-            files_to_sync = result.only_local
-
-        if files_to_sync and target_root:
-            logger.info(f"Syncing {len(files_to_sync)} files to {target_root}...")
-
-            def sync_callback(current: int, total: int, filename: str, error: Optional[str] = None) -> None:
-                if error:
-                    tqdm.write(f"  [ERROR] {filename}: {error}")
-                else:
-                    tqdm.write(f"  [OK] {filename}")
-                pbar.update(1)
-
-            with tqdm(total=len(files_to_sync), desc=f"Syncing {local_path.name}", unit="file") as pbar:
-                synced, errors = sync_files(files_to_sync, local_path, target_root, callback=sync_callback)
-
-            status = "OK"
-            if errors:
-                status = f"{len(errors)} errors"
-            results.append((str(local_path), len(synced), status))
-        else:
-            logger.info("Everything up to date.")
-            results.append((str(local_path), 0, "Up to date"))
 
-    # 4. Print protocol
-    print("\n" + "=" * 60)
-    print("BACKUP PROTOCOL")
-    print("=" * 60)
-    print(f"{'Local Folder':<35} | {'Synced':<8} | {'Status'}")
-    print("-" * 60)
-    for folder, count, status in results:
-        display_folder = folder
-        if len(display_folder) > 35:
-            display_folder = "..." + display_folder[-32:]
-        print(f"{display_folder:<35} | {count:<8} | {status}")
-    print("=" * 60)
+def main() -> None:
+    """Main entry point for the auto_sync script."""
+    parser = argparse.ArgumentParser(description="Auto Sync local folders to backup.")
+    parser.add_argument("--config", help="Path to backup config markdown file (default: the backup_config_path setting).")
+    parser.add_argument("--backup_path", help="Path to backup drive/folder root (overrides config).")
+    parser.add_argument("--force", action="store_true", help="Force indexing even if drive label mismatches existing index.")
+    parser.add_argument("--verbose", action="store_true", help="Enable verbose logging.")
+    parser.add_argument("--metrics_json", help="Write a JSON run report with per-stage timings to this file.")
+    parser.add_argument("--metrics_prom", help="Write metrics in Prometheus textfile format to this file.")
+    parser.add_argument("--profile", action="store_true", help="Profile the scan, compare and sync stages.")
+    parser.add_argument("--profile_dir", help="Directory for profiling results (default: data/profiles/<timestamp>).")
+    parser.add_argument(
+        "--parallel", type=int, default=1, help="Number of source folders to process concurrently (default: 1)."
+    )
+    parser.add_argument(
+        "--writers_per_device",
+        type=int,
+        default=DEFAULT_WRITERS_PER_DEVICE,
+        help="Concurrent copies per target disk with --parallel.",
+    )
+    parser.add_argument("--bandwidth_limit", help="Maximum copy bandwidth, e.g. '20M' (default: unlimited).")
+    parser.add_argument("--files_per_sec", type=float, help="Maximum number of copied files per second.")
+    parser.add_argument(
+        "--throttle_schedule", help="Time-of-day limits, e.g. '08:00-18:00=20M; 18:00-08:00=0' (0: unlimited)."
+    )
+    parser.add_argument("--low_priority", action="store_true", help="Run with low CPU and I/O priority (Linux).")
+    parser.add_argument(
+        "--delta", action="store_true", help="Only write changed blocks of large files that are already backed up."
+    )
+    parser.add_argument(
+        "--snapshot", action="store_true", help="Create a dated snapshot with hardlinks instead of updating a mirror."
+    )
+    parser.add_argument("--daemon", action="store_true", help="Keep running and sync changed files continuously.")
+    parser.add_argument(
+        "--debounce", type=float, default=DEFAULT_DEBOUNCE, help="Seconds a file must be unchanged before syncing."
+    )
+    parser.add_argument(
+        "--sync_interval", type=float, default=DEFAULT_SYNC_INTERVAL, help="Seconds between sync batches in daemon mode."
+    )
+    parser.add_argument(
+        "--index_merge_interval",
+        type=float,
+        default=DEFAULT_INDEX_MERGE_INTERVAL,
+        help="Seconds between merges of the journaled changes into the backup index in daemon mode.",
+    )
+    parser.add_argument("--poll", action="store_true", help="Poll for changes instead of using file system events.")
+    args = parser.parse_args()
+
+    # Setup logging
+    log_level = logging.DEBUG if args.verbose else logging.INFO
+    setup_logging(level=log_level)
+
+    profiler = StageProfiler(enabled=args.profile, output_dir=args.profile_dir)
+    try:
+        with timer("auto_sync.total"):
+            run_auto_sync(args, profiler)
+    finally:
+        # Also written for failed runs, so slow or broken nights can be diagnosed
+        write_metrics_report(args.metrics_json, args.metrics_prom)
+        profiler.finish()
 
 
 if __name__ == "__main__":
@@ -11,28 +11,29 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from tqdm import tqdm
 
+from semantic_backup_explorer.catalog.drive_catalog import DriveCatalog
 from semantic_backup_explorer.chunking.folder_chunker import chunk_markdown
 from semantic_backup_explorer.indexer.scan_backup import scan_backup
 from semantic_backup_explorer.rag.embedder import Embedder
 from semantic_backup_explorer.rag.retriever import Retriever
+from semantic_backup_explorer.sync.snapshot import without_snapshots
 from semantic_backup_explorer.utils.compatibility import check_python_version
-from semantic_backup_explorer.utils.config import BackupConfig
+from semantic_backup_explorer.utils.config import BackupConfig, parse_exclusions
+from semantic_backup_explorer.utils.index_utils import record_embeddings_source
 from semantic_backup_explorer.utils.logging_utils import setup_logging
+from semantic_backup_explorer.utils.profiling import StageProfiler
 
 check_python_version()
 
 
-def main() -> None:
-    """Main entry point for the build_index script."""
-    parser = argparse.ArgumentParser(description="Build semantic backup index.")
-    parser.add_argument("--path", help="Path to backup drive/folder (overrides config).")
-    parser.add_argument("--output", help="Path to output markdown index (overrides config).")
-    parser.add_argument("--verbose", action="store_true", help="Enable verbose logging.")
-    args = parser.parse_args()
+def build_index(args: argparse.Namespace, profiler: StageProfiler) -> None:
+    """
+    Scans the backup drive, chunks the index and stores the embeddings.
 
-    # Setup logging
-    log_level = logging.DEBUG if args.verbose else logging.INFO
-    setup_logging(level=log_level)
+    Args:
+        args: Parsed command line arguments.
+        profiler: Profiler for the scan, chunk and embed stages.
+    """
     logger = logging.getLogger(__name__)
 
     # Load Config
@@ -41,25 +42,41 @@ def main() -> None:
         config.backup_drive = Path(args.path)
     if args.output:
         config.index_path = Path(args.output)
+    if args.config:
+        config.backup_config_path = Path(args.config)
 
-    # 1. Scan
+    # 1. Scan, without the globally excluded files and the snapshot trees
     logger.info(f"Scanning {config.backup_drive}...")
+    exclusions = parse_exclusions(config.backup_config_path)
+    exclude = without_snapshots(config.snapshot_dir, exclusions.global_rules())
     try:
-        scan_backup(config.backup_drive, config.index_path)
+        with profiler.stage("scan"):
+            if args.catalog:
+                entry = DriveCatalog(config.catalog_path).index_drive(config.backup_drive, exclude=exclude)
+                logger.info(f"Registered drive '{entry.key}' in catalog {config.catalog_path}")
+                config.index_path = entry.index_path
+                config.embeddings_path = entry.embeddings_path
+            else:
+                scan_backup(config.backup_drive, config.index_path, exclude=exclude)
     except Exception as e:
         logger.error(f"Scanning failed: {e}")
         sys.exit(1)
 
     # 2. Chunk
     logger.info("Chunking index...")
-    chunks = chunk_markdown(config.index_path)
+    with profiler.stage("chunk"):
+        chunks = chunk_markdown(config.index_path)
     logger.info(f"Created {len(chunks)} chunks.")
 
     # 3. Embed and Store
     logger.info("Initializing embedder and retriever...")
     embedder = Embedder()
     retriever = Retriever(persist_directory=config.embeddings_path)
-    retriever.clear()
+    if args.incremental:
+        # Chunks are content-addressed: only changed chunks are embedded again
+        chunks = retriever.update_chunks(chunks)
+    else:
+        retriever.clear()
 
     logger.info("Generating embeddings and storing in ChromaDB...")
     texts = [c["content"] for c in chunks]
@@ -69,11 +86,46 @@ def main() -> None:
     for i in tqdm(range(0, len(texts), batch_size), desc="Building vector DB"):
         batch_texts = texts[i : i + batch_size]
         batch_chunks = chunks[i : i + batch_size]
-        batch_embeddings = embedder.embed_documents(batch_texts)
-        retriever.add_chunks(batch_chunks, batch_embeddings)
-
+        with profiler.stage("embed"):
+            batch_embeddings = embedder.embed_documents(batch_texts)
+        with profiler.stage("store"):
+            retriever.add_chunks(batch_chunks, batch_embeddings)
+    with profiler.stage("store"):
+        retriever.flush()
+
+    record_embeddings_source(config.index_path, config.embeddings_path)
     logger.info("Indexing complete!")
 
 
+def main() -> None:
+    """Main entry point for the build_index script."""
+    parser = argparse.ArgumentParser(description="Build semantic backup index.")
+    parser.add_argument("--path", help="Path to backup drive/folder (overrides config).")
+    parser.add_argument("--output", help="Path to output markdown index (overrides config).")
+    parser.add_argument(
+        "--config", help="Backup config markdown file with the exclusions (default: the backup_config_path setting)."
+    )
+    parser.add_argument(
+        "--catalog", action="store_true", help="Store index and embeddings in the multi-drive catalog (one entry per drive)."
+    )
+    parser.add_argument(
+        "--incremental", action="store_true", help="Only embed chunks that changed since the last build, keep the others."
+    )
+    parser.add_argument("--verbose", action="store_true", help="Enable verbose logging.")
+    parser.add_argument("--profile", action="store_true", help="Profile the scan, chunk and embed stages.")
+    parser.add_argument("--profile_dir", help="Directory for profiling results (default: data/profiles/<timestamp>).")
+    args = parser.parse_args()
+
+    # Setup logging
+    log_level = logging.DEBUG if args.verbose else logging.INFO
+    setup_logging(level=log_level)
+
+    profiler = StageProfiler(enabled=args.profile, output_dir=args.profile_dir)
+    try:
+        build_index(args, profiler)
+    finally:
+        profiler.finish()
+
+
 if __name__ == "__main__":
     main()
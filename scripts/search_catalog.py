@@ -0,0 +1,61 @@
+"""Script for finding files and folders across all cataloged backup drives."""
+
+import argparse
+import logging
+import os
+import sys
+
+# Add project root to sys.path to allow imports when running as a script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from semantic_backup_explorer.catalog.drive_catalog import CatalogSearchHit, DriveCatalog
+from semantic_backup_explorer.utils.config import BackupConfig
+from semantic_backup_explorer.utils.logging_utils import setup_logging
+
+
+def print_hits(hits: list[CatalogSearchHit]) -> None:
+    """
+    Prints search hits as a table.
+
+    Args:
+        hits: The merged search results.
+    """
+    print(f"{'Drive':<20} | {'Score':<5} | {'Path'}")
+    print("-" * 60)
+    for hit in hits:
+        drive = hit.label or hit.drive_key
+        print(f"{drive:<20} | {hit.score:<5.2f} | {hit.path}")
+
+
+def main() -> None:
+    """Main entry point for the search_catalog script."""
+    parser = argparse.ArgumentParser(description="Search all cataloged backup drives.")
+    parser.add_argument("query", help="File or folder name (fragment) to search for.")
+    parser.add_argument("--max_results", type=int, default=20, help="Maximum number of results.")
+    parser.add_argument("--semantic", action="store_true", help="Use the embedding stores instead of name matching.")
+    parser.add_argument("--verbose", action="store_true", help="Enable verbose logging.")
+    args = parser.parse_args()
+
+    setup_logging(level=logging.DEBUG if args.verbose else logging.WARNING)
+
+    config = BackupConfig()
+    catalog = DriveCatalog(config.catalog_path)
+    if not catalog.entries():
+        print(f"No drives in catalog {config.catalog_path}. Use 'build_index.py --catalog' first.")
+        sys.exit(1)
+
+    if args.semantic:
+        from semantic_backup_explorer.rag.embedder import Embedder
+
+        hits = catalog.semantic_search(Embedder().embed_query(args.query), n_results=args.max_results)
+    else:
+        hits = catalog.search(args.query, max_results=args.max_results)
+
+    if not hits:
+        print("No matches found.")
+        return
+    print_hits(hits)
+
+
+if __name__ == "__main__":
+    main()
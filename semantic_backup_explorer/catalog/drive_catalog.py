@@ -0,0 +1,325 @@
+"""Catalog of per-drive backup indexes with parallel cross-drive search."""
+
+import heapq
+import json
+import logging
+import os
+import re
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from semantic_backup_explorer.indexer.scan_backup import scan_backup
+from semantic_backup_explorer.utils.drive_utils import get_volume_label
+from semantic_backup_explorer.utils.exclusions import ExclusionRules
+from semantic_backup_explorer.utils.index_utils import iter_index_entries
+from semantic_backup_explorer.utils.path_utils import normalize_path
+
+logger = logging.getLogger(__name__)
+
+CATALOG_FILE = "catalog.json"
+
+
+@dataclass
+class CatalogEntry:
+    """A single backup drive registered in the catalog."""
+
+    key: str
+    root_path: Path
+    label: Optional[str]
+    index_path: Path
+    embeddings_path: Path
+    indexed_at: Optional[float] = None
+
+
+@dataclass
+class CatalogSearchHit:
+    """A search result from one of the catalog drives."""
+
+    drive_key: str
+    label: Optional[str]
+    path: str
+    is_dir: bool
+    score: float
+
+
+def make_drive_key(root_path: str | Path, label: Optional[str] = None) -> str:
+    """
+    Builds a filesystem-safe catalog key for a drive.
+
+    The volume label is preferred because drive letters and mount points change
+    between sessions, while the label identifies the physical drive.
+
+    Args:
+        root_path: Root path of the backup drive.
+        label: Optional volume label of the drive.
+
+    Returns:
+        The catalog key.
+    """
+    raw = label if label else normalize_path(root_path)
+    key = re.sub(r"[^A-Za-z0-9._-]+", "_", raw).strip("_")
+    return key or "root"
+
+
+def _score_name_match(path: str, query: str) -> float:
+    """
+    Scores how well an index path matches a lowercase search query.
+
+    Args:
+        path: The full path from the index.
+        query: The lowercase query string.
+
+    Returns:
+        A score between 0 (no match) and 1 (exact name match).
+    """
+    norm = path.replace("\\", "/").rstrip("/")
+    name = norm.rsplit("/", 1)[-1].lower()
+    if name == query:
+        return 1.0
+    if name.startswith(query):
+        return 0.8
+    if query in name:
+        return 0.6
+    if query in norm.lower():
+        return 0.3
+    return 0.0
+
+
+class DriveCatalog:
+    """
+    Keeps one structured index and embedding store per backup drive.
+
+    Every drive gets its own sub-directory below the catalog directory, so
+    rotating backup drives no longer overwrite each other's index.
+    """
+
+    def __init__(self, catalog_dir: str | Path = "data/catalog") -> None:
+        """
+        Initialize the catalog.
+
+        Args:
+            catalog_dir: Directory holding the catalog file and per-drive data.
+        """
+        self.catalog_dir = Path(catalog_dir)
+        self.catalog_file = self.catalog_dir / CATALOG_FILE
+        self._entries: dict[str, CatalogEntry] = {}
+        self._load()
+
+    def _load(self) -> None:
+        """Loads the catalog file if it exists."""
+        if not self.catalog_file.exists():
+            return
+        try:
+            with open(self.catalog_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read drive catalog {self.catalog_file}: {e}")
+            return
+
+        for raw in data.get("drives", []):
+            entry = CatalogEntry(
+                key=raw["key"],
+                root_path=Path(raw["root_path"]),
+                label=raw.get("label"),
+                index_path=Path(raw["index_path"]),
+                embeddings_path=Path(raw["embeddings_path"]),
+                indexed_at=raw.get("indexed_at"),
+            )
+            self._entries[entry.key] = entry
+
+    def save(self) -> None:
+        """Writes the catalog file atomically."""
+        self.catalog_dir.mkdir(parents=True, exist_ok=True)
+        drives: list[dict[str, Any]] = [
+            {
+                "key": e.key,
+                "root_path": str(e.root_path),
+                "label": e.label,
+                "index_path": str(e.index_path),
+                "embeddings_path": str(e.embeddings_path),
+                "indexed_at": e.indexed_at,
+            }
+            for e in self._entries.values()
+        ]
+        tmp_file = self.catalog_file.with_suffix(".json.tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump({"drives": drives}, f, indent=2)
+        os.replace(tmp_file, self.catalog_file)
+
+    def entries(self) -> list[CatalogEntry]:
+        """
+        Returns all registered drives, sorted by key.
+
+        Returns:
+            A list of catalog entries.
+        """
+        return [self._entries[k] for k in sorted(self._entries)]
+
+    def get(self, key: str) -> Optional[CatalogEntry]:
+        """
+        Looks up a drive by its catalog key.
+
+        Args:
+            key: The catalog key.
+
+        Returns:
+            The entry, or None if it is not registered.
+        """
+        return self._entries.get(key)
+
+    def register(self, root_path: str | Path, label: Optional[str] = None) -> CatalogEntry:
+        """
+        Registers a drive (or returns the existing entry for it).
+
+        Args:
+            root_path: Root path of the backup drive.
+            label: Optional volume label of the drive.
+
+        Returns:
+            The catalog entry for the drive.
+        """
+        key = make_drive_key(root_path, label)
+        entry = self._entries.get(key)
+        drive_dir = self.catalog_dir / key
+        if entry is None:
+            entry = CatalogEntry(
+                key=key,
+                root_path=Path(root_path),
+                label=label,
+                index_path=drive_dir / "backup_index.md",
+                embeddings_path=drive_dir / "embeddings",
+            )
+            self._entries[key] = entry
+        else:
+            # Same drive may be mounted somewhere else this time
+            entry.root_path = Path(root_path)
+        drive_dir.mkdir(parents=True, exist_ok=True)
+        self.save()
+        return entry
+
+    def remove(self, key: str, delete_data: bool = False) -> bool:
+        """
+        Removes a drive from the catalog.
+
+        Args:
+            key: The catalog key.
+            delete_data: Whether to delete the drive's index and embeddings as well.
+
+        Returns:
+            True if the drive was registered, False otherwise.
+        """
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        if delete_data:
+            shutil.rmtree(self.catalog_dir / key, ignore_errors=True)
+        self.save()
+        return True
+
+    def index_drive(
+        self,
+        root_path: str | Path,
+        callback: Optional[Callable[[int, str], None]] = None,
+        exclude: Optional[ExclusionRules] = None,
+    ) -> CatalogEntry:
+        """
+        Scans a connected backup drive into its own catalog entry.
+
+        Args:
+            root_path: Root path of the backup drive.
+            callback: Optional scan progress callback, see scan_backup.
+            exclude: Optional exclusion rules relative to the drive root, see scan_backup.
+
+        Returns:
+            The updated catalog entry.
+        """
+        root_path = Path(root_path).resolve()
+        label = get_volume_label(root_path)
+        entry = self.register(root_path, label)
+        scan_backup(root_path, entry.index_path, callback=callback, exclude=exclude)
+        entry.indexed_at = time.time()
+        self.save()
+        return entry
+
+    def _search_entry(self, entry: CatalogEntry, query: str, max_results: int) -> list[CatalogSearchHit]:
+        """Searches the index of a single drive for matching names."""
+        heap: list[tuple[float, str, bool]] = []
+        for path, is_dir, _ in iter_index_entries(entry.index_path):
+            score = _score_name_match(path, query)
+            if score <= 0.0:
+                continue
+            item = (score, path, is_dir)
+            if len(heap) < max_results:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+        return [CatalogSearchHit(entry.key, entry.label, path, is_dir, score) for score, path, is_dir in heap]
+
+    def search(self, query: str, max_results: int = 20, max_workers: Optional[int] = None) -> list[CatalogSearchHit]:
+        """
+        Searches all drive indexes concurrently for files and folders by name.
+
+        Args:
+            query: Name or path fragment to search for (case-insensitive).
+            max_results: Maximum number of merged results.
+            max_workers: Number of parallel index readers (default: one per drive).
+
+        Returns:
+            Hits from all drives, best matches first.
+        """
+        query = query.strip().lower()
+        entries = [e for e in self.entries() if e.index_path.exists()]
+        if not query or not entries:
+            return []
+
+        workers = max_workers or len(entries)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            per_drive = list(executor.map(lambda e: self._search_entry(e, query, max_results), entries))
+
+        hits = [hit for drive_hits in per_drive for hit in drive_hits]
+        hits.sort(key=lambda h: (-h.score, h.drive_key, h.path))
+        return hits[:max_results]
+
+    def semantic_search(
+        self, query_embedding: list[float], n_results: int = 5, max_workers: Optional[int] = None
+    ) -> list[CatalogSearchHit]:
+        """
+        Queries the embedding stores of all drives concurrently.
+
+        Args:
+            query_embedding: The embedding vector of the query.
+            n_results: Maximum number of merged results.
+            max_workers: Number of parallel queries (default: one per drive).
+
+        Returns:
+            Folder hits from all drives, closest matches first.
+
+        Raises:
+            ImportError: If chromadb is not installed.
+        """
+        from semantic_backup_explorer.rag.retriever import Retriever
+
+        entries = [e for e in self.entries() if e.embeddings_path.exists()]
+        if not entries:
+            return []
+
+        def query_entry(entry: CatalogEntry) -> list[CatalogSearchHit]:
+            results = Retriever(persist_directory=entry.embeddings_path).query(query_embedding, n_results=n_results)
+            metadatas = (results.get("metadatas") or [[]])[0]
+            distances = (results.get("distances") or [[]])[0]
+            return [
+                CatalogSearchHit(entry.key, entry.label, str(meta.get("folder", "")), True, 1.0 / (1.0 + float(dist)))
+                for meta, dist in zip(metadatas, distances, strict=False)
+            ]
+
+        workers = max_workers or len(entries)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            per_drive = list(executor.map(query_entry, entries))
+
+        hits = [hit for drive_hits in per_drive for hit in drive_hits]
+        hits.sort(key=lambda h: (-h.score, h.drive_key, h.path))
+        return hits[:n_results]
@@ -1,90 +1,179 @@
 """Module for chunking the markdown index into folder-based sections."""
 
-import re
+import mmap
+import os
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Any
+from typing import Any, Optional
 
+from semantic_backup_explorer.indexer.compact_index import is_compact_index
+from semantic_backup_explorer.utils.index_utils import iter_index_lines
+from semantic_backup_explorer.utils.metrics import timed
 
-def chunk_markdown(filepath: str | Path) -> list[dict[str, Any]]:
-    """
-    Parses a markdown index file and splits it into chunks based on folder headers (##).
-
-    Only folders until a depth of 4 (relative to the Root path) start a new chunk.
-    Subfolders deeper than 4 are added to the chunk of their nearest depth-4 ancestor.
+DEFAULT_MAX_DEPTH = 4
+# Smaller markdown indexes are chunked in-process; starting worker processes costs more
+PARALLEL_MIN_BYTES = 16 * 1024 * 1024
+# Several byte ranges per worker, so one range with huge folders does not stall the pool
+RANGES_PER_WORKER = 4
 
-    Args:
-        filepath: Path to the markdown index file.
-
-    Returns:
-        A list of chunk dictionaries, each containing 'folder', 'content', and 'metadata'.
-    """
-    filepath = Path(filepath)
-    if not filepath.exists():
-        return []
+# (folder, depth, content) of one "## " section
+Section = tuple[str, int, str]
 
-    with open(filepath, "r", encoding="utf-8") as f:
-        lines = f.readlines()
 
-    root_path = None
-    drive_label = None
+def _parse_root(lines: Iterable[str]) -> tuple[Optional[Path], Optional[str]]:
+    """Returns the root path and drive label from the "Root: " line of an index."""
     for line in lines:
         if line.startswith("Root: "):
             content_after_root = line[6:].strip()
             # Handle "Root: J:\ (Label: MyBackup)"
             if " (Label: " in content_after_root:
                 root_part, label_part = content_after_root.split(" (Label: ", 1)
-                root_path = Path(root_part.strip())
-                drive_label = label_part.rstrip(")").strip()
-            else:
-                root_path = Path(content_after_root)
-            break
+                return Path(root_part.strip()), label_part.rstrip(")").strip()
+            return Path(content_after_root), None
+    return None, None
 
-    if root_path is None:
-        return []
 
-    content = "".join(lines)
-    # Split by ## headers
-    raw_chunks = re.split(r"\n(?=## )", content)
+def _iter_raw_sections(lines: Iterable[str]) -> Iterator[str]:
+    """Groups index lines into the text before the first header and one text per "## " header."""
+    current: list[str] = []
+    for line in lines:
+        if line.startswith("## ") and current:
+            yield "".join(current)
+            current = []
+        current.append(line)
+    if current:
+        yield "".join(current)
 
-    chunks: list[dict[str, Any]] = []
-    for rc in raw_chunks:
-        rc = rc.strip()
-        if not rc.startswith("## "):
-            continue
 
-        # Extract folder path from header
-        rc_lines = rc.split("\n")
-        header = rc_lines[0]
-        folder_path_str = header[3:].strip()
-        folder_path = Path(folder_path_str)
+def _depth(folder: str, root: str) -> int:
+    """
+    Counts the path components of folder below root (0 if it is not below root).
 
+    Same result as len(Path(folder).relative_to(root).parts) for normalized
+    paths, but by comparing strings and counting separators.
+    """
+    folder_key = os.path.normcase(folder)
+    root_key = os.path.normcase(root)
+    if root_key == os.curdir:
+        # Every relative path is below ".", which has no components itself
         try:
-            relative_path = folder_path.relative_to(root_path)
-            depth = len(relative_path.parts)
+            return len(Path(folder).relative_to(root).parts)
         except ValueError:
-            # folder_path is not under root_path
-            depth = 0
-
-        chunk_content = rc
-        if drive_label:
-            chunk_content = f"Backup Drive: {drive_label}\n{chunk_content}"
-
-        if depth <= 4 or not chunks:
-            chunks.append(
-                {
-                    "folder": str(folder_path),
-                    "content": chunk_content,
-                    "metadata": {"source": str(filepath), "folder": str(folder_path), "depth": depth},
-                }
-            )
-        else:
-            # Append to last chunk
-            current_content = str(chunks[-1]["content"])
-            chunks[-1]["content"] = current_content + "\n\n" + chunk_content
+            return 0
+    if folder_key == root_key:
+        return 0
+    prefix = root_key if root_key.endswith(os.sep) else root_key + os.sep
+    if not folder_key.startswith(prefix):
+        return 0
+    return folder_key.count(os.sep, len(prefix)) + 1
+
+
+def _parse_sections(lines: Iterable[str], root: str, drive_label: Optional[str]) -> list[Section]:
+    """Parses the "## " sections of some index lines into (folder, depth, content)."""
+    sections: list[Section] = []
+    for raw in _iter_raw_sections(lines):
+        rc = raw.strip()
+        if not rc.startswith("## "):
+            continue
 
+        # Extract folder path from header
+        header = rc.split("\n", 1)[0]
+        folder = str(Path(header[3:].strip()))
+        content = f"Backup Drive: {drive_label}\n{rc}" if drive_label else rc
+        sections.append((folder, _depth(folder, root), content))
+    return sections
+
+
+def _chunk_range(task: tuple[str, int, int, str, Optional[str]]) -> list[Section]:
+    """Parses the sections in a byte range of a markdown index (runs in a worker process)."""
+    path, start, end, root, drive_label = task
+    with open(path, "rb") as f:
+        f.seek(start)
+        text = f.read(end - start).decode("utf-8")
+    if "\r" in text:
+        # Same newline translation as reading the file in text mode
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    lines = [line + "\n" for line in text.split("\n")]
+    # The last piece has no newline of its own (empty if the range ends with one)
+    lines[-1] = lines[-1][:-1]
+    return _parse_sections(lines, root, drive_label)
+
+
+def _split_ranges(path: Path, count: int) -> list[tuple[int, int]]:
+    """Splits a markdown index into up to count byte ranges that each start at a line or a "## " header."""
+    size = path.stat().st_size
+    bounds = [0]
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for i in range(1, count):
+            pos = mm.find(b"\n## ", max(size * i // count, bounds[-1]))
+            if pos == -1:
+                break
+            if pos + 1 > bounds[-1]:
+                bounds.append(pos + 1)
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:], strict=True))
+
+
+def _build_chunks(sections: Iterable[Section], source: str, max_depth: int) -> list[dict[str, Any]]:
+    """Groups the sections into chunks; deeper sections are appended to the chunk before them."""
+    chunks: list[dict[str, Any]] = []
+    contents: list[list[str]] = []
+    for folder, depth, content in sections:
+        if depth <= max_depth or not chunks:
+            chunks.append({"folder": folder, "content": "", "metadata": {"source": source, "folder": folder, "depth": depth}})
+            contents.append([content])
+        else:
+            contents[-1].append(content)
+    for chunk, parts in zip(chunks, contents, strict=True):
+        chunk["content"] = "\n\n".join(parts)
     return chunks
 
 
+@timed("chunk_markdown")
+def chunk_markdown(
+    filepath: str | Path, max_depth: int = DEFAULT_MAX_DEPTH, workers: Optional[int] = None
+) -> list[dict[str, Any]]:
+    """
+    Parses a markdown index file and splits it into chunks based on folder headers (##).
+
+    Only folders until a depth of max_depth (relative to the Root path) start a new chunk.
+    Deeper subfolders are added to the chunk of their nearest ancestor at that depth.
+
+    Markdown indexes of at least PARALLEL_MIN_BYTES are split into byte ranges
+    at header boundaries, which are parsed in a process pool; the result is
+    the same as parsing the file in one go.
+
+    Args:
+        filepath: Path to the markdown (or compact) index file.
+        max_depth: Deepest folder level that still gets its own chunk.
+        workers: Number of worker processes for large indexes (default: CPU count; 1 disables them).
+
+    Returns:
+        A list of chunk dictionaries, each containing 'folder', 'content', and 'metadata'.
+    """
+    filepath = Path(filepath)
+    if not filepath.exists():
+        return []
+
+    root_path, drive_label = _parse_root(iter_index_lines(filepath))
+    if root_path is None:
+        return []
+    root = str(root_path)
+
+    workers = workers or os.cpu_count() or 1
+    sections: Iterable[Section]
+    if workers > 1 and not is_compact_index(filepath) and filepath.stat().st_size >= PARALLEL_MIN_BYTES:
+        ranges = _split_ranges(filepath, workers * RANGES_PER_WORKER)
+        tasks = [(str(filepath), start, end, root, drive_label) for start, end in ranges]
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            sections = [section for part in pool.map(_chunk_range, tasks) for section in part]
+    else:
+        sections = _parse_sections(iter_index_lines(filepath), root, drive_label)
+
+    return _build_chunks(sections, str(filepath), max_depth)
+
+
 if __name__ == "__main__":
     import json
     import sys
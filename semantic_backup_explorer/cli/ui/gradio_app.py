@@ -8,22 +8,33 @@ from typing import Any, NamedTuple, Optional
 import gradio as gr
 
 from semantic_backup_explorer.chunking.folder_chunker import chunk_markdown
+from semantic_backup_explorer.compare.local_snapshot import get_local_snapshot_cache
 from semantic_backup_explorer.core.backup_operations import BackupOperations
 from semantic_backup_explorer.indexer.scan_backup import scan_backup
 from semantic_backup_explorer.rag.embedder import Embedder
 from semantic_backup_explorer.rag.rag_pipeline import RAGPipeline
 from semantic_backup_explorer.rag.retriever import Retriever
-from semantic_backup_explorer.sync.sync_missing import sync_files
+from semantic_backup_explorer.sync.snapshot import without_snapshots
+from semantic_backup_explorer.sync.sync_missing import rename_files, sync_files
 from semantic_backup_explorer.utils.compatibility import check_python_version
-from semantic_backup_explorer.utils.config import BackupConfig
-from semantic_backup_explorer.utils.index_utils import get_index_metadata
+from semantic_backup_explorer.utils.config import BackupConfig, parse_exclusions
+from semantic_backup_explorer.utils.index_browser import IndexBrowser
+from semantic_backup_explorer.utils.index_utils import (
+    embeddings_are_stale,
+    get_index_metadata,
+    record_embeddings_source,
+)
 
 check_python_version()
 
 logger = logging.getLogger(__name__)
 
+# Folders per page in the Index Viewer
+INDEX_PAGE_SIZE = 100
+
 # Initialize Config
 config = BackupConfig()
+exclusions = parse_exclusions(config.backup_config_path)
 
 # Initialize RAG Pipeline
 pipeline: Optional["RAGPipeline"] = None
@@ -34,7 +45,20 @@ except Exception as e:
     pipeline = None
 
 # Initialize Backup Operations
-operations = BackupOperations(index_path=config.index_path, rag_pipeline=pipeline)
+local_cache = get_local_snapshot_cache(
+    config.local_cache_path, config.local_cache_trust_dir_mtime, config.local_cache_max_age_hours
+)
+operations = BackupOperations(
+    index_path=config.index_path,
+    rag_pipeline=pipeline,
+    local_cache=local_cache,
+    detect_renames=config.detect_renames,
+    verify_renames=config.verify_renames,
+    exclusions=exclusions,
+)
+
+# Separates old and new path of a moved file in the list of files to sync
+RENAME_SEPARATOR = " -> "
 
 
 def select_folder() -> str:
@@ -85,12 +109,17 @@ def get_index_status_html() -> str:
 
     date_str = metadata.mtime.strftime("%d.%m.%Y %H:%M") if metadata.mtime else "Unbekannt"
     label_str = f" (Label: {metadata.label})" if metadata.label else ""
+    counts_str = ""
+    if metadata.file_count is not None and metadata.total_bytes is not None:
+        counts_str = (
+            f"<br>Inhalt: {metadata.file_count} Dateien, {metadata.dir_count} Ordner, {metadata.total_bytes / 1024**3:.1f} GB"
+        )
 
     html = f"""
     <div style='background-color: #d1ecf1; color: #0c5460; padding: 15px; border-radius: 5px; border: 1px solid #bee5eb;'>
         <b>Gelesener Backup-Index (backup_index.md)</b><br>
         Laufwerk: <code>{metadata.root_path}</code>{label_str}<br>
-        Erstellt am: {date_str} ({metadata.age_days} Tage alt)
+        Erstellt am: {date_str} ({metadata.age_days} Tage alt){counts_str}
     </div>
     """
 
@@ -120,9 +149,13 @@ def folder_compare(local_path_str: str) -> ComparisonUIResult:
     metadata = get_index_metadata(config.index_path)
     label_info = f" (Label: {metadata.label})" if metadata.label else ""
 
+    status = f"✅ Gefundenes Backup im Index{label_info}: {result.backup_path}"
+    if result.renamed:
+        status += f"\n{len(result.renamed)} verschobene Dateien werden im Backup umbenannt statt kopiert."
+    renamed_lines = [f"{old}{RENAME_SEPARATOR}{new}" for old, new in result.renamed]
     return ComparisonUIResult(
-        status=f"✅ Gefundenes Backup im Index{label_info}: {result.backup_path}",
-        only_local="\n".join(result.only_local),
+        status=status,
+        only_local="\n".join(renamed_lines + result.only_local),
         only_backup="\n".join(result.only_backup),
         in_both="\n".join(result.in_both),
         target_root=str(result.backup_path),
@@ -139,10 +172,19 @@ def run_sync(only_local_text: str, local_root_str: str, target_root_str: str, pr
     if not target_root_str or not os.path.exists(target_root_str):
         return "Zielordner existiert nicht oder ist nicht angeschlossen."
 
-    files_to_sync = [f.strip() for f in only_local_text.split("\n") if f.strip()]
-    if not files_to_sync:
+    lines = [f.strip() for f in only_local_text.split("\n") if f.strip()]
+    renames = [line.split(RENAME_SEPARATOR, 1) for line in lines if RENAME_SEPARATOR in line]
+    files_to_sync = [line for line in lines if RENAME_SEPARATOR not in line]
+    if not files_to_sync and not renames:
         return "Keine Dateien zum Synchronisieren."
 
+    renamed: list[str] = []
+    if renames:
+        progress(0, desc=f"Benenne {len(renames)} verschobene Dateien um...")
+        renamed, rename_errors = rename_files([(old, new) for old, new in renames], target_root_str)
+        # Files that could not be moved are copied instead
+        files_to_sync += [rel_path for rel_path, _ in rename_errors]
+
     def sync_callback(current: int, total: int, filename: str, error: Optional[str] = None) -> None:
         if error:
             desc = f"⚠️ Fehler bei {filename}: {error}"
@@ -151,38 +193,93 @@ def run_sync(only_local_text: str, local_root_str: str, target_root_str: str, pr
             if current == 1 or current == total or current % 100 == 0:
                 desc += f" ({filename})"
         progress(current / total, desc=desc)
+        files_done[0] = current
+
+    files_done = [0]
+
+    def byte_callback(filename: str, bytes_done: int, bytes_total: int, bytes_per_sec: float) -> None:
+        # Only large files get their own progress text, small ones finish between two updates
+        if bytes_done >= bytes_total:
+            return
+        fraction = (files_done[0] + bytes_done / bytes_total) / len(files_to_sync)
+        progress(
+            fraction,
+            desc=f"Kopiere {filename}: {bytes_done / 1024**3:.1f} von {bytes_total / 1024**3:.1f} GB "
+            f"({bytes_per_sec / 1024**2:.0f} MB/s)",
+        )
 
-    synced, errors = sync_files(files_to_sync, local_root_str, target_root_str, callback=sync_callback)
+    synced, errors = sync_files(
+        files_to_sync,
+        local_root_str,
+        target_root_str,
+        callback=sync_callback,
+        byte_callback=byte_callback,
+        buffer_size=config.copy_buffer_mb * 1024 * 1024,
+    )
 
     msg = f"{len(synced)} Dateien erfolgreich kopiert."
+    if renamed:
+        msg += f"\n{len(renamed)} Dateien im Backup umbenannt."
     if errors:
         msg += f"\nFehler bei {len(errors)} Dateien."
     return msg
 
 
-def get_index_viewer() -> str:
-    """Reads the backup index file for viewing."""
-    if config.index_path.exists():
-        with open(config.index_path, "r", encoding="utf-8") as f:
-            return f.read()
-    return "Kein Index gefunden. Bitte oben den Pfad angeben und auf 'Index erstellen' klicken."
+def browse_index(query: str, page: float) -> tuple[dict[str, Any], str, int]:
+    """Lists one page of folders of the backup index, filtered by a path substring."""
+    if not config.index_path.exists():
+        return (
+            gr.update(choices=[], value=None),
+            "Kein Index gefunden. Bitte oben den Pfad angeben und auf 'Index erstellen' klicken.",
+            1,
+        )
+
+    page_no = max(int(page or 1), 1) - 1
+    result = IndexBrowser(config.index_path).list_folders(query or "", page=page_no, page_size=INDEX_PAGE_SIZE)
+    if not result.total:
+        return gr.update(choices=[], value=None), "Keine passenden Ordner gefunden.", 1
+
+    info = f"Seite {result.page + 1} von {result.page_count} ({result.total} Ordner)"
+    return gr.update(choices=result.folders, value=result.folders[0]), info, result.page + 1
+
+
+def browse_index_previous(query: str, page: float) -> tuple[dict[str, Any], str, int]:
+    """Shows the previous page of folders."""
+    return browse_index(query, (page or 1) - 1)
 
 
-def create_index(backup_path: str, progress: gr.Progress = gr.Progress()) -> tuple[str, str]:
+def browse_index_next(query: str, page: float) -> tuple[dict[str, Any], str, int]:
+    """Shows the next page of folders."""
+    return browse_index(query, (page or 1) + 1)
+
+
+def show_index_section(folder: Optional[str]) -> str:
+    """Reads the index section of a single folder."""
+    if not folder:
+        return ""
+    return IndexBrowser(config.index_path).read_section(folder)
+
+
+def create_index(backup_path: str, progress: gr.Progress = gr.Progress()) -> str:
     """Creates a new backup index."""
     if not backup_path or not os.path.exists(backup_path):
-        return "Ungültiger Pfad.", get_index_viewer()
+        return "Ungültiger Pfad."
 
     def scan_callback(count: int, current_folder: str) -> None:
         if count == 1 or count % 100 == 0:
             progress(None, desc=f"Gelesene Ordner: {count}... Aktuell: {current_folder}")
 
     try:
-        scan_backup(backup_path, output_file=config.index_path, callback=scan_callback)
-        return "Index erfolgreich erstellt.", get_index_viewer()
+        scan_backup(
+            backup_path,
+            output_file=config.index_path,
+            callback=scan_callback,
+            exclude=without_snapshots(config.snapshot_dir, exclusions.global_rules()),
+        )
+        return "Index erfolgreich erstellt."
     except Exception as e:
         logger.exception("Error during indexing")
-        return f"Fehler beim Erstellen des Index: {e}", get_index_viewer()
+        return f"Fehler beim Erstellen des Index: {e}"
 
 
 def check_embeddings_staleness() -> tuple[dict[str, Any], dict[str, Any]]:
@@ -195,7 +292,7 @@ def check_embeddings_staleness() -> tuple[dict[str, Any], dict[str, Any]]:
     if not embeddings_file.exists():
         return gr.update(value="⚠️ Embeddings fehlen. Bitte erstellen.", visible=True), gr.update(visible=True)
 
-    if embeddings_file.stat().st_mtime < config.index_path.stat().st_mtime:
+    if embeddings_are_stale(config.index_path, config.embeddings_path):
         return gr.update(value="⚠️ Die Embeddings sind veraltet und müssen erneuert werden.", visible=True), gr.update(
             visible=True
         )
@@ -205,6 +302,7 @@ def check_embeddings_staleness() -> tuple[dict[str, Any], dict[str, Any]]:
 
 def run_rebuild_embeddings(progress: gr.Progress = gr.Progress()) -> str:
     """Rebuilds the vector database from the current index."""
+    global pipeline, operations
     if not config.index_path.exists():
         return "Kein Index gefunden."
 
@@ -215,7 +313,8 @@ def run_rebuild_embeddings(progress: gr.Progress = gr.Progress()) -> str:
             return "Keine Chunks im Index gefunden."
 
         progress(0.1, desc="Initialisiere Embedder...")
-        embedder = Embedder()
+        # Reuse the pipeline's model instead of loading a second one
+        embedder = pipeline.embedder if pipeline is not None else Embedder()
         retriever = Retriever(persist_directory=config.embeddings_path)
         retriever.clear()
 
@@ -232,14 +331,22 @@ def run_rebuild_embeddings(progress: gr.Progress = gr.Progress()) -> str:
             batch_chunks = chunks[i : i + batch_size]
             batch_embeddings = embedder.embed_documents(batch_texts)
             retriever.add_chunks(batch_chunks, batch_embeddings)
+        retriever.flush()
 
+        record_embeddings_source(config.index_path, config.embeddings_path)
         progress(1.0, desc="Fertig!")
 
         # Re-initialize the pipeline and operations
-        global pipeline, operations
         try:
             pipeline = RAGPipeline()
-            operations = BackupOperations(index_path=config.index_path, rag_pipeline=pipeline)
+            operations = BackupOperations(
+                index_path=config.index_path,
+                rag_pipeline=pipeline,
+                local_cache=local_cache,
+                detect_renames=config.detect_renames,
+                verify_renames=config.verify_renames,
+                exclusions=exclusions,
+            )
         except Exception:
             pass
 
@@ -348,18 +455,35 @@ with gr.Blocks(title="Semantic Backup Explorer", theme=gr.themes.Soft()) as demo
 
         index_status = gr.Textbox(label="Status")
         with gr.Row():
-            refresh_button = gr.Button("🔄 Ansicht aktualisieren")
+            index_filter = gr.Textbox(
+                label="Ordner filtern",
+                placeholder="z.B. Steuer oder Fotos/2021",
+                info="Zeigt nur Ordner, deren Pfad diesen Text enthält.",
+                scale=4,
+            )
+            refresh_button = gr.Button("🔄 Ansicht aktualisieren", scale=1)
+        with gr.Row():
+            previous_page_button = gr.Button("◀ Zurück", scale=1)
+            index_page = gr.Number(value=1, precision=0, label="Seite", scale=1)
+            next_page_button = gr.Button("Weiter ▶", scale=1)
+        index_page_info = gr.Markdown()
+        index_folder = gr.Dropdown(label="Ordner", choices=[], interactive=True)
         index_content = gr.Textbox(
-            label="Inhalt von backup_index.md",
+            label="Inhalt des Ordners",
             lines=20,
-            value=get_index_viewer(),
-            info="Hier siehst du die aktuelle Liste aller indizierten Dateien und Ordner.",
+            info="Hier siehst du die indizierten Dateien und Unterordner des gewählten Ordners.",
         )
 
-        create_index_button.click(create_index, inputs=backup_path_display, outputs=[index_status, index_content]).then(
+        browse_outputs = [index_folder, index_page_info, index_page]
+        create_index_button.click(create_index, inputs=backup_path_display, outputs=index_status).then(
             get_index_status_html, outputs=index_info_box
-        )
-        refresh_button.click(get_index_viewer, inputs=[], outputs=index_content)
+        ).then(browse_index, inputs=[index_filter, index_page], outputs=browse_outputs)
+        refresh_button.click(browse_index, inputs=[index_filter, index_page], outputs=browse_outputs)
+        index_filter.submit(browse_index, inputs=[index_filter, gr.State(1)], outputs=browse_outputs)
+        index_page.submit(browse_index, inputs=[index_filter, index_page], outputs=browse_outputs)
+        previous_page_button.click(browse_index_previous, inputs=[index_filter, index_page], outputs=browse_outputs)
+        next_page_button.click(browse_index_next, inputs=[index_filter, index_page], outputs=browse_outputs)
+        index_folder.change(show_index_section, inputs=index_folder, outputs=index_content)
 
     with gr.Tab("📚 Semantic Search") as semantic_search_tab:
         gr.Markdown("### Durchsuche dein Backup mit natürlicher Sprache")
@@ -419,7 +543,7 @@ with gr.Blocks(title="Semantic Backup Explorer", theme=gr.themes.Soft()) as demo
 
     demo.load(check_embeddings_staleness, outputs=[embeddings_warning, rebuild_embeddings_button]).then(
         get_index_status_html, outputs=index_info_box
-    )
+    ).then(browse_index, inputs=[index_filter, index_page], outputs=browse_outputs)
 
 
 def main() -> None:
@@ -1,8 +1,20 @@
 """Module for comparing local folders with backup contents."""
 
+import hashlib
+import math
 import os
+from collections.abc import Mapping
+from dataclasses import dataclass
 from pathlib import Path
-from typing import TypedDict, Union
+from typing import Optional, TypedDict, Union
+
+import numpy as np
+
+from semantic_backup_explorer.compare.local_snapshot import LocalSnapshotCache
+from semantic_backup_explorer.compare.local_walk import DEFAULT_WALK_WORKERS, walk_folder
+from semantic_backup_explorer.utils.exclusions import ExclusionRules
+from semantic_backup_explorer.utils.file_table import UNKNOWN_SIZE, FileTable
+from semantic_backup_explorer.utils.metrics import inc, timed
 
 
 class FolderDiffResult(TypedDict):
@@ -11,35 +23,239 @@ class FolderDiffResult(TypedDict):
     only_local: list[str]
     only_backup: list[str]
     in_both: list[str]
+    # (path in the backup, new local path) of files that were moved or renamed locally
+    renamed: list[tuple[str, str]]
+
+
+@dataclass
+class TableDiff:
+    """Result of compare_tables, as row numbers into the compared tables."""
+
+    local: FileTable
+    backup: FileTable
+    # Rows of local: files missing in the backup or newer locally
+    only_local: np.ndarray
+    # Rows of backup: files missing locally
+    only_backup: np.ndarray
+    # Rows of local: files that are up to date in the backup
+    in_both: np.ndarray
+    renamed: list[tuple[str, str]]
+
+    def to_result(self) -> FolderDiffResult:
+        """
+        Converts the row numbers into sorted path lists.
+
+        Returns:
+            The same result as compare_folders.
+        """
+        return {
+            "only_local": sorted(self.local.paths(self.only_local)),
+            "only_backup": sorted(self.backup.paths(self.only_backup)),
+            "in_both": sorted(self.local.paths(self.in_both)),
+            "renamed": self.renamed,
+        }
+
+
+# Files whose local mtime is at most this much newer count as unchanged
+MTIME_EPSILON = 0.1
+# Largest mtime difference of a moved file and its backup copy (FAT stores mtimes in 2 s steps)
+RENAME_MTIME_TOLERANCE = 2.0
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+@timed("compare.local_walk")
+def get_folder_table(
+    folder_path: str | Path, workers: int = DEFAULT_WALK_WORKERS, exclude: Optional[ExclusionRules] = None
+) -> FileTable:
+    """
+    Returns the files of a folder with mtimes and sizes as a FileTable.
+
+    Args:
+        folder_path: Path to the folder to scan.
+        workers: Number of threads listing directories (see walk_folder).
+        exclude: Optional exclusion rules; excluded subtrees are not walked.
+
+    Returns:
+        The files with paths relative to folder_path.
+    """
+    columns = walk_folder(folder_path, workers=workers, exclude=exclude)
+    inc("compare.local_files", len(columns))
+    return FileTable.from_columns(columns.paths, columns.mtimes, columns.sizes)
 
 
-def get_folder_content(folder_path: str | Path) -> dict[str, float]:
+@timed("compare.local_walk")
+def get_folder_content(
+    folder_path: str | Path, workers: int = DEFAULT_WALK_WORKERS, exclude: Optional[ExclusionRules] = None
+) -> dict[str, float]:
     """
     Returns a dictionary of relative file paths and their modification times.
 
     Args:
         folder_path: Path to the folder to scan.
+        workers: Number of threads listing directories (see walk_folder).
+        exclude: Optional exclusion rules; excluded subtrees are not walked.
 
     Returns:
         Dictionary mapping relative file paths to their modification timestamps.
     """
-    folder_path = Path(folder_path)
-    if not folder_path.exists():
-        return {}
-
-    files: dict[str, float] = {}
-    for root, _, filenames in os.walk(folder_path):
-        for f in filenames:
-            full_path = Path(root) / f
-            rel_path = str(full_path.relative_to(folder_path))
-            try:
-                files[rel_path] = os.path.getmtime(full_path)
-            except Exception:
-                files[rel_path] = 0.0
+    files = walk_folder(folder_path, workers=workers, exclude=exclude).to_dict()
+    inc("compare.local_files", len(files))
     return files
 
 
-def compare_folders(local_path: str | Path, backup_files: Union[list[str], dict[str, float]]) -> FolderDiffResult:
+def _file_digest(path: Path) -> Optional[bytes]:
+    """Content hash of a file, or None if it cannot be read."""
+    digest = hashlib.blake2b(digest_size=16)
+    try:
+        with open(path, "rb") as f:
+            while chunk := f.read(HASH_CHUNK_SIZE):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.digest()
+
+
+@timed("compare.find_renames")
+def find_renames(
+    local_path: str | Path,
+    only_local: Mapping[str, float],
+    only_backup: Mapping[str, tuple[float, Optional[int]]],
+    backup_root: Optional[str | Path] = None,
+    local_sizes: Optional[Mapping[str, int]] = None,
+) -> list[tuple[str, str]]:
+    """
+    Pairs new local files with backup files that no longer exist locally.
+
+    A local file is considered the moved version of a backup file if both
+    have the same size and (within RENAME_MTIME_TOLERANCE) the same mtime;
+    moving or renaming a file changes neither. Backup files are grouped by
+    mtime first, so only local files with a candidate are stat'ed for their
+    size. Among several candidates, one with the same file name is preferred.
+
+    Args:
+        local_path: Root of the local folder.
+        only_local: Relative paths and mtimes of files missing in the backup.
+        only_backup: Relative paths and (mtime, size) of backup files missing
+            locally. Files without a recorded size are never matched.
+        backup_root: If given, the backup copies are read from this folder and
+            a pair is only accepted if the contents have the same hash.
+        local_sizes: Known sizes of local files, which then need no stat call.
+
+    Returns:
+        Sorted list of (backup path, local path) pairs.
+    """
+    local_path = Path(local_path)
+    buckets: dict[int, list[str]] = {}
+    for rel_path, (mtime, size) in only_backup.items():
+        if size is not None and not math.isnan(mtime):
+            buckets.setdefault(int(mtime // RENAME_MTIME_TOLERANCE), []).append(rel_path)
+    if not buckets:
+        return []
+
+    used: set[str] = set()
+    renames = []
+    for rel_path, mtime in only_local.items():
+        bucket = int(mtime // RENAME_MTIME_TOLERANCE)
+        candidates = [
+            backup_rel
+            for key in (bucket - 1, bucket, bucket + 1)
+            for backup_rel in buckets.get(key, [])
+            if backup_rel not in used and abs(only_backup[backup_rel][0] - mtime) <= RENAME_MTIME_TOLERANCE
+        ]
+        if not candidates:
+            continue
+        size = local_sizes.get(rel_path) if local_sizes is not None else None
+        if size is None:
+            try:
+                size = os.path.getsize(local_path / rel_path)
+            except OSError:
+                continue
+        name = os.path.basename(rel_path)
+        candidates = [c for c in candidates if only_backup[c][1] == size]
+        candidates.sort(key=lambda c: (os.path.basename(c) != name, c))
+        for backup_rel in candidates:
+            if backup_root is not None:
+                local_digest = _file_digest(local_path / rel_path)
+                if local_digest is None or local_digest != _file_digest(Path(backup_root) / backup_rel):
+                    continue
+            used.add(backup_rel)
+            renames.append((backup_rel, rel_path))
+            break
+    inc("compare.renames_detected", len(renames))
+    return sorted(renames)
+
+
+@timed("compare.compare_tables")
+def compare_tables(
+    local_path: str | Path,
+    local: FileTable,
+    backup: FileTable,
+    detect_renames: bool = False,
+    verify_root: Optional[str | Path] = None,
+) -> TableDiff:
+    """
+    Compares the files of a local folder with those of its backup.
+
+    Both tables are joined on their path ids in a single vectorized pass;
+    only the rename detection works on Python objects, and only for the
+    files that are missing on one side.
+
+    Args:
+        local_path: Path to the local folder (read for rename detection).
+        local: Files of the local folder.
+        backup: Files of the backup folder. Rows with unknown mtime are
+            never considered outdated.
+        detect_renames: Pair new local files with vanished backup files of the
+            same size and mtime (see find_renames).
+        verify_root: Backup folder used to confirm detected renames by content hash.
+
+    Returns:
+        The row numbers of each category and the detected renames.
+    """
+    local_rows, backup_rows = local.join(backup)
+    only_local = local.difference(backup)
+    matched = np.zeros(len(backup), dtype=bool)
+    matched[backup_rows] = True
+    only_backup = np.flatnonzero(~matched)
+
+    # NaN (unknown) backup mtimes compare as False, so these files count as up to date
+    newer = local.mtimes[local_rows] > backup.mtimes[backup_rows] + MTIME_EPSILON
+    in_both = local_rows[~newer]
+
+    renamed: list[tuple[str, str]] = []
+    if detect_renames and len(only_local) and len(only_backup) and (backup.sizes[only_backup] != UNKNOWN_SIZE).any():
+        local_candidates = dict(zip(local.paths(only_local), only_local.tolist(), strict=True))
+        backup_candidates = dict(zip(backup.paths(only_backup), only_backup.tolist(), strict=True))
+        renamed = find_renames(
+            local_path,
+            {path: float(local.mtimes[row]) for path, row in local_candidates.items()},
+            {
+                path: (float(backup.mtimes[row]), None if backup.sizes[row] == UNKNOWN_SIZE else int(backup.sizes[row]))
+                for path, row in backup_candidates.items()
+            },
+            backup_root=verify_root,
+            local_sizes={
+                path: int(local.sizes[row]) for path, row in local_candidates.items() if local.sizes[row] != UNKNOWN_SIZE
+            },
+        )
+        if renamed:
+            only_backup = np.setdiff1d(only_backup, [backup_candidates[old] for old, _ in renamed])
+            only_local = np.setdiff1d(only_local, [local_candidates[new] for _, new in renamed])
+
+    only_local = np.union1d(only_local, local_rows[newer])
+    return TableDiff(local, backup, only_local, only_backup, in_both, renamed)
+
+
+@timed("compare.compare_folders")
+def compare_folders(
+    local_path: str | Path,
+    backup_files: Union[list[str], dict[str, float], FileTable],
+    local_cache: Optional[LocalSnapshotCache] = None,
+    backup_sizes: Optional[Mapping[str, Optional[int]]] = None,
+    verify_root: Optional[str | Path] = None,
+    detect_renames: Optional[bool] = None,
+    exclude: Optional[ExclusionRules] = None,
+) -> FolderDiffResult:
     """
     Compares local folder content with backup files.
 
@@ -47,11 +263,26 @@ def compare_folders(local_path: str | Path, backup_files: Union[list[str], dict[
 
     Args:
         local_path: Path to the local folder.
-        backup_files: Either a list of relative paths or a dictionary mapping
-                     relative paths to modification timestamps.
+        backup_files: A list of relative paths, a dictionary mapping relative
+                     paths to modification timestamps, or a FileTable (see
+                     index_utils.get_file_table_from_index).
+        local_cache: Optional snapshot cache, so that unchanged local
+                     directories are not listed again.
+        backup_sizes: Optional sizes of the backup files (None where unknown)
+                     for a dictionary backup_files.
+        verify_root: Backup folder used to confirm detected renames by
+                     content hash (slow, reads both copies).
+        detect_renames: Detect moved and renamed files (see find_renames).
+                     By default enabled if backup sizes are given, either in
+                     backup_sizes or in a FileTable.
+        exclude: Optional exclusion rules, relative to the folder. Excluded
+                     local subtrees are not walked, and excluded backup files
+                     are not reported in 'only_backup'.
 
     Returns:
-        A TypedDict containing lists of files 'only_local', 'only_backup', and 'in_both'.
+        A TypedDict containing lists of files 'only_local', 'only_backup', and 'in_both',
+        and the detected renames as (backup path, local path) pairs in 'renamed'.
+        Renamed files are not listed in 'only_local' or 'only_backup'.
 
     Raises:
         FileNotFoundError: If local_path does not exist.
@@ -63,29 +294,20 @@ def compare_folders(local_path: str | Path, backup_files: Union[list[str], dict[
     if not local_path.is_dir():
         raise NotADirectoryError(f"Local path is not a directory: {local_path}")
 
-    local_files_dict = get_folder_content(local_path)
-    local_paths = set(local_files_dict.keys())
+    if local_cache is not None:
+        local = FileTable.from_dict(local_cache.get_folder_content(local_path, exclude=exclude))
+    else:
+        local = get_folder_table(local_path, exclude=exclude)
 
-    if isinstance(backup_files, dict):
-        backup_paths = set(backup_files.keys())
+    if isinstance(backup_files, FileTable):
+        backup = backup_files
+    elif isinstance(backup_files, dict):
+        backup = FileTable.from_dict(backup_files, backup_sizes)
     else:
-        backup_paths = set(backup_files)
-
-    only_local = local_paths - backup_paths
-    only_backup = backup_paths - local_paths
-    in_both = local_paths & backup_paths
-
-    # Check for newer files in local
-    newer_locally = set()
-    if isinstance(backup_files, dict):
-        for path in in_both:
-            local_mtime = local_files_dict.get(path, 0.0)
-            backup_mtime = backup_files.get(path, 0.0)
-            # Use a small epsilon for float comparison (0.1 seconds)
-            if local_mtime > backup_mtime + 0.1:
-                newer_locally.add(path)
-
-    only_local.update(newer_locally)
-    in_both = in_both - newer_locally
-
-    return {"only_local": sorted(list(only_local)), "only_backup": sorted(list(only_backup)), "in_both": sorted(list(in_both))}
+        backup = FileTable.from_columns(list(backup_files))
+    if exclude:
+        backup = backup.take(np.flatnonzero(~np.array(exclude.excluded_mask(backup.paths()), dtype=bool)))
+
+    if detect_renames is None:
+        detect_renames = backup_sizes is not None or isinstance(backup_files, FileTable)
+    return compare_tables(local_path, local, backup, detect_renames=detect_renames, verify_root=verify_root).to_result()
@@ -0,0 +1,238 @@
+"""Persistent per-directory snapshots of local source folders for fast re-comparison."""
+
+import hashlib
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+from semantic_backup_explorer.compare.local_walk import scan_directory
+from semantic_backup_explorer.utils.exclusions import ExclusionRules
+from semantic_backup_explorer.utils.metrics import inc, timed
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+# Directories modified this close to the snapshot time are re-listed next time,
+# since a change within the same mtime tick would go unnoticed
+RACY_WINDOW_NS = 2_000_000_000
+DEFAULT_MAX_AGE_HOURS = 24.0
+
+
+@dataclass
+class _DirSnapshot:
+    """Listing of a single directory at the time of the snapshot."""
+
+    mtime_ns: int
+    files: dict[str, float]
+    subdirs: list[str]
+    racy: bool = False
+
+
+@dataclass
+class SnapshotStats:
+    """How much work the last get_folder_content call could skip."""
+
+    dirs_reused: int = 0
+    dirs_listed: int = 0
+    files_stat: int = 0
+
+
+class LocalSnapshotCache:
+    """
+    Caches the content of local source folders between comparisons.
+
+    For every directory the snapshot stores its mtime, its file names with
+    their mtimes and its subdirectories. A directory's mtime changes whenever an
+    entry is added, removed or renamed in it, so unchanged directories do not
+    have to be listed again.
+
+    Editing a file in place does not change its directory's mtime, though. By
+    default the file mtimes of unchanged directories are therefore still read
+    (one stat per file, but no directory listings). With trust_dir_mtime the
+    cached file mtimes are used as well, which skips nearly all syscalls but
+    misses in-place edits until the directory changes or the snapshot is older
+    than max_age_hours, after which everything is verified again.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str | Path,
+        trust_dir_mtime: bool = False,
+        max_age_hours: float = DEFAULT_MAX_AGE_HOURS,
+    ) -> None:
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Directory for the snapshot files (one per source folder).
+            trust_dir_mtime: Reuse cached file mtimes of unchanged directories.
+            max_age_hours: Age after which a trusted snapshot is fully verified.
+        """
+        self.cache_dir = Path(cache_dir)
+        self.trust_dir_mtime = trust_dir_mtime
+        self.max_age_hours = max_age_hours
+        self.last_stats = SnapshotStats()
+
+    def snapshot_path(self, folder_path: str | Path) -> Path:
+        """
+        Returns the snapshot file of a source folder.
+
+        Args:
+            folder_path: The local source folder.
+
+        Returns:
+            Path of the JSON snapshot file.
+        """
+        key = hashlib.blake2b(str(Path(folder_path).resolve()).encode("utf-8"), digest_size=12).hexdigest()
+        return self.cache_dir / f"{key}.json"
+
+    def _load(self, folder_path: Path) -> tuple[dict[str, _DirSnapshot], float]:
+        """Loads the snapshot of folder_path (empty if missing or unusable)."""
+        try:
+            with open(self.snapshot_path(folder_path), "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != SNAPSHOT_VERSION or data.get("root") != str(folder_path):
+                return {}, 0.0
+            dirs = {
+                rel: _DirSnapshot(d["mtime_ns"], d["files"], d["subdirs"], d.get("racy", False))
+                for rel, d in data["dirs"].items()
+            }
+            return dirs, float(data.get("verified", 0.0))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            if not isinstance(e, FileNotFoundError):
+                logger.warning(f"Ignoring unreadable local snapshot for {folder_path}: {e}")
+            return {}, 0.0
+
+    def _save(self, folder_path: Path, dirs: dict[str, _DirSnapshot], verified: float) -> None:
+        """Writes the snapshot atomically."""
+        data: dict[str, Any] = {
+            "version": SNAPSHOT_VERSION,
+            "root": str(folder_path),
+            "verified": verified,
+            "dirs": {
+                rel: {"mtime_ns": d.mtime_ns, "files": d.files, "subdirs": d.subdirs, "racy": d.racy}
+                for rel, d in dirs.items()
+            },
+        }
+        path = self.snapshot_path(folder_path)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(path.name + ".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write local snapshot {path}: {e}")
+
+    def invalidate(self, folder_path: str | Path) -> None:
+        """
+        Deletes the snapshot of a source folder.
+
+        Args:
+            folder_path: The local source folder.
+        """
+        self.snapshot_path(folder_path).unlink(missing_ok=True)
+
+    @timed("compare.local_walk")
+    def get_folder_content(self, folder_path: str | Path, exclude: Optional[ExclusionRules] = None) -> dict[str, float]:
+        """
+        Returns the same mapping as folder_diff.get_folder_content, using the snapshot.
+
+        The snapshot keeps complete directory listings, so it stays valid when
+        the exclusion rules change; excluded subtrees are neither walked nor stored.
+
+        Args:
+            folder_path: Path to the folder to scan.
+            exclude: Optional exclusion rules, relative to folder_path.
+
+        Returns:
+            Dictionary mapping relative file paths to their modification timestamps.
+        """
+        folder_path = Path(folder_path).resolve()
+        if not folder_path.exists():
+            return {}
+
+        cached, verified = self._load(folder_path)
+        now = time.time()
+        trust = self.trust_dir_mtime and (now - verified) < self.max_age_hours * 3600
+        stats = SnapshotStats()
+        dirs: dict[str, _DirSnapshot] = {}
+        files: dict[str, float] = {}
+        now_ns = time.time_ns()
+
+        pending = [""]
+        while pending:
+            rel = pending.pop()
+            abs_dir = os.path.join(folder_path, rel) if rel else str(folder_path)
+            try:
+                mtime_ns = os.stat(abs_dir).st_mtime_ns
+            except OSError:
+                continue
+
+            previous = cached.get(rel)
+            if previous is not None and previous.mtime_ns == mtime_ns and not previous.racy:
+                stats.dirs_reused += 1
+                if trust:
+                    dir_files = previous.files
+                else:
+                    # Excluded files keep their cached mtime without a stat call
+                    dir_files = dict(previous.files)
+                    for name in previous.files:
+                        if exclude and exclude.matches(os.path.join(rel, name) if rel else name):
+                            continue
+                        try:
+                            dir_files[name] = os.path.getmtime(os.path.join(abs_dir, name))
+                        except Exception:
+                            dir_files[name] = 0.0
+                        stats.files_stat += 1
+                subdirs = previous.subdirs
+            else:
+                stats.dirs_listed += 1
+                dir_files, subdirs = _list_directory(abs_dir)
+                stats.files_stat += len(dir_files)
+
+            dirs[rel] = _DirSnapshot(mtime_ns, dir_files, subdirs, racy=now_ns - mtime_ns < RACY_WINDOW_NS)
+            for name, mtime in dir_files.items():
+                rel_path = os.path.join(rel, name) if rel else name
+                if not (exclude and exclude.matches(rel_path)):
+                    files[rel_path] = mtime
+            for d in reversed(subdirs):
+                rel_dir = os.path.join(rel, d) if rel else d
+                if not (exclude and exclude.matches(rel_dir, is_dir=True)):
+                    pending.append(rel_dir)
+
+        self._save(folder_path, dirs, verified if trust else now)
+        self.last_stats = stats
+        inc("compare.local_files", len(files))
+        inc("compare.snapshot.cache_hits", stats.dirs_reused)
+        inc("compare.snapshot.cache_misses", stats.dirs_listed)
+        return files
+
+
+def _list_directory(path: str) -> tuple[dict[str, float], list[str]]:
+    """Lists one directory like a single os.walk step (see local_walk.scan_directory)."""
+    columns, subdirs = scan_directory(path, "")
+    return columns.to_dict(), subdirs
+
+
+def get_local_snapshot_cache(
+    cache_dir: Optional[str | Path], trust_dir_mtime: bool = False, max_age_hours: float = DEFAULT_MAX_AGE_HOURS
+) -> Optional[LocalSnapshotCache]:
+    """
+    Creates a snapshot cache, or None if caching is disabled.
+
+    Args:
+        cache_dir: Snapshot directory (None or empty disables the cache).
+        trust_dir_mtime: Reuse cached file mtimes of unchanged directories.
+        max_age_hours: Age after which a trusted snapshot is fully verified.
+
+    Returns:
+        The cache or None.
+    """
+    if not cache_dir or not str(cache_dir).strip():
+        return None
+    return LocalSnapshotCache(cache_dir, trust_dir_mtime=trust_dir_mtime, max_age_hours=max_age_hours)
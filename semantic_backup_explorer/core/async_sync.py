@@ -0,0 +1,283 @@
+"""Concurrent sync of several source folders with per-device limits."""
+
+import asyncio
+import functools
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Optional
+
+from semantic_backup_explorer.core.backup_operations import BackupOperations, SyncPlan
+from semantic_backup_explorer.sync.copy_engine import DEFAULT_BUFFER_SIZE
+from semantic_backup_explorer.sync.delta import DeltaSync
+from semantic_backup_explorer.sync.sync_missing import SyncProgressCallback, rename_files, sync_files
+from semantic_backup_explorer.sync.throttle import Throttle
+from semantic_backup_explorer.utils.metrics import inc, set_gauge
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_WALKERS_PER_DEVICE = 2
+DEFAULT_WRITERS_PER_DEVICE = 1
+
+
+@dataclass
+class FolderSyncResult:
+    """Outcome of syncing one source folder (one row of the backup protocol)."""
+
+    local_path: Path
+    target_root: Optional[Path]
+    synced: int
+    status: str
+    renamed: int = 0
+
+
+def device_key(path: str | Path) -> Optional[int]:
+    """
+    Returns the device id of the file system that contains (or will contain) path.
+
+    Args:
+        path: A path, which does not have to exist yet.
+
+    Returns:
+        The st_dev of the nearest existing ancestor, or None if none is accessible.
+    """
+    current = Path(path).absolute()
+    while True:
+        try:
+            return os.stat(current).st_dev
+        except OSError:
+            if current.parent == current:
+                return None
+            current = current.parent
+
+
+class DeviceLimiter:
+    """
+    Limits the number of concurrent operations per device.
+
+    Copying two folders to the same disk in parallel makes a spinning disk seek
+    back and forth and is slower than copying them one after another, while
+    different disks can be busy at the same time.
+    """
+
+    def __init__(self, per_device: int) -> None:
+        """
+        Initialize the limiter.
+
+        Args:
+            per_device: Maximum concurrent operations on one device.
+        """
+        self.per_device = max(1, per_device)
+        self._semaphores: dict[Optional[int], asyncio.Semaphore] = {}
+
+    def for_path(self, path: str | Path) -> asyncio.Semaphore:
+        """
+        Returns the semaphore of the device containing path.
+
+        Args:
+            path: A path on the device.
+
+        Returns:
+            The shared semaphore for that device.
+        """
+        key = device_key(path)
+        if key not in self._semaphores:
+            self._semaphores[key] = asyncio.Semaphore(self.per_device)
+        return self._semaphores[key]
+
+
+class SyncProgress:
+    """Thread-safe progress counters aggregated across all folders."""
+
+    def __init__(self, on_update: Optional[Callable[["SyncProgress", str, Optional[str]], None]] = None) -> None:
+        """
+        Initialize the counters.
+
+        Args:
+            on_update: Called after every processed file with (progress, filename, error).
+        """
+        self.on_update = on_update
+        self.files_total = 0
+        self.files_done = 0
+        self.errors = 0
+        self.folders_done = 0
+        self._lock = threading.Lock()
+
+    def add_planned(self, count: int) -> None:
+        """
+        Adds files that will be copied to the total.
+
+        Args:
+            count: Number of newly planned files.
+        """
+        with self._lock:
+            self.files_total += count
+        set_gauge("sync.parallel.files_total", self.files_total)
+
+    def folder_done(self) -> None:
+        """Counts a completely processed folder."""
+        with self._lock:
+            self.folders_done += 1
+
+    def callback_for(self, local_path: Path) -> SyncProgressCallback:
+        """
+        Creates a sync_files callback feeding these counters.
+
+        Args:
+            local_path: The folder being synced (used as filename prefix).
+
+        Returns:
+            The callback.
+        """
+
+        def callback(current: int, total: int, filename: str, error: Optional[str] = None) -> None:
+            with self._lock:
+                self.files_done += 1
+                if error:
+                    self.errors += 1
+            if self.on_update is not None:
+                self.on_update(self, os.path.join(local_path.name, filename), error)
+
+        return callback
+
+
+class AsyncSyncOrchestrator:
+    """
+    Syncs several source folders concurrently.
+
+    Every folder goes through plan (walk and compare) and copy. The blocking
+    work runs in a thread pool, so walking one folder overlaps with copying
+    another. Walks are limited per source device and copies per target device
+    (by default one writer per disk), because parallel I/O on the same
+    spinning disk mostly adds seeks.
+    """
+
+    def __init__(
+        self,
+        operations: BackupOperations,
+        backup_drive: Path,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        walkers_per_device: int = DEFAULT_WALKERS_PER_DEVICE,
+        writers_per_device: int = DEFAULT_WRITERS_PER_DEVICE,
+        progress: Optional[SyncProgress] = None,
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+        throttle: Optional[Throttle] = None,
+        delta: Optional[DeltaSync] = None,
+    ) -> None:
+        """
+        Initialize the orchestrator.
+
+        Args:
+            operations: Operations used to plan each folder.
+            backup_drive: Root of the backup drive (for folders without a match).
+            max_workers: Size of the thread pool for blocking file system work.
+            walkers_per_device: Concurrent folder walks per source device.
+            writers_per_device: Concurrent copies per target device.
+            progress: Progress counters to update (a new one if None).
+            buffer_size: Copy buffer size where no in-kernel copy is possible.
+            throttle: Optional limits shared by all concurrent copies.
+            delta: Optional delta transfer for large modified files.
+        """
+        self.operations = operations
+        self.backup_drive = backup_drive
+        self.max_workers = max(1, max_workers)
+        self.walkers_per_device = walkers_per_device
+        self.writers_per_device = writers_per_device
+        self.progress = progress or SyncProgress()
+        self.buffer_size = buffer_size
+        self.throttle = throttle
+        self.delta = delta
+
+    async def _sync_folder(
+        self,
+        local_path: Path,
+        executor: ThreadPoolExecutor,
+        walk_limits: DeviceLimiter,
+        write_limits: DeviceLimiter,
+    ) -> FolderSyncResult:
+        """Plans and copies one folder."""
+        loop = asyncio.get_running_loop()
+        logger.info(f"Processing {local_path}...")
+        async with walk_limits.for_path(local_path):
+            plan: SyncPlan = await loop.run_in_executor(executor, self.operations.plan_sync, local_path, self.backup_drive)
+
+        try:
+            if plan.status is not None or plan.target_root is None:
+                return FolderSyncResult(local_path, None, 0, plan.status or "Error")
+            if not plan.files_to_sync and not plan.renames:
+                logger.info(f"{local_path}: Everything up to date.")
+                return FolderSyncResult(local_path, plan.target_root, 0, "Up to date")
+
+            async with write_limits.for_path(plan.target_root):
+                files_to_sync = plan.files_to_sync
+                renamed: list[str] = []
+                if plan.renames:
+                    logger.info(f"Renaming {len(plan.renames)} moved files in {plan.target_root}...")
+                    renamed, rename_errors = await loop.run_in_executor(executor, rename_files, plan.renames, plan.target_root)
+                    # Files that could not be moved are copied instead
+                    files_to_sync = files_to_sync + [rel_path for rel_path, _ in rename_errors]
+
+                synced: list[str] = []
+                errors: list[tuple[str, str]] = []
+                if files_to_sync:
+                    self.progress.add_planned(len(files_to_sync))
+                    logger.info(f"Syncing {len(files_to_sync)} files to {plan.target_root}...")
+                    synced, errors = await loop.run_in_executor(
+                        executor,
+                        functools.partial(
+                            sync_files,
+                            files_to_sync,
+                            local_path,
+                            plan.target_root,
+                            callback=self.progress.callback_for(local_path),
+                            buffer_size=self.buffer_size,
+                            throttle=self.throttle,
+                            delta=self.delta,
+                        ),
+                    )
+            inc("auto_sync.folders_synced")
+            status = f"{len(errors)} errors" if errors else "OK"
+            return FolderSyncResult(local_path, plan.target_root, len(synced), status, renamed=len(renamed))
+        finally:
+            self.progress.folder_done()
+
+    async def run(self, local_paths: list[Path]) -> list[FolderSyncResult]:
+        """
+        Syncs all folders concurrently.
+
+        Args:
+            local_paths: Source folders to sync.
+
+        Returns:
+            One result per folder, in the order of local_paths.
+        """
+        walk_limits = DeviceLimiter(self.walkers_per_device)
+        write_limits = DeviceLimiter(self.writers_per_device)
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="sync") as executor:
+            tasks = [self._sync_folder(path, executor, walk_limits, write_limits) for path in local_paths]
+            outcomes = await asyncio.gather(*tasks, return_exceptions=True)
+
+        results = []
+        for path, outcome in zip(local_paths, outcomes, strict=True):
+            if isinstance(outcome, BaseException):
+                logger.error(f"Sync of {path} failed: {outcome}")
+                results.append(FolderSyncResult(path, None, 0, f"Error: {outcome}"))
+            else:
+                results.append(outcome)
+        return results
+
+    def run_sync(self, local_paths: list[Path]) -> list[FolderSyncResult]:
+        """
+        Runs run() in a new event loop (for callers without one).
+
+        Args:
+            local_paths: Source folders to sync.
+
+        Returns:
+            One result per folder, in the order of local_paths.
+        """
+        return asyncio.run(self.run(local_paths))
@@ -1,18 +1,20 @@
 """Core business logic for backup operations."""
 
 import logging
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import TYPE_CHECKING, Optional
 
-from semantic_backup_explorer.compare.folder_diff import FolderDiffResult, compare_folders
+from semantic_backup_explorer.compare.folder_diff import FolderDiffResult, compare_folders, get_folder_content
+from semantic_backup_explorer.compare.local_snapshot import LocalSnapshotCache
 
 if TYPE_CHECKING:
     from semantic_backup_explorer.rag.rag_pipeline import RAGPipeline
 from semantic_backup_explorer.utils.drive_utils import get_volume_label
+from semantic_backup_explorer.utils.exclusions import ExclusionConfig, ExclusionRules
 from semantic_backup_explorer.utils.index_utils import (
     find_backup_folder,
-    get_all_files_from_index,
+    get_file_table_from_index,
     get_index_metadata,
 )
 
@@ -29,21 +31,53 @@ class BackupComparisonResult:
     only_backup: list[str]
     in_both: list[str]
     error: Optional[str] = None
+    # (backup path, local path) of files that were moved or renamed locally
+    renamed: list[tuple[str, str]] = field(default_factory=list)
+
+
+@dataclass
+class SyncPlan:
+    """Files of a local folder that have to be copied, and where to."""
+
+    local_path: Path
+    target_root: Optional[Path]
+    files_to_sync: list[str]
+    status: Optional[str] = None
+    # (old, new) relative paths of backup copies to move instead of copying
+    renames: list[tuple[str, str]] = field(default_factory=list)
 
 
 class BackupOperations:
     """High-level operations for backup management."""
 
-    def __init__(self, index_path: Path, rag_pipeline: Optional["RAGPipeline"] = None):
+    def __init__(
+        self,
+        index_path: Path,
+        rag_pipeline: Optional["RAGPipeline"] = None,
+        local_cache: Optional[LocalSnapshotCache] = None,
+        detect_renames: bool = True,
+        verify_renames: bool = False,
+        exclusions: Optional[ExclusionConfig] = None,
+    ):
         """
         Initialize BackupOperations.
 
         Args:
             index_path: Path to the backup index file.
             rag_pipeline: Optional RAG pipeline for semantic folder matching.
+            local_cache: Optional snapshot cache for the local side of comparisons.
+            detect_renames: Match new local files with vanished backup files by
+                size and mtime, so moved files are renamed instead of copied.
+            verify_renames: Confirm detected renames by comparing content hashes.
+            exclusions: Optional exclusion patterns; excluded files are neither
+                compared nor synced.
         """
         self.index_path = index_path
         self.rag_pipeline = rag_pipeline
+        self.local_cache = local_cache
+        self.detect_renames = detect_renames
+        self.verify_renames = verify_renames
+        self.exclusions = exclusions
 
     def verify_backup_drive(self) -> tuple[bool, Optional[str]]:
         """
@@ -122,8 +156,15 @@ class BackupOperations:
             )
 
         backup_path = Path(backup_folder_str)
-        backup_files = get_all_files_from_index(backup_folder_str, self.index_path)
-        diff: FolderDiffResult = compare_folders(local_path, backup_files)
+        backup_files = get_file_table_from_index(backup_folder_str, self.index_path)
+        diff: FolderDiffResult = compare_folders(
+            local_path,
+            backup_files,
+            local_cache=self.local_cache,
+            verify_root=backup_path if self.verify_renames else None,
+            detect_renames=self.detect_renames,
+            exclude=self._exclude_for(local_path),
+        )
 
         return BackupComparisonResult(
             local_path=local_path,
@@ -131,8 +172,50 @@ class BackupOperations:
             only_local=diff["only_local"],
             only_backup=diff["only_backup"],
             in_both=diff["in_both"],
+            renamed=diff.get("renamed", []),
         )
 
+    def plan_sync(self, local_path: Path, backup_drive: Path) -> SyncPlan:
+        """
+        Determines the target folder and the files to copy for a local folder.
+
+        Folders without a matching backup folder are planned as a new folder
+        of the same name on the backup drive, with all local files.
+
+        Args:
+            local_path: The local folder to sync.
+            backup_drive: Root of the backup drive.
+
+        Returns:
+            A SyncPlan; status is set (and target_root None) if the folder cannot be synced.
+        """
+        if not local_path.exists():
+            logger.warning(f"Local path {local_path} does not exist. Skipping.")
+            return SyncPlan(local_path, None, [], status="Not Found Locally")
+
+        result = self.find_and_compare(local_path)
+        if not result.error:
+            return SyncPlan(local_path, result.backup_path, result.only_local, renames=result.renamed)
+
+        logger.warning(f"Comparison error for {local_path}: {result.error}")
+        if "No matching backup folder found" not in result.error:
+            return SyncPlan(local_path, None, [], status=f"Error: {result.error}")
+
+        target_root = backup_drive / local_path.name
+        logger.info(f"Defaulting to new folder: {target_root}")
+        exclude = self._exclude_for(local_path)
+        if self.local_cache is not None:
+            local_files = self.local_cache.get_folder_content(local_path, exclude=exclude)
+        else:
+            local_files = get_folder_content(local_path, exclude=exclude)
+        return SyncPlan(local_path, target_root, sorted(local_files))
+
+    def _exclude_for(self, local_path: Path) -> Optional[ExclusionRules]:
+        """Returns the exclusion rules of a source folder, or None without exclusions."""
+        if self.exclusions is None:
+            return None
+        return self.exclusions.for_folder(local_path) or None
+
     def _rag_search(self, folder_name: str) -> Optional[str]:
         """
         Search for a folder using the RAG pipeline.
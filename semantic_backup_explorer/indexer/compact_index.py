@@ -0,0 +1,525 @@
+"""Compact, block-compressed on-disk format for the backup index.
+
+The markdown index repeats the full parent path on every line. The compact
+format stores each entry relative to its ``##`` section, front-codes shared
+prefixes of consecutive entries and compresses groups of sections into blocks
+(zstd if available, zlib otherwise). A folder -> block table in the footer
+allows decompressing a single subtree without reading the rest of the file.
+
+File layout::
+
+    MAGIC | codec (1 byte) | block 0 | block 1 | ... | footer | trailer
+
+The footer is a compressed JSON document (root, label, separator, folder
+table and block offsets); the trailer stores its offset and length.
+"""
+
+import json
+import os
+import struct
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from types import TracebackType
+from typing import Any, Iterable, Iterator, Optional
+
+try:
+    import zstandard
+
+    HAS_ZSTANDARD = True
+except Exception:
+    HAS_ZSTANDARD = False
+
+MAGIC = b"SBIDX01\n"
+TRAILER = struct.Struct("<QQ8s")
+TRAILER_MAGIC = b"SBIDXEND"
+COMPACT_INDEX_SUFFIX = ".sbi"
+DEFAULT_BLOCK_SIZE = 256 * 1024
+
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+
+# (path as written in the markdown index, raw metadata string or "")
+# The metadata is the mtime, optionally followed by SIZE_MARKER and the size in bytes
+IndexEntry = tuple[str, str]
+SIZE_MARKER = " | size:"
+
+
+def _compress(data: bytes, codec: int) -> bytes:
+    """Compresses data with the given codec."""
+    if codec == CODEC_ZSTD:
+        return bytes(zstandard.ZstdCompressor(level=9).compress(data))
+    return zlib.compress(data, 6)
+
+
+def _decompress(data: bytes, codec: int) -> bytes:
+    """Decompresses data with the given codec."""
+    if codec == CODEC_ZSTD:
+        if not HAS_ZSTANDARD:
+            raise ImportError("zstandard is not installed. Please install it with 'pip install -e .[compact]'")
+        return bytes(zstandard.ZstdDecompressor().decompress(data))
+    return zlib.decompress(data)
+
+
+def _shared_prefix(a: str, b: str) -> int:
+    """Returns the length of the common prefix of a and b."""
+    n = min(len(a), len(b))
+    i = 0
+    while i < n and a[i] == b[i]:
+        i += 1
+    return i
+
+
+def is_compact_index(path: str | Path) -> bool:
+    """
+    Checks whether path is an index in the compact format.
+
+    Args:
+        path: Path to an index file.
+
+    Returns:
+        True if the file starts with the compact index magic bytes.
+    """
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def format_entry_meta(mtime: float, size: Optional[int] = None) -> str:
+    """
+    Formats the metadata string of a file entry.
+
+    Args:
+        mtime: Modification timestamp.
+        size: Size in bytes, or None if unknown.
+
+    Returns:
+        The raw metadata string, e.g. "1700000000.5 | size:1024".
+    """
+    if size is None:
+        return str(mtime)
+    return f"{mtime}{SIZE_MARKER}{size}"
+
+
+def split_entry_meta(meta: str) -> tuple[str, Optional[int]]:
+    """
+    Splits a raw metadata string into the mtime string and the size.
+
+    Indexes written before sizes were recorded only contain the mtime.
+
+    Args:
+        meta: Raw metadata string of an entry.
+
+    Returns:
+        Tuple of (raw mtime string, size in bytes or None).
+    """
+    if SIZE_MARKER not in meta:
+        return meta, None
+    mtime, size = meta.rsplit(SIZE_MARKER, 1)
+    try:
+        return mtime, int(size)
+    except ValueError:
+        return mtime, None
+
+
+def format_markdown_entry(path: str, mtime: str) -> str:
+    """
+    Formats an entry as a markdown index line.
+
+    Args:
+        path: Full path (directories with trailing separator).
+        mtime: Raw metadata string (see format_entry_meta), or "" if unknown.
+
+    Returns:
+        The markdown line including the newline.
+    """
+    if mtime:
+        return f"- {path} | mtime:{mtime}\n"
+    return f"- {path}\n"
+
+
+class CompactIndexWriter:
+    """Streams index sections into a compact index file."""
+
+    def __init__(
+        self,
+        path: str | Path,
+        root: str | Path,
+        label: Optional[str] = None,
+        sep: str = os.sep,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        codec: Optional[int] = None,
+    ) -> None:
+        """
+        Initialize the writer and write the file header.
+
+        Args:
+            path: Output file path.
+            root: Root path of the scanned drive.
+            label: Optional volume label.
+            sep: Path separator used in the indexed paths.
+            block_size: Target uncompressed size of a block in bytes.
+            codec: CODEC_ZSTD or CODEC_ZLIB (default: zstd if installed).
+        """
+        self.path = Path(path)
+        self.root = str(root)
+        self.label = label
+        self.sep = sep
+        self.block_size = block_size
+        self.codec = codec if codec is not None else (CODEC_ZSTD if HAS_ZSTANDARD else CODEC_ZLIB)
+        if self.codec == CODEC_ZSTD and not HAS_ZSTANDARD:
+            raise ImportError("zstandard is not installed. Please install it with 'pip install -e .[compact]'")
+
+        self._file = open(self.path, "wb")
+        self._file.write(MAGIC + bytes([self.codec]))
+        self._folders: list[str] = []
+        self._folder_blocks: list[int] = []
+        self._blocks: list[list[int]] = []
+        self._buffer: list[str] = []
+        self._buffer_size = 0
+        self._block_has_absolute = False
+        self._block_first_section = 0
+        self._prev_header = ""
+
+    def add_section(self, folder: str, entries: Iterable[IndexEntry]) -> None:
+        """
+        Adds a ``##`` section.
+
+        Args:
+            folder: The folder path of the section header.
+            entries: The section's entries as (path, mtime) tuples.
+        """
+        shared = _shared_prefix(self._prev_header, folder)
+        lines = [f"S{shared}\t{folder[shared:]}\n"]
+        self._prev_header = folder
+
+        prefix = folder if folder.endswith(("/", "\\")) else folder + self.sep
+        prev = ""
+        for path, mtime in entries:
+            if path.startswith(prefix):
+                kind = "r"
+                stored = path[len(prefix) :]
+            else:
+                kind = "a"
+                stored = path
+                self._block_has_absolute = True
+            shared = _shared_prefix(prev, stored)
+            lines.append(f"{kind}{shared}\t{stored[shared:]}\t{mtime}\n")
+            prev = stored
+
+        self._folders.append(folder)
+        self._folder_blocks.append(len(self._blocks))
+        self._buffer.extend(lines)
+        self._buffer_size += sum(len(line) for line in lines)
+        if self._buffer_size >= self.block_size:
+            self._flush_block()
+
+    def _flush_block(self) -> None:
+        """Compresses and writes the buffered sections as one block."""
+        if not self._buffer:
+            return
+        data = _compress("".join(self._buffer).encode("utf-8"), self.codec)
+        offset = self._file.tell()
+        self._file.write(data)
+        self._blocks.append([offset, len(data), self._block_first_section, int(self._block_has_absolute)])
+        self._buffer = []
+        self._buffer_size = 0
+        self._block_has_absolute = False
+        self._block_first_section = len(self._folders)
+        self._prev_header = ""
+
+    def close(self) -> None:
+        """Writes the remaining block, the footer and the trailer."""
+        if self._file.closed:
+            return
+        self._flush_block()
+        footer: dict[str, Any] = {
+            "version": 1,
+            "root": self.root,
+            "label": self.label,
+            "sep": self.sep,
+            "blocks": self._blocks,
+            "folders": self._folders,
+            "folder_blocks": self._folder_blocks,
+        }
+        data = _compress(json.dumps(footer).encode("utf-8"), self.codec)
+        offset = self._file.tell()
+        self._file.write(data)
+        self._file.write(TRAILER.pack(offset, len(data), TRAILER_MAGIC))
+        self._file.close()
+
+    def __enter__(self) -> "CompactIndexWriter":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc: Optional[BaseException],
+        tb: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+
+class CompactIndexReader:
+    """Random-access reader for compact index files."""
+
+    def __init__(self, path: str | Path, cache_blocks: int = 8) -> None:
+        """
+        Open a compact index and read its footer.
+
+        Args:
+            path: Path to the compact index.
+            cache_blocks: Number of decompressed blocks to keep in memory.
+
+        Raises:
+            ValueError: If the file is not a valid compact index.
+        """
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            header = f.read(len(MAGIC) + 1)
+            if len(header) != len(MAGIC) + 1 or header[: len(MAGIC)] != MAGIC:
+                raise ValueError(f"Not a compact index: {self.path}")
+            self.codec = header[-1]
+            f.seek(-TRAILER.size, os.SEEK_END)
+            offset, length, trailer_magic = TRAILER.unpack(f.read(TRAILER.size))
+            if trailer_magic != TRAILER_MAGIC:
+                raise ValueError(f"Compact index is truncated: {self.path}")
+            f.seek(offset)
+            footer = json.loads(_decompress(f.read(length), self.codec))
+
+        self.root: str = footer["root"]
+        self.label: Optional[str] = footer.get("label")
+        self.sep: str = footer.get("sep", os.sep)
+        self.folders: list[str] = footer["folders"]
+        self._folder_blocks: list[int] = footer["folder_blocks"]
+        self._blocks: list[list[int]] = footer["blocks"]
+        self._cache: OrderedDict[int, list[tuple[str, list[IndexEntry]]]] = OrderedDict()
+        self._cache_blocks = cache_blocks
+
+    def _read_block(self, block_no: int) -> list[tuple[str, list[IndexEntry]]]:
+        """Decompresses and decodes a block into its sections."""
+        cached = self._cache.get(block_no)
+        if cached is not None:
+            self._cache.move_to_end(block_no)
+            return cached
+
+        offset, length = self._blocks[block_no][:2]
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            text = _decompress(f.read(length), self.codec).decode("utf-8")
+
+        sections: list[tuple[str, list[IndexEntry]]] = []
+        entries: list[IndexEntry] = []
+        header = ""
+        prefix = ""
+        prev = ""
+        for line in text.split("\n"):
+            if not line:
+                continue
+            kind = line[0]
+            if kind == "S":
+                shared_str, suffix = line[1:].split("\t", 1)
+                header = header[: int(shared_str)] + suffix
+                prefix = header if header.endswith(("/", "\\")) else header + self.sep
+                entries = []
+                sections.append((header, entries))
+                prev = ""
+                continue
+            shared_str, rest = line[1:].split("\t", 1)
+            suffix, mtime = rest.rsplit("\t", 1)
+            stored = prev[: int(shared_str)] + suffix
+            prev = stored
+            entries.append((prefix + stored if kind == "r" else stored, mtime))
+
+        self._cache[block_no] = sections
+        if len(self._cache) > self._cache_blocks:
+            self._cache.popitem(last=False)
+        return sections
+
+    def read_section(self, section_no: int) -> tuple[str, list[IndexEntry]]:
+        """
+        Reads a single section by its position in the folder table.
+
+        Args:
+            section_no: Index into self.folders.
+
+        Returns:
+            A tuple of (folder, entries).
+        """
+        block_no = self._folder_blocks[section_no]
+        first_section = self._blocks[block_no][2]
+        return self._read_block(block_no)[section_no - first_section]
+
+    def iter_sections(self, section_numbers: Optional[Iterable[int]] = None) -> Iterator[tuple[str, list[IndexEntry]]]:
+        """
+        Iterates over sections, decompressing only the blocks that are needed.
+
+        Args:
+            section_numbers: Sections to read in ascending order (default: all).
+
+        Yields:
+            Tuples of (folder, entries).
+        """
+        if section_numbers is None:
+            for block_no in range(len(self._blocks)):
+                yield from self._read_block(block_no)
+            return
+        for section_no in section_numbers:
+            yield self.read_section(section_no)
+
+    def subtree_sections(self, folder: str) -> list[int]:
+        """
+        Finds the sections of folder and all its descendants.
+
+        Sections of blocks containing entries outside their own section are
+        included as well, since such entries may belong to the subtree.
+
+        Args:
+            folder: Folder path (either separator style).
+
+        Returns:
+            Ascending section numbers.
+        """
+        norm = folder.replace("\\", "/").rstrip("/")
+        prefix = norm + "/"
+        absolute_blocks = {i for i, block in enumerate(self._blocks) if block[3]}
+        result = []
+        for i, candidate in enumerate(self.folders):
+            norm_candidate = candidate.replace("\\", "/").rstrip("/")
+            if norm_candidate == norm or norm_candidate.startswith(prefix) or self._folder_blocks[i] in absolute_blocks:
+                result.append(i)
+        return result
+
+    def iter_markdown(self) -> Iterator[str]:
+        """
+        Reproduces the markdown index line by line.
+
+        Yields:
+            Lines (including newlines) identical to the markdown written by scan_backup.
+        """
+        yield "# Backup Index\n"
+        yield "\n"
+        root_line = f"Root: {self.root}"
+        if self.label:
+            root_line += f" (Label: {self.label})"
+        yield f"{root_line}\n"
+        yield "\n"
+        for folder, entries in self.iter_sections():
+            yield f"## {folder}\n"
+            yield "\n"
+            for path, mtime in entries:
+                yield format_markdown_entry(path, mtime)
+            yield "\n"
+
+
+def export_markdown(compact_path: str | Path, markdown_path: str | Path) -> None:
+    """
+    Exports a compact index as a markdown index.
+
+    Args:
+        compact_path: Path to the compact index.
+        markdown_path: Path of the markdown file to write.
+    """
+    reader = CompactIndexReader(compact_path)
+    with open(markdown_path, "w", encoding="utf-8") as f:
+        f.writelines(reader.iter_markdown())
+
+
+def read_markdown_root(markdown_path: str | Path) -> tuple[Optional[str], Optional[str]]:
+    """
+    Reads the root path and drive label from the header of a markdown index.
+
+    Args:
+        markdown_path: Path to the markdown index.
+
+    Returns:
+        Tuple of (root, label); each is None if missing.
+    """
+    with open(markdown_path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("## "):
+                break
+            if line.startswith("Root: "):
+                content = line[6:].strip()
+                if " (Label: " in content:
+                    root_part, label_part = content.split(" (Label: ", 1)
+                    return root_part.strip(), label_part.rstrip(")").strip()
+                return content, None
+    return None, None
+
+
+def iter_markdown_sections(markdown_path: str | Path) -> Iterator[tuple[str, list[IndexEntry]]]:
+    """
+    Streams the folder sections of a markdown index.
+
+    Args:
+        markdown_path: Path to the markdown index.
+
+    Yields:
+        Tuples of (folder, entries) with the raw mtime strings of the entries.
+    """
+    folder: Optional[str] = None
+    entries: list[IndexEntry] = []
+    with open(markdown_path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("## "):
+                if folder is not None:
+                    yield folder, entries
+                folder = line[3:].rstrip("\n")
+                entries = []
+            elif line.startswith("- ") and folder is not None:
+                content = line[2:].rstrip("\n")
+                if " | mtime:" in content:
+                    path, mtime = content.rsplit(" | mtime:", 1)
+                else:
+                    path, mtime = content, ""
+                entries.append((path, mtime))
+    if folder is not None:
+        yield folder, entries
+
+
+def guess_separator(root: str) -> str:
+    """Returns the path separator used by an index with the given root path."""
+    return "\\" if "\\" in root or ":" in root[:2] else "/"
+
+
+def convert_markdown_to_compact(
+    markdown_path: str | Path, compact_path: str | Path, block_size: int = DEFAULT_BLOCK_SIZE
+) -> None:
+    """
+    Converts an existing markdown index into the compact format.
+
+    Args:
+        markdown_path: Path to the markdown index.
+        compact_path: Path of the compact index to write.
+        block_size: Target uncompressed size of a block in bytes.
+
+    Raises:
+        ValueError: If the markdown index has no Root line.
+    """
+    root, label = read_markdown_root(markdown_path)
+    if root is None:
+        raise ValueError(f"Index has no Root line: {markdown_path}")
+
+    with CompactIndexWriter(compact_path, root, label, sep=guess_separator(root), block_size=block_size) as writer:
+        for folder, entries in iter_markdown_sections(markdown_path):
+            writer.add_section(folder, entries)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Convert between markdown and compact backup indexes.")
+    parser.add_argument(
+        "command", choices=["compact", "export"], help="'compact': markdown -> .sbi, 'export': .sbi -> markdown."
+    )
+    parser.add_argument("input", help="Input index file.")
+    parser.add_argument("output", help="Output index file.")
+    args = parser.parse_args()
+
+    if args.command == "compact":
+        convert_markdown_to_compact(args.input, args.output)
+    else:
+        export_markdown(args.input, args.output)
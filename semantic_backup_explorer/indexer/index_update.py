@@ -0,0 +1,256 @@
+"""Incremental updates of an existing backup index without rescanning the drive."""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Iterator, Optional, TextIO
+
+from semantic_backup_explorer.indexer.compact_index import (
+    CompactIndexReader,
+    CompactIndexWriter,
+    IndexEntry,
+    format_entry_meta,
+    format_markdown_entry,
+    guess_separator,
+    is_compact_index,
+    iter_markdown_sections,
+    read_markdown_root,
+)
+from semantic_backup_explorer.utils.index_utils import (
+    clear_index_journal,
+    get_index_journal_path,
+    get_index_metadata,
+    read_index_journal,
+    write_index_metadata,
+)
+from semantic_backup_explorer.utils.metrics import inc, timed
+
+
+def _sort_entries(entries: dict[str, str]) -> list[IndexEntry]:
+    """Orders entries like scan_backup: sub-directories first, then files, each by name."""
+    dirs = sorted(p for p in entries if p.endswith("/"))
+    files = sorted(p for p in entries if not p.endswith("/"))
+    return [(p, entries[p]) for p in dirs + files]
+
+
+def _plan_updates(root: str, changed: dict[str, tuple[float, int]]) -> dict[str, dict[str, str]]:
+    """
+    Groups changed files by section and adds directory entries for their ancestors.
+
+    Returns:
+        Mapping of section folder -> {entry path: raw metadata string}.
+    """
+    updates: dict[str, dict[str, str]] = {}
+    for file_path, (mtime, size) in changed.items():
+        folder = os.path.dirname(file_path)
+        updates.setdefault(folder, {})[file_path] = format_entry_meta(mtime, size)
+        # Every directory between root and folder needs a section and an entry in its parent
+        while len(folder) > len(root):
+            parent = os.path.dirname(folder)
+            updates.setdefault(parent, {})[f"{folder}/"] = ""
+            folder = parent
+    return updates
+
+
+def _merge_sections(
+    sections: Iterator[tuple[str, list[IndexEntry]]],
+    updates: dict[str, dict[str, str]],
+    existing: set[str],
+    added_files: set[str],
+) -> Iterator[tuple[str, list[IndexEntry]]]:
+    """
+    Applies updates to a stream of sections.
+
+    New sections are inserted directly after the section of their nearest
+    existing ancestor, which keeps the parent-before-children order that
+    chunk_markdown relies on. Paths of files that were not indexed before are
+    collected in added_files.
+    """
+    new_by_anchor: dict[Optional[str], list[str]] = {}
+    for folder in updates:
+        if folder in existing:
+            continue
+        anchor: Optional[str] = os.path.dirname(folder)
+        while anchor is not None and anchor not in existing:
+            parent = os.path.dirname(anchor)
+            anchor = parent if parent != anchor else None
+        new_by_anchor.setdefault(anchor, []).append(folder)
+
+    def new_sections(anchor: Optional[str]) -> Iterator[tuple[str, list[IndexEntry]]]:
+        for folder in sorted(new_by_anchor.get(anchor, [])):
+            added_files.update(p for p in updates[folder] if not p.endswith("/"))
+            yield folder, _sort_entries(updates[folder])
+
+    for folder, entries in sections:
+        if folder in updates:
+            merged = dict(entries)
+            added_files.update(p for p in updates[folder] if p not in merged and not p.endswith("/"))
+            merged.update(updates[folder])
+            entries = _sort_entries(merged)
+        yield folder, entries
+        yield from new_sections(folder)
+    yield from new_sections(None)
+
+
+@timed("index.update_index")
+def update_index(index_path: str | Path, changed: dict[str, tuple[float, int]]) -> int:
+    """
+    Adds or updates file entries in an existing index.
+
+    The index is rewritten in a single streaming pass (markdown or compact) and
+    atomically replaced, and its metadata sidecar is refreshed. This is much
+    cheaper than scan_backup, which has to walk the whole drive, but still
+    proportional to the index size; for frequent small batches use
+    append_index_journal instead. Pending journal entries are merged as well
+    and the journal is removed. The total size in the sidecar only grows by
+    newly added files, since the index does not record the previous size of
+    updated ones.
+
+    Args:
+        index_path: Path to the markdown or compact index.
+        changed: Mapping of full backup file path -> (mtime, size in bytes).
+            Paths outside the index root are ignored.
+
+    Returns:
+        The number of applied file entries, including journaled ones.
+
+    Raises:
+        FileNotFoundError: If the index does not exist.
+        ValueError: If the index has no root path.
+    """
+    index_path = Path(index_path)
+    if not index_path.exists():
+        raise FileNotFoundError(f"Index does not exist: {index_path}")
+
+    compact = is_compact_index(index_path)
+    if compact:
+        reader = CompactIndexReader(index_path)
+        root, label, sep = reader.root, reader.label, reader.sep
+        existing = set(reader.folders)
+    else:
+        md_root, label = read_markdown_root(index_path)
+        if md_root is None:
+            raise ValueError(f"Index has no Root line: {index_path}")
+        root, sep = md_root, guess_separator(md_root)
+        existing = {folder for folder, _ in iter_markdown_sections(index_path)}
+
+    prefix = root.rstrip("/\\") + sep
+    journal = read_index_journal(index_path)
+    changed = {p: v for p, v in {**journal, **changed}.items() if p.startswith(prefix)}
+    if not changed:
+        clear_index_journal(index_path)
+        return 0
+
+    metadata = get_index_metadata(index_path)
+    updates = _plan_updates(root, changed)
+    sections = reader.iter_sections() if compact else iter_markdown_sections(index_path)
+    added_files: set[str] = set()
+    merged_sections = _merge_sections(sections, updates, existing, added_files)
+
+    # Same header and checksum scheme as scan_backup
+    root_line = f"Root: {root}" + (f" (Label: {label})" if label else "")
+    checksum = hashlib.blake2b(digest_size=16)
+    checksum.update(f"# Backup Index\n\n{root_line}\n\n".encode("utf-8"))
+    file_count = 0
+    dir_count = 0
+    tmp_path = index_path.with_name(index_path.name + ".tmp")
+
+    writer: Optional[CompactIndexWriter] = None
+    f: Optional[TextIO] = None
+    if compact:
+        writer = CompactIndexWriter(tmp_path, root, label, sep=sep)
+    else:
+        f = open(tmp_path, "w", encoding="utf-8")
+        f.write(f"# Backup Index\n\n{root_line}\n\n")
+    try:
+        for folder, entries in merged_sections:
+            text = f"## {folder}\n\n" + "".join(format_markdown_entry(p, m) for p, m in entries) + "\n"
+            checksum.update(text.encode("utf-8"))
+            if f is not None:
+                f.write(text)
+            if writer is not None:
+                writer.add_section(folder, entries)
+            for path, _ in entries:
+                if path.endswith("/"):
+                    dir_count += 1
+                else:
+                    file_count += 1
+    finally:
+        if f is not None:
+            f.close()
+        if writer is not None:
+            writer.close()
+    os.replace(tmp_path, index_path)
+    clear_index_journal(index_path)
+
+    write_index_metadata(
+        index_path,
+        root_path=Path(root),
+        label=label,
+        file_count=file_count,
+        dir_count=dir_count,
+        total_bytes=(metadata.total_bytes or 0) + sum(changed[p][1] for p in added_files),
+        checksum=f"blake2b:{checksum.hexdigest()}",
+    )
+    inc("index.updated_entries", len(changed))
+    return len(changed)
+
+
+@timed("index.append_index_journal")
+def append_index_journal(index_path: str | Path, changed: dict[str, tuple[float, int]]) -> int:
+    """
+    Records file entries for a later update_index without rewriting the index.
+
+    The entries are appended to the journal next to the index (see
+    get_index_journal_path), which costs only the size of the entries.
+    get_all_files_from_index and get_file_table_from_index include journaled
+    entries, so compares stay current; searches and chunking see them once
+    merge_index_journal (or any update_index) has merged the journal.
+
+    Args:
+        index_path: Path to the markdown or compact index.
+        changed: Mapping of full backup file path -> (mtime, size in bytes).
+
+    Returns:
+        The number of journaled entries.
+
+    Raises:
+        FileNotFoundError: If the index does not exist.
+    """
+    index_path = Path(index_path)
+    if not index_path.exists():
+        raise FileNotFoundError(f"Index does not exist: {index_path}")
+    if not changed:
+        return 0
+    lines = "".join(json.dumps([path, mtime, size], ensure_ascii=False) + "\n" for path, (mtime, size) in changed.items())
+    with open(get_index_journal_path(index_path), "a+b") as f:
+        # Terminate a line that was cut off by a crash, so it does not swallow the first new entry
+        if f.tell() > 0:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                lines = "\n" + lines
+        f.write(lines.encode("utf-8"))
+        f.flush()
+        os.fsync(f.fileno())
+    inc("index.journaled_entries", len(changed))
+    return len(changed)
+
+
+def merge_index_journal(index_path: str | Path) -> int:
+    """
+    Merges the journaled entries into the index and removes the journal.
+
+    Args:
+        index_path: Path to the markdown or compact index.
+
+    Returns:
+        The number of merged file entries (0 without a journal).
+
+    Raises:
+        FileNotFoundError: If the index does not exist.
+        ValueError: If the index has no root path.
+    """
+    if not get_index_journal_path(index_path).exists():
+        return 0
+    return update_index(index_path, {})
@@ -1,27 +1,46 @@
 """Module for scanning backup directories and creating a markdown index."""
 
+import hashlib
 import os
 from pathlib import Path
-from typing import Callable, Optional
+from typing import Callable, Optional, TextIO
 
 from tqdm import tqdm
 
+from semantic_backup_explorer.indexer.compact_index import (
+    COMPACT_INDEX_SUFFIX,
+    CompactIndexWriter,
+    IndexEntry,
+    format_entry_meta,
+    format_markdown_entry,
+)
 from semantic_backup_explorer.utils.drive_utils import get_volume_label
+from semantic_backup_explorer.utils.exclusions import ExclusionRules
+from semantic_backup_explorer.utils.index_utils import clear_index_journal, write_index_metadata
+from semantic_backup_explorer.utils.metrics import inc, timed
 
 
+@timed("scan_backup")
 def scan_backup(
     root_path: str | Path,
     output_file: str | Path = "data/backup_index.md",
     callback: Optional[Callable[[int, str], None]] = None,
+    exclude: Optional[ExclusionRules] = None,
 ) -> None:
     """
     Recursively scans the root_path and writes every file and folder
     with its full path into a structured markdown file.
 
+    A JSON metadata sidecar (root, label, counts, total size, checksum) is
+    written next to the index, see get_index_metadata. If output_file ends in
+    ``.sbi``, the index is written in the compact block-compressed format.
+
     Args:
         root_path: Path to the backup directory to scan.
-        output_file: Path to the output markdown file.
+        output_file: Path to the output markdown (or compact ``.sbi``) file.
         callback: Optional callback function called with (count, current_root).
+        exclude: Optional exclusion rules, relative to root_path. Excluded
+            directories are not entered and do not appear in the index.
 
     Raises:
         FileNotFoundError: If root_path does not exist.
@@ -39,12 +58,31 @@ def scan_backup(
 
     try:
         label = get_volume_label(root_path)
-        with open(output_path, "w", encoding="utf-8") as f:
-            f.write("# Backup Index\n\n")
+        checksum = hashlib.blake2b(digest_size=16)
+        file_count = 0
+        dir_count = 0
+        total_bytes = 0
+
+        compact = output_path.suffix == COMPACT_INDEX_SUFFIX
+        writer: Optional[CompactIndexWriter] = None
+        f: Optional[TextIO] = None
+        if compact:
+            writer = CompactIndexWriter(output_path, root_path, label)
+        else:
+            f = open(output_path, "w", encoding="utf-8")
+
+        def write(text: str) -> None:
+            # The checksum always covers the markdown form, independent of the on-disk format
+            if f is not None:
+                f.write(text)
+            checksum.update(text.encode("utf-8"))
+
+        try:
+            write("# Backup Index\n\n")
             root_line = f"Root: {root_path}"
             if label:
                 root_line += f" (Label: {label})"
-            f.write(f"{root_line}\n\n")
+            write(f"{root_line}\n\n")
 
             count = 0
             for root, dirs, files in tqdm(os.walk(root_path), desc="Scanning directories"):
@@ -52,18 +90,52 @@ def scan_backup(
                 if callback:
                     callback(count, root)
                 current_path = Path(root)
-                f.write(f"## {current_path}\n\n")
+                write(f"## {current_path}\n\n")
+                if exclude:
+                    rel_root = os.path.relpath(root, root_path)
+                    prefix = "" if rel_root == os.curdir else rel_root + os.sep
+                    # Pruned in place, so os.walk does not descend into excluded directories
+                    dirs[:] = [d for d in dirs if not exclude.matches(prefix + d, is_dir=True)]
+                    files = [name for name in files if not exclude.matches(prefix + name)]
 
+                entries: list[IndexEntry] = []
+                dir_count += len(dirs)
                 for d in sorted(dirs):
-                    f.write(f"- {current_path / d}/\n")
+                    entries.append((f"{current_path / d}/", ""))
                 for name in sorted(files):
                     file_path = current_path / name
+                    file_count += 1
                     try:
-                        mtime = os.path.getmtime(file_path)
-                        f.write(f"- {file_path} | mtime:{mtime}\n")
+                        stat = os.stat(file_path)
+                        total_bytes += stat.st_size
+                        entries.append((str(file_path), format_entry_meta(stat.st_mtime, stat.st_size)))
                     except Exception:
-                        f.write(f"- {file_path}\n")
-                f.write("\n")
+                        entries.append((str(file_path), ""))
+
+                write("".join(format_markdown_entry(path, mtime) for path, mtime in entries))
+                write("\n")
+                if writer is not None:
+                    writer.add_section(str(current_path), entries)
+        finally:
+            if f is not None:
+                f.close()
+            if writer is not None:
+                writer.close()
+
+        write_index_metadata(
+            output_path,
+            root_path=root_path,
+            label=label,
+            file_count=file_count,
+            dir_count=dir_count,
+            total_bytes=total_bytes,
+            checksum=f"blake2b:{checksum.hexdigest()}",
+        )
+        # The rescan already contains everything a daemon journaled for the old index
+        clear_index_journal(output_path)
+        inc("scan_backup.files", file_count)
+        inc("scan_backup.dirs", dir_count)
+        inc("scan_backup.bytes", total_bytes)
     except PermissionError as e:
         raise PermissionError(f"Cannot write to output file: {output_path}") from e
 
@@ -71,12 +143,20 @@ def scan_backup(
 if __name__ == "__main__":
     import argparse
 
+    from semantic_backup_explorer.sync.snapshot import without_snapshots
+    from semantic_backup_explorer.utils.config import BackupConfig, parse_exclusions
+
     parser = argparse.ArgumentParser(description="Scan a backup directory and create a markdown index.")
     parser.add_argument("--path", required=True, help="Path to the backup directory to scan.")
     parser.add_argument("--output", default="data/backup_index.md", help="Path to the output markdown file.")
+    parser.add_argument(
+        "--config", help="Backup config markdown file with the exclusions (default: the backup_config_path setting)."
+    )
     args = parser.parse_args()
 
+    config = BackupConfig()
+    exclusions = parse_exclusions(Path(args.config) if args.config else config.backup_config_path)
     try:
-        scan_backup(args.path, args.output)
+        scan_backup(args.path, args.output, exclude=without_snapshots(config.snapshot_dir, exclusions.global_rules()))
     except Exception as e:
         print(f"Error: {e}")
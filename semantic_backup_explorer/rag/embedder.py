@@ -1,6 +1,7 @@
 """Module for generating text embeddings using SentenceTransformers."""
 
-from typing import cast
+import logging
+from typing import Optional, cast
 
 try:
     from sentence_transformers import SentenceTransformer
@@ -9,28 +10,54 @@ try:
 except Exception:
     HAS_SENTENCE_TRANSFORMERS = False
 
+from semantic_backup_explorer.rag.embedding_server import DEFAULT_MODEL_NAME, EmbeddingClient
+from semantic_backup_explorer.utils.config import BackupConfig
+from semantic_backup_explorer.utils.metrics import inc, timed
+
+logger = logging.getLogger(__name__)
+
 
 class Embedder:
     """
     Handles generation of vector embeddings for text chunks and queries.
 
     Uses SentenceTransformers to convert text into fixed-size numerical vectors.
+    If an embedding server is configured and serves the same model, the texts
+    are encoded there instead, so no model has to be loaded in this process.
     """
 
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2") -> None:
+    def __init__(self, model_name: str = DEFAULT_MODEL_NAME, server_url: Optional[str] = None) -> None:
         """
         Initialize the embedder with a specific model.
 
         Args:
             model_name: The name of the SentenceTransformer model to use.
+            server_url: URL of an embedding server (see embedding_server.py);
+                default: the embedding_server_url setting, empty for none. If
+                the server is not reachable, the model is loaded locally.
 
         Raises:
-            ImportError: If sentence-transformers is not installed.
+            ImportError: If sentence-transformers is needed but not installed.
         """
+        self.model_name = model_name
+        self.client: Optional[EmbeddingClient] = None
+        if server_url is None:
+            server_url = BackupConfig().embedding_server_url
+        if server_url:
+            client = EmbeddingClient(server_url)
+            health = client.health()
+            if health is not None and health.get("model") == model_name:
+                self.client = client
+                return
+            if health is None:
+                logger.warning(f"Embedding server {server_url} is not reachable, loading {model_name} locally.")
+            else:
+                logger.warning(f"Embedding server {server_url} serves {health.get('model')}, loading {model_name} locally.")
         if not HAS_SENTENCE_TRANSFORMERS:
             raise ImportError("sentence-transformers is not installed. Please install it with 'pip install -e .[semantic]'")
         self.model = SentenceTransformer(model_name)
 
+    @timed("embedder.embed_query")
     def embed_query(self, text: str) -> list[float]:
         """
         Embed a single query string.
@@ -41,8 +68,29 @@ class Embedder:
         Returns:
             A list of floats representing the embedding.
         """
+        if self.client is not None:
+            return self.client.embed([text])[0]
         return cast(list[float], self.model.encode(text).tolist())
 
+    @timed("embedder.embed_queries")
+    def embed_queries(self, texts: list[str]) -> list[list[float]]:
+        """
+        Embed several query strings in one batch.
+
+        Args:
+            texts: The query texts.
+
+        Returns:
+            One embedding vector per query.
+        """
+        if not texts:
+            return []
+        inc("embedder.queries", len(texts))
+        if self.client is not None:
+            return self.client.embed(texts)
+        return cast(list[list[float]], self.model.encode(texts).tolist())
+
+    @timed("embedder.embed_documents")
     def embed_documents(self, texts: list[str]) -> list[list[float]]:
         """
         Embed a list of document strings.
@@ -53,4 +101,7 @@ class Embedder:
         Returns:
             A list of embedding vectors.
         """
+        inc("embedder.documents", len(texts))
+        if self.client is not None:
+            return self.client.embed(texts)
         return cast(list[list[float]], self.model.encode(texts).tolist())
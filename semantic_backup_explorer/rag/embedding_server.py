@@ -0,0 +1,350 @@
+"""Local embedding service that keeps one warm model in memory and batches concurrent requests."""
+
+import json
+import logging
+import queue
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Optional, Sequence
+
+from semantic_backup_explorer.utils.metrics import inc, timed
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_NAME = "all-MiniLM-L6-v2"
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# Texts encoded together at most; larger single requests are encoded on their own
+DEFAULT_MAX_BATCH_SIZE = 64
+# How long the first request of a batch waits for others to join it
+DEFAULT_MAX_WAIT = 0.005
+DEFAULT_CLIENT_TIMEOUT = 60.0
+HEALTH_TIMEOUT = 1.0
+
+EncodeFunction = Callable[[list[str]], Sequence[Sequence[float]]]
+
+
+@dataclass
+class _Request:
+    texts: list[str]
+    future: "Future[list[list[float]]]" = field(default_factory=Future)
+
+
+class MicroBatcher:
+    """
+    Collects embedding requests from many threads and encodes them in shared batches.
+
+    The first request of a batch waits up to max_wait seconds for more
+    requests, until max_batch_size texts are collected; then all of them are
+    encoded with a single model call. A few milliseconds of latency buy much
+    better throughput, since the model encodes 64 texts barely slower than one.
+    """
+
+    def __init__(
+        self,
+        encode: EncodeFunction,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_wait: float = DEFAULT_MAX_WAIT,
+    ) -> None:
+        """
+        Initialize the batcher and start its worker thread.
+
+        Args:
+            encode: Function turning a list of texts into one vector per text.
+            max_batch_size: Maximum number of texts per model call.
+            max_wait: Seconds the first request waits for others to join its batch.
+        """
+        self.encode = encode
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue: "queue.Queue[Optional[_Request]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, texts: list[str]) -> "Future[list[list[float]]]":
+        """
+        Queues texts for encoding.
+
+        Args:
+            texts: The texts of one request.
+
+        Returns:
+            A future with one vector per text.
+        """
+        request = _Request(list(texts))
+        if not request.texts:
+            request.future.set_result([])
+        else:
+            self._queue.put(request)
+        return request.future
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        """
+        Encodes texts, sharing the model call with concurrent requests.
+
+        Args:
+            texts: The texts to encode.
+
+        Returns:
+            One vector per text.
+        """
+        return self.submit(texts).result()
+
+    def close(self) -> None:
+        """Encodes the queued requests and stops the worker thread."""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is None:
+                break
+            batch = [first]
+            count = len(first.texts)
+            deadline = time.monotonic() + self.max_wait
+            while count < self.max_batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if request is None:
+                    stopping = True
+                    break
+                batch.append(request)
+                count += len(request.texts)
+            self._process(batch)
+
+    def _process(self, batch: list[_Request]) -> None:
+        texts = [text for request in batch for text in request.texts]
+        try:
+            vectors = self.encode(texts)
+            rows = vectors.tolist() if hasattr(vectors, "tolist") else [list(v) for v in vectors]
+        except Exception as e:
+            for request in batch:
+                request.future.set_exception(e)
+            return
+        start = 0
+        for request in batch:
+            request.future.set_result(rows[start : start + len(request.texts)])
+            start += len(request.texts)
+        inc("embedding_server.batches")
+        inc("embedding_server.requests", len(batch))
+        inc("embedding_server.texts", len(texts))
+
+
+def _load_model(model_name: str) -> Any:
+    """Loads a SentenceTransformer model."""
+    try:
+        from sentence_transformers import SentenceTransformer
+    except Exception as e:
+        raise ImportError("sentence-transformers is not installed. Please install it with 'pip install -e .[semantic]'") from e
+    return SentenceTransformer(model_name)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Serves GET /health and POST /embed with JSON bodies."""
+
+    server: "_EmbeddingHTTPServer"
+
+    def do_GET(self) -> None:
+        if self.path != "/health":
+            self._send(404, {"error": f"Unknown path: {self.path}"})
+            return
+        owner = self.server.owner
+        self._send(200, {"status": "ok", "model": owner.model_name, "dimension": owner.dimension})
+
+    def do_POST(self) -> None:
+        if self.path != "/embed":
+            self._send(404, {"error": f"Unknown path: {self.path}"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            texts = json.loads(self.rfile.read(length)).get("texts")
+            if not isinstance(texts, list) or not all(isinstance(t, str) for t in texts):
+                raise ValueError("'texts' must be a list of strings")
+        except (ValueError, AttributeError) as e:
+            self._send(400, {"error": str(e)})
+            return
+        try:
+            embeddings = self.server.owner.batcher.embed(texts)
+        except Exception as e:
+            logger.exception("Encoding failed")
+            self._send(500, {"error": str(e)})
+            return
+        self._send(200, {"embeddings": embeddings})
+
+    def _send(self, status: int, body: dict[str, Any]) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug(f"{self.address_string()} {format % args}")
+
+
+class _EmbeddingHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    owner: "EmbeddingServer"
+
+
+class EmbeddingServer:
+    """
+    Localhost HTTP service around one warm embedding model.
+
+    Every request handler runs in its own thread and hands its texts to a
+    shared MicroBatcher, so concurrent callers (build_index.py, the Gradio UI,
+    search_catalog.py) share model calls. The model is loaded and warmed up
+    once at start; clients use Embedder(server_url=...) and start instantly.
+
+    Endpoints: ``GET /health`` returns the model name and vector dimension,
+    ``POST /embed`` with ``{"texts": [...]}`` returns ``{"embeddings": [...]}``.
+    """
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_MODEL_NAME,
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_wait: float = DEFAULT_MAX_WAIT,
+        model: Optional[Any] = None,
+    ) -> None:
+        """
+        Load the model and bind the server socket.
+
+        Args:
+            model_name: SentenceTransformer model to serve.
+            host: Interface to listen on (default: localhost only).
+            port: TCP port (0 picks a free one).
+            max_batch_size: Maximum number of texts per model call.
+            max_wait: Seconds a request waits for others to join its batch.
+            model: Already loaded model with an encode(texts) method (used for testing).
+
+        Raises:
+            ImportError: If no model is given and sentence-transformers is not installed.
+        """
+        self.model_name = model_name
+        self.model = model if model is not None else _load_model(model_name)
+        # The first encode call initializes lazy parts of the model; pay that before serving
+        self.dimension = len(self.model.encode(["warm-up"])[0])
+        self.batcher = MicroBatcher(self.model.encode, max_batch_size=max_batch_size, max_wait=max_wait)
+        self.httpd = _EmbeddingHTTPServer((host, port), _Handler)
+        self.httpd.owner = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """The base URL of the server."""
+        host, port = self.httpd.server_address[:2]
+        if isinstance(host, bytes):
+            host = host.decode()
+        return f"http://{host}:{port}"
+
+    def serve_forever(self) -> None:
+        """Serves requests until stop() is called."""
+        logger.info(f"Embedding server for {self.model_name} listening on {self.url}")
+        self.httpd.serve_forever()
+
+    def start(self) -> None:
+        """Serves requests in a background thread."""
+        self._thread = threading.Thread(target=self.serve_forever, name="embedding-server", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stops serving and closes the socket."""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.batcher.close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+class EmbeddingClient:
+    """Client of an EmbeddingServer."""
+
+    def __init__(self, url: str, timeout: float = DEFAULT_CLIENT_TIMEOUT) -> None:
+        """
+        Initialize the client.
+
+        Args:
+            url: Base URL of the server, e.g. http://127.0.0.1:8765.
+            timeout: Seconds to wait for an embedding response.
+        """
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def health(self) -> Optional[dict[str, Any]]:
+        """
+        Asks the server for its model.
+
+        Returns:
+            The health response, or None if the server is not reachable.
+        """
+        try:
+            with urllib.request.urlopen(f"{self.url}/health", timeout=HEALTH_TIMEOUT) as response:
+                return dict(json.loads(response.read()))
+        except (OSError, ValueError):
+            return None
+
+    @timed("embedding_client.embed")
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        """
+        Encodes texts on the server.
+
+        Args:
+            texts: The texts to encode.
+
+        Returns:
+            One vector per text.
+
+        Raises:
+            OSError: If the server cannot be reached or reports an error.
+        """
+        request = urllib.request.Request(
+            f"{self.url}/embed",
+            data=json.dumps({"texts": texts}).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return list(json.loads(response.read())["embeddings"])
+        except urllib.error.HTTPError as e:
+            raise OSError(f"Embedding server error {e.code}: {e.read().decode('utf-8', 'replace')}") from e
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from semantic_backup_explorer.utils.logging_utils import setup_logging
+
+    parser = argparse.ArgumentParser(description="Serve a warm embedding model on localhost.")
+    parser.add_argument("--model", default=DEFAULT_MODEL_NAME, help="SentenceTransformer model name.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="Interface to listen on.")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="TCP port.")
+    parser.add_argument("--max_batch_size", type=int, default=DEFAULT_MAX_BATCH_SIZE, help="Maximum texts per model call.")
+    parser.add_argument(
+        "--max_wait_ms", type=float, default=DEFAULT_MAX_WAIT * 1000, help="Milliseconds a request waits for others."
+    )
+    args = parser.parse_args()
+
+    setup_logging()
+    server = EmbeddingServer(args.model, args.host, args.port, args.max_batch_size, args.max_wait_ms / 1000)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
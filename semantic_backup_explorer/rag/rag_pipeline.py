@@ -1,5 +1,7 @@
 """Module for the RAG (Retrieval-Augmented Generation) pipeline."""
 
+from typing import Any, Optional
+
 from dotenv import load_dotenv
 
 try:
@@ -20,19 +22,36 @@ class RAGPipeline:
     Orchestrates the retrieval and generation process to answer questions about backups.
     """
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        embedder: Optional[Any] = None,
+        retriever: Optional[Any] = None,
+        client: Optional[Any] = None,
+        n_results: int = 3,
+    ) -> None:
         """
         Initialize the RAG pipeline with embedder, retriever, and LLM client.
 
+        Components that are not passed in are created with their defaults. Passing
+        them in allows offline evaluation with stub embedders and LLMs.
+
+        Args:
+            embedder: Object providing embed_query, and embed_queries for
+                retrieve_many (default: Embedder).
+            retriever: Object providing query, and query_many for retrieve_many (default: Retriever).
+            client: Object providing chat_completion (default: groq LLMClient).
+            n_results: Number of chunks used as context.
+
         Raises:
             ImportError: If any semantic dependencies are missing.
         """
-        if not HAS_LLM_CLIENT:
+        if client is None and not HAS_LLM_CLIENT:
             raise ImportError("llm-client is not installed. Please install it with 'pip install -e .[semantic]'")
-        self.embedder = Embedder()
-        self.retriever = Retriever()
+        self.embedder = embedder if embedder is not None else Embedder()
+        self.retriever = retriever if retriever is not None else Retriever()
         # Default to groq as requested
-        self.client = LLMClient(api_choice="groq")
+        self.client = client if client is not None else LLMClient(api_choice="groq")
+        self.n_results = n_results
 
     def answer_question(self, question: str) -> tuple[str, str]:
         """
@@ -48,17 +67,8 @@ class RAGPipeline:
         query_embedding = self.embedder.embed_query(question)
 
         # 2. Retrieve relevant chunks
-        results = self.retriever.query(query_embedding, n_results=3)
-
-        documents = results.get("documents")
-        if documents and len(documents) > 0:
-            doc_list = documents[0]
-            if doc_list:
-                context = "\n\n".join(doc_list)
-            else:
-                context = ""
-        else:
-            context = ""
+        results = self.retriever.query(query_embedding, n_results=self.n_results)
+        context = self.context(results)
 
         # 3. Generate answer
         prompt = f"""
@@ -80,3 +90,40 @@ Antwort:"""
 
         response = self.client.chat_completion(messages)
         return response, context
+
+    def retrieve_many(self, questions: list[str], n_results: Optional[int] = None) -> list[Any]:
+        """
+        Retrieves the chunks of several questions with one batched encode and one search.
+
+        Use this instead of a loop over answer_question() when many lookups
+        are resolved at once, e.g. unmatched source folders or an evaluation
+        question set.
+
+        Args:
+            questions: The questions.
+            n_results: Number of chunks per question (default: the pipeline's n_results).
+
+        Returns:
+            One retriever result per question, in the layout of Retriever.query();
+            pass them to context() for the context text.
+        """
+        if not questions:
+            return []
+        embeddings = self.embedder.embed_queries(questions)
+        return list(self.retriever.query_many(embeddings, n_results=n_results or self.n_results))
+
+    @staticmethod
+    def context(results: Any) -> str:
+        """
+        Joins the documents of a single-query retriever result into the context text.
+
+        Args:
+            results: Result of Retriever.query() (or one entry of retrieve_many()).
+
+        Returns:
+            The documents separated by blank lines, or an empty string.
+        """
+        documents = results.get("documents")
+        if documents and documents[0]:
+            return "\n\n".join(documents[0])
+        return ""
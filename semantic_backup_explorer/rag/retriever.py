@@ -1,7 +1,10 @@
 """Module for managing the ChromaDB vector storage and retrieval."""
 
+import hashlib
+import json
+import logging
 from pathlib import Path
-from typing import Any
+from typing import Any, Optional
 
 try:
     import chromadb
@@ -12,35 +15,113 @@ except Exception:
     HAS_CHROMADB = False
     QueryResult = Any  # type: ignore
 
+from semantic_backup_explorer.rag.vector_store import NumpyVectorStore
+from semantic_backup_explorer.utils.config import BackupConfig
+from semantic_backup_explorer.utils.metrics import timed
+
+logger = logging.getLogger(__name__)
+
+# Subdirectory of the compressed NumPy store inside persist_directory
+COMPRESSED_STORE_DIR = "compressed"
+
+
+def chunk_id(chunk: dict[str, Any]) -> str:
+    """
+    Returns the content-addressed id of a chunk.
+
+    The id is a hash of the content and metadata, so a chunk that did not
+    change keeps its id when the index is chunked again.
+
+    Args:
+        chunk: Chunk dictionary with 'content' and 'metadata'.
+
+    Returns:
+        32 hex digits.
+    """
+    data = json.dumps([chunk["content"], chunk["metadata"]], sort_keys=True, ensure_ascii=False)
+    return hashlib.blake2b(data.encode("utf-8"), digest_size=16).hexdigest()
+
 
 class Retriever:
     """
     Manages ChromaDB vector storage for backup index chunks.
 
     This class handles storing and retrieving document embeddings using ChromaDB
-    as the persistence layer.
+    as the persistence layer. If a vector compression or the IVF index is
+    configured, the embeddings are stored in a NumpyVectorStore instead (see
+    vector_store.py); existing NumPy stores are always opened as such.
+
+    Chunks are stored under content-addressed ids (see chunk_id), so
+    update_chunks() can replace only the chunks that changed.
     """
 
-    def __init__(self, persist_directory: str | Path = "data/embeddings") -> None:
+    def __init__(
+        self,
+        persist_directory: str | Path = "data/embeddings",
+        compression: Optional[str] = None,
+        pca_dim: Optional[int] = None,
+        rescore: Optional[bool] = None,
+        index: Optional[str] = None,
+        nlist: Optional[int] = None,
+        nprobe: Optional[int] = None,
+    ) -> None:
         """
         Initialize retriever with ChromaDB persistence.
 
         Args:
             persist_directory: Path to ChromaDB storage directory.
                              Will be created if it doesn't exist.
+            compression: "float16", "int8" or "none" to store the vectors in a
+                NumpyVectorStore, empty for ChromaDB (default: the vector_compression setting).
+            pca_dim: PCA dimension of the NumpyVectorStore (default: the vector_pca_dim setting).
+            rescore: Rescore with full-precision vectors (default: the vector_rescore setting).
+            index: "flat" or "ivf" for an approximate IVF index in a NumpyVectorStore
+                (default: the vector_index setting).
+            nlist: Inverted lists of the IVF index, 0 for automatic (default: the vector_ivf_lists setting).
+            nprobe: Inverted lists scanned per query (default: the vector_ivf_probe setting).
 
         Raises:
-            ImportError: If chromadb is not installed.
+            ImportError: If ChromaDB is used but chromadb is not installed.
         """
+        config = BackupConfig()
+        self.persist_directory = Path(persist_directory)
+        self.compression = config.vector_compression if compression is None else compression
+        self.pca_dim = config.vector_pca_dim if pca_dim is None else pca_dim
+        self.rescore = config.vector_rescore if rescore is None else rescore
+        self.index = config.vector_index if index is None else index
+        self.store: Optional[NumpyVectorStore] = None
+        store_dir = self.persist_directory / COMPRESSED_STORE_DIR
+        if self._use_store() or NumpyVectorStore.exists(store_dir):
+            self.store = NumpyVectorStore(
+                store_dir,
+                compression=self.compression or "none",
+                pca_dim=self.pca_dim,
+                rescore=self.rescore,
+                index=self.index,
+                nlist=config.vector_ivf_lists if nlist is None else nlist,
+                nprobe=config.vector_ivf_probe if nprobe is None else nprobe,
+            )
+        else:
+            self._open_chroma()
+
+    def _use_store(self) -> bool:
+        return bool(self.compression) or self.index != "flat"
+
+    def _open_chroma(self) -> None:
         if not HAS_CHROMADB:
             raise ImportError("chromadb is not installed. Please install it with 'pip install -e .[semantic]'")
-        self.client = chromadb.PersistentClient(path=str(persist_directory))
+        self.client = chromadb.PersistentClient(path=str(self.persist_directory))
         self.collection = self.client.get_or_create_collection(name="backup_index")
 
+    @timed("retriever.add_chunks")
     def add_chunks(self, chunks: list[dict[str, Any]], embeddings: list[list[float]]) -> None:
         """
         Add document chunks with their embeddings to the collection.
 
+        Chunks that are already stored (same content and metadata) are
+        replaced in ChromaDB; in a NumpyVectorStore they are stored twice,
+        so use update_chunks() to skip them.
+
         Args:
             chunks: List of chunk dictionaries, each containing 'content' and 'metadata'.
             embeddings: List of embedding vectors, one per chunk.
@@ -51,17 +132,75 @@ class Retriever:
         if len(chunks) != len(embeddings):
             raise ValueError(f"Chunk count ({len(chunks)}) must match embedding count ({len(embeddings)})")
 
-        ids = [f"chunk_{i}" for i in range(len(chunks))]
-        metadatas = [c["metadata"] for c in chunks]
-        documents = [c["content"] for c in chunks]
+        # Identical chunks share an id; keep the first of them
+        rows: dict[str, int] = {}
+        for i, chunk in enumerate(chunks):
+            rows.setdefault(chunk_id(chunk), i)
+        ids = list(rows)
+        metadatas = [chunks[i]["metadata"] for i in rows.values()]
+        documents = [chunks[i]["content"] for i in rows.values()]
+        embeddings = [embeddings[i] for i in rows.values()]
+
+        if self.store is not None:
+            self.store.add(ids, embeddings, documents, metadatas)
+            return
 
-        self.collection.add(
+        self.collection.upsert(
             embeddings=embeddings,
             documents=documents,
             metadatas=metadatas,
             ids=ids,
         )
 
+    @timed("retriever.update_chunks")
+    def update_chunks(self, chunks: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """
+        Deletes stored chunks that are not in chunks and returns the chunks that are not stored yet.
+
+        Embedding and adding only the returned chunks brings the collection
+        to the same state as clear() followed by adding all chunks.
+
+        Args:
+            chunks: All chunks of the current index.
+
+        Returns:
+            The chunks that still need to be embedded and added (without duplicates).
+        """
+        ids: dict[str, dict[str, Any]] = {}
+        for chunk in chunks:
+            ids.setdefault(chunk_id(chunk), chunk)
+        if self.store is not None:
+            missing = self.store.retain(list(ids))
+            new = [c for c, m in zip(ids.values(), missing, strict=True) if m]
+        else:
+            stored = set(self.collection.get(include=[])["ids"])
+            stale = list(stored - ids.keys())
+            if stale:
+                self.collection.delete(ids=stale)
+            new = [c for i, c in ids.items() if i not in stored]
+        logger.info(f"{len(ids) - len(new)} chunks unchanged, {len(new)} new")
+        return new
+
+    def delete(self, ids: list[str]) -> None:
+        """
+        Deletes chunks by id.
+
+        Args:
+            ids: Chunk ids (see chunk_id); unknown ids are ignored.
+        """
+        if not ids:
+            return
+        if self.store is not None:
+            self.store.delete(ids)
+        else:
+            self.collection.delete(ids=ids)
+
+    def flush(self) -> None:
+        """Finishes pending work of a NumpyVectorStore (PCA fit, IVF training, compaction) before the first query."""
+        if self.store is not None:
+            self.store.flush()
+
+    @timed("retriever.query")
     def query(self, query_embedding: list[float], n_results: int = 5) -> QueryResult:
         """
         Query the collection for the most relevant chunks.
@@ -73,16 +212,53 @@ class Retriever:
         Returns:
             ChromaDB QueryResult containing documents, metadatas, and distances.
         """
+        if self.store is not None:
+            return self.store.query(query_embedding, n_results=n_results)
         results = self.collection.query(
             query_embeddings=[query_embedding],
             n_results=n_results,
         )
         return results
 
+    @timed("retriever.query_many")
+    def query_many(self, query_embeddings: list[list[float]], n_results: int = 5) -> list[QueryResult]:
+        """
+        Query the collection for several embeddings in one search.
+
+        Args:
+            query_embeddings: The embedding vectors of the queries.
+            n_results: Number of results to return per query.
+
+        Returns:
+            One result per query, in the layout of query().
+        """
+        if not query_embeddings:
+            return []
+        if self.store is not None:
+            return self.store.query_many(query_embeddings, n_results=n_results)
+        results = self.collection.query(
+            query_embeddings=query_embeddings,
+            n_results=n_results,
+        )
+        # ChromaDB returns one list per query under each key; split them into single-query results
+        return [
+            {key: [value[i]] if key != "included" and isinstance(value, list) else value for key, value in results.items()}
+            for i in range(len(query_embeddings))
+        ]
+
     def clear(self) -> None:
         """
         Clears the collection by deleting and recreating it.
+
+        A NumPy store is rebuilt with the current settings; without a
+        configured compression or index the retriever switches back to ChromaDB.
         """
+        if self.store is not None:
+            self.store.clear()
+            if not self._use_store():
+                self.store = None
+                self._open_chroma()
+            return
         try:
             self.client.delete_collection("backup_index")
             self.collection = self.client.get_or_create_collection(name="backup_index")
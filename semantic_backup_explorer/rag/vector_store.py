@@ -0,0 +1,827 @@
+"""Compressed on-disk vector store with an optional IVF index, built on NumPy."""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any, Optional
+
+import numpy as np
+
+from semantic_backup_explorer.utils.metrics import inc, timed
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIONS = ("none", "float16", "int8")
+DEFAULT_COMPRESSION = "float16"
+INDEXES = ("flat", "ivf")
+# Candidates per requested result that are rescored with the full-precision vectors
+DEFAULT_RESCORE_FACTOR = 4
+# Inverted lists searched per query
+DEFAULT_NPROBE = 16
+# The PCA is fitted on a random sample of at most this many vectors
+PCA_FIT_ROWS = 100_000
+# Rows whose compressed vectors are converted to float32 at once while searching
+SEARCH_BLOCK_ROWS = 65_536
+# Below this many vectors a full scan is fast enough, so no IVF is trained
+IVF_MIN_ROWS = 10_000
+# k-means runs on this many sample vectors per inverted list
+KMEANS_ROWS_PER_LIST = 64
+KMEANS_ITERATIONS = 10
+# flush() drops deleted rows from the files once they make up this fraction
+COMPACT_FRACTION = 0.25
+
+STATE_FILE = "store.json"
+RECORDS_FILE = "records.jsonl"
+OFFSETS_FILE = "offsets.i64"
+KEYS_FILE = "keys.i64"
+DELETED_FILE = "deleted.u8"
+FULL_FILE = "full.f32"
+CODES_FILE = "codes.bin"
+SCALES_FILE = "scales.f32"
+NORMS_FILE = "norms.f32"
+LISTS_FILE = "lists.i32"
+IVF_ORDER_FILE = "ivf_order.i64"
+PCA_FILE = "pca.npz"
+IVF_FILE = "ivf.npz"
+
+CODE_DTYPES = {"none": np.float32, "float16": np.float16, "int8": np.int8}
+
+
+def _write_at(path: Path, offset: int, data: bytes) -> None:
+    """Writes data at offset of a file and cuts off anything after it (left over by an interrupted write)."""
+    with open(path, "r+b" if path.exists() else "wb") as f:
+        f.seek(offset)
+        f.write(data)
+        if f.seek(0, os.SEEK_END) > offset + len(data):
+            f.truncate(offset + len(data))
+
+
+def _smallest(values: np.ndarray, count: int) -> np.ndarray:
+    """Returns the indices of the count smallest values, smallest first."""
+    if count < len(values):
+        candidates = np.argpartition(values, count - 1)[:count]
+    else:
+        candidates = np.arange(len(values))
+    return candidates[np.argsort(values[candidates], kind="stable")]
+
+
+def id_keys(ids: Iterable[str]) -> np.ndarray:
+    """Returns a 64-bit key per id, used to find rows by id without keeping the id strings in memory."""
+    return np.fromiter(
+        (int.from_bytes(hashlib.blake2b(i.encode("utf-8"), digest_size=8).digest(), "little", signed=True) for i in ids),
+        dtype=np.int64,
+    )
+
+
+def _nearest(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Returns the index of the nearest centroid of every vector."""
+    centroid_norms = np.einsum("ij,ij->i", centroids, centroids)
+    nearest = np.empty(len(vectors), dtype=np.int32)
+    block_rows = max(1, SEARCH_BLOCK_ROWS * 16 // max(1, len(centroids)))
+    for start in range(0, len(vectors), block_rows):
+        block = np.asarray(vectors[start : start + block_rows], dtype=np.float32)
+        nearest[start : start + len(block)] = np.argmin(centroid_norms - 2 * block @ centroids.T, axis=1)
+    return nearest
+
+
+def _kmeans(sample: np.ndarray, count: int, rng: np.random.Generator) -> np.ndarray:
+    """Clusters the sample into count centroids (Lloyd's algorithm, random start)."""
+    centroids = np.array(sample[rng.choice(len(sample), count, replace=False)], dtype=np.float32)
+    for _ in range(KMEANS_ITERATIONS):
+        assignment = _nearest(sample, centroids)
+        order = np.argsort(assignment, kind="stable")
+        counts = np.bincount(assignment, minlength=count)
+        filled = np.flatnonzero(counts)
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[filled]
+        centroids[filled] = np.add.reduceat(sample[order], starts) / counts[filled, None]
+    return centroids
+
+
+class _Column:
+    """A per-row array in an append-only raw file; memory-mapped when a store is opened."""
+
+    def __init__(self, path: Path, dtype: Any, width: int = 0) -> None:
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        # 0 for one value per row
+        self.width = width
+        self.rows = 0
+        self._blocks: list[np.ndarray] = []
+
+    def _shape(self, rows: int) -> tuple[int, ...]:
+        return (rows, self.width) if self.width else (rows,)
+
+    def load(self, rows: int) -> None:
+        self.rows = rows
+        self._blocks = [np.memmap(self.path, dtype=self.dtype, mode="r", shape=self._shape(rows))] if rows else []
+
+    def append(self, values: np.ndarray) -> None:
+        values = np.ascontiguousarray(values, dtype=self.dtype)
+        _write_at(self.path, self.rows * self.dtype.itemsize * max(1, self.width), values.tobytes())
+        self._blocks.append(values)
+        self.rows += len(values)
+
+    def array(self) -> np.ndarray:
+        """All rows as one array (merging the blocks appended since loading)."""
+        if len(self._blocks) > 1:
+            self._blocks = [np.concatenate(self._blocks)]
+        return self._blocks[0] if self._blocks else np.zeros(self._shape(0), dtype=self.dtype)
+
+
+class NumpyVectorStore:
+    """
+    Stores chunk embeddings compressed and searches them by squared L2 distance.
+
+    Each vector is optionally reduced with a PCA fitted on the collection and
+    then stored as float16 or as int8 with one scale per vector, so the part
+    that is searched in memory is 2x (float16) to 4x (int8) smaller than
+    float32, times the PCA reduction. The search ranks the compressed vectors
+    and rescores the best rescore_factor * n_results of them with the exact
+    float32 vectors, which stay on disk and are memory-mapped; only those
+    candidate rows are read. Without rescoring, no float32 vectors are kept.
+
+    With index="ivf", the compressed vectors are clustered with k-means into
+    inverted lists once the store has IVF_MIN_ROWS vectors, and a query only
+    scans the nprobe lists whose centroids are closest to it (approximate,
+    see measure_recall). Vectors added later join the list of their nearest
+    centroid; compact() or clear() and a rebuild recluster them.
+
+    Every row has an id (see Retriever for content-addressed chunk ids).
+    delete() and retain() only mark rows as deleted; flush() rewrites the
+    files without them once they make up COMPACT_FRACTION of the store.
+
+    Documents and metadata are appended to a JSON Lines file and only read
+    for the returned results. The per-row arrays are append-only raw files
+    that are memory-mapped when the store is opened, so opening even a large
+    store is instant. The counts in store.json are written last, so an
+    interrupted write is ignored.
+
+    Distances are squared L2 distances like ChromaDB's default, so results
+    of both backends can be merged (see DriveCatalog.semantic_search).
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        compression: str = DEFAULT_COMPRESSION,
+        pca_dim: int = 0,
+        rescore: bool = True,
+        rescore_factor: int = DEFAULT_RESCORE_FACTOR,
+        index: str = "flat",
+        nlist: int = 0,
+        nprobe: int = DEFAULT_NPROBE,
+    ) -> None:
+        """
+        Open the store in a directory; an existing store keeps its own settings.
+
+        Args:
+            directory: Directory of the store files (created on the first add).
+            compression: "float16", "int8" or "none" (float32).
+            pca_dim: Reduce the vectors to this many PCA components (0 keeps all dimensions).
+            rescore: Keep the float32 vectors and rescore the top candidates with them.
+            rescore_factor: Candidates per requested result that are rescored.
+            index: "flat" (scan all vectors) or "ivf" (scan the closest inverted lists).
+            nlist: Number of inverted lists (0: square root of the number of vectors).
+            nprobe: Inverted lists scanned per query; more is slower but finds more true neighbours.
+
+        Raises:
+            ValueError: If the compression or index is unknown.
+        """
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression: {compression} (expected one of {', '.join(COMPRESSIONS)})")
+        if index not in INDEXES:
+            raise ValueError(f"Unknown index: {index} (expected one of {', '.join(INDEXES)})")
+        self.directory = Path(directory)
+        self.rescore_factor = max(1, rescore_factor)
+        self.nprobe = max(1, nprobe)
+        self._settings = (compression, max(0, pca_dim), rescore, index, max(0, nlist))
+        self._load()
+
+    @staticmethod
+    def exists(directory: str | Path) -> bool:
+        """Returns True if a store has been written to the directory."""
+        return (Path(directory) / STATE_FILE).exists()
+
+    def __len__(self) -> int:
+        """Number of stored (not deleted) vectors."""
+        return self.count - self.deleted_count
+
+    @property
+    def memory_bytes(self) -> int:
+        """Bytes of the arrays that are searched in memory."""
+        columns = [self._codes, self._scales, self._norms, self._offsets, self._keys, self._lists]
+        return int(sum(c.array().nbytes for c in columns) + self._deleted.nbytes)
+
+    def _reset(self) -> None:
+        self.compression, self.pca_dim, self.rescore, self.index, self.nlist = self._settings
+        self.dim = 0
+        self.count = 0
+        self.encoded = 0
+        self.deleted_count = 0
+        self.full_offset = 0
+        self.records_size = 0
+        self.ivf_rows = 0
+        self.mean: Optional[np.ndarray] = None
+        self.components: Optional[np.ndarray] = None
+        self.centroids: Optional[np.ndarray] = None
+        self._ivf_bounds = np.zeros(1, dtype=np.int64)
+        self._ivf_order = np.zeros(0, dtype=np.int64)
+        self._deleted = np.zeros(0, dtype=np.bool_)
+        self._full: Optional[np.ndarray] = None
+        self._make_columns()
+
+    def _make_columns(self) -> None:
+        self._offsets = _Column(self.directory / OFFSETS_FILE, np.int64)
+        self._keys = _Column(self.directory / KEYS_FILE, np.int64)
+        self._codes = _Column(self.directory / CODES_FILE, CODE_DTYPES[self.compression], self._code_dim())
+        self._scales = _Column(self.directory / SCALES_FILE, np.float32)
+        self._norms = _Column(self.directory / NORMS_FILE, np.float32)
+        self._lists = _Column(self.directory / LISTS_FILE, np.int32)
+
+    def _load(self) -> None:
+        self._reset()
+        state_path = self.directory / STATE_FILE
+        if not state_path.exists():
+            return
+        state = json.loads(state_path.read_text(encoding="utf-8"))
+        self.compression = state["compression"]
+        self.pca_dim = state["pca_dim"]
+        self.rescore = state["rescore"]
+        self.index = state["index"]
+        self.nlist = state["nlist"]
+        self.dim = state["dim"]
+        self.count = state["count"]
+        self.encoded = state["encoded"]
+        self.deleted_count = state["deleted_count"]
+        self.full_offset = state["full_offset"]
+        self.records_size = state["records_size"]
+        self.ivf_rows = state["ivf_rows"]
+        if (self.directory / PCA_FILE).exists():
+            with np.load(self.directory / PCA_FILE) as pca:
+                self.mean = pca["mean"]
+                self.components = pca["components"]
+        if (self.directory / IVF_FILE).exists():
+            with np.load(self.directory / IVF_FILE) as ivf:
+                self.centroids = ivf["centroids"]
+                self._ivf_bounds = ivf["bounds"]
+        self._make_columns()
+        self._offsets.load(self.count)
+        self._keys.load(self.count)
+        self._deleted = np.fromfile(self.directory / DELETED_FILE, dtype=np.bool_, count=self.count)
+        for column in (self._codes, self._norms) + ((self._scales,) if self.compression == "int8" else ()):
+            column.load(self.encoded)
+        if self.centroids is not None:
+            self._lists.load(self.encoded)
+            if self.ivf_rows:
+                self._ivf_order = np.memmap(self.directory / IVF_ORDER_FILE, dtype=np.int64, mode="r", shape=(self.ivf_rows,))
+
+    def _save_state(self) -> None:
+        state = {
+            "compression": self.compression,
+            "pca_dim": self.pca_dim,
+            "rescore": self.rescore,
+            "index": self.index,
+            "nlist": self.nlist,
+            "dim": self.dim,
+            "count": self.count,
+            "encoded": self.encoded,
+            "deleted_count": self.deleted_count,
+            "full_offset": self.full_offset,
+            "records_size": self.records_size,
+            "ivf_rows": self.ivf_rows,
+        }
+        tmp_path = self.directory / (STATE_FILE + ".tmp")
+        tmp_path.write_text(json.dumps(state), encoding="utf-8")
+        os.replace(tmp_path, self.directory / STATE_FILE)
+
+    def _code_dim(self) -> int:
+        return self.components.shape[0] if self.components is not None else self.dim
+
+    def _full_vectors(self) -> Optional[np.ndarray]:
+        """The float32 vectors on disk (rows from full_offset on), memory-mapped."""
+        rows = self.count - self.full_offset
+        if rows <= 0:
+            return None
+        if self._full is None:
+            self._full = np.memmap(self.directory / FULL_FILE, dtype=np.float32, mode="r", shape=(rows, self.dim))
+        return self._full
+
+    def _codec_ready(self) -> bool:
+        return not self.pca_dim or self.components is not None
+
+    def _project(self, vectors: np.ndarray) -> np.ndarray:
+        if self.components is None or self.mean is None:
+            return vectors
+        return np.asarray((vectors - self.mean) @ self.components.T, dtype=np.float32)
+
+    def _decode(self, rows: Optional[np.ndarray] = None, start: int = 0, stop: int = 0) -> np.ndarray:
+        """Compressed vectors as float32, either of some rows or of the range start:stop."""
+        codes = self._codes.array()
+        block = codes[rows] if rows is not None else codes[start:stop]
+        vectors = np.asarray(block, dtype=np.float32)
+        if self.compression == "int8":
+            scales = self._scales.array()
+            vectors = vectors * (scales[rows] if rows is not None else scales[start:stop])[:, None]
+        return vectors
+
+    def _fit_pca(self) -> None:
+        """Fits the PCA on (a sample of) the float32 vectors on disk."""
+        full = self._full_vectors()
+        if full is None:
+            return
+        if self.pca_dim >= self.dim:
+            logger.warning(f"PCA dimension {self.pca_dim} is not below the embedding dimension {self.dim}, keeping all.")
+            self.pca_dim = 0
+            return
+        rows = np.arange(len(full))
+        if len(rows) > PCA_FIT_ROWS:
+            rows = np.sort(np.random.default_rng(0).choice(rows, PCA_FIT_ROWS, replace=False))
+        sample = np.asarray(full[rows], dtype=np.float64)
+        mean = sample.mean(axis=0)
+        _, _, vt = np.linalg.svd(sample - mean, full_matrices=False)
+        self.mean = mean.astype(np.float32)
+        self.components = vt[: self.pca_dim].astype(np.float32)
+        self._codes.width = self._code_dim()
+        np.savez(self.directory / PCA_FILE, mean=self.mean, components=self.components)
+        logger.info(f"Fitted PCA {self.dim} -> {len(self.components)} dimensions on {len(rows)} vectors")
+
+    def _encode(self, vectors: np.ndarray) -> None:
+        """Compresses vectors and appends them to the codes (and their inverted lists)."""
+        reduced = self._project(vectors)
+        if self.compression == "int8":
+            scales = np.abs(reduced).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            scales = scales.astype(np.float32)
+            codes = np.rint(reduced / scales[:, None]).astype(np.int8)
+            self._scales.append(scales)
+            decoded = codes.astype(np.float32) * scales[:, None]
+        else:
+            codes = reduced.astype(CODE_DTYPES[self.compression])
+            decoded = codes.astype(np.float32)
+        self._codes.append(codes)
+        self._norms.append(np.einsum("ij,ij->i", decoded, decoded))
+        if self.centroids is not None:
+            self._lists.append(_nearest(decoded, self.centroids))
+        self.encoded += len(codes)
+
+    def _encode_pending(self) -> None:
+        """Compresses the vectors that wait for the PCA fit."""
+        if self.encoded == self.count:
+            return
+        if not self._codec_ready():
+            self._fit_pca()
+        full = self._full_vectors()
+        if full is None:
+            return
+        for start in range(self.encoded - self.full_offset, len(full), SEARCH_BLOCK_ROWS):
+            self._encode(np.asarray(full[start : start + SEARCH_BLOCK_ROWS]))
+        if not self.rescore:
+            self._full = None
+            _write_at(self.directory / FULL_FILE, 0, b"")
+            self.full_offset = self.count
+        self._save_state()
+
+    def _train_ivf(self) -> None:
+        """Clusters the compressed vectors into inverted lists and assigns all rows to them."""
+        nlist = min(self.nlist or int(np.sqrt(self.encoded)), self.encoded)
+        rng = np.random.default_rng(0)
+        rows = np.arange(self.encoded)
+        if self.encoded > nlist * KMEANS_ROWS_PER_LIST:
+            rows = np.sort(rng.choice(rows, nlist * KMEANS_ROWS_PER_LIST, replace=False))
+        self.centroids = _kmeans(self._decode(rows), nlist, rng)
+        self.nlist = nlist
+        self._lists = _Column(self.directory / LISTS_FILE, np.int32)
+        for start in range(0, self.encoded, SEARCH_BLOCK_ROWS):
+            stop = min(start + SEARCH_BLOCK_ROWS, self.encoded)
+            self._lists.append(_nearest(self._decode(start=start, stop=stop), self.centroids))
+        self.ivf_rows = 0
+        logger.info(f"Trained IVF index with {nlist} lists on {len(rows)} of {self.encoded} vectors")
+
+    def _write_ivf_order(self, centroids: np.ndarray) -> None:
+        """Sorts the rows by inverted list, so each list is one range of the order."""
+        lists = self._lists.array()
+        order = np.argsort(lists, kind="stable").astype(np.int64)
+        self._ivf_bounds = np.searchsorted(lists[order], np.arange(len(centroids) + 1)).astype(np.int64)
+        _write_at(self.directory / IVF_ORDER_FILE, 0, order.tobytes())
+        np.savez(self.directory / IVF_FILE, centroids=centroids, bounds=self._ivf_bounds)
+        self._ivf_order = order
+        self.ivf_rows = len(order)
+
+    def _mark_deleted(self, rows: np.ndarray) -> int:
+        rows = rows[~self._deleted[rows]]
+        if len(rows):
+            self._deleted[rows] = True
+            self.deleted_count += len(rows)
+            _write_at(self.directory / DELETED_FILE, 0, self._deleted.tobytes())
+        return len(rows)
+
+    @timed("vector_store.add")
+    def add(
+        self,
+        ids: list[str],
+        embeddings: Any,
+        documents: list[str],
+        metadatas: list[dict[str, Any]],
+    ) -> None:
+        """
+        Appends vectors with their documents.
+
+        Args:
+            ids: One id per vector; ids are not checked for duplicates, delete() stored ones first to replace them.
+            embeddings: 2-D array-like of float vectors.
+            documents: One document text per vector.
+            metadatas: One metadata dictionary per vector.
+
+        Raises:
+            ValueError: If the lengths or the vector dimension do not match.
+        """
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if len(ids) == 0:
+            return
+        if vectors.ndim != 2 or not len(ids) == len(vectors) == len(documents) == len(metadatas):
+            raise ValueError("ids, embeddings, documents and metadatas must have the same length")
+        if self.dim and vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected {self.dim}-dimensional embeddings, got {vectors.shape[1]}")
+        if not self.dim:
+            self.dim = vectors.shape[1]
+            self._codes.width = self._code_dim()
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        lines = [
+            json.dumps({"id": i, "document": d, "metadata": m}, ensure_ascii=False).encode("utf-8") + b"\n"
+            for i, d, m in zip(ids, documents, metadatas, strict=True)
+        ]
+        sizes = np.fromiter(map(len, lines), dtype=np.int64, count=len(lines))
+        _write_at(self.directory / RECORDS_FILE, self.records_size, b"".join(lines))
+        self._offsets.append(self.records_size + np.concatenate([[0], np.cumsum(sizes)[:-1]]))
+        self._keys.append(id_keys(ids))
+        self._deleted = np.concatenate([self._deleted, np.zeros(len(ids), dtype=np.bool_)])
+        _write_at(self.directory / DELETED_FILE, self.count, bytes(len(ids)))
+        self.records_size += int(sizes.sum())
+
+        if self.rescore or not self._codec_ready():
+            offset = (self.count - self.full_offset) * self.dim * 4
+            _write_at(self.directory / FULL_FILE, offset, vectors.tobytes())
+        else:
+            self.full_offset += len(vectors)
+        self.count += len(vectors)
+        self._full = None
+        if self._codec_ready():
+            self._encode(vectors)
+        self._save_state()
+        inc("vector_store.vectors", len(vectors))
+
+    def delete(self, ids: list[str]) -> int:
+        """
+        Deletes vectors by id.
+
+        Args:
+            ids: Ids of the vectors to delete; unknown ids are ignored.
+
+        Returns:
+            The number of deleted vectors.
+        """
+        if not self.count:
+            return 0
+        deleted = self._mark_deleted(np.flatnonzero(np.isin(self._keys.array(), id_keys(ids))))
+        if deleted:
+            self._save_state()
+        return deleted
+
+    def retain(self, ids: list[str]) -> list[bool]:
+        """
+        Deletes all vectors whose id is not in ids.
+
+        Args:
+            ids: Ids of the vectors to keep.
+
+        Returns:
+            For every id, whether it is missing from the store (and needs to be added).
+        """
+        keys = id_keys(ids)
+        stored = self._keys.array()
+        live = ~self._deleted
+        if self._mark_deleted(np.flatnonzero(live & ~np.isin(stored, keys))):
+            self._save_state()
+        return [bool(m) for m in ~np.isin(keys, stored[live])]
+
+    @timed("vector_store.flush")
+    def flush(self) -> None:
+        """
+        Finishes pending work so the next query is fast.
+
+        With a PCA, vectors are kept at full precision until the first query
+        (or flush), then the PCA is fitted on all of them. Later vectors are
+        projected with that PCA right away. flush() also trains the IVF index
+        once there are enough vectors, re-sorts its inverted lists after
+        inserts, and compacts the files after many deletes.
+        """
+        if self.count and self.deleted_count >= COMPACT_FRACTION * self.count:
+            self.compact()
+        self._encode_pending()
+        if self.index != "ivf" or self.encoded < IVF_MIN_ROWS:
+            return
+        if self.centroids is None:
+            self._train_ivf()
+        if self.centroids is not None and self.ivf_rows < self.encoded:
+            self._write_ivf_order(self.centroids)
+            self._save_state()
+
+    @timed("vector_store.compact")
+    def compact(self) -> None:
+        """Rewrites the store without its deleted rows; an IVF index is trained again on the next flush."""
+        self._encode_pending()
+        live = np.flatnonzero(~self._deleted)
+        tmp_dir = self.directory.with_name(self.directory.name + ".compact")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp = NumpyVectorStore(tmp_dir, self.compression, self.pca_dim, self.rescore, self.rescore_factor, self.index)
+        tmp.nlist = self._settings[4]
+        tmp.dim = self.dim
+        tmp.mean, tmp.components = self.mean, self.components
+        tmp._make_columns()
+        tmp.directory.mkdir(parents=True)
+        if self.components is not None:
+            shutil.copy2(self.directory / PCA_FILE, tmp_dir / PCA_FILE)
+
+        full = self._full_vectors() if self.rescore else None
+        offsets = self._offsets.array()
+        with open(self.directory / RECORDS_FILE, "rb") as f:
+            for start in range(0, len(live), SEARCH_BLOCK_ROWS):
+                rows = live[start : start + SEARCH_BLOCK_ROWS]
+                lines = []
+                for row in rows:
+                    f.seek(int(offsets[row]))
+                    lines.append(f.readline())
+                sizes = np.fromiter(map(len, lines), dtype=np.int64, count=len(lines))
+                _write_at(tmp_dir / RECORDS_FILE, tmp.records_size, b"".join(lines))
+                tmp._offsets.append(tmp.records_size + np.concatenate([[0], np.cumsum(sizes)[:-1]]))
+                tmp.records_size += int(sizes.sum())
+                tmp._keys.append(self._keys.array()[rows])
+                if full is not None:
+                    _write_at(tmp_dir / FULL_FILE, tmp.count * self.dim * 4, np.asarray(full[rows]).tobytes())
+                tmp._codes.append(self._codes.array()[rows])
+                tmp._norms.append(self._norms.array()[rows])
+                if self.compression == "int8":
+                    tmp._scales.append(self._scales.array()[rows])
+                tmp.count += len(rows)
+                tmp.encoded += len(rows)
+        tmp._deleted = np.zeros(tmp.count, dtype=np.bool_)
+        _write_at(tmp_dir / DELETED_FILE, 0, tmp._deleted.tobytes())
+        tmp.full_offset = 0 if full is not None else tmp.count
+        tmp._save_state()
+        logger.info(f"Compacted vector store {self.directory}: {self.count} -> {tmp.count} rows")
+
+        # Release the memory maps of the old files before replacing them
+        del tmp, full, offsets
+        self._reset()
+        old_dir = self.directory.with_name(self.directory.name + ".old")
+        os.replace(self.directory, old_dir)
+        os.replace(tmp_dir, self.directory)
+        shutil.rmtree(old_dir, ignore_errors=True)
+        self._load()
+
+    def _candidate_rows(self, query: np.ndarray, nprobe: int) -> Optional[np.ndarray]:
+        """Rows in the nprobe inverted lists closest to the (projected) query, or None to scan all rows."""
+        if self.centroids is None or nprobe >= len(self.centroids):
+            return None
+        centroid_distances = np.einsum("ij,ij->i", self.centroids, self.centroids) - 2 * self.centroids @ query
+        parts = [self._ivf_order[self._ivf_bounds[i] : self._ivf_bounds[i + 1]] for i in _smallest(centroid_distances, nprobe)]
+        # Rows added since the lists were last sorted are scanned as well
+        parts.append(np.arange(self.ivf_rows, self.encoded))
+        return np.sort(np.concatenate(parts))
+
+    def _approx_distances(self, query: np.ndarray, rows: Optional[np.ndarray]) -> np.ndarray:
+        """Squared L2 distances between the (projected) query and the compressed vectors of some or all rows."""
+        codes = self._codes.array()
+        if rows is not None:
+            dots = np.asarray(codes[rows], dtype=np.float32) @ query
+        else:
+            dots = np.empty(self.encoded, dtype=np.float32)
+            for start in range(0, self.encoded, SEARCH_BLOCK_ROWS):
+                block = np.asarray(codes[start : start + SEARCH_BLOCK_ROWS], dtype=np.float32)
+                dots[start : start + len(block)] = block @ query
+        norms = self._norms.array()
+        if self.compression == "int8":
+            scales = self._scales.array()
+            dots *= scales[rows] if rows is not None else scales[: self.encoded]
+        if rows is not None:
+            norms = norms[rows]
+        return np.asarray(norms - 2 * dots + float(query @ query), dtype=np.float32)
+
+    def _flat_candidates(self, queries: np.ndarray, count: int) -> list[tuple[np.ndarray, np.ndarray]]:
+        """The count rows with the smallest approximate distances to each (projected) query, scanning all rows."""
+        codes = self._codes.array()
+        norms = self._norms.array()
+        scales = self._scales.array() if self.compression == "int8" else None
+        query_norms = np.einsum("ij,ij->i", queries, queries)
+        # Keep the distance matrix of a block near the size of a single-query block
+        block_rows = max(1, SEARCH_BLOCK_ROWS * 16 // max(16, len(queries)))
+        best_rows = np.zeros((0, len(queries)), dtype=np.int64)
+        best = np.zeros((0, len(queries)), dtype=np.float32)
+        for start in range(0, self.encoded, block_rows):
+            stop = min(start + block_rows, self.encoded)
+            dots = np.asarray(codes[start:stop], dtype=np.float32) @ queries.T
+            if scales is not None:
+                dots *= scales[start:stop, None]
+            distances = norms[start:stop, None] - 2 * dots + query_norms
+            if self.deleted_count:
+                distances[self._deleted[start:stop]] = np.inf
+            rows = np.broadcast_to(np.arange(start, stop)[:, None], distances.shape)
+            best_rows = np.concatenate([best_rows, rows])
+            best = np.concatenate([best, distances])
+            if len(best) > count:
+                keep = np.argpartition(best, count - 1, axis=0)[:count]
+                best_rows = np.take_along_axis(best_rows, keep, axis=0)
+                best = np.take_along_axis(best, keep, axis=0)
+        candidates = []
+        for column in range(len(queries)):
+            order = np.argsort(best[:, column], kind="stable")
+            order = order[np.isfinite(best[order, column])]
+            candidates.append((best_rows[order, column], best[order, column]))
+        return candidates
+
+    def _ivf_candidates(self, query: np.ndarray, nprobe: int, count: int) -> tuple[np.ndarray, np.ndarray]:
+        """The count rows of the nprobe closest inverted lists with the smallest approximate distances."""
+        rows = self._candidate_rows(query, nprobe)
+        if self.deleted_count:
+            rows = np.flatnonzero(~self._deleted[: self.encoded]) if rows is None else rows[~self._deleted[rows]]
+        approx = self._approx_distances(query, rows)
+        best = _smallest(approx, count)
+        return (rows[best] if rows is not None else best), approx[best]
+
+    def search_many(
+        self, query_embeddings: Any, n_results: int, nprobe: Optional[int] = None
+    ) -> list[tuple[np.ndarray, np.ndarray]]:
+        """
+        Finds the rows closest to each of several queries.
+
+        Without an IVF index (or if nprobe covers all lists) the compressed
+        vectors are read once for all queries and multiplied with the query
+        matrix; the candidates of all queries are then rescored in one pass.
+
+        Args:
+            query_embeddings: The query vectors, one per row.
+            n_results: Number of rows to return per query.
+            nprobe: Inverted lists to scan (default: the store's nprobe).
+
+        Returns:
+            For each query, row numbers and their squared L2 distances, closest first.
+        """
+        self._encode_pending()
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        if not self.encoded or n_results <= 0 or not len(queries):
+            return [(np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)) for _ in range(len(queries))]
+        if queries.ndim != 2 or queries.shape[1] != self.dim:
+            raise ValueError(f"Expected {self.dim}-dimensional queries, got shape {queries.shape}")
+        projected = self._project(queries)
+        full = self._full_vectors() if self.rescore else None
+        count = n_results * self.rescore_factor if full is not None else n_results
+        nprobe = nprobe or self.nprobe
+        if self.centroids is not None and nprobe < len(self.centroids):
+            candidates = [self._ivf_candidates(query, nprobe, count) for query in projected]
+        else:
+            candidates = self._flat_candidates(projected, count)
+        if full is None:
+            return [(rows[:n_results], distances[:n_results]) for rows, distances in candidates]
+        # Read the full-precision vectors of all candidates at once, in file order
+        union = np.unique(np.concatenate([rows for rows, _ in candidates]))
+        vectors = np.asarray(full[union])
+        results = []
+        for query, (rows, _) in zip(queries, candidates, strict=True):
+            rows = np.sort(rows)
+            diff = vectors[np.searchsorted(union, rows)] - query
+            exact = np.einsum("ij,ij->i", diff, diff)
+            best = _smallest(exact, n_results)
+            results.append((rows[best], exact[best]))
+        return results
+
+    def search(self, query_embedding: Any, n_results: int, nprobe: Optional[int] = None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Finds the rows closest to a query.
+
+        Args:
+            query_embedding: The query vector.
+            n_results: Number of rows to return.
+            nprobe: Inverted lists to scan (default: the store's nprobe).
+
+        Returns:
+            Row numbers and their squared L2 distances, closest first.
+        """
+        query = np.asarray(query_embedding, dtype=np.float32)
+        if self.encoded and query.shape != (self.dim,):
+            raise ValueError(f"Expected a {self.dim}-dimensional query, got shape {query.shape}")
+        return self.search_many(query[None, :], n_results, nprobe)[0]
+
+    def brute_force(self, query_embedding: Any, n_results: int) -> np.ndarray:
+        """
+        Returns the rows closest to a query by scanning every vector at full precision.
+
+        Falls back to the compressed vectors if no float32 vectors are kept.
+
+        Args:
+            query_embedding: The query vector.
+            n_results: Number of rows to return.
+
+        Returns:
+            Row numbers, closest first.
+        """
+        self._encode_pending()
+        query = np.asarray(query_embedding, dtype=np.float32)
+        full = self._full_vectors() if self.rescore else None
+        if full is None:
+            distances = self._approx_distances(self._project(query), None)
+        else:
+            distances = np.empty(len(full), dtype=np.float32)
+            for start in range(0, len(full), SEARCH_BLOCK_ROWS):
+                diff = np.asarray(full[start : start + SEARCH_BLOCK_ROWS]) - query
+                distances[start : start + len(diff)] = np.einsum("ij,ij->i", diff, diff)
+        distances[self._deleted[: len(distances)]] = np.inf
+        best = _smallest(distances, min(n_results, len(self)))
+        return best
+
+    def measure_recall(self, queries: Any, n_results: int = 10, nprobe: Optional[int] = None) -> float:
+        """
+        Compares search results with an exact scan.
+
+        Args:
+            queries: 2-D array-like of query vectors.
+            n_results: Results per query.
+            nprobe: Inverted lists to scan (default: the store's nprobe).
+
+        Returns:
+            The fraction of the exact nearest neighbours that search() finds (1.0 for an empty store).
+        """
+        found = expected = 0
+        for query in np.asarray(queries, dtype=np.float32):
+            exact = self.brute_force(query, n_results)
+            found += len(np.intersect1d(self.search(query, n_results, nprobe)[0], exact))
+            expected += len(exact)
+        return found / expected if expected else 1.0
+
+    def _read_records(self, rows: np.ndarray) -> list[dict[str, Any]]:
+        records: list[dict[str, Any]] = []
+        if not len(rows):
+            return records
+        offsets = self._offsets.array()
+        with open(self.directory / RECORDS_FILE, "rb") as f:
+            for row in rows:
+                f.seek(int(offsets[row]))
+                records.append(json.loads(f.readline()))
+        return records
+
+    @timed("vector_store.query")
+    def query(self, query_embedding: Any, n_results: int = 5, nprobe: Optional[int] = None) -> dict[str, Any]:
+        """
+        Returns the closest documents in ChromaDB's result layout.
+
+        Args:
+            query_embedding: The query vector.
+            n_results: Number of results to return.
+            nprobe: Inverted lists to scan (default: the store's nprobe).
+
+        Returns:
+            Dictionary with ids, documents, metadatas and distances (one query).
+        """
+        return self._results([self.search(query_embedding, n_results, nprobe)])[0]
+
+    @timed("vector_store.query_many")
+    def query_many(self, query_embeddings: Any, n_results: int = 5, nprobe: Optional[int] = None) -> list[dict[str, Any]]:
+        """
+        Returns the closest documents of several queries with one matrix search.
+
+        Args:
+            query_embeddings: The query vectors.
+            n_results: Number of results per query.
+            nprobe: Inverted lists to scan (default: the store's nprobe).
+
+        Returns:
+            One dictionary per query, in the layout of query().
+        """
+        return self._results(self.search_many(query_embeddings, n_results, nprobe))
+
+    def _results(self, hits: list[tuple[np.ndarray, np.ndarray]]) -> list[dict[str, Any]]:
+        """Turns rows and distances of each query into ChromaDB's result layout."""
+        records = self._read_records(np.concatenate([rows for rows, _ in hits])) if hits else []
+        results = []
+        start = 0
+        for rows, distances in hits:
+            part = records[start : start + len(rows)]
+            start += len(rows)
+            results.append(
+                {
+                    "ids": [[r["id"] for r in part]],
+                    "documents": [[r["document"] for r in part]],
+                    "metadatas": [[r["metadata"] for r in part]],
+                    "distances": [[float(d) for d in distances]],
+                }
+            )
+        return results
+
+    def clear(self) -> None:
+        """Deletes all vectors and documents; the next add uses the settings passed to the constructor."""
+        self._reset()
+        shutil.rmtree(self.directory, ignore_errors=True)
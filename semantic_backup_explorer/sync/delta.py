@@ -0,0 +1,463 @@
+"""Delta transfer of large modified files: only changed blocks are written to the backup."""
+
+import hashlib
+import logging
+import os
+import shutil
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Callable, Optional
+
+from semantic_backup_explorer.sync.copy_engine import ByteProgressCallback, _ProgressReporter
+from semantic_backup_explorer.sync.throttle import Throttle
+from semantic_backup_explorer.utils.metrics import inc
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BLOCK_SIZE = 1024 * 1024
+DEFAULT_MIN_SIZE = 64 * 1024 * 1024
+DIGEST_SIZE = 16
+SIGNATURE_MAGIC = b"SBESIG1\n"
+JOURNAL_MAGIC = b"SBEJRN1\n"
+# Written after the last block, followed by the block count, new size, block size and
+# timestamps; a journal without it was interrupted and is discarded
+JOURNAL_END = b"SBEJEND\n"
+JOURNAL_TRAILER = len(JOURNAL_END) + 40
+# Per block: its index (8 bytes) and length (4 bytes)
+JOURNAL_ENTRY_HEADER = 12
+
+BlockWriter = Callable[[int, memoryview], None]
+
+
+@dataclass
+class BlockSignature:
+    """Block hashes of a backup copy, valid as long as its size and mtime are unchanged."""
+
+    size: int
+    mtime_ns: int
+    block_size: int
+    digests: list[bytes]
+
+
+@dataclass
+class DeltaResult:
+    """Outcome of a delta transfer."""
+
+    bytes_total: int
+    # All bytes written to the backup drive, including the journal
+    bytes_written: int
+    # Bytes of the changed blocks
+    bytes_changed: int
+    blocks_changed: int
+    blocks_total: int
+    signature_cached: bool
+
+
+def _block_digest(data: bytes | memoryview) -> bytes:
+    return hashlib.blake2b(data, digest_size=DIGEST_SIZE).digest()
+
+
+def compute_signature(path: str | Path, block_size: int = DEFAULT_BLOCK_SIZE) -> BlockSignature:
+    """
+    Reads a file and hashes it block by block.
+
+    Args:
+        path: The file.
+        block_size: Block size in bytes.
+
+    Returns:
+        The signature of the file.
+    """
+    digests = []
+    with open(path, "rb") as f:
+        stat = os.fstat(f.fileno())
+        buffer = bytearray(block_size)
+        while True:
+            read = f.readinto(buffer)
+            if not read:
+                break
+            digests.append(_block_digest(memoryview(buffer)[:read]))
+    return BlockSignature(stat.st_size, stat.st_mtime_ns, block_size, digests)
+
+
+class SignatureCache:
+    """
+    Stores block signatures of backup copies between runs.
+
+    With a valid cached signature the backup copy does not have to be read
+    again to find the changed blocks, which halves the I/O on the (usually
+    slower) backup drive. A signature is only used if size and mtime of the
+    backup copy still match.
+    """
+
+    def __init__(self, cache_dir: str | Path) -> None:
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Directory for the signature files.
+        """
+        self.cache_dir = Path(cache_dir)
+
+    def _path(self, target: str | Path) -> Path:
+        key = hashlib.blake2b(str(Path(target).absolute()).encode("utf-8"), digest_size=12).hexdigest()
+        return self.cache_dir / f"{key}.sig"
+
+    def load(self, target: str | Path, block_size: int) -> Optional[BlockSignature]:
+        """
+        Returns the cached signature of target if it is still valid.
+
+        Args:
+            target: The backup copy.
+            block_size: Block size the signature must have.
+
+        Returns:
+            The signature, or None if missing or outdated.
+        """
+        try:
+            stat = os.stat(target)
+            data = self._path(target).read_bytes()
+        except OSError:
+            return None
+        header_len = len(SIGNATURE_MAGIC) + 24
+        if not data.startswith(SIGNATURE_MAGIC) or len(data) < header_len:
+            return None
+        header = data[len(SIGNATURE_MAGIC) : header_len]
+        size, mtime_ns, cached_block_size = (int.from_bytes(header[i : i + 8], "little") for i in (0, 8, 16))
+        if (size, mtime_ns, cached_block_size) != (stat.st_size, stat.st_mtime_ns, block_size):
+            return None
+        body = data[header_len:]
+        if len(body) % DIGEST_SIZE:
+            return None
+        digests = [body[i : i + DIGEST_SIZE] for i in range(0, len(body), DIGEST_SIZE)]
+        return BlockSignature(size, mtime_ns, block_size, digests)
+
+    def save(self, target: str | Path, signature: BlockSignature) -> None:
+        """
+        Stores the signature of target.
+
+        Args:
+            target: The backup copy.
+            signature: Its current signature.
+        """
+        path = self._path(target)
+        header = b"".join(v.to_bytes(8, "little") for v in (signature.size, signature.mtime_ns, signature.block_size))
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(path.name + ".tmp")
+            tmp_path.write_bytes(SIGNATURE_MAGIC + header + b"".join(signature.digests))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write block signature {path}: {e}")
+
+    def invalidate(self, target: str | Path) -> None:
+        """
+        Removes the signature of target.
+
+        Args:
+            target: The backup copy.
+        """
+        self._path(target).unlink(missing_ok=True)
+
+
+def journal_path(target: str | Path) -> Path:
+    """
+    Returns the path of the write journal of a backup copy.
+
+    Args:
+        target: The backup copy.
+
+    Returns:
+        The hidden journal file next to it.
+    """
+    target = Path(target)
+    return target.with_name(f".{target.name}.delta.journal")
+
+
+def _write_journal_entry(f: BinaryIO, index: int, block: memoryview) -> int:
+    f.write(index.to_bytes(8, "little") + len(block).to_bytes(4, "little"))
+    f.write(block)
+    return JOURNAL_ENTRY_HEADER + len(block)
+
+
+def replay_journal(target: str | Path, throttle: Optional[Throttle] = None) -> Optional[int]:
+    """
+    Applies a complete write journal to its backup copy and removes it.
+
+    The journal holds the changed blocks and, in its trailer, the new size
+    and timestamps of the copy. Replaying it again after an interruption
+    gives the same result, so a journal is only removed once the copy is
+    written and synced. An incomplete journal (the run was interrupted while
+    writing it, before the copy was touched) is removed without changes.
+
+    Args:
+        target: The backup copy.
+        throttle: Optional limit for the written bytes.
+
+    Returns:
+        The bytes written to the copy, or None if there was no complete journal.
+
+    Raises:
+        OSError: If the copy cannot be written.
+    """
+    target = Path(target)
+    path = journal_path(target)
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return None
+    with f:
+        size = os.fstat(f.fileno()).st_size
+        magic = f.read(len(JOURNAL_MAGIC))
+        f.seek(max(0, size - JOURNAL_TRAILER))
+        trailer = f.read(JOURNAL_TRAILER)
+        if size < len(JOURNAL_MAGIC) + JOURNAL_TRAILER or magic != JOURNAL_MAGIC or not trailer.startswith(JOURNAL_END):
+            logger.warning(f"Discarding incomplete delta journal {path}")
+            f.close()
+            path.unlink(missing_ok=True)
+            return None
+        count, total, block_size, atime_ns, mtime_ns = (
+            int.from_bytes(trailer[i : i + 8], "little") for i in range(len(JOURNAL_END), JOURNAL_TRAILER, 8)
+        )
+        written = 0
+        f.seek(len(JOURNAL_MAGIC))
+        with open(target, "r+b") as fdst:
+            for _ in range(count):
+                entry = f.read(JOURNAL_ENTRY_HEADER)
+                index = int.from_bytes(entry[:8], "little")
+                block = f.read(int.from_bytes(entry[8:], "little"))
+                fdst.seek(index * block_size)
+                fdst.write(block)
+                written += len(block)
+                if throttle is not None:
+                    throttle.throttle_bytes(len(block))
+            fdst.truncate(total)
+            fdst.flush()
+            os.fsync(fdst.fileno())
+    os.utime(target, ns=(atime_ns, mtime_ns))
+    path.unlink()
+    return written
+
+
+class DeltaSync:
+    """
+    Updates existing backup copies of large files by writing only changed blocks.
+
+    Both files are compared in fixed-size blocks by their hashes. This fits
+    the files that benefit most (mailboxes, VM disks, databases), which are
+    modified in place and keep their block alignment. Inserting data near the
+    start of a file shifts all following blocks, so the whole rest is
+    rewritten, like a normal copy.
+
+    The backup copy is patched in place. By default the changed blocks are
+    first written to a journal next to it (see replay_journal), which costs
+    the changed bytes once more but never the whole file. If a run is
+    interrupted while patching, the next run completes the patch from the
+    journal, so the copy is never left half old and half new. With in_place
+    the copy is patched without a journal; if that is interrupted, the backup
+    keeps its old mtime and is patched again on the next run.
+    """
+
+    def __init__(
+        self,
+        min_size: int = DEFAULT_MIN_SIZE,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        cache: Optional[SignatureCache] = None,
+        in_place: bool = False,
+    ) -> None:
+        """
+        Initialize the delta transfer.
+
+        Args:
+            min_size: Files smaller than this are copied normally.
+            block_size: Block size in bytes.
+            cache: Optional signature cache for backup copies.
+            in_place: Patch the backup copy without a write journal.
+        """
+        self.min_size = min_size
+        self.block_size = block_size
+        self.cache = cache
+        self.in_place = in_place
+
+    def applies_to(self, src: str | Path, dst: str | Path) -> bool:
+        """
+        Checks whether a file should be transferred as delta.
+
+        Args:
+            src: Source file.
+            dst: Existing backup copy.
+
+        Returns:
+            True if src is large enough and dst exists.
+        """
+        try:
+            return os.path.getsize(src) >= self.min_size and os.path.isfile(dst)
+        except OSError:
+            return False
+
+    def sync_file(
+        self,
+        src: str | Path,
+        dst: str | Path,
+        filename: Optional[str] = None,
+        progress: Optional[ByteProgressCallback] = None,
+        throttle: Optional[Throttle] = None,
+    ) -> DeltaResult:
+        """
+        Brings dst up to date with src by rewriting changed blocks.
+
+        Args:
+            src: Source file.
+            dst: Existing backup copy.
+            filename: Name passed to the progress callback (default: src).
+            progress: Optional byte-level progress callback (source bytes read).
+            throttle: Optional limit for all bytes written to the backup drive.
+
+        Returns:
+            Statistics of the transfer.
+
+        Raises:
+            OSError: If a file cannot be read or written.
+        """
+        src = Path(src)
+        dst = Path(dst)
+        # Finish the patch of an interrupted run first, the signature must describe the copy as it is
+        recovered = replay_journal(dst, throttle) or 0
+        signature = self.cache.load(dst, self.block_size) if self.cache is not None else None
+        cached = signature is not None
+        if signature is None:
+            signature = compute_signature(dst, self.block_size)
+        if self.cache is not None:
+            # The copy is about to change, an interrupted run must not leave a stale signature
+            self.cache.invalidate(dst)
+
+        filename = filename or str(src)
+        if self.in_place:
+            with open(dst, "r+b") as fdst:
+
+                def write_block(index: int, block: memoryview) -> None:
+                    fdst.seek(index * self.block_size)
+                    fdst.write(block)
+                    if throttle is not None:
+                        throttle.throttle_bytes(len(block))
+
+                result, digests = self._patch(src, signature, filename, progress, write_block)
+                fdst.truncate(result.bytes_total)
+                fdst.flush()
+                os.fsync(fdst.fileno())
+            shutil.copystat(src, dst)
+        else:
+            result, digests = self._journaled_patch(src, dst, signature, filename, progress, throttle)
+
+        result.bytes_written += recovered
+        result.signature_cached = cached
+        if self.cache is not None:
+            stat = os.stat(dst)
+            self.cache.save(dst, BlockSignature(stat.st_size, stat.st_mtime_ns, self.block_size, digests))
+        inc("sync.delta.files")
+        inc("sync.delta.bytes_written", result.bytes_written)
+        inc("sync.delta.bytes_skipped", result.bytes_total - result.bytes_changed)
+        return result
+
+    def _journaled_patch(
+        self,
+        src: Path,
+        dst: Path,
+        signature: BlockSignature,
+        filename: str,
+        progress: Optional[ByteProgressCallback],
+        throttle: Optional[Throttle],
+    ) -> tuple[DeltaResult, list[bytes]]:
+        """Writes the changed blocks to the journal of dst, then replays it into dst."""
+        path = journal_path(dst)
+        journal_bytes = 0
+        count = 0
+        try:
+            with open(path, "wb") as f:
+                stat = os.stat(src)
+                f.write(JOURNAL_MAGIC)
+
+                def write_block(index: int, block: memoryview) -> None:
+                    nonlocal journal_bytes, count
+                    journal_bytes += _write_journal_entry(f, index, block)
+                    count += 1
+                    if throttle is not None:
+                        throttle.throttle_bytes(JOURNAL_ENTRY_HEADER + len(block))
+
+                result, digests = self._patch(src, signature, filename, progress, write_block)
+                # The blocks must be on disk before the trailer marks the journal complete
+                f.flush()
+                os.fsync(f.fileno())
+                values = (count, result.bytes_total, self.block_size, stat.st_atime_ns, stat.st_mtime_ns)
+                f.write(JOURNAL_END + b"".join(v.to_bytes(8, "little") for v in values))
+                f.flush()
+                os.fsync(f.fileno())
+        except BaseException:
+            path.unlink(missing_ok=True)
+            raise
+        journal_bytes += len(JOURNAL_MAGIC) + JOURNAL_TRAILER
+        if throttle is not None:
+            throttle.throttle_bytes(len(JOURNAL_MAGIC) + JOURNAL_TRAILER)
+        result.bytes_written = journal_bytes + (replay_journal(dst, throttle) or 0)
+        shutil.copystat(src, dst)
+        return result, digests
+
+    def _patch(
+        self,
+        src: Path,
+        signature: BlockSignature,
+        filename: str,
+        progress: Optional[ByteProgressCallback],
+        write_block: BlockWriter,
+    ) -> tuple[DeltaResult, list[bytes]]:
+        """Passes all blocks of src whose hash differs from the signature to write_block."""
+        digests: list[bytes] = []
+        changed_bytes = 0
+        changed = 0
+        buffer = bytearray(self.block_size)
+        view = memoryview(buffer)
+        with open(src, "rb") as fsrc:
+            total = os.fstat(fsrc.fileno()).st_size
+            reporter = _ProgressReporter(filename, total, progress)
+            index = 0
+            while True:
+                read = fsrc.readinto(buffer)
+                if not read:
+                    break
+                block = view[:read]
+                digest = _block_digest(block)
+                digests.append(digest)
+                if index >= len(signature.digests) or signature.digests[index] != digest:
+                    write_block(index, block)
+                    changed_bytes += read
+                    changed += 1
+                reporter.advance(read)
+                index += 1
+        reporter.finish()
+        return DeltaResult(total, changed_bytes, changed_bytes, changed, len(digests), False), digests
+
+
+def get_delta_sync(
+    enabled: bool,
+    min_size_mb: float = DEFAULT_MIN_SIZE / 1024**2,
+    block_kb: int = DEFAULT_BLOCK_SIZE // 1024,
+    cache_dir: Optional[str | Path] = None,
+    in_place: bool = False,
+) -> Optional[DeltaSync]:
+    """
+    Creates a delta transfer from configuration values, or None if disabled.
+
+    Args:
+        enabled: Whether delta transfers are used at all.
+        min_size_mb: Minimum file size in MB.
+        block_kb: Block size in KB.
+        cache_dir: Directory of the signature cache (None or empty disables it).
+        in_place: Patch backup copies without a write journal.
+
+    Returns:
+        The delta transfer or None.
+    """
+    if not enabled:
+        return None
+    cache = SignatureCache(cache_dir) if cache_dir and str(cache_dir).strip() else None
+    return DeltaSync(min_size=int(min_size_mb * 1024**2), block_size=max(4, block_kb) * 1024, cache=cache, in_place=in_place)
@@ -0,0 +1,378 @@
+"""Dated snapshot backups in which unchanged files are hardlinks to the previous snapshot."""
+
+import datetime
+import json
+import logging
+import os
+import shutil
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from semantic_backup_explorer.compare.folder_diff import find_renames, get_folder_content
+from semantic_backup_explorer.compare.local_snapshot import LocalSnapshotCache
+from semantic_backup_explorer.sync.copy_engine import DEFAULT_BUFFER_SIZE, ByteProgressCallback, copy_file
+from semantic_backup_explorer.sync.sync_missing import SyncProgressCallback
+from semantic_backup_explorer.sync.throttle import Throttle
+from semantic_backup_explorer.utils.exclusions import ExclusionRules
+from semantic_backup_explorer.utils.metrics import inc, timed
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOTS_FILE = "snapshots.json"
+MANIFEST_DIR = ".manifests"
+SNAPSHOT_ID_FORMAT = "%Y-%m-%d_%H%M%S"
+# Same tolerance as compare_folders uses for "newer locally"
+MTIME_EPSILON = 0.1
+
+
+@dataclass
+class FileVersion:
+    """A file as stored in a snapshot."""
+
+    mtime: float
+    size: int
+    # Snapshot in which this content was copied; later snapshots only link to it
+    origin: str
+
+
+@dataclass
+class SnapshotInfo:
+    """Summary of one snapshot, as listed in snapshots.json."""
+
+    id: str
+    created: str
+    folders: list[str] = field(default_factory=list)
+    files_copied: int = 0
+    files_linked: int = 0
+    bytes_copied: int = 0
+
+
+@dataclass
+class SnapshotFolderResult:
+    """Outcome of adding one source folder to a snapshot."""
+
+    local_path: Path
+    snapshot_path: Path
+    copied: list[str]
+    linked: int
+    errors: list[tuple[str, str]]
+
+
+class SnapshotStore:
+    """
+    Dated snapshots of the source folders below a root directory on the backup drive.
+
+    Every run creates a new directory <root>/<YYYY-MM-DD_HHMMSS>/<folder name>
+    holding the complete tree of each source folder. Files that are unchanged
+    since the previous snapshot (same path, or moved locally with the same size
+    and mtime) are hardlinked to it, so a snapshot only takes space and time
+    for the files that changed. Deleting an old snapshot directory never
+    affects the others.
+
+    Which files a snapshot holds, and in which snapshot each version was
+    copied, is recorded in a manifest per snapshot (<root>/.manifests/<id>.json);
+    snapshots.json lists the committed snapshots. A run that is interrupted
+    before commit() is not listed and never used as the base of a later one.
+    """
+
+    def __init__(self, root: str | Path) -> None:
+        """
+        Initialize the store.
+
+        Args:
+            root: Directory of the snapshots on the backup drive.
+        """
+        self.root = Path(root)
+
+    def list_snapshots(self) -> list[SnapshotInfo]:
+        """
+        Returns the committed snapshots, oldest first.
+
+        Returns:
+            The snapshot summaries.
+        """
+        try:
+            with open(self.root / SNAPSHOTS_FILE, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return []
+        return [SnapshotInfo(**entry) for entry in data.get("snapshots", [])]
+
+    def _manifest_path(self, snapshot_id: str) -> Path:
+        return self.root / MANIFEST_DIR / f"{snapshot_id}.json"
+
+    def load_manifest(self, snapshot_id: str) -> dict[str, dict[str, FileVersion]]:
+        """
+        Reads the file list of a snapshot.
+
+        Args:
+            snapshot_id: The snapshot.
+
+        Returns:
+            Mapping of folder name -> {relative path: version}; empty if unknown.
+        """
+        try:
+            with open(self._manifest_path(snapshot_id), "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return {
+            folder: {rel_path: FileVersion(*values) for rel_path, values in files.items()} for folder, files in data.items()
+        }
+
+    def latest_with(self, folder_name: str) -> Optional[SnapshotInfo]:
+        """
+        Returns the newest committed snapshot that contains a folder.
+
+        Args:
+            folder_name: Name of the source folder.
+
+        Returns:
+            The snapshot, or None if the folder was never backed up.
+        """
+        for info in reversed(self.list_snapshots()):
+            if folder_name in info.folders:
+                return info
+        return None
+
+    def file_history(self, folder_name: str, rel_path: str) -> list[tuple[str, FileVersion]]:
+        """
+        Lists the distinct versions of a file over all snapshots.
+
+        Args:
+            folder_name: Name of the source folder.
+            rel_path: Path of the file relative to the folder.
+
+        Returns:
+            (snapshot id, version) pairs, oldest first, one per version; the
+            snapshot is the first one that holds the version.
+        """
+        history: list[tuple[str, FileVersion]] = []
+        for info in self.list_snapshots():
+            if folder_name not in info.folders:
+                continue
+            version = self.load_manifest(info.id).get(folder_name, {}).get(rel_path)
+            if version is not None and (not history or history[-1][1].origin != version.origin):
+                history.append((info.id, version))
+        return history
+
+    def begin(self, now: Optional[datetime.datetime] = None) -> "SnapshotRun":
+        """
+        Starts a new snapshot.
+
+        Args:
+            now: Time stamp of the snapshot (default: now).
+
+        Returns:
+            The run, to which source folders are added.
+        """
+        base_id = (now or datetime.datetime.now()).strftime(SNAPSHOT_ID_FORMAT)
+        snapshot_id = base_id
+        suffix = 2
+        while (self.root / snapshot_id).exists():
+            snapshot_id = f"{base_id}_{suffix}"
+            suffix += 1
+        return SnapshotRun(self, snapshot_id)
+
+    def _commit(self, info: SnapshotInfo, manifest: dict[str, dict[str, FileVersion]]) -> None:
+        """Writes the manifest of a finished run and adds it to snapshots.json."""
+        manifest_data = {
+            folder: {rel_path: [v.mtime, v.size, v.origin] for rel_path, v in files.items()}
+            for folder, files in manifest.items()
+        }
+        _write_json(self._manifest_path(info.id), manifest_data)
+        snapshots = [asdict(s) for s in self.list_snapshots()] + [asdict(info)]
+        _write_json(self.root / SNAPSHOTS_FILE, {"snapshots": snapshots})
+
+    def prune(self, keep: int) -> list[str]:
+        """
+        Deletes all but the newest snapshots.
+
+        Args:
+            keep: Number of snapshots to keep (0 keeps all).
+
+        Returns:
+            The ids of the deleted snapshots.
+        """
+        snapshots = self.list_snapshots()
+        if keep <= 0 or len(snapshots) <= keep:
+            return []
+        removed = snapshots[:-keep]
+        # Unlist first, so an interrupted prune never leaves a listed but incomplete snapshot
+        _write_json(self.root / SNAPSHOTS_FILE, {"snapshots": [asdict(s) for s in snapshots[-keep:]]})
+        for info in removed:
+            shutil.rmtree(self.root / info.id, ignore_errors=True)
+            self._manifest_path(info.id).unlink(missing_ok=True)
+            logger.info(f"Removed snapshot {info.id}")
+        inc("snapshot.pruned", len(removed))
+        return [info.id for info in removed]
+
+
+class SnapshotRun:
+    """A snapshot being created; obtained from SnapshotStore.begin."""
+
+    def __init__(self, store: SnapshotStore, snapshot_id: str) -> None:
+        """
+        Initialize the run.
+
+        Args:
+            store: The snapshot store.
+            snapshot_id: Id (directory name) of the new snapshot.
+        """
+        self.store = store
+        self.info = SnapshotInfo(id=snapshot_id, created=datetime.datetime.now().isoformat(timespec="seconds"))
+        self.path = store.root / snapshot_id
+        self.manifest: dict[str, dict[str, FileVersion]] = {}
+
+    @timed("snapshot.sync_folder")
+    def sync_folder(
+        self,
+        local_path: str | Path,
+        callback: Optional[SyncProgressCallback] = None,
+        byte_callback: Optional[ByteProgressCallback] = None,
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+        throttle: Optional[Throttle] = None,
+        local_cache: Optional[LocalSnapshotCache] = None,
+        exclude: Optional[ExclusionRules] = None,
+    ) -> SnapshotFolderResult:
+        """
+        Adds a source folder to the snapshot.
+
+        Args:
+            local_path: The source folder; stored under its name.
+            callback: Optional progress callback, called once per copied file.
+            byte_callback: Optional byte progress callback for copied files.
+            buffer_size: Copy buffer size where no in-kernel copy is possible.
+            throttle: Optional bandwidth and file rate limit for copied files.
+            local_cache: Optional snapshot cache for listing the source folder.
+            exclude: Optional exclusion rules; excluded files are not part of the snapshot.
+
+        Returns:
+            The copied files, the number of linked files and the errors.
+
+        Raises:
+            FileNotFoundError: If local_path does not exist.
+        """
+        local_path = Path(local_path)
+        if not local_path.is_dir():
+            raise FileNotFoundError(f"Local path does not exist: {local_path}")
+        name = local_path.name
+        target_root = self.path / name
+
+        prev_files: dict[str, FileVersion] = {}
+        prev_root = target_root
+        previous = self.store.latest_with(name)
+        if previous is not None:
+            prev_files = self.store.load_manifest(previous.id).get(name, {})
+            prev_root = self.store.root / previous.id / name
+
+        if local_cache is not None:
+            local_files = local_cache.get_folder_content(local_path, exclude=exclude)
+        else:
+            local_files = get_folder_content(local_path, exclude=exclude)
+
+        # Unchanged files keep their path; moved ones are found like renames in compare_folders
+        links: dict[str, str] = {}
+        new_files: dict[str, float] = {}
+        for rel_path, mtime in local_files.items():
+            version = prev_files.get(rel_path)
+            if version is not None and abs(version.mtime - mtime) <= MTIME_EPSILON:
+                links[rel_path] = rel_path
+            else:
+                new_files[rel_path] = mtime
+        vanished = {p: (v.mtime, v.size) for p, v in prev_files.items() if p not in local_files}
+        if new_files and vanished:
+            for old_rel, new_rel in find_renames(local_path, new_files, vanished):
+                links[new_rel] = old_rel
+                del new_files[new_rel]
+
+        files: dict[str, FileVersion] = {}
+        to_copy = sorted(new_files)
+        for rel_path, prev_rel in sorted(links.items()):
+            dst = target_root / rel_path
+            try:
+                dst.parent.mkdir(parents=True, exist_ok=True)
+                os.link(prev_root / prev_rel, dst)
+                files[rel_path] = prev_files[prev_rel]
+            except OSError as e:
+                # No hardlinks on this file system (FAT, exFAT) or the old copy is gone
+                logger.debug(f"Cannot link {rel_path}, copying instead: {e}")
+                to_copy.append(rel_path)
+
+        copied: list[str] = []
+        errors: list[tuple[str, str]] = []
+        bytes_copied = 0
+        for i, rel_path in enumerate(to_copy):
+            src = local_path / rel_path
+            dst = target_root / rel_path
+            error_msg = None
+            try:
+                dst.parent.mkdir(parents=True, exist_ok=True)
+                if throttle is not None:
+                    throttle.throttle_file()
+                stat = os.stat(src)
+                bytes_copied += copy_file(
+                    src, dst, filename=rel_path, progress=byte_callback, buffer_size=buffer_size, throttle=throttle
+                )
+                files[rel_path] = FileVersion(stat.st_mtime, stat.st_size, self.info.id)
+                copied.append(rel_path)
+            except Exception as e:
+                error_msg = str(e)
+                errors.append((rel_path, error_msg))
+            if callback:
+                callback(i + 1, len(to_copy), rel_path, error_msg)
+
+        target_root.mkdir(parents=True, exist_ok=True)
+        linked = len(files) - len(copied)
+        self.manifest[name] = files
+        self.info.folders.append(name)
+        self.info.files_copied += len(copied)
+        self.info.files_linked += linked
+        self.info.bytes_copied += bytes_copied
+        inc("snapshot.files_copied", len(copied))
+        inc("snapshot.files_linked", linked)
+        inc("snapshot.bytes_copied", bytes_copied)
+        inc("sync.errors", len(errors))
+        return SnapshotFolderResult(local_path, target_root, copied, linked, errors)
+
+    def commit(self) -> SnapshotInfo:
+        """
+        Records the snapshot, so it becomes the base of the next run.
+
+        Returns:
+            The summary of the snapshot.
+        """
+        self.store._commit(self.info, self.manifest)
+        logger.info(f"Snapshot {self.info.id}: {self.info.files_copied} files copied, {self.info.files_linked} linked")
+        return self.info
+
+
+def without_snapshots(snapshot_dir: str, rules: Optional[ExclusionRules] = None) -> ExclusionRules:
+    """
+    Returns exclusion rules for scanning a backup drive that prune its snapshot directory.
+
+    Every snapshot holds a hardlinked copy of all folders. Indexing them would
+    grow the index with each run, and find_backup_folder could match a source
+    folder to its copy in an old snapshot.
+
+    Args:
+        snapshot_dir: The snapshot directory, relative to the backup drive.
+        rules: Further rules to apply, e.g. the global exclusions.
+
+    Returns:
+        The rules, extended by the anchored snapshot directory.
+    """
+    name = snapshot_dir.replace("\\", "/").strip("/")
+    # Match the directory name literally, even if it contains glob characters
+    pattern = "".join(f"\\{c}" if c in "*?[" else c for c in name)
+    return (rules or ExclusionRules()).extended([f"/{pattern}/"])
+
+
+def _write_json(path: Path, data: object) -> None:
+    """Writes a JSON file atomically."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
@@ -1,9 +1,14 @@
 """Module for synchronizing files between local and backup directories."""
 
-import shutil
+import os
 from pathlib import Path
 from typing import Optional, Protocol
 
+from semantic_backup_explorer.sync.copy_engine import DEFAULT_BUFFER_SIZE, ByteProgressCallback, copy_file
+from semantic_backup_explorer.sync.delta import DeltaSync
+from semantic_backup_explorer.sync.throttle import Throttle
+from semantic_backup_explorer.utils.metrics import inc, timed
+
 
 class SyncProgressCallback(Protocol):
     """Protocol for sync progress callbacks."""
@@ -21,8 +26,16 @@ class SyncProgressCallback(Protocol):
         ...
 
 
+@timed("sync.sync_files")
 def sync_files(
-    files_to_sync: list[str], source_root: str | Path, target_root: str | Path, callback: Optional[SyncProgressCallback] = None
+    files_to_sync: list[str],
+    source_root: str | Path,
+    target_root: str | Path,
+    callback: Optional[SyncProgressCallback] = None,
+    byte_callback: Optional[ByteProgressCallback] = None,
+    buffer_size: int = DEFAULT_BUFFER_SIZE,
+    throttle: Optional[Throttle] = None,
+    delta: Optional[DeltaSync] = None,
 ) -> tuple[list[str], list[tuple[str, str]]]:
     """
     Copies files from source_root to target_root.
@@ -31,7 +44,13 @@ def sync_files(
         files_to_sync: List of relative file paths to copy.
         source_root: Source directory.
         target_root: Target directory.
-        callback: Optional progress callback.
+        callback: Optional progress callback, called once per file.
+        byte_callback: Optional callback with byte progress and throughput
+            while a file is copied.
+        buffer_size: Copy buffer size where no in-kernel copy is possible.
+        throttle: Optional bandwidth and file rate limit.
+        delta: Optional delta transfer for large files that already exist in
+            the backup; only their changed blocks are written.
 
     Returns:
         Tuple of (synced_files, errors) where errors is a list of (filename, error_msg).
@@ -48,6 +67,7 @@ def sync_files(
     synced = []
     errors = []
     total = len(files_to_sync)
+    bytes_copied = 0
 
     for i, rel_path in enumerate(files_to_sync):
         src = source_root / rel_path
@@ -57,7 +77,16 @@ def sync_files(
         try:
             # Create target directory if it doesn't exist
             dst.parent.mkdir(parents=True, exist_ok=True)
-            shutil.copy2(src, dst)
+            if throttle is not None:
+                throttle.throttle_file()
+            if delta is not None and delta.applies_to(src, dst):
+                bytes_copied += delta.sync_file(
+                    src, dst, filename=rel_path, progress=byte_callback, throttle=throttle
+                ).bytes_written
+            else:
+                bytes_copied += copy_file(
+                    src, dst, filename=rel_path, progress=byte_callback, buffer_size=buffer_size, throttle=throttle
+                )
             synced.append(rel_path)
         except Exception as e:
             error_msg = str(e)
@@ -66,4 +95,69 @@ def sync_files(
         if callback:
             callback(i + 1, total, rel_path, error_msg)
 
+    inc("sync.files_copied", len(synced))
+    inc("sync.bytes_copied", bytes_copied)
+    inc("sync.errors", len(errors))
     return synced, errors
+
+
+def _remove_empty_parents(folder: Path, stop: Path) -> None:
+    """Removes folder and its parents below stop as long as they are empty."""
+    while folder != stop and stop in folder.parents:
+        try:
+            folder.rmdir()
+        except OSError:
+            return
+        folder = folder.parent
+
+
+@timed("sync.rename_files")
+def rename_files(
+    renames: list[tuple[str, str]],
+    target_root: str | Path,
+    callback: Optional[SyncProgressCallback] = None,
+) -> tuple[list[str], list[tuple[str, str]]]:
+    """
+    Moves backup copies of locally moved or renamed files to their new paths.
+
+    A rename within the backup drive only changes directory entries, so no
+    file data is copied. Directories left empty by the moves are removed.
+    Files that could not be renamed should be copied with sync_files instead.
+
+    Args:
+        renames: (old relative path, new relative path) pairs, as detected by
+            compare_folders.
+        target_root: Backup folder the paths are relative to.
+        callback: Optional progress callback, called once per file with the new path.
+
+    Returns:
+        Tuple of (renamed_files, errors) with the new relative paths, where
+        errors is a list of (filename, error_msg).
+    """
+    target_root = Path(target_root)
+    renamed = []
+    errors = []
+    total = len(renames)
+
+    for i, (old_rel, new_rel) in enumerate(renames):
+        src = target_root / old_rel
+        dst = target_root / new_rel
+
+        error_msg = None
+        try:
+            if dst.exists():
+                raise FileExistsError(f"Target already exists: {dst}")
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            os.rename(src, dst)
+            _remove_empty_parents(src.parent, target_root)
+            renamed.append(new_rel)
+        except Exception as e:
+            error_msg = str(e)
+            errors.append((new_rel, error_msg))
+
+        if callback:
+            callback(i + 1, total, new_rel, error_msg)
+
+    inc("sync.files_renamed", len(renamed))
+    inc("sync.rename_errors", len(errors))
+    return renamed, errors
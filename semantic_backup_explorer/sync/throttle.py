@@ -0,0 +1,316 @@
+"""Bandwidth and file-rate limits for background syncs."""
+
+import datetime
+import logging
+import os
+import re
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from semantic_backup_explorer.utils.metrics import inc
+
+logger = logging.getLogger(__name__)
+
+_UNITS = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3}
+_RATE_PATTERN = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([KMG]?)(?:i?B)?(?:/s)?\s*$", re.IGNORECASE)
+_RULE_PATTERN = re.compile(r"^\s*(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})\s*=\s*([^,]+?)\s*(?:,\s*(\S+)\s*)?$")
+# Chunk size for in-kernel copies while a bandwidth limit is active, so the
+# limit is enforced smoothly instead of in bursts of a whole zero-copy chunk
+THROTTLED_CHUNK = 1024 * 1024
+
+
+def parse_rate(value: str | float | None) -> float:
+    """
+    Parses a rate like ``"20M"``, ``"512K"``, ``"1.5GB/s"`` or ``"1000"``.
+
+    Args:
+        value: Rate in bytes (or files) per second, with an optional binary unit.
+
+    Returns:
+        The rate per second (0 means unlimited).
+
+    Raises:
+        ValueError: If the value cannot be parsed.
+    """
+    if value is None:
+        return 0.0
+    if isinstance(value, (int, float)):
+        return max(0.0, float(value))
+    if not value.strip():
+        return 0.0
+    match = _RATE_PATTERN.match(value)
+    if not match:
+        raise ValueError(f"Invalid rate: {value!r} (expected e.g. '20M' or '512K')")
+    return float(match.group(1)) * _UNITS[match.group(2).upper()]
+
+
+@dataclass
+class ScheduleRule:
+    """Limits that apply during a time window of the day."""
+
+    start: datetime.time
+    end: datetime.time
+    bytes_per_sec: float
+    files_per_sec: float = 0.0
+
+    def matches(self, moment: datetime.time) -> bool:
+        """
+        Checks whether moment lies in the window (windows may wrap past midnight).
+
+        Args:
+            moment: Time of day.
+
+        Returns:
+            True if the rule applies.
+        """
+        if self.start <= self.end:
+            return self.start <= moment < self.end
+        return moment >= self.start or moment < self.end
+
+
+def parse_schedule(value: Optional[str]) -> list[ScheduleRule]:
+    """
+    Parses a schedule like ``"08:00-18:00=10M,20; 22:00-06:00=0"``.
+
+    Rules are separated by semicolons. Each rule is a time window, the
+    bandwidth limit and optionally the file limit; 0 means unlimited.
+
+    Args:
+        value: The schedule string (empty for no schedule).
+
+    Returns:
+        The rules in the given order.
+
+    Raises:
+        ValueError: If a rule cannot be parsed.
+    """
+    rules: list[ScheduleRule] = []
+    for part in (value or "").split(";"):
+        if not part.strip():
+            continue
+        match = _RULE_PATTERN.match(part)
+        if not match:
+            raise ValueError(f"Invalid schedule rule: {part.strip()!r} (expected e.g. '08:00-18:00=10M,20')")
+        start_h, start_m, end_h, end_m, bandwidth, files = match.groups()
+        rules.append(
+            ScheduleRule(
+                start=datetime.time(int(start_h) % 24, int(start_m)),
+                end=datetime.time(int(end_h) % 24, int(end_m)),
+                bytes_per_sec=parse_rate(bandwidth),
+                files_per_sec=parse_rate(files),
+            )
+        )
+    return rules
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+
+    Tokens refill at rate per second up to burst. consume() may take more
+    tokens than available; the caller then sleeps until the debt is paid, so
+    the long-term rate is exact regardless of the request sizes.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        """
+        Initialize a full bucket.
+
+        Args:
+            rate: Tokens per second (0 disables the limit).
+            burst: Maximum stored tokens (default: one second worth of rate).
+            clock: Monotonic clock function (used for testing).
+            sleep: Sleep function (used for testing).
+        """
+        self.clock = clock
+        self.sleep = sleep
+        self._lock = threading.Lock()
+        self._burst_override = burst
+        self.rate = 0.0
+        self.burst = 0.0
+        self._tokens = 0.0
+        self._updated = clock()
+        self.set_rate(rate)
+
+    def set_rate(self, rate: float) -> None:
+        """
+        Changes the rate, e.g. when a schedule window starts.
+
+        Args:
+            rate: Tokens per second (0 disables the limit).
+        """
+        with self._lock:
+            if rate == self.rate:
+                return
+            was_unlimited = self.rate <= 0
+            self.rate = rate
+            self.burst = self._burst_override if self._burst_override is not None else rate
+            # Keep a debt across rate changes, but start full after an unlimited period
+            self._tokens = self.burst if was_unlimited else min(self._tokens, self.burst)
+            self._updated = self.clock()
+
+    def consume(self, amount: float) -> float:
+        """
+        Takes amount tokens, sleeping if the bucket runs into debt.
+
+        Args:
+            amount: Number of tokens (bytes or files).
+
+        Returns:
+            Seconds slept.
+        """
+        with self._lock:
+            if self.rate <= 0:
+                return 0.0
+            now = self.clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= amount
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            self.sleep(wait)
+        return wait
+
+
+class Throttle:
+    """
+    Limits copy bandwidth and the number of copied files per second.
+
+    The default limits apply unless a schedule rule matches the current time
+    of day, in which case the first matching rule's limits are used (e.g.
+    limited during office hours, full speed at night). One Throttle can be
+    shared by concurrent syncs; the limits then apply to their sum.
+    """
+
+    def __init__(
+        self,
+        bytes_per_sec: float = 0.0,
+        files_per_sec: float = 0.0,
+        schedule: Optional[list[ScheduleRule]] = None,
+        now: Callable[[], datetime.datetime] = datetime.datetime.now,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        """
+        Initialize the throttle.
+
+        Args:
+            bytes_per_sec: Default bandwidth limit (0: unlimited).
+            files_per_sec: Default file limit (0: unlimited).
+            schedule: Time-of-day rules overriding the defaults.
+            now: Wall clock for the schedule (used for testing).
+            clock: Monotonic clock for the token buckets (used for testing).
+            sleep: Sleep function (used for testing).
+        """
+        self.default_limits = (bytes_per_sec, files_per_sec)
+        self.schedule = schedule or []
+        self.now = now
+        self.bytes_bucket = TokenBucket(bytes_per_sec, clock=clock, sleep=sleep)
+        self.files_bucket = TokenBucket(files_per_sec, clock=clock, sleep=sleep)
+
+    @property
+    def enabled(self) -> bool:
+        """Whether any limit is configured."""
+        return any(self.default_limits) or any(r.bytes_per_sec or r.files_per_sec for r in self.schedule)
+
+    def current_limits(self) -> tuple[float, float]:
+        """
+        Returns the limits that apply right now.
+
+        Returns:
+            Tuple of (bytes per second, files per second), 0 meaning unlimited.
+        """
+        moment = self.now().time()
+        for rule in self.schedule:
+            if rule.matches(moment):
+                return rule.bytes_per_sec, rule.files_per_sec
+        return self.default_limits
+
+    def bytes_limited(self) -> bool:
+        """Whether a bandwidth limit applies right now."""
+        return self.current_limits()[0] > 0
+
+    def throttle_bytes(self, count: int) -> None:
+        """
+        Accounts for copied bytes, sleeping if the bandwidth limit is exceeded.
+
+        Args:
+            count: Number of bytes just copied.
+        """
+        self.bytes_bucket.set_rate(self.current_limits()[0])
+        waited = self.bytes_bucket.consume(count)
+        if waited:
+            inc("sync.throttle.wait_seconds", waited)
+
+    def throttle_file(self) -> None:
+        """Accounts for a file about to be copied, sleeping if the file limit is exceeded."""
+        self.files_bucket.set_rate(self.current_limits()[1])
+        waited = self.files_bucket.consume(1)
+        if waited:
+            inc("sync.throttle.wait_seconds", waited)
+
+
+def get_throttle(
+    bandwidth: str | float | None = None, files_per_sec: str | float | None = None, schedule: Optional[str] = None
+) -> Optional[Throttle]:
+    """
+    Creates a throttle from configuration values, or None if nothing is limited.
+
+    Args:
+        bandwidth: Default bandwidth limit like ``"20M"``.
+        files_per_sec: Default file limit.
+        schedule: Schedule string, see parse_schedule.
+
+    Returns:
+        The throttle or None.
+
+    Raises:
+        ValueError: If a value cannot be parsed.
+    """
+    throttle = Throttle(parse_rate(bandwidth), parse_rate(files_per_sec), parse_schedule(schedule))
+    return throttle if throttle.enabled else None
+
+
+def lower_io_priority() -> bool:
+    """
+    Lowers the CPU and I/O priority of the current process.
+
+    On Linux the process gets nice 10 and the lowest best-effort I/O priority
+    (``ionice -c 2 -n 7``), so interactive programs are served first by the
+    disk scheduler. Threads inherit the priority, so call this before any
+    thread pools are started. On other platforms only the nice value is
+    changed where supported.
+
+    Returns:
+        True if the I/O priority was lowered.
+    """
+    if hasattr(os, "nice"):
+        try:
+            os.nice(10)
+        except OSError as e:
+            logger.warning(f"Could not lower CPU priority: {e}")
+
+    if not sys.platform.startswith("linux"):
+        logger.info("Low I/O priority is only supported on Linux.")
+        return False
+    ionice = shutil.which("ionice")
+    if ionice is None:
+        logger.warning("ionice not found, I/O priority unchanged.")
+        return False
+    try:
+        subprocess.run([ionice, "-c", "2", "-n", "7", "-p", str(os.getpid())], check=True, capture_output=True, timeout=5)
+    except (OSError, subprocess.SubprocessError) as e:
+        logger.warning(f"Could not lower I/O priority: {e}")
+        return False
+    return True
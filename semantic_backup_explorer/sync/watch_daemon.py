@@ -0,0 +1,434 @@
+"""Long-running daemon that syncs changed files as soon as they settle."""
+
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Optional, Protocol
+
+from semantic_backup_explorer.compare.local_snapshot import LocalSnapshotCache
+from semantic_backup_explorer.indexer.index_update import append_index_journal, merge_index_journal
+from semantic_backup_explorer.sync.delta import DeltaSync
+from semantic_backup_explorer.sync.sync_missing import sync_files
+from semantic_backup_explorer.sync.throttle import Throttle
+from semantic_backup_explorer.utils.exclusions import ExclusionRules
+from semantic_backup_explorer.utils.metrics import inc
+
+try:
+    from watchdog.events import FileSystemEvent, FileSystemEventHandler
+    from watchdog.observers import Observer
+
+    HAS_WATCHDOG = True
+except Exception:
+    HAS_WATCHDOG = False
+    FileSystemEventHandler = object  # type: ignore[assignment,misc,unused-ignore]
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DEBOUNCE = 5.0
+DEFAULT_SYNC_INTERVAL = 30.0
+DEFAULT_POLL_INTERVAL = 60.0
+DEFAULT_INDEX_MERGE_INTERVAL = 3600.0
+
+
+@dataclass
+class WatchedFolder:
+    """A local source folder and the backup folder it is synced to."""
+
+    local_path: Path
+    target_root: Path
+    # Changes to excluded files are ignored
+    exclude: Optional[ExclusionRules] = None
+
+
+@dataclass
+class DaemonSyncResult:
+    """Outcome of syncing the dirty files of one folder."""
+
+    local_path: Path
+    synced: list[str]
+    errors: list[tuple[str, str]] = field(default_factory=list)
+
+
+class DirtySet:
+    """
+    Thread-safe set of changed files with debouncing.
+
+    Every change refreshes the file's timestamp; a file is only handed out once
+    it has been quiet for the debounce interval, so files that are still being
+    written are not copied half-finished.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic) -> None:
+        """
+        Initialize an empty set.
+
+        Args:
+            clock: Monotonic clock function (used for testing).
+        """
+        self.clock = clock
+        self._entries: dict[tuple[Path, str], float] = {}
+        self._lock = threading.Lock()
+
+    def add(self, local_path: Path, rel_path: str) -> None:
+        """
+        Marks a file as changed.
+
+        Args:
+            local_path: The watched source folder.
+            rel_path: Path of the file relative to local_path.
+        """
+        with self._lock:
+            self._entries[(local_path, rel_path)] = self.clock()
+
+    def drain(self, debounce: float) -> dict[Path, list[str]]:
+        """
+        Removes and returns all files that have been quiet for debounce seconds.
+
+        Args:
+            debounce: Minimum seconds since the last change.
+
+        Returns:
+            Mapping of source folder -> sorted relative paths.
+        """
+        now = self.clock()
+        ready: dict[Path, list[str]] = {}
+        with self._lock:
+            for key, changed in list(self._entries.items()):
+                if now - changed >= debounce:
+                    del self._entries[key]
+                    ready.setdefault(key[0], []).append(key[1])
+        return {folder: sorted(paths) for folder, paths in ready.items()}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class Watcher(Protocol):
+    """Source of change notifications for the watched folders."""
+
+    def start(self) -> None:
+        """Starts watching."""
+        ...
+
+    def stop(self) -> None:
+        """Stops watching."""
+        ...
+
+
+class PollingWatcher:
+    """
+    Detects changes by periodically re-reading local snapshots.
+
+    Used when watchdog is not installed or the file system does not deliver
+    events (e.g. network shares). Thanks to the snapshot cache only changed
+    directories are listed again.
+    """
+
+    def __init__(
+        self,
+        folders: list[WatchedFolder],
+        dirty: DirtySet,
+        cache: LocalSnapshotCache,
+        interval: float = DEFAULT_POLL_INTERVAL,
+    ) -> None:
+        """
+        Initialize the watcher.
+
+        Args:
+            folders: Folders to watch.
+            dirty: Set receiving the changed files.
+            cache: Snapshot cache for the folder listings.
+            interval: Seconds between polls.
+        """
+        self.folders = folders
+        self.dirty = dirty
+        self.cache = cache
+        self.interval = interval
+        self._known: dict[Path, dict[str, float]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def poll(self) -> int:
+        """
+        Compares every folder with the previous poll and marks changed files.
+
+        Returns:
+            The number of changed files found.
+        """
+        changes = 0
+        for folder in self.folders:
+            content = self.cache.get_folder_content(folder.local_path, exclude=folder.exclude)
+            known = self._known.get(folder.local_path)
+            if known is not None:
+                for rel_path, mtime in content.items():
+                    if known.get(rel_path) != mtime:
+                        self.dirty.add(folder.local_path, rel_path)
+                        changes += 1
+            self._known[folder.local_path] = content
+        return changes
+
+    def start(self) -> None:
+        """Takes the initial snapshot and starts polling in a background thread."""
+        self.poll()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sync-poller", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stops polling."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error(f"Polling for changes failed: {e}")
+
+
+class _DirtyEventHandler(FileSystemEventHandler):  # type: ignore[misc]
+    """Translates watchdog events of one folder into dirty-set entries."""
+
+    def __init__(self, folder: WatchedFolder, dirty: DirtySet) -> None:
+        super().__init__()
+        self.folder = folder
+        self.dirty = dirty
+
+    def _mark(self, path: str) -> None:
+        local = str(self.folder.local_path)
+        if not path.startswith(local) or os.path.normpath(path) == os.path.normpath(local):
+            return
+        exclude = self.folder.exclude
+        rel_path = os.path.relpath(path, local)
+        if os.path.isdir(path):
+            if exclude and exclude.is_excluded(rel_path, is_dir=True):
+                return
+            # Files created before the new directory was watched produce no events
+            for root, dirs, files in os.walk(path):
+                rel_root = os.path.relpath(root, local)
+                if exclude:
+                    dirs[:] = [d for d in dirs if not exclude.matches(os.path.join(rel_root, d), is_dir=True)]
+                for name in files:
+                    rel_file = os.path.join(rel_root, name)
+                    if not (exclude and exclude.matches(rel_file)):
+                        self.dirty.add(self.folder.local_path, rel_file)
+        elif os.path.isfile(path) and not (exclude and exclude.is_excluded(rel_path)):
+            self.dirty.add(self.folder.local_path, rel_path)
+
+    def on_created(self, event: "FileSystemEvent") -> None:
+        self._mark(str(event.src_path))
+
+    def on_modified(self, event: "FileSystemEvent") -> None:
+        if not event.is_directory:
+            self._mark(str(event.src_path))
+
+    def on_moved(self, event: "FileSystemEvent") -> None:
+        self._mark(str(event.dest_path))
+
+    def on_closed(self, event: "FileSystemEvent") -> None:
+        self._mark(str(event.src_path))
+
+
+class WatchdogWatcher:
+    """Receives change events from the OS (inotify, FSEvents, ReadDirectoryChangesW) via watchdog."""
+
+    def __init__(self, folders: list[WatchedFolder], dirty: DirtySet) -> None:
+        """
+        Initialize the watcher.
+
+        Args:
+            folders: Folders to watch.
+            dirty: Set receiving the changed files.
+
+        Raises:
+            ImportError: If watchdog is not installed.
+        """
+        if not HAS_WATCHDOG:
+            raise ImportError("watchdog is not installed. Please install it with 'pip install -e .[daemon]'")
+        self.folders = folders
+        self.dirty = dirty
+        self._observer: Optional[Any] = None
+
+    def start(self) -> None:
+        """Starts the observer thread."""
+        self._observer = Observer()
+        for folder in self.folders:
+            self._observer.schedule(_DirtyEventHandler(folder, self.dirty), str(folder.local_path), recursive=True)
+        self._observer.start()
+
+    def stop(self) -> None:
+        """Stops the observer thread."""
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+
+
+class SyncDaemon:
+    """
+    Keeps backup folders in sync with their local source folders.
+
+    Changed files are collected by a watcher, debounced, and copied in batches
+    every sync_interval seconds. The copied files are appended to the index
+    journal, which compares already take into account, and the journal is
+    merged into the backup index every index_merge_interval seconds and on
+    exit. So the index stays current without running scan_backup, and a batch
+    costs only its own entries instead of a rewrite of the whole index.
+    """
+
+    def __init__(
+        self,
+        folders: list[WatchedFolder],
+        index_path: Optional[Path] = None,
+        debounce: float = DEFAULT_DEBOUNCE,
+        sync_interval: float = DEFAULT_SYNC_INTERVAL,
+        watcher: Optional[Watcher] = None,
+        local_cache: Optional[LocalSnapshotCache] = None,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        force_polling: bool = False,
+        throttle: Optional[Throttle] = None,
+        delta: Optional[DeltaSync] = None,
+        index_merge_interval: float = DEFAULT_INDEX_MERGE_INTERVAL,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Initialize the daemon.
+
+        Args:
+            folders: Folders to keep in sync.
+            index_path: Backup index to journal the copied files for (None: no updates).
+            debounce: Seconds a file must be unchanged before it is copied.
+            sync_interval: Seconds between sync batches.
+            watcher: Change source (default: watchdog if installed, polling otherwise).
+            local_cache: Snapshot cache for the polling watcher.
+            poll_interval: Seconds between polls of the polling watcher.
+            force_polling: Poll even if watchdog is installed (e.g. for network shares).
+            throttle: Optional bandwidth and file rate limit for the copies.
+            delta: Optional delta transfer for large modified files.
+            index_merge_interval: Seconds between merges of the index journal into the index.
+            clock: Monotonic clock function for debouncing and merges (used for testing).
+        """
+        self.folders = folders
+        self.index_path = index_path
+        self.debounce = debounce
+        self.sync_interval = sync_interval
+        self.throttle = throttle
+        self.delta = delta
+        self.index_merge_interval = index_merge_interval
+        self.dirty = DirtySet(clock=clock)
+        self._clock = clock
+        self._last_merge = clock()
+        if watcher is None:
+            if HAS_WATCHDOG and not force_polling:
+                watcher = WatchdogWatcher(folders, self.dirty)
+            else:
+                if not force_polling:
+                    logger.info("watchdog is not installed, falling back to polling for changes.")
+                cache = local_cache or LocalSnapshotCache(Path("data/local_cache"))
+                watcher = PollingWatcher(folders, self.dirty, cache, interval=poll_interval)
+        self.watcher = watcher
+        self._targets = {folder.local_path: folder.target_root for folder in folders}
+        self._stop = threading.Event()
+
+    def sync_dirty(self) -> list[DaemonSyncResult]:
+        """
+        Copies all settled dirty files and journals them for the index.
+
+        Files that could not be copied are marked dirty again, so they are
+        retried once they have been quiet for the debounce interval.
+
+        The journal is merged into the index once index_merge_interval
+        seconds have passed since the last merge.
+
+        Returns:
+            One result per folder with copied files.
+        """
+        results = []
+        changed_in_backup: dict[str, tuple[float, int]] = {}
+        for local_path, rel_paths in self.dirty.drain(self.debounce).items():
+            # Deleted or replaced-by-directory paths are skipped, the backup never deletes
+            rel_paths = [p for p in rel_paths if (local_path / p).is_file()]
+            if not rel_paths:
+                continue
+            target_root = self._targets[local_path]
+            try:
+                synced, errors = sync_files(rel_paths, local_path, target_root, throttle=self.throttle, delta=self.delta)
+            except OSError as e:
+                synced, errors = [], [(rel_path, str(e)) for rel_path in rel_paths]
+            # Failed files (locked, target full or disconnected) are retried in a later batch
+            for rel_path, error in errors:
+                logger.warning(f"Could not sync {local_path / rel_path}, retrying later: {error}")
+                self.dirty.add(local_path, rel_path)
+            if errors:
+                inc("daemon.retries", len(errors))
+            for rel_path in synced:
+                dst = target_root / rel_path
+                try:
+                    stat = dst.stat()
+                    changed_in_backup[str(dst)] = (stat.st_mtime, stat.st_size)
+                except OSError:
+                    pass
+            logger.info(f"Synced {len(synced)} changed files from {local_path} to {target_root}")
+            results.append(DaemonSyncResult(local_path, synced, errors))
+
+        if changed_in_backup and self.index_path is not None and self.index_path.exists():
+            try:
+                append_index_journal(self.index_path, changed_in_backup)
+            except Exception as e:
+                logger.error(f"Could not update index {self.index_path}: {e}")
+        if self._clock() - self._last_merge >= self.index_merge_interval:
+            self.merge_index()
+        inc("daemon.batches")
+        return results
+
+    def merge_index(self) -> int:
+        """
+        Merges the index journal into the backup index.
+
+        Returns:
+            The number of merged file entries.
+        """
+        self._last_merge = self._clock()
+        if self.index_path is None or not self.index_path.exists():
+            return 0
+        try:
+            merged = merge_index_journal(self.index_path)
+        except Exception as e:
+            logger.error(f"Could not merge the journal into index {self.index_path}: {e}")
+            return 0
+        if merged:
+            logger.info(f"Merged {merged} journaled entries into {self.index_path}")
+        return merged
+
+    def start(self) -> None:
+        """Starts the watcher."""
+        self._stop.clear()
+        self.watcher.start()
+
+    def stop(self) -> None:
+        """Requests the run loop to end and stops the watcher."""
+        self._stop.set()
+        self.watcher.stop()
+
+    def run_forever(self) -> None:
+        """Syncs dirty files every sync_interval seconds until stop() is called."""
+        self.start()
+        logger.info(f"Watching {len(self.folders)} folders for changes (Ctrl+C to stop)...")
+        try:
+            while not self._stop.wait(self.sync_interval):
+                try:
+                    self.sync_dirty()
+                except Exception as e:
+                    logger.error(f"Sync batch failed: {e}")
+        finally:
+            self.watcher.stop()
+            # Copy whatever settled in the meantime before exiting
+            self.sync_dirty()
+            self.merge_index()
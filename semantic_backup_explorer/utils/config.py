@@ -1,9 +1,17 @@
 """Centralized configuration for backup operations."""
 
+import logging
+from collections.abc import Iterator
 from pathlib import Path
+from typing import Optional
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+from semantic_backup_explorer.utils.exclusions import ExclusionConfig
+
+EXCLUSIONS_SECTION = "exclusions"
+EXCLUDE_PREFIX = "exclude:"
+
 
 class BackupConfig(BaseSettings):  # type: ignore[misc]
     """
@@ -13,8 +21,35 @@ class BackupConfig(BaseSettings):  # type: ignore[misc]
     """
 
     backup_drive: Path = Path("/media/backup")
+    backup_config_path: Path = Path("backup_config.md")
     index_path: Path = Path("data/backup_index.md")
     embeddings_path: Path = Path("data/embeddings")
+    catalog_path: Path = Path("data/catalog")
+    local_cache_path: Optional[Path] = Path("data/local_cache")
+    local_cache_trust_dir_mtime: bool = False
+    local_cache_max_age_hours: float = 24.0
+    copy_buffer_mb: int = 8
+    throttle_bandwidth: str = ""
+    throttle_files_per_sec: float = 0.0
+    throttle_schedule: str = ""
+    low_io_priority: bool = False
+    delta_sync: bool = False
+    delta_min_size_mb: float = 64.0
+    delta_block_kb: int = 1024
+    delta_cache_path: Optional[Path] = Path("data/delta_cache")
+    delta_in_place: bool = False
+    detect_renames: bool = True
+    verify_renames: bool = False
+    snapshot_sync: bool = False
+    snapshot_dir: str = "snapshots"
+    snapshot_keep: int = 0
+    embedding_server_url: str = ""
+    vector_compression: str = ""
+    vector_pca_dim: int = 0
+    vector_rescore: bool = True
+    vector_index: str = "flat"
+    vector_ivf_lists: int = 0
+    vector_ivf_probe: int = 16
     groq_api_key: str = ""
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
@@ -32,3 +67,65 @@ class BackupConfig(BaseSettings):  # type: ignore[misc]
         # Note: We used to check writability here by touching a file, but this
         # can fail on Windows drive roots even if the drive is generally writable.
         # Writability will be caught during the actual sync process.
+
+
+def _iter_config_items(config_path: Path) -> Iterator[tuple[str, str]]:
+    """Yields (lower-case section heading, item text) for every list item of the config file."""
+    if not config_path.exists():
+        return
+    section = ""
+    with open(config_path, "r", encoding="utf-8") as f:
+        for line in f:
+            stripped = line.strip()
+            if stripped.startswith("#"):
+                section = stripped.lstrip("#").strip().lower()
+            # Look for lines starting with '- ' or '* ' followed by a path or pattern
+            elif stripped.startswith("- ") or stripped.startswith("* "):
+                yield section, stripped[2:].strip()
+
+
+def _is_exclude_item(section: str, item: str) -> bool:
+    return section == EXCLUSIONS_SECTION or item.lower().startswith(EXCLUDE_PREFIX)
+
+
+def parse_config(config_path: Path) -> list[str]:
+    """
+    Parses the markdown config file for source folders.
+
+    Args:
+        config_path: Path to the backup configuration file.
+
+    Returns:
+        A list of folder paths to synchronize.
+    """
+    return [item for section, item in _iter_config_items(config_path) if not _is_exclude_item(section, item)]
+
+
+def parse_exclusions(config_path: Path) -> ExclusionConfig:
+    """
+    Parses the exclusion patterns of the markdown config file.
+
+    Patterns listed under '## Exclusions' apply to all source folders and to
+    the scan of the backup drive. An item '- exclude: <pattern>' below a source
+    folder applies to that folder only. Patterns may be wrapped in backticks.
+
+    Args:
+        config_path: Path to the backup configuration file.
+
+    Returns:
+        The global and per-folder patterns (empty if the file does not exist).
+    """
+    exclusions = ExclusionConfig()
+    folder: Optional[str] = None
+    for section, item in _iter_config_items(config_path):
+        if section == EXCLUSIONS_SECTION:
+            exclusions.patterns.append(item.strip("`"))
+        elif item.lower().startswith(EXCLUDE_PREFIX):
+            pattern = item[len(EXCLUDE_PREFIX) :].strip().strip("`")
+            if folder is None:
+                logging.getLogger(__name__).warning(f"Ignoring '{item}' before the first source folder.")
+            else:
+                exclusions.folder_patterns.setdefault(folder, []).append(pattern)
+        else:
+            folder = item
+    return exclusions
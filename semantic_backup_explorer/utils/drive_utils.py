@@ -1,27 +1,48 @@
 """Utilities for drive and volume information."""
 
+import logging
 import os
+import re
 import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional, Protocol
 
+from semantic_backup_explorer.utils.metrics import inc
 
-def get_volume_label(path: str | Path) -> Optional[str]:
-    """
-    Attempts to get the volume label of the drive containing the path on Windows.
+logger = logging.getLogger(__name__)
 
-    Args:
-        path: Path on the drive.
+DEFAULT_LABEL_TTL = 30.0
 
-    Returns:
-        The volume label string, or None if not on Windows or if detection fails.
-    """
-    if os.name != "nt":
-        return None
 
-    try:
-        abs_path = os.path.abspath(path)
-        drive = os.path.splitdrive(abs_path)[0]
+class DriveIdentityBackend(Protocol):
+    """Protocol for volume label lookup backends."""
+
+    def get_label(self, path: Path) -> Optional[str]:
+        """
+        Looks up the volume label of the drive containing path.
+
+        Args:
+            path: Absolute path on the drive.
+
+        Returns:
+            The volume label, or None if this backend cannot determine it.
+        """
+        ...
+
+
+class WmicBackend:
+    """Windows backend that asks ``wmic`` in a subprocess (slow, legacy fallback)."""
+
+    def get_label(self, path: Path) -> Optional[str]:
+        """Looks up the volume label via wmic."""
+        if os.name != "nt":
+            return None
+
+        drive = os.path.splitdrive(str(path))[0]
         if not drive:
             return None
 
@@ -36,6 +57,295 @@ def get_volume_label(path: str | Path) -> Optional[str]:
         # MyBackup
         if len(lines) > 1 and lines[0].lower().startswith("volumename"):
             return lines[1]
-    except Exception:
-        pass
-    return None
+        return None
+
+
+class WindowsApiBackend:
+    """Windows backend calling ``GetVolumeInformationW`` directly, without a subprocess."""
+
+    def get_label(self, path: Path) -> Optional[str]:
+        """Looks up the volume label via the Win32 API."""
+        if sys.platform != "win32":
+            return None
+
+        import ctypes
+
+        drive = os.path.splitdrive(str(path))[0]
+        if not drive:
+            return None
+
+        buffer = ctypes.create_unicode_buffer(261)
+        ok = ctypes.windll.kernel32.GetVolumeInformationW(  # type: ignore[attr-defined,unused-ignore]
+            ctypes.c_wchar_p(drive + "\\"), buffer, ctypes.sizeof(buffer), None, None, None, None, 0
+        )
+        if not ok:
+            return None
+        return buffer.value or None
+
+
+def _decode_udev_label(name: str) -> str:
+    """
+    Decodes the ``\\xNN`` escapes udev uses in ``/dev/disk/by-label`` entries.
+
+    Args:
+        name: The escaped entry name, e.g. ``My\\x20Backup``.
+
+    Returns:
+        The decoded label.
+    """
+    return re.sub(r"\\x([0-9a-fA-F]{2})", lambda m: chr(int(m.group(1), 16)), name)
+
+
+class LinuxByLabelBackend:
+    """Linux backend resolving the symlinks in ``/dev/disk/by-label`` (no subprocess)."""
+
+    def __init__(self, by_label_dir: str | Path = "/dev/disk/by-label") -> None:
+        """
+        Initialize the backend.
+
+        Args:
+            by_label_dir: Directory containing the udev label symlinks.
+        """
+        self.by_label_dir = Path(by_label_dir)
+
+    def get_label(self, path: Path) -> Optional[str]:
+        """Looks up the volume label by matching the device number of path."""
+        if not self.by_label_dir.is_dir():
+            return None
+
+        device = os.stat(path).st_dev
+        for entry in os.scandir(self.by_label_dir):
+            try:
+                # Follows the symlink to the block device node
+                if os.stat(entry.path).st_rdev == device:
+                    return _decode_udev_label(entry.name)
+            except OSError:
+                continue
+        return None
+
+
+def parse_blkid_export(output: str) -> list[dict[str, str]]:
+    """
+    Parses the output of ``blkid -o export``.
+
+    Args:
+        output: The raw command output (``KEY=value`` lines, blank-line separated devices).
+
+    Returns:
+        One dictionary per device.
+    """
+    devices: list[dict[str, str]] = []
+    current: dict[str, str] = {}
+    for line in output.splitlines():
+        line = line.strip()
+        if not line:
+            if current:
+                devices.append(current)
+                current = {}
+            continue
+        if "=" in line:
+            key, value = line.split("=", 1)
+            current[key] = value
+    if current:
+        devices.append(current)
+    return devices
+
+
+class BlkidBackend:
+    """Linux backend parsing ``blkid -o export`` (one subprocess per cache miss)."""
+
+    def __init__(self, runner: Optional[Callable[[], str]] = None) -> None:
+        """
+        Initialize the backend.
+
+        Args:
+            runner: Optional callable returning the blkid output (used for testing).
+        """
+        self.runner = runner or self._run_blkid
+
+    @staticmethod
+    def _run_blkid() -> str:
+        """Runs blkid and returns its output."""
+        return subprocess.check_output(["blkid", "-o", "export"], stderr=subprocess.DEVNULL).decode("utf-8", errors="ignore")
+
+    def get_label(self, path: Path) -> Optional[str]:
+        """Looks up the volume label by matching the device number of path."""
+        device = os.stat(path).st_dev
+        for info in parse_blkid_export(self.runner()):
+            label = info.get("LABEL")
+            devname = info.get("DEVNAME")
+            if not label or not devname:
+                continue
+            try:
+                if os.stat(devname).st_rdev == device:
+                    return label
+            except OSError:
+                continue
+        return None
+
+
+def default_backends() -> list[DriveIdentityBackend]:
+    """
+    Returns the label backends for the current platform, fastest first.
+
+    Returns:
+        A list of backends.
+    """
+    if os.name == "nt":
+        return [WindowsApiBackend(), WmicBackend()]
+    if sys.platform.startswith("linux"):
+        return [LinuxByLabelBackend(), BlkidBackend()]
+    return []
+
+
+def _device_id(path: str | Path) -> Optional[int]:
+    """
+    Returns the device id of the filesystem containing path.
+
+    Args:
+        path: Path on the drive.
+
+    Returns:
+        The device id, or None if path cannot be accessed.
+    """
+    try:
+        return os.stat(path).st_dev
+    except OSError:
+        return None
+
+
+@dataclass
+class _CachedLabel:
+    """Cached label lookup for one device."""
+
+    label: Optional[str]
+    expires: float
+
+
+class DriveIdentityProvider:
+    """
+    Resolves volume labels with a per-device cache.
+
+    Entries are keyed by the device id of the mount point, so plugging in a
+    different drive under the same drive letter produces a different key and
+    bypasses stale entries. The TTL additionally guards against a new drive
+    reusing the device id of the previous one.
+    """
+
+    def __init__(
+        self,
+        backends: Optional[list[DriveIdentityBackend]] = None,
+        ttl: float = DEFAULT_LABEL_TTL,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Initialize the provider.
+
+        Args:
+            backends: Backends to ask in order (default: platform backends).
+            ttl: Seconds a looked-up label stays valid.
+            clock: Monotonic clock function (used for testing).
+        """
+        self.backends = default_backends() if backends is None else backends
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._cache: dict[int, _CachedLabel] = {}
+        self._lock = threading.Lock()
+
+    def get_label(self, path: str | Path) -> Optional[str]:
+        """
+        Returns the volume label of the drive containing path.
+
+        Args:
+            path: Path on the drive.
+
+        Returns:
+            The volume label string, or None if detection fails.
+        """
+        abs_path = Path(os.path.abspath(path))
+        device = _device_id(abs_path)
+        if device is None:
+            return None
+
+        now = self.clock()
+        with self._lock:
+            cached = self._cache.get(device)
+            if cached is not None and cached.expires > now:
+                self.hits += 1
+                inc("drive_label.cache_hits")
+                return cached.label
+            self.misses += 1
+        inc("drive_label.cache_misses")
+
+        label = self._lookup(abs_path)
+        with self._lock:
+            self._cache[device] = _CachedLabel(label, now + self.ttl)
+        return label
+
+    def _lookup(self, path: Path) -> Optional[str]:
+        """Asks the backends in order until one returns a label."""
+        for backend in self.backends:
+            try:
+                label = backend.get_label(path)
+            except Exception as e:
+                logger.debug(f"{type(backend).__name__} failed for {path}: {e}")
+                continue
+            if label:
+                return label
+        return None
+
+    def invalidate(self, path: Optional[str | Path] = None) -> None:
+        """
+        Drops cached labels.
+
+        Args:
+            path: Only drop the entry for the device containing path (default: all).
+        """
+        with self._lock:
+            if path is None:
+                self._cache.clear()
+                return
+            device = _device_id(os.path.abspath(path))
+            if device is not None:
+                self._cache.pop(device, None)
+
+
+_provider = DriveIdentityProvider()
+
+
+def get_drive_identity_provider() -> DriveIdentityProvider:
+    """
+    Returns the process-wide drive identity provider.
+
+    Returns:
+        The shared provider instance.
+    """
+    return _provider
+
+
+def set_drive_identity_provider(provider: DriveIdentityProvider) -> None:
+    """
+    Replaces the process-wide drive identity provider.
+
+    Args:
+        provider: The provider to use for get_volume_label.
+    """
+    global _provider
+    _provider = provider
+
+
+def get_volume_label(path: str | Path) -> Optional[str]:
+    """
+    Attempts to get the volume label of the drive containing the path.
+
+    Lookups are cached per device, see DriveIdentityProvider.
+
+    Args:
+        path: Path on the drive.
+
+    Returns:
+        The volume label string, or None if detection fails.
+    """
+    return _provider.get_label(path)
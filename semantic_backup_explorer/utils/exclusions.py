@@ -0,0 +1,233 @@
+"""Gitignore-style exclusion rules for scanning, comparing and syncing folders."""
+
+import os
+import re
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+# Windows file systems are case-insensitive, so "thumbs.db" must also exclude "Thumbs.db"
+IGNORE_CASE = os.name == "nt"
+
+
+def _translate(pattern: str) -> tuple[str, bool]:
+    """
+    Translates one gitignore pattern into a regular expression.
+
+    The expression matches a path relative to the rule root, with "/" as
+    separator and a trailing "/" for directories.
+
+    Args:
+        pattern: The pattern, without surrounding whitespace.
+
+    Returns:
+        The expression (without capturing groups) and whether the pattern is negated.
+    """
+    negated = pattern.startswith("!")
+    if negated:
+        pattern = pattern[1:]
+    elif pattern.startswith("\\"):
+        # "\!" and "\#" match file names starting with these characters
+        pattern = pattern[1:]
+    dir_only = pattern.endswith("/")
+    pattern = pattern.rstrip("/")
+    # A slash at the start or in the middle anchors the pattern to the rule root
+    anchored = "/" in pattern
+    pattern = pattern.lstrip("/")
+
+    parts: list[str] = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == "*":
+            at_segment_start = i == 0 or pattern[i - 1] == "/"
+            if pattern.startswith("**", i) and at_segment_start and pattern.startswith("/", i + 2):
+                # "**/" matches zero or more directories
+                parts.append("(?:.*/)?")
+                i += 3
+                continue
+            if pattern.startswith("**", i) and at_segment_start and i + 2 == n:
+                # A trailing "/**" matches everything inside, but not the directory itself
+                parts.append(".+")
+                i += 2
+                continue
+            parts.append("[^/]*")
+            while i + 1 < n and pattern[i + 1] == "*":
+                i += 1
+        elif c == "?":
+            parts.append("[^/]")
+        elif c == "[" and (end := pattern.find("]", i + 2)) != -1:
+            body = pattern[i + 1 : end].replace("\\", "\\\\")
+            if body.startswith("!"):
+                body = "^" + body[1:]
+            parts.append(f"[{body}]")
+            i = end
+        elif c == "\\" and i + 1 < n:
+            i += 1
+            parts.append(re.escape(pattern[i]))
+        else:
+            parts.append(re.escape(c))
+        i += 1
+
+    prefix = "" if anchored else "(?:.*/)?"
+    suffix = "/" if dir_only else "/?"
+    return prefix + "".join(parts) + suffix, negated
+
+
+class ExclusionRules:
+    """
+    A list of gitignore-style patterns, compiled into a single regular expression.
+
+    Supported syntax: "*" and "?" (not matching "/"), "[abc]" / "[!abc]",
+    "**" for any number of directories, a trailing "/" for directories only,
+    a leading or inner "/" to anchor a pattern at the root, "!" to re-include
+    what an earlier pattern excluded, and "#" comments. As in git, the last
+    matching pattern decides, and nothing inside an excluded directory can be
+    re-included: callers prune excluded directories instead of descending.
+
+    All patterns become one alternation with a group per pattern, in reverse
+    order, so a single regex match finds the last matching pattern.
+    """
+
+    def __init__(self, patterns: Iterable[str] = (), ignore_case: bool = IGNORE_CASE) -> None:
+        """
+        Initialize the rules.
+
+        Args:
+            patterns: Patterns, one per entry; blank entries and "#" comments are ignored.
+            ignore_case: Match case-insensitively (default: on Windows).
+        """
+        self.patterns = [p for p in (line.strip() for line in patterns) if p and not p.startswith("#")]
+        self.ignore_case = ignore_case
+        self._regex: Optional[re.Pattern[str]] = None
+        self._negated: list[bool] = []
+        if self.patterns:
+            translated = [_translate(p) for p in reversed(self.patterns)]
+            self._negated = [negated for _, negated in translated]
+            alternatives = "|".join(f"({regex})" for regex, _ in translated)
+            self._regex = re.compile(alternatives, re.DOTALL | (re.IGNORECASE if ignore_case else 0))
+
+    def __bool__(self) -> bool:
+        return self._regex is not None
+
+    def __repr__(self) -> str:
+        return f"ExclusionRules({self.patterns!r})"
+
+    def extended(self, patterns: Iterable[str]) -> "ExclusionRules":
+        """
+        Returns new rules with more patterns appended (and thus taking precedence).
+
+        Args:
+            patterns: The additional patterns.
+
+        Returns:
+            The combined rules.
+        """
+        return ExclusionRules([*self.patterns, *patterns], ignore_case=self.ignore_case)
+
+    def matches(self, rel_path: str, is_dir: bool = False) -> bool:
+        """
+        Checks a single path, assuming its parent directories are not excluded.
+
+        This is the check for walks that prune excluded directories.
+
+        Args:
+            rel_path: Path relative to the rule root, with "/" or os.sep.
+            is_dir: Whether the path is a directory.
+
+        Returns:
+            True if the path is excluded.
+        """
+        if self._regex is None:
+            return False
+        if os.sep != "/":
+            rel_path = rel_path.replace(os.sep, "/")
+        match = self._regex.fullmatch(rel_path + "/" if is_dir else rel_path)
+        return match is not None and not self._negated[(match.lastindex or 1) - 1]
+
+    def is_excluded(self, rel_path: str, is_dir: bool = False) -> bool:
+        """
+        Checks a path and all of its parent directories.
+
+        Args:
+            rel_path: Path relative to the rule root, with "/" or os.sep.
+            is_dir: Whether the path is a directory.
+
+        Returns:
+            True if the path or one of its parents is excluded.
+        """
+        if self._regex is None:
+            return False
+        parts = rel_path.replace(os.sep, "/").split("/")
+        for i in range(1, len(parts)):
+            if self.matches("/".join(parts[:i]), is_dir=True):
+                return True
+        return self.matches(rel_path, is_dir)
+
+    def excluded_mask(self, rel_paths: Iterable[str]) -> list[bool]:
+        """
+        Checks many file paths, each directory only once.
+
+        Args:
+            rel_paths: File paths relative to the rule root.
+
+        Returns:
+            True for every excluded path, in input order.
+        """
+        if self._regex is None:
+            return [False for _ in rel_paths]
+        dir_cache: dict[str, bool] = {"": False}
+
+        def dir_excluded(rel_dir: str) -> bool:
+            excluded = dir_cache.get(rel_dir)
+            if excluded is None:
+                parent = rel_dir.rpartition("/")[0]
+                excluded = dir_excluded(parent) or self.matches(rel_dir, is_dir=True)
+                dir_cache[rel_dir] = excluded
+            return excluded
+
+        mask = []
+        for rel_path in rel_paths:
+            rel_path = rel_path.replace(os.sep, "/")
+            mask.append(dir_excluded(rel_path.rpartition("/")[0]) or self.matches(rel_path))
+        return mask
+
+
+@dataclass
+class ExclusionConfig:
+    """Exclusion patterns for all source folders and for individual ones, as read from backup_config.md."""
+
+    patterns: list[str] = field(default_factory=list)
+    # Source folder (as written in the config) -> its own patterns
+    folder_patterns: dict[str, list[str]] = field(default_factory=dict)
+    _compiled: dict[str, ExclusionRules] = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    def global_rules(self) -> ExclusionRules:
+        """
+        Returns the rules that apply everywhere, e.g. when scanning the backup drive.
+
+        Returns:
+            The compiled rules.
+        """
+        rules = self._compiled.get("")
+        if rules is None:
+            rules = self._compiled[""] = ExclusionRules(self.patterns)
+        return rules
+
+    def for_folder(self, local_path: str | Path) -> ExclusionRules:
+        """
+        Returns the rules of a source folder: the global patterns followed by its own.
+
+        Args:
+            local_path: The source folder.
+
+        Returns:
+            The compiled rules, relative to the folder.
+        """
+        key = str(Path(local_path))
+        rules = self._compiled.get(key)
+        if rules is None:
+            own = next((p for folder, p in self.folder_patterns.items() if str(Path(folder)) == key), [])
+            rules = self._compiled[key] = self.global_rules().extended(own)
+        return rules
@@ -0,0 +1,270 @@
+"""Compact, array-backed tables of file records with vectorized joins."""
+
+from array import array
+from collections.abc import Iterable, Mapping, Sequence
+from typing import Any, Optional
+
+import numpy as np
+
+# Size of files whose size is unknown (indexes written before sizes were recorded)
+UNKNOWN_SIZE = -1
+# Matched rows whose paths are compared at once (bounds the temporary index arrays)
+COMPARE_BLOCK_ROWS = 16384
+
+# The path id function; a module attribute so that tests can force collisions
+_path_hash = hash
+
+
+def _column(values: Optional[Iterable[Any]], dtype: Any, count: int, fill: float) -> np.ndarray:
+    """Converts a column to a NumPy array, without copying arrays that already have the dtype."""
+    if values is None:
+        return np.full(count, fill, dtype=dtype)
+    if isinstance(values, (np.ndarray, array)):
+        return np.asarray(values, dtype=dtype)
+    return np.fromiter(values, dtype=dtype, count=count)
+
+
+class FileTable:
+    """
+    Files with modification times and sizes, stored in a few NumPy arrays.
+
+    The paths are UTF-8 encoded into a single string pool and addressed by
+    offsets, so a table of a million files takes tens of MB instead of the
+    hundreds of MB of a dict of Python strings and floats. Every row has a
+    64-bit path id (the hash of its path), and the rows are sorted by id:
+    joins and set differences of two tables are sorted merges of their id
+    columns (numpy.searchsorted) instead of Python set operations.
+
+    The ids only preselect rows: matched rows are confirmed by comparing
+    their path bytes, so two paths with the same hash stay distinct rows and
+    are never mistaken for each other. The ids are only comparable within one
+    process (str hashes are salted per interpreter), so tables are not meant
+    to be persisted.
+    """
+
+    def __init__(self, ids: np.ndarray, mtimes: np.ndarray, sizes: np.ndarray, pool: bytes, offsets: np.ndarray) -> None:
+        """
+        Initialize a table from its columns; use the from_* constructors instead.
+
+        Args:
+            ids: Path ids (int64), sorted ascending; only different paths share an id.
+            mtimes: Modification times (float64, NaN if unknown).
+            sizes: Sizes in bytes (int64, UNKNOWN_SIZE if unknown).
+            pool: UTF-8 encoded paths of all rows, concatenated.
+            offsets: Start of each path in the pool, plus the end of the last one.
+        """
+        self.ids = ids
+        self.mtimes = mtimes
+        self.sizes = sizes
+        self._pool = pool
+        self._offsets = offsets
+
+    @classmethod
+    def from_columns(
+        cls,
+        paths: Sequence[str],
+        mtimes: Optional[Iterable[float]] = None,
+        sizes: Optional[Iterable[int]] = None,
+    ) -> "FileTable":
+        """
+        Builds a table from parallel columns.
+
+        Args:
+            paths: Relative file paths. If a path occurs twice, the last row wins.
+            mtimes: Modification times (default: unknown).
+            sizes: Sizes in bytes (default: unknown).
+
+        Returns:
+            The table.
+        """
+        count = len(paths)
+        ids = np.fromiter(map(_path_hash, paths), dtype=np.int64, count=count)
+        mtime_col = _column(mtimes, np.float64, count, np.nan)
+        size_col = _column(sizes, np.int64, count, UNKNOWN_SIZE)
+
+        order = np.argsort(ids, kind="stable")
+        ids = ids[order]
+        keep = np.ones(count, dtype=bool)
+        same_id = ids[1:] == ids[:-1]
+        if same_id.any():
+            # A path given twice, or two paths with the same hash: check the few rows involved by path
+            in_run = np.zeros(count, dtype=bool)
+            in_run[:-1] |= same_id
+            in_run[1:] |= same_id
+            run_rows = np.flatnonzero(in_run)
+            # Keep the last row of each path, like a dict built from the rows would
+            last = {paths[i]: pos for pos, i in zip(run_rows.tolist(), order[run_rows].tolist(), strict=True)}
+            keep[run_rows] = False
+            keep[list(last.values())] = True
+        order = order[keep]
+
+        encoded = [paths[i].encode("utf-8") for i in order.tolist()]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum(np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded)), out=offsets[1:])
+        return cls(ids[keep], mtime_col[order], size_col[order], b"".join(encoded), offsets)
+
+    @classmethod
+    def from_dict(cls, mtimes: Mapping[str, float], sizes: Optional[Mapping[str, Optional[int]]] = None) -> "FileTable":
+        """
+        Builds a table from a path -> mtime mapping, as returned by get_all_files_from_index.
+
+        Args:
+            mtimes: Modification time per relative path.
+            sizes: Optional size per relative path (None or missing if unknown).
+
+        Returns:
+            The table.
+        """
+        paths = list(mtimes)
+        size_col = None
+        if sizes is not None:
+            size_col = [UNKNOWN_SIZE if (size := sizes.get(p)) is None else size for p in paths]
+        return cls.from_columns(paths, mtimes.values(), size_col)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def path(self, row: int) -> str:
+        """
+        Returns the path of a row.
+
+        Args:
+            row: Row number.
+
+        Returns:
+            The relative path.
+        """
+        return self._pool[self._offsets[row] : self._offsets[row + 1]].decode("utf-8")
+
+    def paths(self, rows: Optional[Iterable[int]] = None) -> list[str]:
+        """
+        Returns the paths of some or all rows.
+
+        Args:
+            rows: Row numbers (default: all rows, in table order).
+
+        Returns:
+            The relative paths.
+        """
+        offsets = self._offsets.tolist()
+        pool = self._pool
+        selected = range(len(self)) if rows is None else (int(row) for row in rows)
+        return [pool[offsets[row] : offsets[row + 1]].decode("utf-8") for row in selected]
+
+    def find(self, path: str) -> Optional[int]:
+        """
+        Looks up the row of a path.
+
+        Args:
+            path: Relative path.
+
+        Returns:
+            The row number, or None if the path is not in the table.
+        """
+        path_id = _path_hash(path)
+        row = int(np.searchsorted(self.ids, path_id))
+        while row < len(self) and self.ids[row] == path_id:
+            if self.path(row) == path:
+                return row
+            row += 1
+        return None
+
+    def join(self, other: "FileTable") -> tuple[np.ndarray, np.ndarray]:
+        """
+        Finds the paths present in both tables.
+
+        Args:
+            other: The other table.
+
+        Returns:
+            Arrays (rows in self, rows in other) of the common paths.
+        """
+        if not len(other) or not len(self):
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty
+        first = np.searchsorted(other.ids, self.ids, side="left")
+        matches = np.searchsorted(other.ids, self.ids, side="right") - first
+        rows = np.flatnonzero(matches == 1)
+        other_rows = first[rows]
+        same = self._same_paths(rows, other, other_rows)
+        rows, other_rows = rows[same], other_rows[same]
+
+        colliding = np.flatnonzero(matches > 1)
+        if len(colliding):
+            # Several paths of the other table share the id; compare each of them
+            pairs = [
+                (row, candidate)
+                for row in colliding.tolist()
+                for candidate in range(int(first[row]), int(first[row] + matches[row]))
+                if other.path(candidate) == self.path(row)
+            ]
+            if pairs:
+                rows = np.concatenate([rows, np.array([r for r, _ in pairs], dtype=np.int64)])
+                other_rows = np.concatenate([other_rows, np.array([c for _, c in pairs], dtype=np.int64)])
+                order = np.argsort(rows, kind="stable")
+                rows, other_rows = rows[order], other_rows[order]
+        return rows, other_rows
+
+    def _same_paths(self, rows: np.ndarray, other: "FileTable", other_rows: np.ndarray) -> np.ndarray:
+        """Compares the path bytes of pairs of rows of self and other, vectorized in blocks."""
+        starts = self._offsets[rows]
+        lengths = self._offsets[rows + 1] - starts
+        other_starts = other._offsets[other_rows]
+        same: np.ndarray = lengths == other._offsets[other_rows + 1] - other_starts
+        pool = np.frombuffer(self._pool, dtype=np.uint8)
+        other_pool = np.frombuffer(other._pool, dtype=np.uint8)
+        check = np.flatnonzero(same & (lengths > 0))
+        for block_start in range(0, len(check), COMPARE_BLOCK_ROWS):
+            block = check[block_start : block_start + COMPARE_BLOCK_ROWS]
+            block_lengths = lengths[block]
+            # Position of every byte within its path, for all paths of the block concatenated
+            segments = np.zeros(len(block), dtype=np.int64)
+            np.cumsum(block_lengths[:-1], out=segments[1:])
+            within = np.arange(int(block_lengths.sum())) - np.repeat(segments, block_lengths)
+            differ = (
+                pool[np.repeat(starts[block], block_lengths) + within]
+                != other_pool[np.repeat(other_starts[block], block_lengths) + within]
+            )
+            same[block] = ~np.logical_or.reduceat(differ, segments)
+        return same
+
+    def difference(self, other: "FileTable") -> np.ndarray:
+        """
+        Finds the paths of this table that are not in the other one.
+
+        Args:
+            other: The other table.
+
+        Returns:
+            Row numbers in self.
+        """
+        matched = np.zeros(len(self), dtype=bool)
+        matched[self.join(other)[0]] = True
+        return np.flatnonzero(~matched)
+
+    def take(self, rows: np.ndarray) -> "FileTable":
+        """
+        Returns a table with only some of the rows.
+
+        Args:
+            rows: Row numbers, ascending.
+
+        Returns:
+            The new table.
+        """
+        offsets = self._offsets
+        starts, ends = offsets[rows], offsets[rows + 1]
+        lengths = ends - starts
+        new_offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=new_offsets[1:])
+        pool = b"".join(self._pool[start:end] for start, end in zip(starts.tolist(), ends.tolist(), strict=True))
+        return FileTable(self.ids[rows], self.mtimes[rows], self.sizes[rows], pool, new_offsets)
+
+    def to_dict(self) -> dict[str, float]:
+        """
+        Converts the table to a path -> mtime mapping.
+
+        Returns:
+            Dictionary mapping relative paths to modification times.
+        """
+        return dict(zip(self.paths(), self.mtimes.tolist(), strict=True))
@@ -0,0 +1,176 @@
+"""Paginated, section-wise access to the backup index for the Index Viewer."""
+
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from semantic_backup_explorer.indexer.compact_index import CompactIndexReader, format_markdown_entry, is_compact_index
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+DEFAULT_MAX_ENTRIES = 500
+MAX_SECTION_BYTES = 512 * 1024
+
+
+@dataclass
+class FolderPage:
+    """One page of (filtered) folder headers."""
+
+    folders: list[str]
+    page: int
+    page_count: int
+    total: int
+
+
+@dataclass
+class _SectionTable:
+    """Folder headers of an index with the byte range of each markdown section."""
+
+    stat_key: tuple[int, int]
+    folders: list[str]
+    offsets: list[tuple[int, int]]
+    positions: dict[str, int]
+    reader: Optional[CompactIndexReader]
+
+
+# Resolved index path -> section table, invalidated by the index file's mtime/size
+_table_cache: dict[str, _SectionTable] = {}
+_table_lock = threading.Lock()
+
+
+def _build_section_table(index_path: Path, stat_key: tuple[int, int]) -> _SectionTable:
+    """Reads all section headers and their byte offsets in one streaming pass."""
+    if is_compact_index(index_path):
+        reader = CompactIndexReader(index_path)
+        return _SectionTable(stat_key, list(reader.folders), [], {f: i for i, f in enumerate(reader.folders)}, reader)
+
+    folders: list[str] = []
+    offsets: list[tuple[int, int]] = []
+    start: Optional[int] = None
+    offset = 0
+    with open(index_path, "rb") as f:
+        for raw in f:
+            if raw.startswith(b"## "):
+                if start is not None:
+                    offsets.append((start, offset))
+                folders.append(raw[3:].decode("utf-8").strip())
+                start = offset
+            offset += len(raw)
+    if start is not None:
+        offsets.append((start, offset))
+
+    # Keep the first section for duplicate headers
+    positions: dict[str, int] = {}
+    for i, folder in enumerate(folders):
+        positions.setdefault(folder, i)
+    return _SectionTable(stat_key, folders, offsets, positions, None)
+
+
+class IndexBrowser:
+    """
+    Browses a (possibly multi-GB) index one folder section at a time.
+
+    Only the section headers are kept in memory. Sections are read on demand by
+    seeking to their byte offset (markdown) or decompressing their block
+    (compact format), and every response is bounded in size.
+    """
+
+    def __init__(self, index_path: str | Path) -> None:
+        """
+        Initialize the browser.
+
+        Args:
+            index_path: Path to the markdown or compact index.
+        """
+        self.index_path = Path(index_path)
+
+    def _table(self) -> Optional[_SectionTable]:
+        """Returns the cached section table, rebuilding it if the index changed."""
+        try:
+            stat = self.index_path.stat()
+        except OSError:
+            return None
+        stat_key = (stat.st_mtime_ns, stat.st_size)
+        cache_key = str(self.index_path.resolve())
+        with _table_lock:
+            table = _table_cache.get(cache_key)
+            if table is None or table.stat_key != stat_key:
+                table = _build_section_table(self.index_path, stat_key)
+                _table_cache[cache_key] = table
+            return table
+
+    def list_folders(self, query: str = "", page: int = 0, page_size: int = DEFAULT_PAGE_SIZE) -> FolderPage:
+        """
+        Lists folder headers matching a path substring, one page at a time.
+
+        Args:
+            query: Case-insensitive path substring (empty: all folders).
+            page: Zero-based page number (clamped to the valid range).
+            page_size: Folders per page (at most MAX_PAGE_SIZE).
+
+        Returns:
+            The requested page.
+        """
+        table = self._table()
+        if table is None:
+            return FolderPage([], 0, 0, 0)
+
+        page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+        needle = query.strip().lower()
+        if needle:
+            matches = [f for f in table.folders if needle in f.lower()]
+        else:
+            matches = table.folders
+
+        total = len(matches)
+        page_count = (total + page_size - 1) // page_size
+        page = max(0, min(page, page_count - 1)) if page_count else 0
+        start = page * page_size
+        return FolderPage(matches[start : start + page_size], page, page_count, total)
+
+    def read_section(self, folder: str, max_entries: int = DEFAULT_MAX_ENTRIES) -> str:
+        """
+        Returns the markdown section of a single folder.
+
+        Args:
+            folder: Folder header as returned by list_folders.
+            max_entries: Maximum number of entries to include.
+
+        Returns:
+            The section text, truncated with a note if it is too large.
+        """
+        table = self._table()
+        if table is None or folder not in table.positions:
+            return ""
+        position = table.positions[folder]
+
+        if table.reader is not None:
+            header, entries = table.reader.read_section(position)
+            lines = [format_markdown_entry(path, mtime) for path, mtime in entries[:max_entries]]
+            text = f"## {header}\n\n" + "".join(lines)
+            truncated = len(entries) > max_entries
+        else:
+            start, end = table.offsets[position]
+            with open(self.index_path, "rb") as f:
+                f.seek(start)
+                data = f.read(min(end - start, MAX_SECTION_BYTES))
+            raw_lines = data.decode("utf-8", errors="ignore").splitlines(keepends=True)
+            if end - start > MAX_SECTION_BYTES:
+                # Drop the last (possibly partial) line
+                raw_lines = raw_lines[:-1]
+            entry_count = 0
+            kept = []
+            truncated = end - start > MAX_SECTION_BYTES
+            for line in raw_lines:
+                if line.startswith("- "):
+                    entry_count += 1
+                    if entry_count > max_entries:
+                        truncated = True
+                        break
+                kept.append(line)
+            text = "".join(kept).rstrip("\n") + "\n"
+
+        if truncated:
+            text += f"\n… (gekürzt, es werden maximal {max_entries} Einträge angezeigt)\n"
+        return text
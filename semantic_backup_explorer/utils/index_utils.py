@@ -1,13 +1,22 @@
-"""Utilities for parsing and searching the markdown backup index."""
+"""Utilities for parsing and searching the backup index (markdown or compact)."""
 
 import datetime
+import json
 import os
-from dataclasses import dataclass
+from array import array
+from dataclasses import dataclass, replace
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
 
+from semantic_backup_explorer.indexer.compact_index import CompactIndexReader, is_compact_index, split_entry_meta
+from semantic_backup_explorer.utils.file_table import UNKNOWN_SIZE, FileTable
+from semantic_backup_explorer.utils.metrics import inc, timed
 from semantic_backup_explorer.utils.path_utils import normalize_path
 
+METADATA_SIDECAR_SUFFIX = ".meta.json"
+INDEX_JOURNAL_SUFFIX = ".journal"
+EMBEDDINGS_STATE_FILE = "index_state.json"
+
 
 @dataclass
 class IndexMetadata:
@@ -17,27 +26,157 @@ class IndexMetadata:
     label: Optional[str]
     mtime: Optional[datetime.datetime]
     age_days: int
+    created: Optional[datetime.datetime] = None
+    file_count: Optional[int] = None
+    dir_count: Optional[int] = None
+    total_bytes: Optional[int] = None
+    checksum: Optional[str] = None
 
 
-def get_index_metadata(index_path: str | Path) -> IndexMetadata:
+# Resolved index path -> ((st_mtime_ns, st_size), metadata)
+_metadata_cache: dict[str, tuple[tuple[int, int], IndexMetadata]] = {}
+
+
+def get_metadata_sidecar_path(index_path: str | Path) -> Path:
     """
-    Extracts metadata from the index file.
+    Returns the path of the JSON metadata sidecar written next to an index.
 
     Args:
-        index_path: Path to the markdown index file.
+        index_path: Path to the index file.
 
     Returns:
-        An IndexMetadata object.
+        The sidecar path, e.g. ``backup_index.md.meta.json``.
     """
     index_path = Path(index_path)
-    if not index_path.exists():
-        return IndexMetadata(None, None, None, 0)
+    return index_path.with_name(index_path.name + METADATA_SIDECAR_SUFFIX)
+
+
+def get_index_journal_path(index_path: str | Path) -> Path:
+    """
+    Returns the path of the journal of pending index updates (see append_index_journal).
+
+    Args:
+        index_path: Path to the index file.
+
+    Returns:
+        The journal path, e.g. ``backup_index.md.journal``.
+    """
+    index_path = Path(index_path)
+    return index_path.with_name(index_path.name + INDEX_JOURNAL_SUFFIX)
+
+
+def read_index_journal(index_path: str | Path) -> dict[str, tuple[float, int]]:
+    """
+    Reads the file entries that were journaled but not yet merged into the index.
+
+    Each line holds one JSON entry [full path, mtime, size]; later lines win.
+    Incomplete lines (e.g. after a crash during an append) are skipped.
+
+    Args:
+        index_path: Path to the index file.
+
+    Returns:
+        Mapping of full backup file path -> (mtime, size in bytes), empty without a journal.
+    """
+    entries: dict[str, tuple[float, int]] = {}
+    try:
+        with open(get_index_journal_path(index_path), encoding="utf-8") as f:
+            for line in f:
+                try:
+                    path, mtime, size = json.loads(line)
+                    entries[str(path)] = (float(mtime), int(size))
+                except (ValueError, TypeError):
+                    continue
+    except FileNotFoundError:
+        pass
+    return entries
+
+
+def clear_index_journal(index_path: str | Path) -> None:
+    """
+    Removes the journal of an index after its entries were written to the index.
+
+    Args:
+        index_path: Path to the index file.
+    """
+    get_index_journal_path(index_path).unlink(missing_ok=True)
+
+
+def write_index_metadata(
+    index_path: str | Path,
+    root_path: Path,
+    label: Optional[str],
+    file_count: int,
+    dir_count: int,
+    total_bytes: int,
+    checksum: str,
+) -> None:
+    """
+    Writes the metadata sidecar for a freshly written index.
+
+    The sidecar records the size and mtime of the index it describes, so it is
+    ignored once the index is modified by anything else.
+
+    Args:
+        index_path: Path to the (closed) index file.
+        root_path: Scanned root path.
+        label: Volume label of the scanned drive.
+        file_count: Number of indexed files.
+        dir_count: Number of indexed directories.
+        total_bytes: Sum of all indexed file sizes.
+        checksum: Checksum of the index content.
+    """
+    stat = Path(index_path).stat()
+    data = {
+        "version": 1,
+        "root": str(root_path),
+        "label": label,
+        "created": datetime.datetime.now().isoformat(),
+        "file_count": file_count,
+        "dir_count": dir_count,
+        "total_bytes": total_bytes,
+        "checksum": checksum,
+        "index_size": stat.st_size,
+        "index_mtime_ns": stat.st_mtime_ns,
+    }
+    with open(get_metadata_sidecar_path(index_path), "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+
+
+def _read_metadata_sidecar(index_path: Path, stat: os.stat_result) -> Optional[IndexMetadata]:
+    """Reads the sidecar if it exists and still matches the index file."""
+    sidecar = get_metadata_sidecar_path(index_path)
+    try:
+        with open(sidecar, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if data.get("index_size") != stat.st_size or data.get("index_mtime_ns") != stat.st_mtime_ns:
+        return None
+
+    created = data.get("created")
+    return IndexMetadata(
+        root_path=Path(data["root"]) if data.get("root") else None,
+        label=data.get("label"),
+        mtime=None,
+        age_days=0,
+        created=datetime.datetime.fromisoformat(created) if created else None,
+        file_count=data.get("file_count"),
+        dir_count=data.get("dir_count"),
+        total_bytes=data.get("total_bytes"),
+        checksum=data.get("checksum"),
+    )
+
+
+def _read_metadata_header(index_path: Path) -> IndexMetadata:
+    """Scans the index header for the Root line (fallback for indexes without sidecar)."""
+    if is_compact_index(index_path):
+        reader = CompactIndexReader(index_path)
+        return IndexMetadata(Path(reader.root), reader.label, None, 0)
 
     root_path = None
     label = None
-    mtime = datetime.datetime.fromtimestamp(index_path.stat().st_mtime)
-    age_days = (datetime.datetime.now() - mtime).days
-
     with open(index_path, "r", encoding="utf-8") as f:
         for line in f:
             if line.startswith("Root: "):
@@ -49,17 +188,134 @@ def get_index_metadata(index_path: str | Path) -> IndexMetadata:
                 else:
                     root_path = Path(content_after_root)
                 break
+    return IndexMetadata(root_path, label, None, 0)
+
 
-    return IndexMetadata(root_path, label, mtime, age_days)
+def get_index_metadata(index_path: str | Path) -> IndexMetadata:
+    """
+    Extracts metadata from the index file.
+
+    Results are cached in-process and invalidated when the index file's size or
+    mtime changes. The metadata sidecar is used when available, so the index
+    itself is not read.
+
+    Args:
+        index_path: Path to the markdown index file.
 
+    Returns:
+        An IndexMetadata object.
+    """
+    index_path = Path(index_path)
+    try:
+        stat = index_path.stat()
+    except OSError:
+        return IndexMetadata(None, None, None, 0)
+
+    cache_key = str(index_path.resolve())
+    stat_key = (stat.st_mtime_ns, stat.st_size)
+    cached = _metadata_cache.get(cache_key)
+    if cached is not None and cached[0] == stat_key:
+        inc("index.metadata.cache_hits")
+        metadata = cached[1]
+    else:
+        inc("index.metadata.cache_misses")
+        metadata = _read_metadata_sidecar(index_path, stat) or _read_metadata_header(index_path)
+        metadata.mtime = datetime.datetime.fromtimestamp(stat.st_mtime)
+        _metadata_cache[cache_key] = (stat_key, metadata)
+
+    # The age changes over time, so it is never taken from the cache
+    age_days = (datetime.datetime.now() - metadata.mtime).days if metadata.mtime else 0
+    return replace(metadata, age_days=age_days)
+
+
+def record_embeddings_source(index_path: str | Path, embeddings_path: str | Path) -> None:
+    """
+    Remembers which index the embeddings in embeddings_path were built from.
+
+    Args:
+        index_path: Path to the index the embeddings were created from.
+        embeddings_path: The embeddings directory.
+    """
+    metadata = get_index_metadata(index_path)
+    embeddings_path = Path(embeddings_path)
+    embeddings_path.mkdir(parents=True, exist_ok=True)
+    with open(embeddings_path / EMBEDDINGS_STATE_FILE, "w", encoding="utf-8") as f:
+        json.dump({"checksum": metadata.checksum}, f)
+
+
+def embeddings_are_stale(index_path: str | Path, embeddings_path: str | Path) -> bool:
+    """
+    Checks whether the embeddings were built from an older index.
+
+    Compares the index checksum from the metadata sidecar with the one recorded
+    by record_embeddings_source. Falls back to comparing modification times if
+    either checksum is unknown.
+
+    Args:
+        index_path: Path to the current index.
+        embeddings_path: The embeddings directory.
+
+    Returns:
+        True if the embeddings should be rebuilt.
+    """
+    embeddings_path = Path(embeddings_path)
+    embeddings_file = embeddings_path / "chroma.sqlite3"
+    metadata = get_index_metadata(index_path)
 
+    recorded = None
+    try:
+        with open(embeddings_path / EMBEDDINGS_STATE_FILE, "r", encoding="utf-8") as f:
+            recorded = json.load(f).get("checksum")
+    except (OSError, ValueError):
+        pass
+
+    if metadata.checksum and recorded:
+        return bool(metadata.checksum != recorded)
+
+    if not embeddings_file.exists() or metadata.mtime is None:
+        return True
+    return embeddings_file.stat().st_mtime < metadata.mtime.timestamp()
+
+
+def iter_index_lines(index_path: str | Path) -> Iterator[str]:
+    """
+    Iterates over the lines of an index in markdown form.
+
+    Compact indexes are converted on the fly, so callers do not need to know
+    the on-disk format.
+
+    Args:
+        index_path: Path to the index file (markdown or compact).
+
+    Yields:
+        Markdown lines including their newlines.
+    """
+    if not os.path.exists(index_path):
+        return
+    if is_compact_index(index_path):
+        yield from CompactIndexReader(index_path).iter_markdown()
+        return
+    with open(index_path, "r", encoding="utf-8") as f:
+        yield from f
+
+
+def _folder_matches(clean_folder_name: str, header_path: str) -> bool:
+    """Checks whether a section header matches the searched folder name."""
+    norm_header = header_path.replace("\\", "/").rstrip("/")
+    header_folder_name = norm_header.split("/")[-1].lower()
+
+    # Exact match or partial match (e.g. "Finanzen" in "Finanzen (Backup)")
+    return clean_folder_name == header_folder_name or clean_folder_name in header_folder_name
+
+
+@timed("index.find_backup_folder")
 def find_backup_folder(folder_name: str, index_path: str | Path) -> Optional[str]:
     """
     Searches the index file for a folder header (##) that contains folder_name.
 
     Args:
         folder_name: The name of the folder to search for.
-        index_path: Path to the markdown index file.
+        index_path: Path to the markdown or compact index file.
 
     Returns:
         The first matching full path found, or None if no match is found.
@@ -70,66 +326,189 @@ def find_backup_folder(folder_name: str, index_path: str | Path) -> Optional[str
     # folder_name might also contain backslashes if passed from a Windows path
     clean_folder_name = folder_name.replace("\\", "/").rstrip("/").split("/")[-1].lower()
 
+    if is_compact_index(index_path):
+        # The folder table is in the footer, no block has to be decompressed
+        for header_path in CompactIndexReader(index_path).folders:
+            if _folder_matches(clean_folder_name, header_path.strip()):
+                return header_path.strip()
+        return None
+
     with open(index_path, "r", encoding="utf-8") as f:
         for line in f:
             if line.startswith("## "):
                 header_path = line[3:].strip()
-                norm_header = header_path.replace("\\", "/").rstrip("/")
-                header_folder_name = norm_header.split("/")[-1].lower()
-
-                # Exact match or partial match (e.g. "Finanzen" in "Finanzen (Backup)")
-                if clean_folder_name == header_folder_name or clean_folder_name in header_folder_name:
+                if _folder_matches(clean_folder_name, header_path):
                     return header_path
     return None
 
 
-def get_all_files_from_index(backup_root: str | Path, index_path: str | Path) -> dict[str, float]:
+def _split_mtime(line_content: str, file_path: str, meta: str) -> tuple[str, bool, float, Optional[int]]:
+    """Converts a raw path/metadata pair into an entry tuple with the file size."""
+    mtime_str, size = split_entry_meta(meta)
+    try:
+        mtime = float(mtime_str) if mtime_str else 0.0
+    except ValueError:
+        file_path = line_content
+        mtime = 0.0
+        size = None
+
+    # Directories end in / or \ in our index format
+    is_dir = file_path.endswith("/") or file_path.endswith("\\")
+    return file_path, is_dir, mtime, size
+
+
+def _parse_index_record(line: str) -> Optional[tuple[str, bool, float, Optional[int]]]:
+    """Like parse_index_entry, but also returns the file size (None if not recorded)."""
+    if not line.startswith("- "):
+        return None
+    line_content = line[2:].strip()
+
+    # Check for mtime
+    if " | mtime:" in line_content:
+        file_path, meta = line_content.rsplit(" | mtime:", 1)
+        return _split_mtime(line_content, file_path, meta)
+    return _split_mtime(line_content, line_content, "")
+
+
+def parse_index_entry(line: str) -> Optional[tuple[str, bool, float]]:
     """
-    Extracts all file paths from the index that are sub-paths of backup_root.
+    Parses a single list entry line of the index.
 
     Args:
-        backup_root: The root path in the index to filter by.
-        index_path: Path to the markdown index file.
+        line: A raw line from the index file.
 
     Returns:
-        A dictionary mapping relative paths to modification timestamps.
+        A tuple of (path, is_dir, mtime), or None if the line is not an entry.
+        Directory paths keep their trailing separator.
     """
-    files: dict[str, float] = {}
+    record = _parse_index_record(line)
+    return record[:3] if record is not None else None
+
+
+def _iter_compact_entries(
+    reader: CompactIndexReader, section_numbers: Optional[list[int]] = None
+) -> Iterator[tuple[str, bool, float, Optional[int]]]:
+    """Iterates over the entries of (some) sections of a compact index."""
+    for _, entries in reader.iter_sections(section_numbers):
+        for path, meta in entries:
+            line_content = f"{path} | mtime:{meta}" if meta else path
+            yield _split_mtime(line_content, path, meta)
+
+
+def _iter_index_records(index_path: str | Path) -> Iterator[tuple[str, bool, float, Optional[int]]]:
+    """Iterates over all entries of the index as (path, is_dir, mtime, size) tuples."""
     if not os.path.exists(index_path):
-        return files
+        return
 
-    norm_root = normalize_path(backup_root)
+    if is_compact_index(index_path):
+        yield from _iter_compact_entries(CompactIndexReader(index_path))
+        return
 
     with open(index_path, "r", encoding="utf-8") as f:
         for line in f:
-            if line.startswith("- "):
-                line_content = line[2:].strip()
-
-                # Check for mtime
-                if " | mtime:" in line_content:
-                    try:
-                        file_path, mtime_str = line_content.rsplit(" | mtime:", 1)
-                        mtime = float(mtime_str)
-                    except ValueError:
-                        file_path = line_content
-                        mtime = 0.0
-                else:
-                    file_path = line_content
-                    mtime = 0.0
+            record = _parse_index_record(line)
+            if record is not None:
+                yield record
 
-                # Skip directories (which end in / or \ in our index format)
-                if file_path.endswith("/") or file_path.endswith("\\"):
-                    continue
 
-                norm_file = file_path.replace("\\", "/")
-
-                if norm_file.startswith(norm_root):
-                    # Check if it's actually a subpath (not just a prefix match of a sibling folder)
-                    remainder = norm_file[len(norm_root) :]
-                    if not remainder or remainder.startswith("/"):
-                        rel_path = remainder.lstrip("/")
-                        if rel_path:
-                            # Use current OS separator for the returned relative paths
-                            # so they match what os.walk produces in compare_folders
-                            files[rel_path.replace("/", os.sep)] = mtime
+def iter_index_entries(index_path: str | Path) -> Iterator[tuple[str, bool, float]]:
+    """
+    Iterates over all file and folder entries of the index.
+
+    Args:
+        index_path: Path to the markdown or compact index file.
+
+    Yields:
+        Tuples of (path, is_dir, mtime) as returned by parse_index_entry.
+    """
+    for file_path, is_dir, mtime, _ in _iter_index_records(index_path):
+        yield file_path, is_dir, mtime
+
+
+def _iter_subtree_files(backup_root: str | Path, index_path: str | Path) -> Iterator[tuple[str, float, Optional[int]]]:
+    """Yields (relative path, mtime, size) of all files below backup_root in the index and its journal."""
+    if not os.path.exists(index_path):
+        return
+
+    norm_root = normalize_path(backup_root)
+
+    if is_compact_index(index_path):
+        reader = CompactIndexReader(index_path)
+        entries = _iter_compact_entries(reader, reader.subtree_sections(norm_root))
+    else:
+        entries = _iter_index_records(index_path)
+
+    for file_path, is_dir, mtime, size in entries:
+        if is_dir:
+            continue
+
+        norm_file = file_path.replace("\\", "/")
+
+        if norm_file.startswith(norm_root):
+            # Check if it's actually a subpath (not just a prefix match of a sibling folder)
+            remainder = norm_file[len(norm_root) :]
+            if not remainder or remainder.startswith("/"):
+                rel_path = remainder.lstrip("/")
+                if rel_path:
+                    # Use current OS separator for the returned relative paths
+                    # so they match what os.walk produces in compare_folders
+                    yield rel_path.replace("/", os.sep), mtime, size
+
+    # Pending daemon updates come last, so they replace the indexed entries
+    for file_path, (mtime, size) in read_index_journal(index_path).items():
+        norm_file = file_path.replace("\\", "/")
+        remainder = norm_file[len(norm_root) :]
+        if norm_file.startswith(norm_root) and remainder.startswith("/"):
+            yield remainder.lstrip("/").replace("/", os.sep), mtime, size
+
+
+@timed("index.get_all_files_from_index")
+def get_all_files_from_index(
+    backup_root: str | Path, index_path: str | Path, sizes: Optional[dict[str, Optional[int]]] = None
+) -> dict[str, float]:
+    """
+    Extracts all file paths from the index that are sub-paths of backup_root.
+
+    For compact indexes only the blocks holding the subtree are decompressed.
+    Entries in the index journal that were not merged yet replace the indexed ones.
+
+    Args:
+        backup_root: The root path in the index to filter by.
+        index_path: Path to the markdown or compact index file.
+        sizes: If given, filled with the recorded size of each returned file
+            (None for indexes written before sizes were recorded).
+
+    Returns:
+        A dictionary mapping relative paths to modification timestamps.
+    """
+    files: dict[str, float] = {}
+    for rel_path, mtime, size in _iter_subtree_files(backup_root, index_path):
+        files[rel_path] = mtime
+        if sizes is not None:
+            sizes[rel_path] = size
     return files
+
+
+@timed("index.get_file_table_from_index")
+def get_file_table_from_index(backup_root: str | Path, index_path: str | Path) -> FileTable:
+    """
+    Like get_all_files_from_index, but returns a compact FileTable with mtimes and sizes.
+
+    The entries are collected in typed arrays while the index is read, so no
+    per-file Python floats are created.
+
+    Args:
+        backup_root: The root path in the index to filter by.
+        index_path: Path to the markdown or compact index file.
+
+    Returns:
+        The files below backup_root with paths relative to it.
+    """
+    paths: list[str] = []
+    mtimes = array("d")
+    sizes = array("q")
+    for rel_path, mtime, size in _iter_subtree_files(backup_root, index_path):
+        paths.append(rel_path)
+        mtimes.append(mtime)
+        sizes.append(UNKNOWN_SIZE if size is None else size)
+    return FileTable.from_columns(paths, mtimes, sizes)
@@ -0,0 +1,333 @@
+"""Lightweight timers, counters and histograms for per-stage run reports."""
+
+import datetime
+import functools
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Optional, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Upper bounds (seconds) of the Prometheus histogram buckets used for timers
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 60.0, 300.0, 1800.0)
+PROMETHEUS_PREFIX = "sbe_"
+
+# (derived metric, counter, timer): counter / total timer duration
+DERIVED_RATES = [
+    ("scan_backup.files_per_sec", "scan_backup.files", "scan_backup"),
+    ("compare.local_files_per_sec", "compare.local_files", "compare.local_walk"),
+    ("sync.files_per_sec", "sync.files_copied", "sync.sync_files"),
+    ("sync.bytes_per_sec", "sync.bytes_copied", "sync.sync_files"),
+    ("embedder.documents_per_sec", "embedder.documents", "embedder.embed_documents"),
+]
+
+
+@dataclass
+class Histogram:
+    """Distribution of observed values with fixed buckets."""
+
+    buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    count: int = 0
+    sum: float = 0.0
+    min: float = math.inf
+    max: float = -math.inf
+    bucket_counts: list[int] = field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        if not self.bucket_counts:
+            self.bucket_counts = [0] * len(self.buckets)
+
+    def observe(self, value: float) -> None:
+        """Records a single value."""
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.bucket_counts[i] += 1
+                break
+
+    def to_dict(self) -> dict[str, Any]:
+        """Summary statistics as a JSON-serializable dictionary."""
+        if self.count == 0:
+            return {"count": 0, "sum": 0.0, "min": None, "max": None, "mean": None}
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min,
+            "max": self.max,
+            "mean": self.sum / self.count,
+        }
+
+
+class MetricsRegistry:
+    """
+    Thread-safe collection of timers, counters, gauges and histograms.
+
+    Metric names are dotted strings like ``sync.bytes_copied``. Recording a
+    metric costs a lock and a dictionary lookup, so instrumentation belongs
+    around whole stages or calls, not inside per-file loops.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty registry."""
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Drops all recorded values."""
+        with self._lock:
+            self.started = datetime.datetime.now()
+            self._start_clock = time.perf_counter()
+            self.counters: dict[str, float] = {}
+            self.gauges: dict[str, float] = {}
+            self.timers: dict[str, Histogram] = {}
+            self.histograms: dict[str, Histogram] = {}
+
+    def inc(self, name: str, value: float = 1) -> None:
+        """
+        Increments a counter.
+
+        Args:
+            name: Counter name.
+            value: Amount to add.
+        """
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        """
+        Sets a gauge to an absolute value.
+
+        Args:
+            name: Gauge name.
+            value: The current value.
+        """
+        with self._lock:
+            self.gauges[name] = value
+
+    def observe(self, name: str, value: float) -> None:
+        """
+        Records a value in a histogram.
+
+        Args:
+            name: Histogram name.
+            value: The observed value.
+        """
+        with self._lock:
+            self.histograms.setdefault(name, Histogram()).observe(value)
+
+    def record_duration(self, name: str, seconds: float) -> None:
+        """
+        Records the duration of one timed call.
+
+        Args:
+            name: Timer name.
+            seconds: Elapsed time in seconds.
+        """
+        with self._lock:
+            self.timers.setdefault(name, Histogram()).observe(seconds)
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        """
+        Context manager timing the enclosed block.
+
+        Args:
+            name: Timer name.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_duration(name, time.perf_counter() - start)
+
+    def report(self) -> dict[str, Any]:
+        """
+        Builds the machine-readable run report.
+
+        Besides the raw metrics it contains derived throughput rates
+        (DERIVED_RATES) and hit rates for every ``<name>.cache_hits`` /
+        ``<name>.cache_misses`` counter pair.
+
+        Returns:
+            The report as a JSON-serializable dictionary.
+        """
+        with self._lock:
+            counters = dict(self.counters)
+            gauges = dict(self.gauges)
+            timers = {name: h.to_dict() for name, h in self.timers.items()}
+            histograms = {name: h.to_dict() for name, h in self.histograms.items()}
+            started = self.started
+            duration = time.perf_counter() - self._start_clock
+
+        derived: dict[str, float] = {}
+        for name, counter, timer in DERIVED_RATES:
+            seconds = timers.get(timer, {}).get("sum")
+            if counter in counters and seconds:
+                derived[name] = counters[counter] / seconds
+        cache_prefixes = {name.rsplit(".", 1)[0] for name in counters if name.endswith((".cache_hits", ".cache_misses"))}
+        for prefix in sorted(cache_prefixes):
+            hits = counters.get(f"{prefix}.cache_hits", 0)
+            lookups = hits + counters.get(f"{prefix}.cache_misses", 0)
+            if lookups:
+                derived[f"{prefix}.cache_hit_rate"] = hits / lookups
+
+        return {
+            "started": started.isoformat(timespec="seconds"),
+            "duration_seconds": duration,
+            "timers": timers,
+            "counters": counters,
+            "gauges": gauges,
+            "histograms": histograms,
+            "derived": derived,
+        }
+
+    def write_json(self, path: str | Path) -> None:
+        """
+        Writes the run report as JSON.
+
+        Args:
+            path: Output file.
+        """
+        _write_atomic(Path(path), json.dumps(self.report(), indent=2))
+
+    def write_prometheus(self, path: str | Path) -> None:
+        """
+        Writes all metrics in the Prometheus text exposition format.
+
+        The file is replaced atomically, so it can be picked up by the node
+        exporter's textfile collector while a run is writing it.
+
+        Args:
+            path: Output file (should end in ``.prom``).
+        """
+        lines: list[str] = []
+        with self._lock:
+            for name, value in sorted(self.counters.items()):
+                metric = _prometheus_name(name) + "_total"
+                lines += [f"# TYPE {metric} counter", f"{metric} {_format_value(value)}"]
+            for name, value in sorted(self.gauges.items()):
+                metric = _prometheus_name(name)
+                lines += [f"# TYPE {metric} gauge", f"{metric} {_format_value(value)}"]
+            for name, hist in sorted(self.timers.items()):
+                lines += _prometheus_histogram(_prometheus_name(name) + "_seconds", hist)
+            for name, hist in sorted(self.histograms.items()):
+                lines += _prometheus_histogram(_prometheus_name(name), hist)
+        for name, value in sorted(self.report()["derived"].items()):
+            metric = _prometheus_name(name)
+            lines += [f"# TYPE {metric} gauge", f"{metric} {_format_value(value)}"]
+        _write_atomic(Path(path), "\n".join(lines) + "\n")
+
+
+def _prometheus_name(name: str) -> str:
+    """Converts a dotted metric name into a valid Prometheus metric name."""
+    return PROMETHEUS_PREFIX + re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+def _format_value(value: float) -> str:
+    """Formats a sample value (integers without a decimal point)."""
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _prometheus_histogram(metric: str, hist: Histogram) -> list[str]:
+    """Renders a histogram with cumulative buckets."""
+    lines = [f"# TYPE {metric} histogram"]
+    cumulative = 0
+    for bound, count in zip(hist.buckets, hist.bucket_counts, strict=True):
+        cumulative += count
+        lines.append(f'{metric}_bucket{{le="{bound:g}"}} {cumulative}')
+    lines.append(f'{metric}_bucket{{le="+Inf"}} {hist.count}')
+    lines.append(f"{metric}_sum {_format_value(hist.sum)}")
+    lines.append(f"{metric}_count {hist.count}")
+    return lines
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    """Writes text to a temporary file and moves it into place."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(text, encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+_registry = MetricsRegistry()
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """Returns the process-wide metrics registry."""
+    return _registry
+
+
+def set_metrics_registry(registry: MetricsRegistry) -> None:
+    """
+    Replaces the process-wide metrics registry (e.g. for tests).
+
+    Args:
+        registry: The registry to use from now on.
+    """
+    global _registry
+    _registry = registry
+
+
+def inc(name: str, value: float = 1) -> None:
+    """Increments a counter in the process-wide registry."""
+    _registry.inc(name, value)
+
+
+def set_gauge(name: str, value: float) -> None:
+    """Sets a gauge in the process-wide registry."""
+    _registry.set_gauge(name, value)
+
+
+def observe(name: str, value: float) -> None:
+    """Records a histogram value in the process-wide registry."""
+    _registry.observe(name, value)
+
+
+@contextmanager
+def timer(name: str) -> Iterator[None]:
+    """
+    Times the enclosed block in the process-wide registry.
+
+    Args:
+        name: Timer name.
+    """
+    with _registry.timer(name):
+        yield
+
+
+def timed(name: Optional[str] = None) -> Callable[[F], F]:
+    """
+    Decorator timing every call of a function in the process-wide registry.
+
+    The registry is looked up per call, so set_metrics_registry also affects
+    functions decorated at import time.
+
+    Args:
+        name: Timer name (default: ``<module>.<function>``).
+
+    Returns:
+        The decorator.
+    """
+
+    def decorator(func: F) -> F:
+        timer_name = name or f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with _registry.timer(timer_name):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
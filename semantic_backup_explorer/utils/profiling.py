@@ -0,0 +1,227 @@
+"""Opt-in per-stage profiling (cProfile plus a stack sampler) for the CLI scripts."""
+
+import cProfile
+import datetime
+import os
+import pstats
+import sys
+import threading
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from types import FrameType
+from typing import Optional, TextIO
+
+DEFAULT_PROFILE_DIR = Path("data/profiles")
+DEFAULT_SAMPLE_INTERVAL = 0.005
+DEFAULT_TOP_N = 10
+
+
+class StackSampler:
+    """
+    Samples the call stack of one thread at a fixed interval.
+
+    The samples are aggregated as collapsed stacks (``outer;inner;leaf count``),
+    the input format of flamegraph.pl, speedscope and similar tools. Only the
+    profiled thread is sampled, so work done in thread pools is not attributed.
+    """
+
+    def __init__(self, thread_id: int, interval: float = DEFAULT_SAMPLE_INTERVAL) -> None:
+        """
+        Initialize the sampler.
+
+        Args:
+            thread_id: Identifier of the thread to sample (threading.get_ident()).
+            interval: Seconds between samples.
+        """
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Starts sampling in a background thread."""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stops sampling and waits for the background thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[_collapse(frame)] += 1
+
+
+def _collapse(frame: Optional[FrameType]) -> str:
+    """Formats a stack as ``outer;...;leaf`` with one ``file:function`` per frame."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class StageProfiler:
+    """
+    Profiles named stages of a run.
+
+    Every stage gets its own cProfile profile and stack samples, accumulated
+    over all times the stage is entered. A disabled profiler costs nothing but
+    the call of stage(); nested stages count toward the outer stage.
+
+    Example:
+        profiler = StageProfiler(enabled=args.profile)
+        with profiler.stage("scan"):
+            scan_backup(...)
+        profiler.finish()
+    """
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        output_dir: Optional[str | Path] = None,
+        sample_interval: float = DEFAULT_SAMPLE_INTERVAL,
+    ) -> None:
+        """
+        Initialize the profiler.
+
+        Args:
+            enabled: Whether stages are profiled at all.
+            output_dir: Directory for the result files (default: a timestamped
+                directory below data/profiles).
+            sample_interval: Seconds between stack samples (0 disables sampling).
+        """
+        self.enabled = enabled
+        if output_dir is None:
+            output_dir = DEFAULT_PROFILE_DIR / datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        self.output_dir = Path(output_dir)
+        self.sample_interval = sample_interval
+        self.profiles: dict[str, cProfile.Profile] = {}
+        self.samples: dict[str, Counter[str]] = {}
+        self._active: Optional[str] = None
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        Context manager profiling the enclosed block as stage name.
+
+        Args:
+            name: Stage name (used for the output file names).
+        """
+        if not self.enabled or self._active is not None:
+            yield
+            return
+
+        profile = self.profiles.setdefault(name, cProfile.Profile())
+        sampler = None
+        if self.sample_interval > 0:
+            sampler = StackSampler(threading.get_ident(), self.sample_interval)
+            sampler.start()
+        self._active = name
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            self._active = None
+            if sampler is not None:
+                sampler.stop()
+                self.samples.setdefault(name, Counter()).update(sampler.stacks)
+
+    def write(self) -> list[Path]:
+        """
+        Writes ``<stage>.pstats`` and ``<stage>.collapsed`` for every stage.
+
+        Returns:
+            The written files.
+        """
+        written: list[Path] = []
+        if not self.profiles:
+            return written
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        for name, profile in self.profiles.items():
+            stats_path = self.output_dir / f"{_safe_name(name)}.pstats"
+            profile.dump_stats(str(stats_path))
+            written.append(stats_path)
+
+            stacks = self.samples.get(name)
+            if stacks:
+                collapsed_path = self.output_dir / f"{_safe_name(name)}.collapsed"
+                with open(collapsed_path, "w", encoding="utf-8") as f:
+                    for stack, count in stacks.most_common():
+                        f.write(f"{stack} {count}\n")
+                written.append(collapsed_path)
+        return written
+
+    def top_functions(self, name: str, n: int = DEFAULT_TOP_N) -> list[tuple[str, float, float, int]]:
+        """
+        Returns the functions with the highest own time in a stage.
+
+        Args:
+            name: Stage name.
+            n: Number of functions.
+
+        Returns:
+            Tuples of (function, own seconds, cumulative seconds, calls).
+        """
+        profile = self.profiles.get(name)
+        if profile is None:
+            return []
+        stats = pstats.Stats(profile)
+        rows = []
+        for (filename, line, func), (_, calls, own, cumulative, _) in stats.stats.items():  # type: ignore[attr-defined]
+            location = f"{os.path.basename(filename)}:{line}" if line else filename
+            rows.append((f"{func} ({location})", own, cumulative, calls))
+        rows.sort(key=lambda row: row[1], reverse=True)
+        return rows[:n]
+
+    def print_summary(self, n: int = DEFAULT_TOP_N, stream: Optional[TextIO] = None) -> None:
+        """
+        Prints the hottest functions of every stage.
+
+        Args:
+            n: Functions per stage.
+            stream: Output stream (default: stdout).
+        """
+        out = stream or sys.stdout
+        for name in self.profiles:
+            all_rows = self.top_functions(name, n=sys.maxsize)
+            rows = all_rows[:n]
+            stage_total = sum(row[1] for row in all_rows)
+            print(f"\nProfile stage '{name}' ({stage_total:.3f}s):", file=out)
+            print(f"  {'own s':>8} {'cum s':>8} {'calls':>8}  function", file=out)
+            for func, own, cumulative, calls in rows:
+                print(f"  {own:>8.3f} {cumulative:>8.3f} {calls:>8}  {func}", file=out)
+
+    def finish(self, n: int = DEFAULT_TOP_N, stream: Optional[TextIO] = None) -> None:
+        """
+        Writes all result files and prints the summary (no-op when disabled).
+
+        Args:
+            n: Functions per stage in the summary.
+            stream: Output stream (default: stdout).
+        """
+        if not self.enabled or not self.profiles:
+            return
+        self.print_summary(n, stream)
+        written = self.write()
+        print(f"\nProfiles written to {self.output_dir} ({len(written)} files).", file=stream or sys.stdout)
+        print(
+            "View with: python -m pstats <file>.pstats, or flamegraph.pl <file>.collapsed > flame.svg",
+            file=stream or sys.stdout,
+        )
+
+
+def _safe_name(name: str) -> str:
+    """Makes a stage name usable as a file name."""
+    return "".join(c if c.isalnum() or c in "-_." else "_" for c in name)
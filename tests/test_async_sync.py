@@ -0,0 +1,101 @@
+"""Tests for the concurrent sync orchestrator."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from semantic_backup_explorer.core import async_sync
+from semantic_backup_explorer.core.async_sync import AsyncSyncOrchestrator, DeviceLimiter, SyncProgress, device_key
+from semantic_backup_explorer.core.backup_operations import BackupOperations
+from semantic_backup_explorer.indexer.scan_backup import scan_backup
+
+
+@pytest.fixture
+def setup(tmp_path):
+    backup = tmp_path / "backup"
+    (backup / "Photos").mkdir(parents=True)
+    (backup / "Photos" / "old.jpg").write_text("old")
+
+    local = tmp_path / "local"
+    for rel in ["Photos/old.jpg", "Photos/new.jpg", "Documents/a.txt", "Documents/sub/b.txt"]:
+        path = local / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(rel)
+
+    index = tmp_path / "index.md"
+    scan_backup(backup, index)
+    return BackupOperations(index_path=index), backup.resolve(), local.resolve()
+
+
+def test_run_syncs_all_folders_in_order(setup):
+    operations, backup, local = setup
+    updates = []
+    progress = SyncProgress(lambda p, filename, error: updates.append((filename, error)))
+    orchestrator = AsyncSyncOrchestrator(operations, backup, progress=progress)
+
+    folders = [local / "Photos", local / "Missing", local / "Documents"]
+    results = orchestrator.run_sync(folders)
+
+    assert [(r.local_path, r.synced, r.status) for r in results] == [
+        (local / "Photos", 1, "OK"),
+        (local / "Missing", 0, "Not Found Locally"),
+        (local / "Documents", 2, "OK"),
+    ]
+    assert results[2].target_root == backup / "Documents"
+    assert (backup / "Photos" / "new.jpg").exists()
+    assert (backup / "Documents" / "sub" / "b.txt").exists()
+    assert (progress.files_total, progress.files_done, progress.errors, progress.folders_done) == (3, 3, 0, 3)
+    assert len(updates) == 3
+
+
+def test_writers_per_device_serializes_copies(setup, monkeypatch):
+    operations, backup, local = setup
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def fake_sync_files(files, source_root, target_root, callback=None, **kwargs):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.05)
+        with lock:
+            active -= 1
+        return list(files), []
+
+    monkeypatch.setattr(async_sync, "sync_files", fake_sync_files)
+    folders = [local / "Photos", local / "Documents"]
+
+    AsyncSyncOrchestrator(operations, backup, writers_per_device=1).run_sync(folders)
+    assert peak == 1
+
+    peak = 0
+    AsyncSyncOrchestrator(operations, backup, writers_per_device=2).run_sync(folders)
+    assert peak == 2
+
+
+def test_failed_folder_does_not_stop_others(setup, monkeypatch):
+    operations, backup, local = setup
+
+    def fake_sync_files(files, source_root, target_root, callback=None, **kwargs):
+        if "Photos" in str(source_root):
+            raise OSError("disk full")
+        return list(files), []
+
+    monkeypatch.setattr(async_sync, "sync_files", fake_sync_files)
+    results = AsyncSyncOrchestrator(operations, backup).run_sync([local / "Photos", local / "Documents"])
+    assert [r.status for r in results] == ["Error: disk full", "OK"]
+
+
+def test_device_limiter_shares_semaphore_per_device(tmp_path):
+    assert device_key(tmp_path / "does" / "not" / "exist") == device_key(tmp_path)
+
+    async def semaphores():
+        limiter = DeviceLimiter(per_device=1)
+        return limiter.for_path(tmp_path), limiter.for_path(tmp_path / "new")
+
+    first, second = asyncio.run(semaphores())
+    assert first is second
@@ -0,0 +1,66 @@
+"""Tests for the benchmark harness and the synthetic tree generator."""
+
+from benchmarks.harness import BenchmarkResult, compare_to_baseline, load_results, measure, save_results
+from benchmarks.run_benchmarks import parse_size
+from benchmarks.synthetic_tree import SPEC_FILE, TreeSpec, generate_tree
+
+
+def _result(name, median, peak=1000):
+    return BenchmarkResult(name, 3, median, median, median, median, 0.0, peak, {})
+
+
+def test_generate_tree_shape_and_reuse(tmp_path):
+    spec = TreeSpec(files=50, depth=2, fanout=3, seed=1)
+    root = generate_tree(tmp_path / "tree", spec)
+
+    files = [p for p in root.rglob("*") if p.is_file() and p.name != SPEC_FILE]
+    dirs = [p for p in root.rglob("*") if p.is_dir()]
+    assert len(files) == 50
+    assert len(dirs) == 3 + 9
+
+    # Same spec: reused as-is
+    marker = root / "marker.txt"
+    marker.write_text("x")
+    generate_tree(root, spec)
+    assert marker.exists()
+
+    # Different spec: regenerated from scratch
+    generate_tree(root, TreeSpec(files=10, depth=1, fanout=2, seed=1))
+    assert not marker.exists()
+    assert len([p for p in root.rglob("*") if p.is_file() and p.name != SPEC_FILE]) == 10
+
+
+def test_generate_tree_is_deterministic(tmp_path):
+    spec = TreeSpec(files=20, depth=1, fanout=2, name_distribution="long")
+    a = generate_tree(tmp_path / "a", spec)
+    b = generate_tree(tmp_path / "b", spec)
+    names_a = sorted(str(p.relative_to(a)) for p in a.rglob("*"))
+    names_b = sorted(str(p.relative_to(b)) for p in b.rglob("*"))
+    assert names_a == names_b
+
+
+def test_measure_collects_statistics():
+    calls = []
+    result = measure("noop", lambda: calls.append(bytearray(100_000)), rounds=3, setup=calls.clear)
+    assert result.rounds == 3
+    assert result.min <= result.median <= result.max
+    assert result.peak_memory >= 100_000
+
+
+def test_results_roundtrip_and_baseline_comparison(tmp_path):
+    baseline_file = tmp_path / "baseline.json"
+    save_results(baseline_file, [_result("scan", 1.0), _result("diff", 2.0)])
+    baseline = load_results(baseline_file)
+    assert set(baseline) == {"scan", "diff"}
+
+    assert compare_to_baseline([_result("scan", 1.2), _result("new", 9.0)], baseline, threshold=0.25) == []
+    regressions = compare_to_baseline([_result("scan", 1.5), _result("diff", 2.0, peak=5000)], baseline)
+    assert len(regressions) == 2
+    assert regressions[0].startswith("scan: median")
+    assert regressions[1].startswith("diff: peak memory")
+
+
+def test_parse_size():
+    assert parse_size("10k") == 10_000
+    assert parse_size("1M") == 1_000_000
+    assert parse_size("250") == 250
@@ -0,0 +1,46 @@
+"""Tests for the build_index script."""
+
+import argparse
+import os
+
+from scripts import build_index as build_index_script
+from semantic_backup_explorer.utils.index_utils import get_all_files_from_index
+from semantic_backup_explorer.utils.profiling import StageProfiler
+
+
+class FakeEmbedder:
+    def embed_documents(self, texts):
+        return [[float(len(text)), 1.0] for text in texts]
+
+
+class FakeRetriever:
+    def __init__(self, persist_directory):
+        self.chunks = []
+
+    def clear(self):
+        self.chunks = []
+
+    def add_chunks(self, chunks, embeddings):
+        self.chunks.extend(chunks)
+
+    def flush(self):
+        pass
+
+
+def test_build_index_skips_global_exclusions(tmp_path, monkeypatch):
+    backup = tmp_path / "backup"
+    for rel in ["Projects/app/main.py", "Projects/app/node_modules/lib/index.js", "snapshots/2024-01-01/a.txt"]:
+        path = backup / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(rel)
+    config_file = tmp_path / "backup_config.md"
+    config_file.write_text("## Source Folders\n- /home/user/Projects\n\n## Exclusions\n- node_modules/\n", encoding="utf-8")
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(build_index_script, "Embedder", FakeEmbedder)
+    monkeypatch.setattr(build_index_script, "Retriever", FakeRetriever)
+    index = tmp_path / "index.md"
+    args = argparse.Namespace(path=str(backup), output=str(index), config=str(config_file), catalog=False, incremental=False)
+    build_index_script.build_index(args, StageProfiler(enabled=False))
+
+    assert set(get_all_files_from_index(backup.resolve(), index)) == {os.path.join("Projects", "app", "main.py")}
@@ -0,0 +1,127 @@
+"""Tests for the compact block-compressed index format."""
+
+from unittest.mock import patch
+
+import pytest
+
+from semantic_backup_explorer.chunking.folder_chunker import chunk_markdown
+from semantic_backup_explorer.indexer import compact_index
+from semantic_backup_explorer.indexer.compact_index import (
+    CODEC_ZLIB,
+    CompactIndexReader,
+    convert_markdown_to_compact,
+    export_markdown,
+    is_compact_index,
+)
+from semantic_backup_explorer.indexer.scan_backup import scan_backup
+from semantic_backup_explorer.utils.index_utils import (
+    find_backup_folder,
+    get_all_files_from_index,
+    get_index_metadata,
+    iter_index_entries,
+)
+
+WINDOWS_INDEX = (
+    "# Backup Index\n\n"
+    "Root: J:\\ (Label: MyBackup)\n\n"
+    "## J:\\\n\n"
+    "- J:\\data/\n\n"
+    "## J:\\data\n\n"
+    "- J:\\data\\Multimedia/\n"
+    "- J:\\data\\readme.txt | mtime:1700000000.5\n"
+    "- J:\\data\\no_mtime.txt\n\n"
+    "## J:\\data\\Multimedia\n\n"
+    "- J:\\data\\Multimedia\\song1.mp3 | mtime:1700000001.0\n"
+    "- J:\\data\\Multimedia\\song2.mp3 | mtime:1700000002.0\n"
+    "- K:\\elsewhere\\odd.txt | mtime:3.0\n\n"
+)
+
+
+@pytest.fixture
+def backup_tree(tmp_path):
+    root = tmp_path / "backup"
+    for rel in ["photos/2020/img1.jpg", "photos/2020/img2.jpg", "photos/2021/img3.jpg", "docs/tax/tax_2021.pdf", "a.txt"]:
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(rel)
+    return root
+
+
+def test_scan_compact_matches_markdown(backup_tree, tmp_path):
+    md_index = tmp_path / "index.md"
+    sbi_index = tmp_path / "index.sbi"
+    scan_backup(backup_tree, md_index)
+    scan_backup(backup_tree, sbi_index)
+
+    assert is_compact_index(sbi_index)
+    assert not is_compact_index(md_index)
+
+    exported = tmp_path / "exported.md"
+    export_markdown(sbi_index, exported)
+    assert exported.read_text(encoding="utf-8") == md_index.read_text(encoding="utf-8")
+
+    assert get_index_metadata(sbi_index).checksum == get_index_metadata(md_index).checksum
+    assert find_backup_folder("tax", sbi_index) == find_backup_folder("tax", md_index)
+    assert list(iter_index_entries(sbi_index)) == list(iter_index_entries(md_index))
+
+    photos = backup_tree.resolve() / "photos"
+    assert get_all_files_from_index(photos, sbi_index) == get_all_files_from_index(photos, md_index)
+
+    md_chunks = chunk_markdown(md_index)
+    sbi_chunks = chunk_markdown(sbi_index)
+    assert [c["content"] for c in sbi_chunks] == [c["content"] for c in md_chunks]
+
+
+def test_convert_roundtrip_windows_paths(tmp_path):
+    md_index = tmp_path / "index.md"
+    md_index.write_text(WINDOWS_INDEX, encoding="utf-8")
+    sbi_index = tmp_path / "index.sbi"
+    convert_markdown_to_compact(md_index, sbi_index, block_size=16)
+
+    reader = CompactIndexReader(sbi_index)
+    assert reader.root == "J:\\"
+    assert reader.label == "MyBackup"
+    assert reader.sep == "\\"
+    assert "".join(reader.iter_markdown()) == WINDOWS_INDEX
+
+    metadata = get_index_metadata(sbi_index)
+    assert metadata.label == "MyBackup"
+
+    files = get_all_files_from_index("J:\\data\\Multimedia", sbi_index)
+    assert sorted(files) == ["song1.mp3", "song2.mp3"]
+    assert files["song2.mp3"] == 1700000002.0
+
+
+def test_subtree_reads_only_needed_blocks(tmp_path):
+    md_index = tmp_path / "index.md"
+    lines = ["# Backup Index\n\n", "Root: /b\n\n"]
+    for i in range(20):
+        lines.append(f"## /b/folder{i}\n\n")
+        lines.append(f"- /b/folder{i}/file.txt | mtime:{i}.0\n\n")
+    md_index.write_text("".join(lines), encoding="utf-8")
+    sbi_index = tmp_path / "index.sbi"
+    convert_markdown_to_compact(md_index, sbi_index, block_size=64)
+
+    reader = CompactIndexReader(sbi_index)
+    assert len(reader._blocks) > 5
+
+    with patch.object(compact_index, "_decompress", wraps=compact_index._decompress) as spy:
+        files = get_all_files_from_index("/b/folder7", sbi_index)
+    assert files == {"file.txt": 7.0}
+    # Footer + the single block holding folder7
+    assert spy.call_count == 2
+
+
+def test_zlib_codec(tmp_path):
+    sbi_index = tmp_path / "index.sbi"
+    with compact_index.CompactIndexWriter(sbi_index, "/b", codec=CODEC_ZLIB) as writer:
+        writer.add_section("/b", [("/b/x.txt", "1.0"), ("/b/sub/", "")])
+    reader = CompactIndexReader(sbi_index)
+    assert list(reader.iter_sections()) == [("/b", [("/b/x.txt", "1.0"), ("/b/sub/", "")])]
+
+
+def test_invalid_file(tmp_path):
+    bogus = tmp_path / "bogus.sbi"
+    bogus.write_bytes(b"not an index")
+    with pytest.raises(ValueError):
+        CompactIndexReader(bogus)
@@ -2,7 +2,7 @@
 
 import pytest
 
-from semantic_backup_explorer.utils.config import BackupConfig
+from semantic_backup_explorer.utils.config import BackupConfig, parse_config, parse_exclusions
 
 
 def test_validate_backup_drive_success(tmp_path):
@@ -30,3 +30,24 @@ def test_validate_backup_drive_no_longer_checks_writable(tmp_path):
         config.validate_backup_drive()
     finally:
         drive.chmod(0o777)
+
+
+def test_parse_config_and_exclusions(tmp_path):
+    config_file = tmp_path / "backup_config.md"
+    config_file.write_text(
+        "## Source Folders\n"
+        "- /home/user/Projects\n"
+        "  - exclude: `build/`\n"
+        "- /home/user/Documents\n"
+        "\n"
+        "## Exclusions\n"
+        "- node_modules/\n"
+        "- `*.tmp`\n",
+        encoding="utf-8",
+    )
+
+    assert parse_config(config_file) == ["/home/user/Projects", "/home/user/Documents"]
+    exclusions = parse_exclusions(config_file)
+    assert exclusions.patterns == ["node_modules/", "*.tmp"]
+    assert exclusions.folder_patterns == {"/home/user/Projects": ["build/"]}
+    assert parse_exclusions(tmp_path / "missing.md").patterns == []
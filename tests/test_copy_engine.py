@@ -0,0 +1,85 @@
+"""Tests for the copy engine."""
+
+import errno
+import os
+
+import pytest
+
+from semantic_backup_explorer.sync import copy_engine
+from semantic_backup_explorer.sync.copy_engine import copy_file
+from semantic_backup_explorer.sync.sync_missing import sync_files
+
+DATA = os.urandom(300_000)
+
+
+@pytest.fixture
+def src(tmp_path):
+    path = tmp_path / "src.bin"
+    path.write_bytes(DATA)
+    os.utime(path, (1_600_000_000, 1_600_000_000))
+    return path
+
+
+def _check_copy(src, dst):
+    assert dst.read_bytes() == DATA
+    assert os.path.getmtime(dst) == os.path.getmtime(src)
+
+
+def test_copy_file_preserves_content_and_mtime(src, tmp_path):
+    reports = []
+    dst = tmp_path / "dst.bin"
+    copied = copy_file(src, dst, filename="src.bin", progress=lambda *args: reports.append(args))
+
+    assert copied == len(DATA)
+    _check_copy(src, dst)
+    assert reports[-1][:3] == ("src.bin", len(DATA), len(DATA))
+
+
+def test_buffered_copy_with_small_buffer(src, tmp_path, monkeypatch):
+    monkeypatch.setattr(copy_engine, "DEFAULT_REPORT_INTERVAL", 0)
+    reports = []
+    dst = tmp_path / "dst.bin"
+    reporter = copy_engine._ProgressReporter("src.bin", len(DATA), lambda *args: reports.append(args[1]), interval=0)
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        copy_engine._copy_buffered(fsrc.fileno(), fdst.fileno(), 64 * 1024, reporter)
+
+    assert dst.read_bytes() == DATA
+    assert reports == sorted(reports)
+    assert len(reports) == 5
+    assert reports[-1] == len(DATA)
+
+    assert copy_file(src, tmp_path / "dst2.bin", zero_copy=False, buffer_size=1024) == len(DATA)
+    _check_copy(src, tmp_path / "dst2.bin")
+
+
+@pytest.mark.skipif(not hasattr(os, "copy_file_range"), reason="copy_file_range not available")
+def test_falls_back_when_zero_copy_unsupported(src, tmp_path, monkeypatch):
+    def unsupported(*args, **kwargs):
+        raise OSError(errno.EXDEV, "cross-device")
+
+    monkeypatch.setattr(os, "copy_file_range", unsupported)
+    monkeypatch.setattr(os, "sendfile", unsupported, raising=False)
+    dst = tmp_path / "dst.bin"
+    assert copy_file(src, dst) == len(DATA)
+    _check_copy(src, dst)
+
+
+def test_failed_copy_removes_partial_target(src, tmp_path, monkeypatch):
+    def failing(src_fd, dst_fd, buffer_size, reporter, throttle=None):
+        os.write(dst_fd, b"partial")
+        raise OSError(errno.ENOSPC, "No space left on device")
+
+    monkeypatch.setattr(copy_engine, "_copy_buffered", failing)
+    dst = tmp_path / "dst.bin"
+    with pytest.raises(OSError):
+        copy_file(src, dst, zero_copy=False)
+    assert not dst.exists()
+
+
+def test_sync_files_reports_bytes(src, tmp_path):
+    reports = []
+    synced, errors = sync_files(["src.bin"], tmp_path, tmp_path / "backup", byte_callback=lambda *a: reports.append(a))
+
+    assert synced == ["src.bin"] and errors == []
+    _check_copy(src, tmp_path / "backup" / "src.bin")
+    assert reports[-1][:3] == ("src.bin", len(DATA), len(DATA))
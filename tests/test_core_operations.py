@@ -6,6 +6,7 @@ from unittest.mock import MagicMock, patch
 import pytest
 
 from semantic_backup_explorer.core.backup_operations import BackupOperations
+from semantic_backup_explorer.utils.file_table import FileTable
 
 
 class TestBackupOperations:
@@ -28,14 +29,14 @@ class TestBackupOperations:
         assert "does not exist" in result.error
 
     @patch("semantic_backup_explorer.core.backup_operations.find_backup_folder")
-    @patch("semantic_backup_explorer.core.backup_operations.get_all_files_from_index")
+    @patch("semantic_backup_explorer.core.backup_operations.get_file_table_from_index")
     @patch("semantic_backup_explorer.core.backup_operations.compare_folders")
     def test_find_and_compare_success(self, mock_compare, mock_get_files, mock_find_folder, index_path, tmp_path):
         local_path = tmp_path / "photos"
         local_path.mkdir()
 
         mock_find_folder.return_value = "/backup/photos"
-        mock_get_files.return_value = {"img1.jpg": 1234.5}
+        mock_get_files.return_value = FileTable.from_dict({"img1.jpg": 1234.5})
         mock_compare.return_value = {"only_local": ["img2.jpg"], "only_backup": [], "in_both": ["img1.jpg"]}
 
         ops = BackupOperations(index_path=index_path)
@@ -66,7 +67,10 @@ class TestBackupOperations:
         mock_rag_pipeline.answer_question.return_value = ("/backup/photos_from_rag", "context")
 
         with patch.object(BackupOperations, "_rag_search", return_value="/backup/photos_from_rag"):
-            with patch("semantic_backup_explorer.core.backup_operations.get_all_files_from_index", return_value={}):
+            with patch(
+                "semantic_backup_explorer.core.backup_operations.get_file_table_from_index",
+                return_value=FileTable.from_dict({}),
+            ):
                 with patch(
                     "semantic_backup_explorer.core.backup_operations.compare_folders",
                     return_value={"only_local": [], "only_backup": [], "in_both": []},
@@ -0,0 +1,175 @@
+"""Tests for delta transfers of large modified files."""
+
+import os
+
+import pytest
+
+from semantic_backup_explorer.sync import delta as delta_module
+from semantic_backup_explorer.sync.delta import (
+    JOURNAL_ENTRY_HEADER,
+    JOURNAL_MAGIC,
+    JOURNAL_TRAILER,
+    DeltaSync,
+    SignatureCache,
+    compute_signature,
+    get_delta_sync,
+    journal_path,
+    replay_journal,
+)
+from semantic_backup_explorer.sync.sync_missing import sync_files
+
+BLOCK = 4096
+
+
+@pytest.fixture
+def files(tmp_path):
+    data = bytearray(os.urandom(BLOCK * 20 + 123))
+    src = tmp_path / "local" / "mail.pst"
+    dst = tmp_path / "backup" / "mail.pst"
+    src.parent.mkdir()
+    dst.parent.mkdir()
+    src.write_bytes(data)
+    dst.write_bytes(data)
+    os.utime(dst, (1_600_000_000, 1_600_000_000))
+    return src, dst, data
+
+
+def _modify(src, data, offset, payload):
+    data[offset : offset + len(payload)] = payload
+    src.write_bytes(data)
+    os.utime(src, (1_700_000_000, 1_700_000_000))
+
+
+@pytest.mark.parametrize("in_place", [False, True])
+def test_only_changed_blocks_are_written(files, in_place):
+    src, dst, data = files
+    _modify(src, data, BLOCK * 5 + 10, b"changed")
+
+    result = DeltaSync(min_size=0, block_size=BLOCK, in_place=in_place).sync_file(src, dst)
+
+    assert dst.read_bytes() == bytes(data)
+    assert os.path.getmtime(dst) == os.path.getmtime(src)
+    assert (result.blocks_changed, result.blocks_total, result.bytes_changed) == (1, 21, BLOCK)
+    # The journal holds the changed block once more, never the whole file
+    journal_bytes = 0 if in_place else len(JOURNAL_MAGIC) + JOURNAL_ENTRY_HEADER + BLOCK + JOURNAL_TRAILER
+    assert result.bytes_written == BLOCK + journal_bytes
+    assert sorted(p.name for p in dst.parent.iterdir()) == ["mail.pst"]
+
+
+def test_grown_and_shrunk_files(files):
+    src, dst, data = files
+    delta = DeltaSync(min_size=0, block_size=BLOCK)
+
+    src.write_bytes(bytes(data) + b"appended")
+    result = delta.sync_file(src, dst)
+    assert dst.read_bytes() == bytes(data) + b"appended"
+    assert result.blocks_changed == 1
+
+    src.write_bytes(bytes(data[: BLOCK * 3]))
+    result = delta.sync_file(src, dst)
+    assert dst.read_bytes() == bytes(data[: BLOCK * 3])
+    assert result.bytes_changed == 0
+
+
+def test_signature_cache_avoids_reading_backup(files, tmp_path, monkeypatch):
+    src, dst, data = files
+    cache = SignatureCache(tmp_path / "cache")
+    delta = DeltaSync(min_size=0, block_size=BLOCK, cache=cache)
+
+    _modify(src, data, 0, b"first")
+    assert not delta.sync_file(src, dst).signature_cached
+    assert cache.load(dst, BLOCK).digests == compute_signature(dst, BLOCK).digests
+
+    def fail(*args, **kwargs):
+        raise AssertionError("backup copy was read")
+
+    monkeypatch.setattr(delta_module, "compute_signature", fail)
+    _modify(src, data, BLOCK * 10, b"second")
+    result = delta.sync_file(src, dst)
+    assert result.signature_cached
+    assert result.blocks_changed == 1
+    assert dst.read_bytes() == bytes(data)
+
+    # A backup copy changed behind our back invalidates the signature
+    os.utime(dst, (1_800_000_000, 1_800_000_000))
+    assert cache.load(dst, BLOCK) is None
+
+
+def test_failed_patch_keeps_backup_and_drops_temp_file(files, monkeypatch):
+    src, dst, data = files
+    original = dst.read_bytes()
+    _modify(src, data, 0, b"changed")
+
+    def failing_patch(*args, **kwargs):
+        raise OSError("device removed")
+
+    delta = DeltaSync(min_size=0, block_size=BLOCK)
+    monkeypatch.setattr(delta, "_patch", failing_patch)
+    with pytest.raises(OSError):
+        delta.sync_file(src, dst)
+    assert dst.read_bytes() == original
+    assert sorted(p.name for p in dst.parent.iterdir()) == ["mail.pst"]
+
+
+class _CountingThrottle:
+    def __init__(self):
+        self.bytes = 0
+
+    def throttle_bytes(self, count):
+        self.bytes += count
+
+
+@pytest.mark.parametrize("in_place", [False, True])
+def test_throttle_sees_all_written_bytes(files, in_place):
+    src, dst, data = files
+    for offset in (BLOCK * 2, BLOCK * 7):
+        _modify(src, data, offset, bytes([data[offset] ^ 0xFF]))
+    throttle = _CountingThrottle()
+
+    result = DeltaSync(min_size=0, block_size=BLOCK, in_place=in_place).sync_file(src, dst, throttle=throttle)
+    assert throttle.bytes == result.bytes_written < len(data)
+    assert result.bytes_changed == 2 * BLOCK
+
+
+def test_interrupted_patch_is_completed_from_journal(files, monkeypatch):
+    src, dst, data = files
+    original = dst.read_bytes()
+    _modify(src, data, BLOCK * 3, b"changed")
+    real_replay = replay_journal
+
+    def crash_before_replay(target, throttle=None):
+        if journal_path(target).exists():
+            raise OSError("device removed")
+        return real_replay(target, throttle)
+
+    monkeypatch.setattr(delta_module, "replay_journal", crash_before_replay)
+    delta = DeltaSync(min_size=0, block_size=BLOCK)
+    with pytest.raises(OSError):
+        delta.sync_file(src, dst)
+    assert dst.read_bytes() == original and journal_path(dst).exists()
+
+    # The next run finishes the patch before comparing blocks
+    monkeypatch.setattr(delta_module, "replay_journal", real_replay)
+    result = delta.sync_file(src, dst)
+    assert dst.read_bytes() == bytes(data) and not journal_path(dst).exists()
+    assert result.blocks_changed == 0 and result.bytes_written > BLOCK
+
+    # A journal without trailer was interrupted before the copy was touched and is dropped
+    journal_path(dst).write_bytes(JOURNAL_MAGIC + b"partial")
+    assert replay_journal(dst) is None
+    assert dst.read_bytes() == bytes(data) and not journal_path(dst).exists()
+
+
+def test_sync_files_uses_delta_for_large_existing_files(files, tmp_path):
+    src, dst, data = files
+    _modify(src, data, 100, b"x")
+    (src.parent / "new.txt").write_text("new")
+    delta = get_delta_sync(True, min_size_mb=BLOCK / 1024**2, block_kb=BLOCK // 1024, cache_dir=tmp_path / "cache")
+
+    assert delta.applies_to(src, dst)
+    assert not delta.applies_to(src.parent / "new.txt", dst.parent / "new.txt")
+    synced, errors = sync_files(["mail.pst", "new.txt"], src.parent, dst.parent, delta=delta)
+
+    assert synced == ["mail.pst", "new.txt"] and errors == []
+    assert dst.read_bytes() == bytes(data)
+    assert get_delta_sync(False) is None
@@ -0,0 +1,72 @@
+"""Tests for the multi-drive index catalog."""
+
+from unittest.mock import patch
+
+from semantic_backup_explorer.catalog.drive_catalog import DriveCatalog, make_drive_key
+
+
+def _make_drive(tmp_path, name, files):
+    root = tmp_path / name
+    for rel in files:
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(rel)
+    return root
+
+
+def test_make_drive_key():
+    assert make_drive_key("/media/backup", "Backup Drive 1") == "Backup_Drive_1"
+    assert make_drive_key("J:\\", None) == "J"
+    assert make_drive_key("/", None) == "root"
+
+
+@patch("semantic_backup_explorer.catalog.drive_catalog.get_volume_label")
+def test_index_drives_do_not_overwrite_each_other(mock_label, tmp_path):
+    drive_a = _make_drive(tmp_path, "a", ["photos/2020/img1.jpg"])
+    drive_b = _make_drive(tmp_path, "b", ["tax/tax_2021.pdf"])
+    catalog = DriveCatalog(tmp_path / "catalog")
+
+    mock_label.return_value = "DriveA"
+    entry_a = catalog.index_drive(drive_a)
+    mock_label.return_value = "DriveB"
+    entry_b = catalog.index_drive(drive_b)
+
+    assert entry_a.index_path != entry_b.index_path
+    assert entry_a.index_path.exists() and entry_b.index_path.exists()
+    assert entry_a.indexed_at is not None
+
+    # Reload from disk
+    reloaded = DriveCatalog(tmp_path / "catalog")
+    assert [e.key for e in reloaded.entries()] == ["DriveA", "DriveB"]
+    assert reloaded.get("DriveB").label == "DriveB"
+
+
+@patch("semantic_backup_explorer.catalog.drive_catalog.get_volume_label", return_value=None)
+def test_search_across_drives(mock_label, tmp_path):
+    drive_a = _make_drive(tmp_path, "a", ["docs/report.pdf", "docs/report_old.pdf"])
+    drive_b = _make_drive(tmp_path, "b", ["archive/report.pdf", "misc/other.txt"])
+    catalog = DriveCatalog(tmp_path / "catalog")
+    catalog.index_drive(drive_a)
+    catalog.index_drive(drive_b)
+
+    hits = catalog.search("REPORT.pdf")
+    exact = [h for h in hits if h.score == 1.0]
+    assert {h.drive_key for h in exact} == {e.key for e in catalog.entries()}
+    assert hits[0].score >= hits[-1].score
+    assert not any(h.path.endswith("report_old.pdf") for h in hits)
+    assert any(h.path.endswith("report_old.pdf") for h in catalog.search("report"))
+
+    assert catalog.search("REPORT.pdf", max_results=1)[0].score == 1.0
+    assert catalog.search("nothing-like-this") == []
+
+
+def test_register_and_remove(tmp_path):
+    catalog = DriveCatalog(tmp_path / "catalog")
+    entry = catalog.register(tmp_path / "drive", label="Drive")
+    assert catalog.register(tmp_path / "mounted_elsewhere", label="Drive") is entry
+    assert entry.root_path == tmp_path / "mounted_elsewhere"
+
+    assert catalog.remove("Drive", delete_data=True)
+    assert not (tmp_path / "catalog" / "Drive").exists()
+    assert not catalog.remove("Drive")
+    assert DriveCatalog(tmp_path / "catalog").entries() == []
@@ -0,0 +1,105 @@
+"""Tests for the cached drive identity provider."""
+
+from unittest.mock import patch
+
+from semantic_backup_explorer.utils.drive_utils import (
+    BlkidBackend,
+    DriveIdentityProvider,
+    LinuxByLabelBackend,
+    _decode_udev_label,
+    parse_blkid_export,
+)
+
+
+class CountingBackend:
+    def __init__(self, label):
+        self.label = label
+        self.calls = 0
+
+    def get_label(self, path):
+        self.calls += 1
+        return self.label
+
+
+class FailingBackend:
+    def get_label(self, path):
+        raise OSError("boom")
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_label_is_cached_until_ttl(tmp_path):
+    backend = CountingBackend("Backup1")
+    clock = FakeClock()
+    provider = DriveIdentityProvider(backends=[backend], ttl=10.0, clock=clock)
+    (tmp_path / "sub").mkdir()
+
+    assert provider.get_label(tmp_path) == "Backup1"
+    assert provider.get_label(tmp_path / "sub") == "Backup1"
+    assert backend.calls == 1
+    assert provider.hits == 1 and provider.misses == 1
+
+    clock.now = 11.0
+    assert provider.get_label(tmp_path) == "Backup1"
+    assert backend.calls == 2
+
+
+def test_device_change_invalidates(tmp_path):
+    backend = CountingBackend("Backup1")
+    provider = DriveIdentityProvider(backends=[backend], ttl=60.0)
+
+    with patch("semantic_backup_explorer.utils.drive_utils._device_id", return_value=1):
+        assert provider.get_label(tmp_path) == "Backup1"
+    backend.label = "Backup2"
+    with patch("semantic_backup_explorer.utils.drive_utils._device_id", return_value=2):
+        assert provider.get_label(tmp_path) == "Backup2"
+    assert backend.calls == 2
+
+
+def test_backend_fallback_and_invalidate(tmp_path):
+    backend = CountingBackend("Fallback")
+    provider = DriveIdentityProvider(backends=[FailingBackend(), CountingBackend(None), backend])
+
+    assert provider.get_label(tmp_path) == "Fallback"
+    provider.invalidate(tmp_path)
+    assert provider.get_label(tmp_path) == "Fallback"
+    provider.invalidate()
+    assert provider.get_label(tmp_path) == "Fallback"
+    assert backend.calls == 3
+
+
+def test_missing_path_returns_none(tmp_path):
+    backend = CountingBackend("Backup1")
+    provider = DriveIdentityProvider(backends=[backend])
+    assert provider.get_label(tmp_path / "missing") is None
+    assert backend.calls == 0
+
+
+def test_parse_blkid_export():
+    output = "DEVNAME=/dev/sda1\nLABEL=System\nTYPE=ext4\n\nDEVNAME=/dev/sdb1\nLABEL=My Backup\nTYPE=ntfs\n"
+    devices = parse_blkid_export(output)
+    assert devices == [
+        {"DEVNAME": "/dev/sda1", "LABEL": "System", "TYPE": "ext4"},
+        {"DEVNAME": "/dev/sdb1", "LABEL": "My Backup", "TYPE": "ntfs"},
+    ]
+
+
+def test_blkid_backend_no_matching_device(tmp_path):
+    backend = BlkidBackend(runner=lambda: "DEVNAME=/nonexistent/device\nLABEL=Other\n")
+    assert backend.get_label(tmp_path) is None
+
+
+def test_decode_udev_label():
+    assert _decode_udev_label("My\\x20Backup") == "My Backup"
+    assert _decode_udev_label("Plain") == "Plain"
+
+
+def test_by_label_backend_missing_dir(tmp_path):
+    backend = LinuxByLabelBackend(tmp_path / "by-label")
+    assert backend.get_label(tmp_path) is None
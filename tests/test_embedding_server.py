@@ -0,0 +1,85 @@
+"""Tests for the embedding server, its micro-batching and the Embedder client mode."""
+
+import threading
+
+import pytest
+
+from semantic_backup_explorer.rag.embedder import HAS_SENTENCE_TRANSFORMERS, Embedder
+from semantic_backup_explorer.rag.embedding_server import EmbeddingClient, EmbeddingServer, MicroBatcher
+
+
+class StubModel:
+    """Encodes a text as [length, number of vowels] and records the batch sizes."""
+
+    def __init__(self):
+        self.batches = []
+
+    def encode(self, texts):
+        self.batches.append(len(texts))
+        return [[float(len(t)), float(sum(c in "aeiou" for c in t))] for t in texts]
+
+
+def test_micro_batcher_merges_concurrent_requests():
+    model = StubModel()
+    batcher = MicroBatcher(model.encode, max_batch_size=100, max_wait=0.2)
+    results = {}
+    start = threading.Barrier(8)
+
+    def request(i):
+        start.wait()
+        results[i] = batcher.embed(["x" * i, "aa"])
+
+    threads = [threading.Thread(target=request, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    batcher.close()
+
+    assert results == {i: [[float(i), 0.0], [2.0, 2.0]] for i in range(8)}
+    assert sum(model.batches) == 16 and len(model.batches) < 8
+    assert batcher.submit([]).result() == []
+
+
+def test_micro_batcher_propagates_errors():
+    def failing(texts):
+        raise RuntimeError("model crashed")
+
+    batcher = MicroBatcher(failing, max_wait=0)
+    with pytest.raises(RuntimeError, match="model crashed"):
+        batcher.embed(["a"])
+    batcher.close()
+
+
+@pytest.fixture
+def server():
+    server = EmbeddingServer(model_name="stub-model", port=0, model=StubModel())
+    server.start()
+    yield server
+    server.stop()
+
+
+def test_server_and_client(server):
+    client = EmbeddingClient(server.url)
+    assert client.health() == {"status": "ok", "model": "stub-model", "dimension": 2}
+    assert client.embed(["hello", "sky"]) == [[5.0, 2.0], [3.0, 0.0]]
+    assert client.embed([]) == []
+    assert EmbeddingClient("http://127.0.0.1:1").health() is None
+
+
+def test_embedder_client_mode(server):
+    embedder = Embedder(model_name="stub-model", server_url=server.url)
+    assert embedder.client is not None
+    assert embedder.embed_query("banana") == [6.0, 3.0]
+    assert embedder.embed_documents(["a", "bc"]) == [[1.0, 1.0], [2.0, 0.0]]
+    assert embedder.embed_queries(["banana", "a"]) == [[6.0, 3.0], [1.0, 1.0]]
+    assert embedder.embed_queries([]) == []
+
+
+@pytest.mark.skipif(HAS_SENTENCE_TRANSFORMERS, reason="falls back to loading the model")
+def test_embedder_falls_back_to_local_model(server):
+    # A different model on the server must not be used
+    with pytest.raises(ImportError):
+        Embedder(model_name="other-model", server_url=server.url)
+    with pytest.raises(ImportError):
+        Embedder(server_url="http://127.0.0.1:1")
@@ -0,0 +1,94 @@
+"""Tests for the gitignore-style exclusion rules."""
+
+import os
+
+import pytest
+
+from semantic_backup_explorer.compare.folder_diff import compare_folders, get_folder_content
+from semantic_backup_explorer.compare.local_snapshot import LocalSnapshotCache
+from semantic_backup_explorer.compare.local_walk import walk_folder
+from semantic_backup_explorer.indexer.scan_backup import scan_backup
+from semantic_backup_explorer.utils.exclusions import ExclusionConfig, ExclusionRules
+from semantic_backup_explorer.utils.index_utils import get_all_files_from_index
+
+PATTERNS = ["node_modules/", "*.tmp", "/build", "docs/**/*.pdf", "!keep.tmp", "$RECYCLE.BIN/", "Thumbs.db"]
+
+
+@pytest.mark.parametrize(
+    "path,is_dir,excluded",
+    [
+        ("node_modules", True, True),
+        ("src/node_modules", True, True),
+        ("node_modules", False, False),
+        ("src/a.tmp", False, True),
+        ("src/keep.tmp", False, False),
+        ("build", True, True),
+        ("src/build", True, False),
+        ("docs/a.pdf", False, True),
+        ("docs/x/y/a.pdf", False, True),
+        ("other/a.pdf", False, False),
+        ("$RECYCLE.BIN", True, True),
+        (os.path.join("photos", "Thumbs.db"), False, True),
+    ],
+)
+def test_patterns(path, is_dir, excluded):
+    assert ExclusionRules(PATTERNS).matches(path, is_dir) is excluded
+
+
+def test_parents_and_case():
+    rules = ExclusionRules(["# comment", "", "node_modules/", "a/**"], ignore_case=True)
+    assert rules.patterns == ["node_modules/", "a/**"]
+    assert rules.is_excluded("src/Node_Modules/lib/x.js")
+    assert not rules.matches("a", is_dir=True) and rules.matches("a/b")
+    assert rules.excluded_mask(["src/node_modules/x.js", "src/y.js", "a/b/c"]) == [True, False, True]
+    assert not ExclusionRules() and ExclusionRules().excluded_mask(["x"]) == [False]
+
+    config = ExclusionConfig(patterns=["*.tmp"], folder_patterns={"/home/u/Docs": ["!keep.tmp", "cache/"]})
+    assert config.for_folder("/home/u/Docs/").patterns == ["*.tmp", "!keep.tmp", "cache/"]
+    assert config.for_folder("/home/u/Other").patterns == ["*.tmp"]
+    assert config.for_folder("/home/u/Docs") is config.for_folder("/home/u/Docs")
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / "project"
+    for rel in ["src/main.py", "src/tmp.tmp", "node_modules/pkg/index.js", "src/node_modules/x.js", "keep.tmp"]:
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(rel)
+    return root
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_walk_prunes_excluded(tree, workers):
+    rules = ExclusionRules(PATTERNS)
+    expected = {os.path.join("src", "main.py"), "keep.tmp"}
+    assert set(walk_folder(tree, workers=workers, exclude=rules).paths) == expected
+    assert set(get_folder_content(tree, exclude=rules)) == expected
+
+
+def test_snapshot_cache_keeps_full_listing(tree, tmp_path):
+    cache = LocalSnapshotCache(tmp_path / "cache")
+    rules = ExclusionRules(PATTERNS)
+    assert set(cache.get_folder_content(tree, exclude=rules)) == {os.path.join("src", "main.py"), "keep.tmp"}
+    assert set(cache.get_folder_content(tree, exclude=rules)) == {os.path.join("src", "main.py"), "keep.tmp"}
+    # Without rules the reused directories still list the excluded files
+    assert cache.get_folder_content(tree) == get_folder_content(tree)
+
+
+def test_scan_and_compare_skip_excluded(tree, tmp_path):
+    rules = ExclusionRules(PATTERNS)
+    index = tmp_path / "index.md"
+    scan_backup(tree, index, exclude=rules)
+    text = index.read_text(encoding="utf-8")
+    assert "node_modules" not in text and "tmp.tmp" not in text and "main.py" in text
+
+    # Files excluded locally are not reported as only in the backup either
+    backup_files = {os.path.join("node_modules", "pkg", "index.js"): 1.0, "old.tmp": 1.0, "gone.txt": 1.0}
+    result = compare_folders(tree, backup_files, exclude=rules)
+    assert result["only_backup"] == ["gone.txt"]
+    assert result["only_local"] == ["keep.tmp", os.path.join("src", "main.py")]
+
+    full_index = tmp_path / "full.md"
+    scan_backup(tree, full_index)
+    assert len(get_all_files_from_index(tree.resolve(), full_index)) == 5
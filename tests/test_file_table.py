@@ -0,0 +1,125 @@
+"""Tests for the array-backed file table and the table-based folder comparison."""
+
+import math
+import os
+
+import numpy as np
+import pytest
+
+from semantic_backup_explorer.compare.folder_diff import compare_folders, compare_tables, get_folder_table
+from semantic_backup_explorer.indexer.scan_backup import scan_backup
+from semantic_backup_explorer.utils.file_table import UNKNOWN_SIZE, FileTable
+from semantic_backup_explorer.utils.index_utils import get_all_files_from_index, get_file_table_from_index
+
+MTIME = 1_600_000_000
+
+
+def _write(path, text, mtime=MTIME):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    os.utime(path, (mtime, mtime))
+
+
+def test_join_and_difference():
+    left = FileTable.from_dict({"a": 1.0, "b": 2.0, "ü/c": 3.0})
+    right = FileTable.from_dict({"b": 20.0, "ü/c": 30.0, "d": 40.0}, {"b": 5, "d": None})
+
+    rows_left, rows_right = left.join(right)
+    assert sorted(left.paths(rows_left)) == ["b", "ü/c"]
+    assert left.paths(rows_left) == right.paths(rows_right)
+    assert sorted(right.mtimes[rows_right] - left.mtimes[rows_left]) == [18.0, 27.0]
+    assert left.paths(left.difference(right)) == ["a"]
+    assert right.paths(right.difference(left)) == ["d"]
+
+    assert right.sizes[right.find("b")] == 5
+    assert right.sizes[right.find("d")] == UNKNOWN_SIZE
+    assert right.find("a") is None
+    assert left.to_dict() == {"a": 1.0, "b": 2.0, "ü/c": 3.0}
+
+
+def test_duplicates_keep_last_and_empty_tables():
+    table = FileTable.from_columns(["x", "y", "x"], [1.0, 2.0, 3.0], [10, 20, 30])
+    assert table.to_dict() == {"x": 3.0, "y": 2.0}
+    assert table.sizes[table.find("x")] == 30
+    assert math.isnan(FileTable.from_columns(["x"]).mtimes[0])
+
+    empty = FileTable.from_dict({})
+    assert len(empty) == 0 and empty.paths() == []
+    assert len(table.difference(empty)) == 2
+    assert all(len(rows) == 0 for rows in empty.join(table))
+
+
+def test_hash_collisions_never_merge_paths(monkeypatch, tmp_path):
+    # Force many paths onto the same id; matches must still be decided by the paths
+    monkeypatch.setattr("semantic_backup_explorer.utils.file_table._path_hash", lambda path: len(path) % 3)
+    local_files = {f"file{i}.txt": float(i) for i in range(30)}
+    backup_files = {f"file{i}.txt": float(i) for i in range(0, 60, 2)}
+    local = FileTable.from_columns([*local_files, "file1.txt"], [*local_files.values(), 99.0])
+    backup = FileTable.from_dict(backup_files)
+
+    assert local.to_dict() == {**local_files, "file1.txt": 99.0}
+    assert all(local.find(path) is not None and local.path(local.find(path)) == path for path in local_files)
+    assert local.find("file31.txt") is None
+    rows, backup_rows = local.join(backup)
+    assert local.paths(rows) == backup.paths(backup_rows)
+    assert set(local.paths(rows)) == local_files.keys() & backup_files.keys()
+    assert set(local.paths(local.difference(backup))) == local_files.keys() - backup_files.keys()
+
+    # A local file whose id matches a different backup file is still copied
+    _write(tmp_path / "local" / "ab.txt", "new")
+    diff = compare_tables(tmp_path / "local", get_folder_table(tmp_path / "local"), FileTable.from_dict({"cd.txt": MTIME}))
+    assert diff.to_result()["only_local"] == ["ab.txt"]
+
+
+def test_same_paths_compares_bytes_in_blocks(monkeypatch):
+    monkeypatch.setattr("semantic_backup_explorer.utils.file_table.COMPARE_BLOCK_ROWS", 3)
+    paths = [f"dir/{'x' * i}.txt" for i in range(10)] + [""]
+    left = FileTable.from_columns(paths)
+    right = FileTable.from_columns(paths[::-1])
+    rows, right_rows = left.join(right)
+    assert len(rows) == 11 and left.paths(rows) == right.paths(right_rows)
+    assert left._same_paths(np.array([0, 1]), right, np.array([1, 1])).tolist() == [
+        left.path(0) == right.path(1),
+        left.path(1) == right.path(1),
+    ]
+
+
+@pytest.mark.parametrize("index_name", ["index.md", "index.sbi"])
+def test_table_from_index_matches_dict(tmp_path, index_name):
+    backup = tmp_path / "backup"
+    _write(backup / "Photos" / "a.jpg", "aaaa")
+    _write(backup / "Photos" / "2023" / "b.jpg", "bb", mtime=MTIME + 5)
+    _write(backup / "Docs" / "c.txt", "c")
+    index = tmp_path / index_name
+    scan_backup(backup, index)
+
+    photos = backup.resolve() / "Photos"
+    sizes = {}
+    assert get_file_table_from_index(photos, index).to_dict() == get_all_files_from_index(photos, index, sizes=sizes)
+    table = get_file_table_from_index(photos, index)
+    assert {path: int(table.sizes[table.find(path)]) for path in table.paths()} == sizes
+
+
+def test_compare_tables_matches_compare_folders(tmp_path):
+    local = tmp_path / "local"
+    _write(local / "same.txt", "same")
+    _write(local / "newer.txt", "newer", mtime=MTIME + 100)
+    _write(local / "new.txt", "new")
+    _write(local / "moved" / "photo.jpg", "photo")
+    backup = {"same.txt": MTIME, "newer.txt": MTIME, "gone.txt": MTIME, "photo.jpg": MTIME}
+    sizes = {"same.txt": 4, "newer.txt": 5, "gone.txt": 9, "photo.jpg": 5}
+
+    diff = compare_tables(local, get_folder_table(local), FileTable.from_dict(backup, sizes), detect_renames=True)
+    assert isinstance(diff.only_local, np.ndarray)
+    result = diff.to_result()
+    assert result == compare_folders(local, backup, backup_sizes=sizes)
+    assert result == {
+        "only_local": ["new.txt", "newer.txt"],
+        "only_backup": ["gone.txt"],
+        "in_both": ["same.txt"],
+        "renamed": [("photo.jpg", os.path.join("moved", "photo.jpg"))],
+    }
+
+    # Without known mtimes (list input) nothing counts as outdated
+    listed = compare_folders(local, list(backup))
+    assert listed["in_both"] == ["newer.txt", "same.txt"] and listed["renamed"] == []
@@ -44,3 +44,55 @@ def test_chunk_markdown_multiple_branches(tmp_path):
 
     # Root (0), branch1 (1), branch1/sub (2), branch2 (1), branch2/sub (2) = 5 chunks
     assert len(chunks) == 5
+
+
+def test_chunk_markdown_max_depth(tmp_path):
+    test_root = tmp_path / "test_backup"
+    (test_root / "a" / "b" / "c").mkdir(parents=True)
+
+    index_file = tmp_path / "test_index.md"
+    scan_backup(str(test_root), str(index_file))
+
+    assert len(chunk_markdown(str(index_file), max_depth=1)) == 2
+    assert len(chunk_markdown(str(index_file), max_depth=0)) == 1
+    assert len(chunk_markdown(str(index_file))) == 4
+
+
+def test_chunk_markdown_parallel_matches_sequential(tmp_path, monkeypatch):
+    from semantic_backup_explorer.chunking import folder_chunker
+
+    test_root = tmp_path / "test_backup"
+    for i in range(6):
+        leaf = test_root / f"top{i}" / "a" / "b" / "c" / "d" / f"deep{i}"
+        leaf.mkdir(parents=True)
+        (leaf / "file.txt").write_text("x")
+        (test_root / f"top{i}" / "readme.txt").write_text("y")
+    index_file = tmp_path / "test_index.md"
+    scan_backup(str(test_root), str(index_file))
+    crlf_index = tmp_path / "crlf_index.md"
+    crlf_index.write_bytes(index_file.read_bytes().replace(b"\n", b"\r\n"))
+
+    sequential = chunk_markdown(index_file, workers=1)
+    monkeypatch.setattr(folder_chunker, "PARALLEL_MIN_BYTES", 0)
+    assert chunk_markdown(index_file, workers=3) == sequential
+    for max_depth in (0, 2, 10):
+        assert chunk_markdown(index_file, max_depth=max_depth, workers=2) == chunk_markdown(
+            index_file, max_depth=max_depth, workers=1
+        )
+    crlf_chunks = chunk_markdown(crlf_index, workers=3)
+    assert [c["content"] for c in crlf_chunks] == [c["content"] for c in sequential]
+
+    ranges = folder_chunker._split_ranges(index_file, 8)
+    data = index_file.read_bytes()
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(data)
+    assert all(data[start : start + 3] == b"## " for start, _ in ranges[1:])
+
+
+def test_depth_counts_components_below_root():
+    from semantic_backup_explorer.chunking.folder_chunker import _depth
+
+    assert _depth("/mnt/b", "/mnt/b") == 0
+    assert _depth("/mnt/b/x/y", "/mnt/b") == 2
+    assert _depth("/mnt/bx/y", "/mnt/b") == 0
+    assert _depth("/a/b", "/") == 2
+    assert _depth("x/y", ".") == 2
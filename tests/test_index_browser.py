@@ -0,0 +1,72 @@
+"""Tests for the paginated index browser."""
+
+from semantic_backup_explorer.indexer.compact_index import convert_markdown_to_compact
+from semantic_backup_explorer.utils.index_browser import IndexBrowser
+
+
+def _write_index(path, folder_count=25, files_per_folder=3):
+    lines = ["# Backup Index\n\n", "Root: /b\n\n"]
+    for i in range(folder_count):
+        lines.append(f"## /b/folder{i:02d}\n\n")
+        for j in range(files_per_folder):
+            lines.append(f"- /b/folder{i:02d}/file{j}.txt | mtime:{j}.0\n")
+        lines.append("\n")
+    path.write_text("".join(lines), encoding="utf-8")
+
+
+def test_list_folders_pagination_and_filter(tmp_path):
+    index_file = tmp_path / "index.md"
+    _write_index(index_file)
+    browser = IndexBrowser(index_file)
+
+    page = browser.list_folders(page=1, page_size=10)
+    assert page.total == 25
+    assert page.page_count == 3
+    assert page.folders[0] == "/b/folder10"
+    assert len(page.folders) == 10
+
+    # Out-of-range pages are clamped
+    assert browser.list_folders(page=99, page_size=10).folders == [
+        "/b/folder20",
+        "/b/folder21",
+        "/b/folder22",
+        "/b/folder23",
+        "/b/folder24",
+    ]
+
+    filtered = browser.list_folders("FOLDER1")
+    assert filtered.total == 10
+    assert browser.list_folders("nothing").folders == []
+
+
+def test_read_section_markdown_and_compact(tmp_path):
+    index_file = tmp_path / "index.md"
+    _write_index(index_file)
+    compact_file = tmp_path / "index.sbi"
+    convert_markdown_to_compact(index_file, compact_file, block_size=64)
+
+    expected = "## /b/folder03\n\n- /b/folder03/file0.txt | mtime:0.0\n- /b/folder03/file1.txt | mtime:1.0\n- /b/folder03/file2.txt | mtime:2.0\n"
+    assert IndexBrowser(index_file).read_section("/b/folder03") == expected
+    assert IndexBrowser(compact_file).read_section("/b/folder03") == expected
+    assert IndexBrowser(index_file).read_section("/b/missing") == ""
+
+
+def test_read_section_is_truncated(tmp_path):
+    index_file = tmp_path / "index.md"
+    _write_index(index_file, folder_count=2, files_per_folder=50)
+
+    text = IndexBrowser(index_file).read_section("/b/folder00", max_entries=5)
+    assert text.count("\n- ") + text.startswith("- ") == 5
+    assert "gekürzt" in text
+    assert "folder01" not in text
+
+
+def test_table_refreshes_when_index_changes(tmp_path):
+    index_file = tmp_path / "index.md"
+    _write_index(index_file, folder_count=2)
+    browser = IndexBrowser(index_file)
+    assert browser.list_folders().total == 2
+
+    _write_index(index_file, folder_count=4)
+    assert browser.list_folders().total == 4
+    assert IndexBrowser(tmp_path / "missing.md").list_folders().total == 0
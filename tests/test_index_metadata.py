@@ -1,8 +1,18 @@
 import datetime
+import os
+import shutil
+import tempfile
 import unittest
 from pathlib import Path
+from unittest.mock import patch
 
-from semantic_backup_explorer.utils.index_utils import get_index_metadata
+from semantic_backup_explorer.indexer.scan_backup import scan_backup
+from semantic_backup_explorer.utils.index_utils import (
+    embeddings_are_stale,
+    get_index_metadata,
+    get_metadata_sidecar_path,
+    record_embeddings_source,
+)
 
 
 class TestIndexMetadata(unittest.TestCase):
@@ -36,5 +46,59 @@ class TestIndexMetadata(unittest.TestCase):
         self.assertEqual(metadata.age_days, 0)
 
 
+class TestIndexMetadataSidecar(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.backup_dir = self.tmp_dir / "backup"
+        (self.backup_dir / "docs").mkdir(parents=True)
+        (self.backup_dir / "docs" / "a.txt").write_text("12345")
+        (self.backup_dir / "b.txt").write_text("123")
+        self.index_file = self.tmp_dir / "backup_index.md"
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_sidecar_written_by_scan(self):
+        scan_backup(self.backup_dir, self.index_file)
+        self.assertTrue(get_metadata_sidecar_path(self.index_file).exists())
+
+        metadata = get_index_metadata(self.index_file)
+        self.assertEqual(metadata.root_path, self.backup_dir.resolve())
+        self.assertEqual(metadata.file_count, 2)
+        self.assertEqual(metadata.dir_count, 1)
+        self.assertEqual(metadata.total_bytes, 8)
+        self.assertTrue(metadata.checksum.startswith("blake2b:"))
+        self.assertIsInstance(metadata.created, datetime.datetime)
+
+    def test_metadata_is_cached_until_index_changes(self):
+        scan_backup(self.backup_dir, self.index_file)
+        get_index_metadata(self.index_file)
+
+        with patch("semantic_backup_explorer.utils.index_utils._read_metadata_sidecar") as mock_read:
+            get_index_metadata(self.index_file)
+            mock_read.assert_not_called()
+
+        # A modified index invalidates both the cache and the sidecar
+        with open(self.index_file, "a", encoding="utf-8") as f:
+            f.write("## extra\n")
+        future = self.index_file.stat().st_mtime + 10
+        os.utime(self.index_file, (future, future))
+        metadata = get_index_metadata(self.index_file)
+        self.assertEqual(metadata.root_path, self.backup_dir.resolve())
+        self.assertIsNone(metadata.checksum)
+
+    def test_embeddings_staleness_uses_checksum(self):
+        embeddings_dir = self.tmp_dir / "embeddings"
+        scan_backup(self.backup_dir, self.index_file)
+        self.assertTrue(embeddings_are_stale(self.index_file, embeddings_dir))
+
+        record_embeddings_source(self.index_file, embeddings_dir)
+        self.assertFalse(embeddings_are_stale(self.index_file, embeddings_dir))
+
+        (self.backup_dir / "c.txt").write_text("new")
+        scan_backup(self.backup_dir, self.index_file)
+        self.assertTrue(embeddings_are_stale(self.index_file, embeddings_dir))
+
+
 if __name__ == "__main__":
     unittest.main()
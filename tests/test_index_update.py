@@ -0,0 +1,122 @@
+"""Tests for incremental index updates."""
+
+import os
+
+import pytest
+
+from semantic_backup_explorer.chunking.folder_chunker import chunk_markdown
+from semantic_backup_explorer.indexer.index_update import append_index_journal, merge_index_journal, update_index
+from semantic_backup_explorer.indexer.scan_backup import scan_backup
+from semantic_backup_explorer.utils.index_utils import (
+    find_backup_folder,
+    get_all_files_from_index,
+    get_file_table_from_index,
+    get_index_journal_path,
+    get_index_metadata,
+    iter_index_entries,
+)
+
+
+@pytest.fixture
+def backup_tree(tmp_path):
+    root = tmp_path / "backup"
+    for rel in ["photos/2020/img1.jpg", "photos/2021/img3.jpg", "docs/tax/tax_2021.pdf", "a.txt"]:
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(rel)
+    return root.resolve()
+
+
+def _add_file(root, rel, content):
+    path = root / rel
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+    stat = path.stat()
+    return str(path), (stat.st_mtime, stat.st_size)
+
+
+@pytest.mark.parametrize("suffix", [".md", ".sbi"])
+def test_update_matches_rescan(backup_tree, tmp_path, suffix):
+    index = tmp_path / f"index{suffix}"
+    scan_backup(backup_tree, index)
+
+    changed = dict(
+        [
+            _add_file(backup_tree, "photos/2022/summer/beach.jpg", "sand"),
+            _add_file(backup_tree, "docs/tax/tax_2022.pdf", "more tax"),
+            _add_file(backup_tree, "a.txt", "updated content"),
+        ]
+    )
+    assert update_index(index, changed) == 3
+
+    rescanned = tmp_path / f"rescanned{suffix}"
+    scan_backup(backup_tree, rescanned)
+
+    assert get_all_files_from_index(backup_tree, index) == get_all_files_from_index(backup_tree, rescanned)
+    assert sorted(iter_index_entries(index)) == sorted(iter_index_entries(rescanned))
+    assert find_backup_folder("summer", index) == find_backup_folder("summer", rescanned)
+
+    updated = get_index_metadata(index)
+    expected = get_index_metadata(rescanned)
+    assert (updated.file_count, updated.dir_count) == (expected.file_count, expected.dir_count)
+    # a.txt grew, but its old size is unknown to the index
+    assert updated.total_bytes == expected.total_bytes - len("updated content") + len("a.txt")
+
+    # New sections follow their parent, so chunking still sees the folder hierarchy
+    folders = [c["folder"] for c in chunk_markdown(index)]
+    assert folders.index(str(backup_tree / "photos" / "2022")) > folders.index(str(backup_tree / "photos"))
+
+
+def test_update_ignores_paths_outside_root(backup_tree, tmp_path):
+    index = tmp_path / "index.md"
+    scan_backup(backup_tree, index)
+    before = index.read_text(encoding="utf-8")
+
+    outside = os.path.join(str(tmp_path), "elsewhere", "file.txt")
+    assert update_index(index, {outside: (1.0, 10)}) == 0
+    assert index.read_text(encoding="utf-8") == before
+
+
+def test_update_missing_index(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        update_index(tmp_path / "missing.md", {})
+
+
+@pytest.mark.parametrize("suffix", [".md", ".sbi"])
+def test_journal_is_overlaid_and_merged(backup_tree, tmp_path, suffix):
+    index = tmp_path / f"index{suffix}"
+    scan_backup(backup_tree, index)
+    before = index.read_bytes()
+
+    first = dict([_add_file(backup_tree, "photos/2022/beach.jpg", "sand")])
+    second = dict([_add_file(backup_tree, "a.txt", "updated content")])
+    assert append_index_journal(index, first) == 1
+    assert append_index_journal(index, second) == 1
+    assert index.read_bytes() == before
+
+    rescanned = tmp_path / f"rescanned{suffix}"
+    scan_backup(backup_tree, rescanned)
+    expected = get_all_files_from_index(backup_tree, rescanned)
+    assert get_all_files_from_index(backup_tree, index) == expected
+    table = get_file_table_from_index(backup_tree / "photos", index)
+    assert os.path.join("2022", "beach.jpg") in set(table.paths())
+
+    assert merge_index_journal(index) == 2
+    assert not get_index_journal_path(index).exists()
+    assert get_all_files_from_index(backup_tree, index) == expected
+    assert sorted(iter_index_entries(index)) == sorted(iter_index_entries(rescanned))
+    assert merge_index_journal(index) == 0
+
+
+def test_journal_survives_cut_off_line(backup_tree, tmp_path):
+    index = tmp_path / "index.md"
+    scan_backup(backup_tree, index)
+    get_index_journal_path(index).write_text('["/cut/off", 1.0', encoding="utf-8")
+
+    changed = dict([_add_file(backup_tree, "new.txt", "new")])
+    append_index_journal(index, changed)
+    assert "new.txt" in get_all_files_from_index(backup_tree, index)
+
+    # A rescan makes the journal obsolete
+    scan_backup(backup_tree, index)
+    assert not get_index_journal_path(index).exists()
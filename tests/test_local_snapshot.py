@@ -0,0 +1,105 @@
+"""Tests for the persistent local snapshot cache."""
+
+import os
+
+import pytest
+
+from semantic_backup_explorer.compare.folder_diff import compare_folders, get_folder_content
+from semantic_backup_explorer.compare.local_snapshot import LocalSnapshotCache, get_local_snapshot_cache
+
+OLD = 1_600_000_000
+
+
+def _age_dirs(root):
+    """Backdates all directory mtimes so that they are not considered racy."""
+    for dirpath, _, _ in os.walk(root):
+        os.utime(dirpath, (OLD, OLD))
+
+
+@pytest.fixture
+def source(tmp_path):
+    root = tmp_path / "src"
+    for sub in ["a/b", "a/c", "d"]:
+        (root / sub).mkdir(parents=True)
+    for rel in ["top.txt", "a/one.txt", "a/b/two.txt", "a/c/three.txt", "d/four.txt"]:
+        (root / rel).write_text(rel)
+    _age_dirs(root)
+    return root
+
+
+def test_matches_get_folder_content_and_reuses_directories(tmp_path, source):
+    cache = LocalSnapshotCache(tmp_path / "cache")
+    assert cache.get_folder_content(source) == get_folder_content(source)
+    assert cache.last_stats.dirs_listed == 5
+
+    assert cache.get_folder_content(source) == get_folder_content(source)
+    assert cache.last_stats.dirs_listed == 0
+    assert cache.last_stats.dirs_reused == 5
+
+    # Adding a file changes only the mtime of its directory
+    (source / "a" / "b" / "new.txt").write_text("new")
+    os.utime(source / "a" / "b", (OLD + 10, OLD + 10))
+    result = cache.get_folder_content(source)
+    assert result == get_folder_content(source)
+    assert os.path.join("a", "b", "new.txt") in result
+    assert cache.last_stats.dirs_listed == 1
+
+    # Removing a directory
+    for f in (source / "d").iterdir():
+        f.unlink()
+    (source / "d").rmdir()
+    os.utime(source, (OLD + 20, OLD + 20))
+    assert cache.get_folder_content(source) == get_folder_content(source)
+
+
+def test_in_place_edits_are_detected_by_default(tmp_path, source):
+    cache = LocalSnapshotCache(tmp_path / "cache")
+    cache.get_folder_content(source)
+    os.utime(source / "a" / "one.txt", (OLD + 99, OLD + 99))
+    _age_dirs(source)
+    assert cache.get_folder_content(source)[os.path.join("a", "one.txt")] == OLD + 99
+
+
+def test_trusted_dir_mtimes_skip_file_stats(tmp_path, source):
+    cache = LocalSnapshotCache(tmp_path / "cache", trust_dir_mtime=True)
+    cache.get_folder_content(source)
+    os.utime(source / "a" / "one.txt", (OLD + 99, OLD + 99))
+    _age_dirs(source)
+
+    # The in-place edit is not seen while the snapshot is trusted ...
+    assert cache.get_folder_content(source)[os.path.join("a", "one.txt")] != OLD + 99
+    assert cache.last_stats.files_stat == 0
+
+    # ... but after max_age_hours everything is verified again
+    cache.max_age_hours = 0
+    assert cache.get_folder_content(source)[os.path.join("a", "one.txt")] == OLD + 99
+
+
+def test_recently_modified_directories_are_relisted(tmp_path, source):
+    cache = LocalSnapshotCache(tmp_path / "cache")
+    os.utime(source / "d", None)
+    cache.get_folder_content(source)
+    cache.get_folder_content(source)
+    assert cache.last_stats.dirs_listed == 1
+
+
+@pytest.mark.skipif(os.name == "nt", reason="symlinks need privileges on Windows")
+def test_symlinks_behave_like_os_walk(tmp_path, source):
+    (source / "link_dir").symlink_to(source / "a", target_is_directory=True)
+    (source / "broken").symlink_to(source / "missing.txt")
+    _age_dirs(source)
+    cache = LocalSnapshotCache(tmp_path / "cache")
+    assert cache.get_folder_content(source) == get_folder_content(source)
+
+
+def test_compare_folders_with_cache_and_corrupt_snapshot(tmp_path, source):
+    cache = get_local_snapshot_cache(tmp_path / "cache")
+    assert get_local_snapshot_cache(None) is None
+    expected = compare_folders(source, {"top.txt": OLD + 1000})
+    assert compare_folders(source, {"top.txt": OLD + 1000}, local_cache=cache) == expected
+
+    cache.snapshot_path(source).write_text("{not json", encoding="utf-8")
+    assert compare_folders(source, {"top.txt": OLD + 1000}, local_cache=cache) == expected
+    cache.invalidate(source)
+    assert not cache.snapshot_path(source).exists()
+    assert cache.get_folder_content(tmp_path / "missing") == {}
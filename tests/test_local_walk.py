@@ -0,0 +1,61 @@
+"""Tests for the parallel local folder walk."""
+
+import os
+import sys
+
+import pytest
+
+from semantic_backup_explorer.compare.folder_diff import get_folder_content
+from semantic_backup_explorer.compare.local_walk import scan_directory, walk_folder
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / "source"
+    for i in range(5):
+        for j in range(4):
+            path = root / f"dir{i}" / f"sub{j}" / f"file{i}{j}.txt"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text("x" * (i + j))
+    (root / "top.txt").write_text("top")
+    (root / "empty").mkdir()
+    return root
+
+
+def _os_walk(root):
+    files = {}
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            files[os.path.relpath(path, root)] = (os.path.getmtime(path), os.path.getsize(path))
+    return files
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_walk_matches_os_walk(tree, workers):
+    columns = walk_folder(tree, workers=workers)
+
+    assert len(columns) == 21
+    assert dict(zip(columns.paths, zip(columns.mtimes, columns.sizes, strict=True), strict=True)) == _os_walk(tree)
+    assert columns.mtimes.typecode == "d" and columns.sizes.typecode == "q"
+
+
+def test_get_folder_content_uses_walk(tree):
+    assert get_folder_content(tree) == {path: mtime for path, (mtime, _) in _os_walk(tree).items()}
+    assert get_folder_content(tree / "missing") == {}
+    assert len(walk_folder(tree / "missing")) == 0
+
+
+@pytest.mark.skipif(sys.platform.startswith("win"), reason="symlinks need privileges on Windows")
+def test_symlinks_like_os_walk(tree):
+    os.symlink(tree / "dir0", tree / "link_to_dir")
+    os.symlink(tree / "top.txt", tree / "link_to_file")
+    os.symlink(tree / "missing.txt", tree / "broken_link")
+
+    files, subdirs = scan_directory(str(tree), "")
+    by_name = dict(zip(files.paths, files.sizes, strict=True))
+    assert "link_to_dir" not in subdirs and "link_to_dir" not in by_name
+    assert by_name["link_to_file"] == 3
+    assert by_name["broken_link"] == 0
+    expected = {os.path.relpath(os.path.join(d, n), tree) for d, _, names in os.walk(tree) for n in names}
+    assert set(walk_folder(tree).paths) == expected
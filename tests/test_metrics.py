@@ -0,0 +1,99 @@
+"""Tests for the metrics instrumentation layer."""
+
+import json
+import unittest
+
+from semantic_backup_explorer.compare.folder_diff import compare_folders
+from semantic_backup_explorer.sync.sync_missing import sync_files
+from semantic_backup_explorer.utils.metrics import (
+    MetricsRegistry,
+    get_metrics_registry,
+    inc,
+    set_metrics_registry,
+    timed,
+    timer,
+)
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    def setUp(self):
+        self.previous = get_metrics_registry()
+        self.registry = MetricsRegistry()
+        set_metrics_registry(self.registry)
+
+    def tearDown(self):
+        set_metrics_registry(self.previous)
+
+    def test_timers_counters_and_derived_rates(self):
+        @timed("sync.sync_files")
+        def work():
+            return 42
+
+        self.assertEqual(work(), 42)
+        self.assertEqual(work.__name__, "work")
+        with timer("sync.sync_files"):
+            pass
+        inc("sync.files_copied", 10)
+        inc("cache.cache_hits", 3)
+        inc("cache.cache_misses")
+        self.registry.observe("sizes", 5.0)
+        self.registry.set_gauge("folders", 2)
+
+        report = self.registry.report()
+        self.assertEqual(report["timers"]["sync.sync_files"]["count"], 2)
+        self.assertEqual(report["counters"]["sync.files_copied"], 10)
+        self.assertGreater(report["derived"]["sync.files_per_sec"], 0)
+        self.assertEqual(report["derived"]["cache.cache_hit_rate"], 0.75)
+        self.assertEqual(report["histograms"]["sizes"]["max"], 5.0)
+        self.assertEqual(report["gauges"]["folders"], 2)
+
+    def test_timer_records_on_exception(self):
+        with self.assertRaises(ValueError):
+            with timer("failing"):
+                raise ValueError("boom")
+        self.assertEqual(self.registry.report()["timers"]["failing"]["count"], 1)
+
+    def test_write_json_and_prometheus(self):
+        import tempfile
+        from pathlib import Path
+
+        inc("sync.bytes_copied", 1024)
+        self.registry.record_duration("scan_backup", 0.02)
+        with tempfile.TemporaryDirectory() as tmp:
+            json_path = Path(tmp) / "report.json"
+            prom_path = Path(tmp) / "metrics.prom"
+            self.registry.write_json(json_path)
+            self.registry.write_prometheus(prom_path)
+
+            report = json.loads(json_path.read_text(encoding="utf-8"))
+            self.assertEqual(report["counters"]["sync.bytes_copied"], 1024)
+
+            prom = prom_path.read_text(encoding="utf-8")
+            self.assertIn("# TYPE sbe_sync_bytes_copied_total counter", prom)
+            self.assertIn("sbe_sync_bytes_copied_total 1024", prom)
+            self.assertIn('sbe_scan_backup_seconds_bucket{le="0.05"} 1', prom)
+            self.assertIn('sbe_scan_backup_seconds_bucket{le="0.01"} 0', prom)
+            self.assertIn("sbe_scan_backup_seconds_count 1", prom)
+
+    def test_stages_are_instrumented(self):
+        import tempfile
+        from pathlib import Path
+
+        with tempfile.TemporaryDirectory() as tmp:
+            src = Path(tmp) / "src"
+            src.mkdir()
+            (src / "a.txt").write_text("hello")
+            (src / "b.txt").write_text("world!")
+            diff = compare_folders(src, {})
+            sync_files(diff["only_local"], src, Path(tmp) / "dst")
+
+        report = self.registry.report()
+        self.assertEqual(report["timers"]["compare.compare_folders"]["count"], 1)
+        self.assertEqual(report["counters"]["compare.local_files"], 2)
+        self.assertEqual(report["counters"]["sync.files_copied"], 2)
+        self.assertEqual(report["counters"]["sync.bytes_copied"], 11)
+        self.assertIn("sync.bytes_per_sec", report["derived"])
+
+
+if __name__ == "__main__":
+    unittest.main()
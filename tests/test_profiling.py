@@ -0,0 +1,51 @@
+"""Tests for the opt-in stage profiler."""
+
+import io
+import time
+
+from semantic_backup_explorer.utils.profiling import StageProfiler
+
+
+def _busy(seconds):
+    end = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < end:
+        total += sum(range(100))
+    return total
+
+
+def test_disabled_profiler_records_nothing(tmp_path):
+    profiler = StageProfiler(enabled=False, output_dir=tmp_path / "prof")
+    with profiler.stage("scan"):
+        _busy(0.01)
+    profiler.finish()
+    assert profiler.profiles == {}
+    assert not (tmp_path / "prof").exists()
+
+
+def test_stages_write_pstats_and_collapsed_stacks(tmp_path):
+    profiler = StageProfiler(enabled=True, output_dir=tmp_path / "prof", sample_interval=0.001)
+    with profiler.stage("scan"):
+        _busy(0.05)
+    with profiler.stage("sync"):
+        with profiler.stage("nested"):
+            _busy(0.01)
+    with profiler.stage("scan"):
+        _busy(0.01)
+
+    assert set(profiler.profiles) == {"scan", "sync"}
+    top = profiler.top_functions("scan", n=3)
+    assert len(top) == 3
+    assert any("_busy" in row[0] for row in profiler.top_functions("scan", n=50))
+
+    out = io.StringIO()
+    profiler.finish(n=5, stream=out)
+    assert "Profile stage 'scan'" in out.getvalue()
+    assert (tmp_path / "prof" / "scan.pstats").exists()
+    assert (tmp_path / "prof" / "sync.pstats").exists()
+
+    collapsed = (tmp_path / "prof" / "scan.collapsed").read_text(encoding="utf-8").splitlines()
+    assert collapsed
+    stack, count = collapsed[0].rsplit(" ", 1)
+    assert int(count) >= 1
+    assert "test_profiling.py:_busy" in "".join(collapsed)
@@ -0,0 +1,99 @@
+"""Tests for the offline RAG evaluation harness."""
+
+from benchmarks.rag_eval import (
+    EvalQuestion,
+    ExactRetriever,
+    HashingEmbedder,
+    StubLLM,
+    evaluate,
+    generate_questions,
+    run_matrix,
+)
+from semantic_backup_explorer.indexer.scan_backup import scan_backup
+from semantic_backup_explorer.rag.rag_pipeline import RAGPipeline
+
+
+def _chunk(folder, content):
+    return {"folder": folder, "content": content, "metadata": {"folder": folder}}
+
+
+def test_hashing_embedder_is_deterministic_and_normalized():
+    embedder = HashingEmbedder(dim=64)
+    a = embedder.embed_query("Rechnung 2021")
+    assert a == embedder.embed_documents(["Rechnung 2021"])[0]
+    assert abs(sum(x * x for x in a) - 1.0) < 1e-5
+    assert embedder.embed_query("") == [0.0] * 64
+
+
+def test_exact_retriever_ranks_by_similarity():
+    embedder = HashingEmbedder()
+    retriever = ExactRetriever()
+    chunks = [_chunk("/a", "Urlaub Fotos Italien"), _chunk("/b", "Steuer Rechnung 2021"), _chunk("/c", "Musik")]
+    retriever.add_chunks(chunks, embedder.embed_documents([c["content"] for c in chunks]))
+
+    result = retriever.query(embedder.embed_query("Rechnung 2021"), n_results=2)
+    assert result["metadatas"][0][0]["folder"] == "/b"
+    assert len(result["documents"][0]) == 2
+    assert ExactRetriever().query([1.0], n_results=3)["documents"] == [[]]
+
+    queries = embedder.embed_queries(["Rechnung 2021", "Musik", "Italien"])
+    assert retriever.query_many(queries, n_results=2) == [retriever.query(q, n_results=2) for q in queries]
+
+
+def test_evaluate_metrics():
+    embedder = HashingEmbedder()
+    retriever = ExactRetriever()
+    chunks = [_chunk("/a", "## /a\n- /a/x.txt | mtime:1.0"), _chunk("/b", "## /b\n- /b/y.txt | mtime:1.0")]
+    retriever.add_chunks(chunks, embedder.embed_documents([c["content"] for c in chunks]))
+    questions = [EvalQuestion("x", "/a/x.txt", "/a"), EvalQuestion("y", "/b/y.txt", "/b"), EvalQuestion("z", "/c/z", "/c")]
+
+    result = evaluate("test", chunks, questions, embedder, retriever, ks=[1, 2])
+    assert result.recall[1] == 2 / 3
+    assert result.recall[2] == 2 / 3
+    assert abs(result.mrr - 2 / 3) < 1e-9
+    assert result.latency_p95_ms >= result.latency_p50_ms >= 0
+    assert result.batch_ms_per_query > 0
+
+
+def test_run_matrix_on_synthetic_index(tmp_path):
+    root = tmp_path / "backup"
+    for folder in ["Steuern/2021", "Steuern/2022", "Fotos/Urlaub"]:
+        (root / folder).mkdir(parents=True)
+        (root / folder / f"{folder.replace('/', '_')}_datei.txt").touch()
+    index_file = tmp_path / "index.md"
+    scan_backup(root, index_file)
+
+    questions = generate_questions(index_file, 10)
+    assert len(questions) == 3
+    results = run_matrix(index_file, questions, [1, 4], ["exact"], ["hashing"], [1, 3], tmp_path)
+    assert [r.name for r in results] == ["hashing/depth1/exact", "hashing/depth4/exact"]
+    assert results[0].chunks < results[1].chunks
+    assert all(r.recall[3] == 1.0 for r in results)
+
+
+def test_pipeline_with_injected_components():
+    embedder = HashingEmbedder()
+    retriever = ExactRetriever()
+    chunks = [_chunk("/steuer", "## /steuer\n- /steuer/2021.pdf")]
+    retriever.add_chunks(chunks, embedder.embed_documents([c["content"] for c in chunks]))
+    client = StubLLM()
+
+    pipeline = RAGPipeline(embedder=embedder, retriever=retriever, client=client, n_results=1)
+    answer, context = pipeline.answer_question("Wo ist 2021.pdf?")
+    assert answer == "## /steuer"
+    assert "/steuer/2021.pdf" in context
+    assert client.calls == 1
+
+
+def test_pipeline_retrieves_many_questions_at_once():
+    embedder = HashingEmbedder()
+    retriever = ExactRetriever()
+    chunks = [_chunk("/steuer", "## /steuer\n- /steuer/2021.pdf"), _chunk("/fotos", "## /fotos\n- /fotos/urlaub.jpg")]
+    retriever.add_chunks(chunks, embedder.embed_documents([c["content"] for c in chunks]))
+    pipeline = RAGPipeline(embedder=embedder, retriever=retriever, client=StubLLM(), n_results=1)
+
+    results = pipeline.retrieve_many(["Wo ist 2021.pdf?", "Wo ist urlaub.jpg?"])
+    assert [r["metadatas"][0][0]["folder"] for r in results] == ["/steuer", "/fotos"]
+    assert pipeline.context(results[1]) == "## /fotos\n- /fotos/urlaub.jpg"
+    assert len(pipeline.retrieve_many(["2021.pdf"], n_results=2)[0]["documents"][0]) == 2
+    assert pipeline.retrieve_many([]) == []
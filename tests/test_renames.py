@@ -0,0 +1,132 @@
+"""Tests for the detection and syncing of moved and renamed files."""
+
+import os
+
+import pytest
+
+from semantic_backup_explorer.compare.folder_diff import compare_folders, find_renames
+from semantic_backup_explorer.core import async_sync
+from semantic_backup_explorer.core.async_sync import AsyncSyncOrchestrator
+from semantic_backup_explorer.core.backup_operations import BackupOperations
+from semantic_backup_explorer.indexer.compact_index import format_entry_meta, split_entry_meta
+from semantic_backup_explorer.indexer.scan_backup import scan_backup
+from semantic_backup_explorer.sync.sync_missing import rename_files
+from semantic_backup_explorer.utils.index_utils import get_all_files_from_index, parse_index_entry
+
+MTIME = 1_600_000_000
+
+
+def _write(path, text, mtime=MTIME):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    os.utime(path, (mtime, mtime))
+
+
+@pytest.fixture
+def moved(tmp_path):
+    """A backup of Photos whose 2023 folder was renamed locally to Urlaub 2023."""
+    backup = tmp_path / "backup" / "Photos"
+    local = tmp_path / "local" / "Photos"
+    for name, text in [("a.jpg", "aaaa"), ("b.jpg", "bbbbbb")]:
+        _write(backup / "2023" / name, text)
+        _write(local / "Urlaub 2023" / name, text)
+    _write(backup / "keep.txt", "keep")
+    _write(local / "keep.txt", "keep")
+    _write(local / "new.txt", "new", mtime=MTIME + 100)
+    return tmp_path, backup.resolve(), local.resolve()
+
+
+def test_entry_meta_round_trip():
+    assert split_entry_meta(format_entry_meta(1.5, 42)) == ("1.5", 42)
+    assert split_entry_meta("1.5") == ("1.5", None)
+    assert parse_index_entry("- /b/x.txt | mtime:1.5 | size:42") == ("/b/x.txt", False, 1.5)
+    # Indexes written before sizes were recorded are still read
+    assert parse_index_entry("- /b/x.txt | mtime:1.5") == ("/b/x.txt", False, 1.5)
+
+
+@pytest.mark.parametrize("suffix", [".md", ".sbi"])
+def test_index_records_sizes(moved, suffix):
+    tmp_path, backup, _ = moved
+    index = tmp_path / f"index{suffix}"
+    scan_backup(backup.parent, index)
+
+    sizes = {}
+    files = get_all_files_from_index(backup, index, sizes=sizes)
+    assert files[os.path.join("2023", "b.jpg")] == MTIME
+    assert sizes == {os.path.join("2023", "a.jpg"): 4, os.path.join("2023", "b.jpg"): 6, "keep.txt": 4}
+
+
+def test_compare_folders_reports_renames(moved):
+    _, backup, local = moved
+    sizes = {os.path.join("2023", "a.jpg"): 4, os.path.join("2023", "b.jpg"): 6, "keep.txt": 4}
+    backup_files = dict.fromkeys(sizes, float(MTIME))
+
+    diff = compare_folders(local, backup_files, backup_sizes=sizes)
+    assert diff["only_local"] == ["new.txt"]
+    assert diff["only_backup"] == []
+    assert diff["renamed"] == [
+        (os.path.join("2023", "a.jpg"), os.path.join("Urlaub 2023", "a.jpg")),
+        (os.path.join("2023", "b.jpg"), os.path.join("Urlaub 2023", "b.jpg")),
+    ]
+
+    # Without sizes nothing is matched
+    diff = compare_folders(local, backup_files)
+    assert diff["renamed"] == []
+    assert len(diff["only_local"]) == 3 and len(diff["only_backup"]) == 2
+
+
+def test_find_renames_prefers_same_name_and_verifies_content(tmp_path):
+    _write(tmp_path / "local" / "new" / "b.txt", "xxxx")
+    only_local = {os.path.join("new", "b.txt"): float(MTIME)}
+    only_backup = {"a.txt": (MTIME + 1.0, 4), os.path.join("old", "b.txt"): (float(MTIME), 4), "c.txt": (MTIME, None)}
+
+    assert find_renames(tmp_path / "local", only_local, only_backup) == [
+        (os.path.join("old", "b.txt"), os.path.join("new", "b.txt"))
+    ]
+
+    # Same size and mtime, but different content
+    _write(tmp_path / "backup" / "old" / "b.txt", "yyyy")
+    _write(tmp_path / "backup" / "a.txt", "xxxx")
+    assert find_renames(tmp_path / "local", only_local, only_backup, backup_root=tmp_path / "backup") == [
+        ("a.txt", os.path.join("new", "b.txt"))
+    ]
+    assert find_renames(tmp_path / "local", only_local, {"a.txt": (MTIME + 10.0, 4)}) == []
+
+
+def test_rename_files_moves_and_prunes_empty_folders(tmp_path):
+    _write(tmp_path / "old" / "deep" / "a.txt", "a")
+    _write(tmp_path / "b.txt", "b")
+    _write(tmp_path / "c.txt", "c")
+
+    renamed, errors = rename_files(
+        [(os.path.join("old", "deep", "a.txt"), os.path.join("new", "a.txt")), ("b.txt", "c.txt")], tmp_path
+    )
+    assert renamed == [os.path.join("new", "a.txt")]
+    assert errors[0][0] == "c.txt"
+    assert (tmp_path / "new" / "a.txt").read_text() == "a"
+    assert not (tmp_path / "old").exists()
+    assert (tmp_path / "b.txt").exists() and (tmp_path / "c.txt").read_text() == "c"
+
+
+def test_orchestrator_renames_instead_of_copying(moved, monkeypatch):
+    tmp_path, backup, local = moved
+    index = tmp_path / "index.md"
+    scan_backup(backup.parent, index)
+
+    copied = []
+    real_sync_files = async_sync.sync_files
+
+    def recording_sync_files(files, *args, **kwargs):
+        copied.extend(files)
+        return real_sync_files(files, *args, **kwargs)
+
+    monkeypatch.setattr(async_sync, "sync_files", recording_sync_files)
+    results = AsyncSyncOrchestrator(BackupOperations(index_path=index), backup.parent).run_sync([local])
+
+    assert (results[0].synced, results[0].renamed, results[0].status) == (1, 2, "OK")
+    assert copied == ["new.txt"]
+    assert (backup / "Urlaub 2023" / "b.jpg").read_text() == "bbbbbb"
+    assert not (backup / "2023").exists()
+
+    plan = BackupOperations(index_path=index, detect_renames=False).plan_sync(local, backup.parent)
+    assert plan.renames == [] and len(plan.files_to_sync) == 3
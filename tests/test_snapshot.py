@@ -0,0 +1,137 @@
+"""Tests for hardlinked snapshot backups."""
+
+import datetime
+import os
+
+import pytest
+
+from semantic_backup_explorer.indexer.scan_backup import scan_backup
+from semantic_backup_explorer.sync import snapshot as snapshot_module
+from semantic_backup_explorer.sync.snapshot import SnapshotStore, without_snapshots
+from semantic_backup_explorer.utils.exclusions import ExclusionRules
+
+MTIME = 1_600_000_000
+
+
+def _write(path, text, mtime=MTIME):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    os.utime(path, (mtime, mtime))
+
+
+def _day(day):
+    return datetime.datetime(2024, 1, day, 20, 0)
+
+
+@pytest.fixture
+def setup(tmp_path):
+    local = tmp_path / "Documents"
+    _write(local / "a.txt", "a")
+    _write(local / "sub" / "b.txt", "bb")
+    return SnapshotStore(tmp_path / "backup" / "snapshots"), local
+
+
+def _snapshot(store, local, day):
+    run = store.begin(_day(day))
+    result = run.sync_folder(local)
+    run.commit()
+    return result
+
+
+def test_unchanged_files_are_hardlinked(setup):
+    store, local = setup
+    first = _snapshot(store, local, 1)
+    assert sorted(first.copied) == ["a.txt", os.path.join("sub", "b.txt")]
+    assert first.linked == 0
+
+    _write(local / "a.txt", "changed", mtime=MTIME + 50)
+    _write(local / "c.txt", "new")
+    second = _snapshot(store, local, 2)
+    assert sorted(second.copied) == ["a.txt", "c.txt"]
+    assert second.linked == 1
+
+    old = store.root / "2024-01-01_200000" / "Documents"
+    new = store.root / "2024-01-02_200000" / "Documents"
+    assert os.path.samefile(old / "sub" / "b.txt", new / "sub" / "b.txt")
+    assert (old / "a.txt").read_text() == "a" and (new / "a.txt").read_text() == "changed"
+    assert not (old / "c.txt").exists()
+
+    assert [s.id for s in store.list_snapshots()] == ["2024-01-01_200000", "2024-01-02_200000"]
+    assert [(s.files_copied, s.files_linked) for s in store.list_snapshots()] == [(2, 0), (2, 1)]
+
+
+def test_manifest_records_versions(setup):
+    store, local = setup
+    _snapshot(store, local, 1)
+    _snapshot(store, local, 2)
+    _write(local / "a.txt", "changed", mtime=MTIME + 50)
+    _snapshot(store, local, 3)
+
+    history = store.file_history("Documents", "a.txt")
+    assert [(snapshot_id, v.origin, v.size) for snapshot_id, v in history] == [
+        ("2024-01-01_200000", "2024-01-01_200000", 1),
+        ("2024-01-03_200000", "2024-01-03_200000", 7),
+    ]
+    manifest = store.load_manifest("2024-01-02_200000")["Documents"]
+    assert manifest[os.path.join("sub", "b.txt")].origin == "2024-01-01_200000"
+
+
+def test_moved_files_are_linked_and_uncommitted_runs_ignored(setup):
+    store, local = setup
+    _snapshot(store, local, 1)
+
+    # A run that never commits is not used as base
+    store.begin(_day(2)).sync_folder(local)
+
+    os.rename(local / "sub", local / "renamed")
+    result = _snapshot(store, local, 3)
+    assert result.copied == [] and result.linked == 2
+    assert os.path.samefile(
+        store.root / "2024-01-01_200000" / "Documents" / "sub" / "b.txt",
+        store.root / "2024-01-03_200000" / "Documents" / "renamed" / "b.txt",
+    )
+
+
+def test_falls_back_to_copy_without_hardlinks(setup, monkeypatch):
+    store, local = setup
+    _snapshot(store, local, 1)
+
+    def no_links(src, dst):
+        raise PermissionError("Operation not permitted")
+
+    monkeypatch.setattr(snapshot_module.os, "link", no_links)
+    result = _snapshot(store, local, 2)
+    assert len(result.copied) == 2 and result.linked == 0
+    assert (store.root / "2024-01-02_200000" / "Documents" / "sub" / "b.txt").read_text() == "bb"
+
+
+def test_prune_keeps_newest_snapshots(setup):
+    store, local = setup
+    for day in (1, 2, 3):
+        _snapshot(store, local, day)
+
+    assert store.prune(0) == []
+    assert store.prune(1) == ["2024-01-01_200000", "2024-01-02_200000"]
+    assert [s.id for s in store.list_snapshots()] == ["2024-01-03_200000"]
+    assert not (store.root / "2024-01-01_200000").exists()
+    # The remaining snapshot still holds all files
+    assert (store.root / "2024-01-03_200000" / "Documents" / "a.txt").read_text() == "a"
+    assert store.begin(_day(3)).info.id == "2024-01-03_200000_2"
+
+
+def test_backup_scan_skips_snapshot_trees(setup, tmp_path):
+    store, local = setup
+    for day in (1, 2):
+        _snapshot(store, local, day)
+    backup = store.root.parent
+    _write(backup / "Documents" / "a.txt", "a")
+    _write(backup / "Fotos" / "snapshots" / "bild.jpg", "jpg")
+
+    index_file = tmp_path / "index.md"
+    scan_backup(backup, index_file, exclude=without_snapshots("snapshots/", ExclusionRules(["*.jpg"])))
+    index = index_file.read_text(encoding="utf-8")
+    assert "Documents/a.txt" in index
+    # Only the snapshot directory at the drive root is pruned; the global rules still apply
+    assert str(store.root) not in index and "Fotos/snapshots" in index and "bild.jpg" not in index
+    assert without_snapshots("[old]*").matches("[old]*", is_dir=True)
+    assert not without_snapshots("[old]*").matches("o", is_dir=True)
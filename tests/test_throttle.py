@@ -0,0 +1,119 @@
+"""Tests for bandwidth and file rate limits."""
+
+import datetime
+import os
+import sys
+
+import pytest
+
+from semantic_backup_explorer.sync import throttle as throttle_module
+from semantic_backup_explorer.sync.copy_engine import copy_file
+from semantic_backup_explorer.sync.sync_missing import sync_files
+from semantic_backup_explorer.sync.throttle import (
+    Throttle,
+    TokenBucket,
+    get_throttle,
+    lower_io_priority,
+    parse_rate,
+    parse_schedule,
+)
+
+
+class FakeTime:
+    """Monotonic clock whose sleep advances the clock."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def clock(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def _at(hour, minute=0):
+    return lambda: datetime.datetime(2024, 1, 1, hour, minute)
+
+
+def test_parse_rate():
+    assert parse_rate("20M") == 20 * 1024**2
+    assert parse_rate("512k") == 512 * 1024
+    assert parse_rate("1.5GB/s") == 1.5 * 1024**3
+    assert parse_rate("1000") == 1000
+    assert parse_rate("") == 0
+    assert parse_rate(None) == 0
+    with pytest.raises(ValueError):
+        parse_rate("fast")
+
+
+def test_parse_schedule_and_wrap_around_midnight():
+    rules = parse_schedule("08:00-18:00=10M,20; 22:00-06:00=0")
+    assert [(r.bytes_per_sec, r.files_per_sec) for r in rules] == [(10 * 1024**2, 20), (0, 0)]
+    assert rules[0].matches(datetime.time(8, 0)) and not rules[0].matches(datetime.time(18, 0))
+    assert rules[1].matches(datetime.time(23, 30)) and rules[1].matches(datetime.time(5, 59))
+    assert not rules[1].matches(datetime.time(12, 0))
+    with pytest.raises(ValueError):
+        parse_schedule("8-18=10M")
+
+
+def test_token_bucket_sleeps_off_debt():
+    fake = FakeTime()
+    bucket = TokenBucket(100, clock=fake.clock, sleep=fake.sleep)
+    assert bucket.consume(100) == 0
+    assert bucket.consume(50) == pytest.approx(0.5)
+    # The debt was paid by sleeping, the next request waits for its own tokens only
+    assert bucket.consume(100) == pytest.approx(1.0)
+    fake.now += 10
+    assert bucket.consume(100) == 0
+    assert TokenBucket(0).consume(10**12) == 0
+
+
+def test_schedule_overrides_default_limits():
+    throttle = Throttle(bytes_per_sec=100, schedule=parse_schedule("22:00-06:00=0"), now=_at(12))
+    assert throttle.current_limits() == (100, 0)
+    throttle.now = _at(23)
+    assert throttle.current_limits() == (0, 0)
+    assert not throttle.bytes_limited()
+    assert get_throttle("", 0, "") is None
+    assert get_throttle(schedule="08:00-18:00=1M") is not None
+
+
+def test_copy_respects_bandwidth_limit(tmp_path):
+    fake = FakeTime()
+    data = os.urandom(3 * 1024 * 1024)
+    (tmp_path / "big.bin").write_bytes(data)
+    rate = 1024 * 1024
+    throttle = Throttle(bytes_per_sec=rate, clock=fake.clock, sleep=fake.sleep)
+
+    copy_file(tmp_path / "big.bin", tmp_path / "copy.bin", throttle=throttle, buffer_size=256 * 1024)
+    assert (tmp_path / "copy.bin").read_bytes() == data
+    # One second of burst, then the rest at the limit
+    assert sum(fake.slept) == pytest.approx((len(data) - rate) / rate)
+
+
+def test_sync_files_limits_file_rate(tmp_path):
+    fake = FakeTime()
+    for i in range(5):
+        (tmp_path / f"{i}.txt").write_text(str(i))
+    throttle = Throttle(files_per_sec=2, clock=fake.clock, sleep=fake.sleep)
+
+    synced, _ = sync_files([f"{i}.txt" for i in range(5)], tmp_path, tmp_path / "backup", throttle=throttle)
+    assert len(synced) == 5
+    assert sum(fake.slept) == pytest.approx(1.5)
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="ionice is Linux-only")
+def test_lower_io_priority(monkeypatch):
+    calls = []
+    monkeypatch.setattr(os, "nice", lambda increment: calls.append(("nice", increment)))
+    monkeypatch.setattr(throttle_module.shutil, "which", lambda name: "/usr/bin/ionice")
+    monkeypatch.setattr(throttle_module.subprocess, "run", lambda cmd, **kwargs: calls.append(tuple(cmd)))
+
+    assert lower_io_priority()
+    assert calls == [("nice", 10), ("/usr/bin/ionice", "-c", "2", "-n", "7", "-p", str(os.getpid()))]
+
+    monkeypatch.setattr(throttle_module.shutil, "which", lambda name: None)
+    assert not lower_io_priority()
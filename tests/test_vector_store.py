@@ -0,0 +1,224 @@
+"""Tests for the compressed NumPy vector store, its IVF index and the Retriever backed by it."""
+
+import numpy as np
+import pytest
+
+from benchmarks.ann_eval import build_store, evaluate_store, make_vectors
+from benchmarks.ann_eval import format_results as format_ann_results
+from benchmarks.rag_eval import format_results, make_retriever, run_matrix
+from semantic_backup_explorer.rag.retriever import Retriever, chunk_id
+from semantic_backup_explorer.rag.vector_store import NumpyVectorStore
+
+
+def _vectors(count=500, dim=32, seed=0):
+    rng = np.random.default_rng(seed)
+    # Most of the variance in a few directions, as with real sentence embeddings
+    basis = rng.normal(size=(8, dim))
+    vectors = rng.normal(size=(count, 8)) @ basis + 0.05 * rng.normal(size=(count, dim))
+    return vectors.astype(np.float32)
+
+
+def _add(store, vectors, start=0):
+    ids = [f"id{start + i}" for i in range(len(vectors))]
+    store.add(ids, vectors, [f"doc {start + i}" for i in range(len(vectors))], [{"n": start + i} for i in range(len(vectors))])
+
+
+def _exact_top(vectors, query, k):
+    distances = ((vectors - query) ** 2).sum(axis=1)
+    return list(np.argsort(distances)[:k])
+
+
+@pytest.mark.parametrize(
+    "compression,pca_dim,rescore",
+    [("none", 0, False), ("float16", 0, True), ("int8", 0, True), ("int8", 8, True), ("float16", 8, False)],
+)
+def test_search_matches_brute_force(tmp_path, compression, pca_dim, rescore):
+    vectors = _vectors()
+    store = NumpyVectorStore(tmp_path / "store", compression=compression, pca_dim=pca_dim, rescore=rescore)
+    for start in range(0, len(vectors), 64):
+        _add(store, vectors[start : start + 64], start)
+
+    hits = 0
+    for query in vectors[:20] + 0.01:
+        rows, distances = store.search(query, 5)
+        assert list(distances) == sorted(distances)
+        hits += len(set(rows) & set(_exact_top(vectors, query, 5)))
+    assert hits / 100 >= 0.9
+
+    result = store.query(vectors[3], n_results=2)
+    assert result["ids"][0][0] == "id3"
+    assert result["documents"][0][0] == "doc 3" and result["metadatas"][0][0] == {"n": 3}
+    if rescore:
+        assert result["distances"][0][0] == pytest.approx(0.0, abs=1e-4)
+
+
+def test_compression_shrinks_memory_and_persists(tmp_path):
+    vectors = _vectors()
+    sizes = {}
+    for compression in ["none", "float16", "int8"]:
+        store = NumpyVectorStore(tmp_path / compression, compression=compression, pca_dim=8, rescore=False)
+        _add(store, vectors)
+        store.flush()
+        sizes[compression] = store.memory_bytes
+        assert not (tmp_path / compression / "full.f32").stat().st_size
+
+        reopened = NumpyVectorStore(tmp_path / compression, compression="none")
+        assert (reopened.compression, reopened.pca_dim, len(reopened)) == (compression, 8, 500)
+        assert list(reopened.search(vectors[7], 3)[0]) == list(store.search(vectors[7], 3)[0])
+        # Vectors added after the PCA fit are projected right away
+        _add(reopened, vectors[:10] + 0.001, 500)
+        assert reopened.encoded == 510 and reopened.query(vectors[1], 2)["ids"][0] in (["id1", "id501"], ["id501", "id1"])
+    assert sizes["int8"] < sizes["float16"] < sizes["none"]
+
+
+def test_store_validates_input_and_clears(tmp_path):
+    with pytest.raises(ValueError, match="Unknown compression"):
+        NumpyVectorStore(tmp_path, compression="int4")
+    store = NumpyVectorStore(tmp_path / "store")
+    assert store.query([1.0, 2.0])["ids"] == [[]]
+    _add(store, _vectors(10, 4))
+    with pytest.raises(ValueError, match="4-dimensional"):
+        _add(store, _vectors(2, 5))
+    with pytest.raises(ValueError, match="same length"):
+        store.add(["a"], [[1.0] * 4], [], [])
+    assert NumpyVectorStore.exists(tmp_path / "store")
+    store.clear()
+    assert len(store) == 0 and not NumpyVectorStore.exists(tmp_path / "store")
+
+
+def test_retriever_with_compression(tmp_path):
+    vectors = _vectors(50, 16)
+    chunks = [{"content": f"## /f{i}", "metadata": {"folder": f"/f{i}"}} for i in range(50)]
+    retriever = Retriever(tmp_path, compression="int8", pca_dim=0, rescore=True, index="flat", nlist=0, nprobe=1)
+    retriever.clear()
+    retriever.add_chunks(chunks, vectors.tolist())
+    retriever.flush()
+    assert retriever.query(vectors[9].tolist(), n_results=1)["metadatas"] == [[{"folder": "/f9"}]]
+
+    # An existing compressed store is opened whatever the settings say
+    assert Retriever(tmp_path, compression="", index="flat").store is not None
+
+
+def test_benchmark_reports_compressed_backends(tmp_path):
+    retriever = make_retriever("numpy-int8-pca64-norescore", tmp_path)
+    assert (retriever.store.compression, retriever.store.pca_dim, retriever.store.rescore) == ("int8", 64, False)
+
+    root = tmp_path / "backup"
+    for folder in ["Steuern/2021", "Fotos/Urlaub"]:
+        (root / folder).mkdir(parents=True)
+        (root / folder / "datei.txt").touch()
+    from benchmarks.rag_eval import generate_questions
+    from semantic_backup_explorer.indexer.scan_backup import scan_backup
+
+    index_file = tmp_path / "index.md"
+    scan_backup(root, index_file)
+    questions = generate_questions(index_file, 5)
+    results = run_matrix(index_file, questions, [4], ["exact", "numpy-float16"], ["hashing"], [1], tmp_path)
+    assert results[0].memory_mb == pytest.approx(2 * results[1].memory_mb, rel=0.2)
+    assert "Mem MB" in format_results(results, [1])
+
+
+def test_ivf_index_recall_and_persistence(tmp_path, monkeypatch):
+    monkeypatch.setattr("semantic_backup_explorer.rag.vector_store.IVF_MIN_ROWS", 100)
+    vectors = _vectors(2000, 32)
+    store = NumpyVectorStore(tmp_path / "store", compression="int8", index="ivf", nlist=20, nprobe=4)
+    _add(store, vectors[:1500])
+    assert store.centroids is None
+    store.flush()
+    assert store.centroids.shape == (20, 32) and store.ivf_rows == 1500
+
+    queries = vectors[:30] + 0.01
+    assert store.measure_recall(queries, 5) >= 0.8
+    assert store.measure_recall(queries, 5, nprobe=20) == 1.0
+
+    # Rows added later are assigned to lists and found before and after the next flush
+    _add(store, vectors[1500:], 1500)
+    assert store.query(vectors[1800], 1)["ids"] == [["id1800"]]
+    store.flush()
+    reopened = NumpyVectorStore(tmp_path / "store", nprobe=4)
+    assert reopened.index == "ivf" and reopened.ivf_rows == 2000
+    assert isinstance(reopened._codes.array(), np.memmap)
+    assert reopened.query(vectors[1800], 1)["ids"] == [["id1800"]]
+
+
+@pytest.mark.parametrize("compression,pca_dim,rescore", [("float16", 0, True), ("int8", 8, True), ("int8", 0, False)])
+def test_query_many_matches_single_queries(tmp_path, monkeypatch, compression, pca_dim, rescore):
+    monkeypatch.setattr("semantic_backup_explorer.rag.vector_store.SEARCH_BLOCK_ROWS", 16)
+    vectors = _vectors(300, 16)
+    store = NumpyVectorStore(tmp_path / "store", compression=compression, pca_dim=pca_dim, rescore=rescore)
+    _add(store, vectors)
+    store.delete(["id4", "id7"])
+
+    queries = vectors[:40] + 0.01
+    results = store.query_many(queries, n_results=3)
+    for result, single in zip(results, [store.query(q, n_results=3) for q in queries], strict=True):
+        assert result["ids"] == single["ids"] and result["metadatas"] == single["metadatas"]
+        assert result["distances"][0] == pytest.approx(single["distances"][0], rel=1e-4, abs=1e-4)
+    assert "id4" not in results[4]["ids"][0] and results[5]["ids"][0][0] == "id5"
+    assert store.query_many(queries[:0], 3) == [] and len(store.query_many(queries[:2], 400)[0]["ids"][0]) == 298
+    with pytest.raises(ValueError, match="16-dimensional"):
+        store.query_many([[1.0, 2.0]])
+
+
+def test_retriever_query_many_with_ivf(tmp_path, monkeypatch):
+    monkeypatch.setattr("semantic_backup_explorer.rag.vector_store.IVF_MIN_ROWS", 100)
+    vectors = _vectors(500, 16)
+    chunks = [{"content": f"## /f{i}", "metadata": {"folder": f"/f{i}"}} for i in range(500)]
+    retriever = Retriever(tmp_path, compression="int8", pca_dim=0, rescore=True, index="ivf", nlist=10, nprobe=3)
+    retriever.add_chunks(chunks, vectors.tolist())
+    retriever.flush()
+
+    queries = vectors[:10].tolist()
+    results = retriever.query_many(queries, n_results=2)
+    assert results == [retriever.query(q, n_results=2) for q in queries]
+    assert [r["metadatas"][0][0] for r in results] == [{"folder": f"/f{i}"} for i in range(10)]
+    assert retriever.query_many([]) == []
+
+
+def test_delete_retain_and_compact(tmp_path):
+    vectors = _vectors(100, 8)
+    store = NumpyVectorStore(tmp_path / "store", compression="float16")
+    _add(store, vectors)
+    assert store.delete(["id3", "id3", "unknown"]) == 1
+    assert "id3" not in store.query(vectors[3], 5)["ids"][0]
+    assert list(store.brute_force(vectors[3], 100)).count(3) == 0
+
+    missing = store.retain([f"id{i}" for i in range(50)] + ["new"])
+    assert missing == [i == 3 for i in range(50)] + [True]
+    assert len(store) == 49
+
+    store.flush()
+    assert store.count == 49 and store.deleted_count == 0
+    assert not (tmp_path / "store.compact").exists() and not (tmp_path / "store.old").exists()
+    result = store.query(vectors[10], 1)
+    assert result["ids"] == [["id10"]] and result["metadatas"] == [[{"n": 10}]]
+    assert NumpyVectorStore(tmp_path / "store").query(vectors[49], 1)["documents"] == [["doc 49"]]
+
+
+def test_retriever_updates_changed_chunks_only(tmp_path):
+    chunks = [{"content": f"## /f{i}", "metadata": {"folder": f"/f{i}"}} for i in range(5)]
+    vectors = _vectors(6, 4).tolist()
+    retriever = Retriever(tmp_path, compression="none", pca_dim=0, rescore=True, index="flat", nlist=0, nprobe=1)
+    retriever.add_chunks(chunks + [chunks[0]], vectors)
+    assert len(retriever.store) == 5
+    assert chunk_id(chunks[0]) == chunk_id({"metadata": {"folder": "/f0"}, "content": "## /f0"}) != chunk_id(chunks[1])
+
+    changed = chunks[:3] + [{"content": "## /f3\n- neu.txt", "metadata": {"folder": "/f3"}}]
+    new = retriever.update_chunks(changed)
+    assert new == [changed[3]]
+    retriever.add_chunks(new, [vectors[3]])
+    assert len(retriever.store) == 4
+    assert retriever.query(vectors[3], n_results=1)["documents"] == [["## /f3\n- neu.txt"]]
+
+    retriever.delete([chunk_id(chunks[0])])
+    assert len(retriever.store) == 3
+
+
+def test_ann_benchmark(tmp_path, monkeypatch):
+    monkeypatch.setattr("semantic_backup_explorer.rag.vector_store.IVF_MIN_ROWS", 100)
+    vectors = make_vectors(1000, 16, clusters=10)
+    store, _ = build_store(tmp_path / "store", vectors, "int8", nlist=10)
+    results = evaluate_store(store, vectors[:10], [1, 10], k=5)
+    assert [r.name for r in results] == ["ivf nprobe=1", "ivf nprobe=10", "exact"]
+    assert results[0].recall <= results[1].recall == 1.0
+    assert "Recall" in format_ann_results(results)
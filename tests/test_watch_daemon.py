@@ -0,0 +1,177 @@
+"""Tests for the continuous sync daemon."""
+
+import os
+import threading
+
+import pytest
+
+from semantic_backup_explorer.compare.local_snapshot import LocalSnapshotCache
+from semantic_backup_explorer.indexer.scan_backup import scan_backup
+from semantic_backup_explorer.sync import watch_daemon
+from semantic_backup_explorer.sync.sync_missing import sync_files
+from semantic_backup_explorer.sync.watch_daemon import DirtySet, PollingWatcher, SyncDaemon, WatchedFolder
+from semantic_backup_explorer.utils.index_utils import get_all_files_from_index, get_index_journal_path
+
+OLD = 1_600_000_000
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeWatcher:
+    def __init__(self):
+        self.started = False
+
+    def start(self):
+        self.started = True
+
+    def stop(self):
+        self.started = False
+
+
+@pytest.fixture
+def folders(tmp_path):
+    local = tmp_path / "local" / "Photos"
+    local.mkdir(parents=True)
+    (local / "old.jpg").write_text("old")
+    backup = tmp_path / "backup"
+    target = backup / "Photos"
+    target.mkdir(parents=True)
+    (target / "old.jpg").write_text("old")
+    for dirpath, _, _ in os.walk(tmp_path):
+        os.utime(dirpath, (OLD, OLD))
+    return WatchedFolder(local.resolve(), target.resolve()), backup.resolve()
+
+
+def test_dirty_set_debounces():
+    clock = FakeClock()
+    dirty = DirtySet(clock=clock)
+    dirty.add(os.sep, "a.txt")
+    clock.now = 3.0
+    dirty.add(os.sep, "b.txt")
+
+    clock.now = 5.0
+    assert dirty.drain(5.0) == {os.sep: ["a.txt"]}
+    assert len(dirty) == 1
+
+    # Another change restarts the quiet period
+    dirty.add(os.sep, "b.txt")
+    clock.now = 9.0
+    assert dirty.drain(5.0) == {}
+    clock.now = 10.0
+    assert dirty.drain(5.0) == {os.sep: ["b.txt"]}
+    assert len(dirty) == 0
+
+
+def test_polling_watcher_detects_changes(tmp_path, folders):
+    folder, _ = folders
+    dirty = DirtySet()
+    watcher = PollingWatcher([folder], dirty, LocalSnapshotCache(tmp_path / "cache"))
+    assert watcher.poll() == 0
+
+    (folder.local_path / "sub").mkdir()
+    (folder.local_path / "sub" / "new.jpg").write_text("new")
+    os.utime(folder.local_path / "old.jpg", (OLD + 10, OLD + 10))
+    assert watcher.poll() == 2
+    assert dirty.drain(0) == {folder.local_path: ["old.jpg", os.path.join("sub", "new.jpg")]}
+    assert watcher.poll() == 0
+
+
+def test_sync_dirty_copies_and_updates_index(tmp_path, folders):
+    folder, backup = folders
+    index = tmp_path / "index.md"
+    scan_backup(backup, index)
+
+    before = index.read_text(encoding="utf-8")
+
+    clock = FakeClock()
+    daemon = SyncDaemon(
+        [folder], index_path=index, debounce=5.0, index_merge_interval=100.0, watcher=FakeWatcher(), clock=clock
+    )
+    (folder.local_path / "2024").mkdir()
+    (folder.local_path / "2024" / "new.jpg").write_text("new")
+    daemon.dirty.add(folder.local_path, os.path.join("2024", "new.jpg"))
+    daemon.dirty.add(folder.local_path, "deleted.jpg")
+
+    # Not settled yet
+    assert daemon.sync_dirty() == []
+    assert not (folder.target_root / "2024" / "new.jpg").exists()
+
+    clock.now = 10.0
+    results = daemon.sync_dirty()
+    assert [r.synced for r in results] == [[os.path.join("2024", "new.jpg")]]
+    assert (folder.target_root / "2024" / "new.jpg").read_text() == "new"
+
+    # The batch is only journaled, but compares already see it
+    assert index.read_text(encoding="utf-8") == before
+    assert get_index_journal_path(index).exists()
+    indexed = get_all_files_from_index(folder.target_root, index)
+    assert indexed.keys() == {"old.jpg", os.path.join("2024", "new.jpg")}
+
+    # The journal is merged once the merge interval has passed
+    clock.now = 110.0
+    assert daemon.sync_dirty() == []
+    assert not get_index_journal_path(index).exists()
+    assert str(folder.target_root / "2024" / "new.jpg") in index.read_text(encoding="utf-8")
+    assert get_all_files_from_index(folder.target_root, index) == indexed
+
+
+def test_run_forever_syncs_on_stop(folders):
+    folder, _ = folders
+    watcher = FakeWatcher()
+    daemon = SyncDaemon([folder], debounce=0, sync_interval=3600, watcher=watcher)
+    (folder.local_path / "late.jpg").write_text("late")
+    daemon.dirty.add(folder.local_path, "late.jpg")
+    threading.Timer(0.1, daemon.stop).start()
+
+    daemon.run_forever()
+    assert not watcher.started
+    assert (folder.target_root / "late.jpg").exists()
+
+
+def test_run_forever_merges_index_on_stop(tmp_path, folders):
+    folder, backup = folders
+    index = tmp_path / "index.md"
+    scan_backup(backup, index)
+    daemon = SyncDaemon([folder], index_path=index, debounce=0, sync_interval=3600, watcher=FakeWatcher())
+    (folder.local_path / "late.jpg").write_text("late")
+    daemon.dirty.add(folder.local_path, "late.jpg")
+    threading.Timer(0.1, daemon.stop).start()
+
+    daemon.run_forever()
+    assert not get_index_journal_path(index).exists()
+    assert str(folder.target_root / "late.jpg") in index.read_text(encoding="utf-8")
+
+
+def test_sync_dirty_retries_failed_files(folders, monkeypatch):
+    folder, _ = folders
+    clock = FakeClock()
+    daemon = SyncDaemon([folder], debounce=5.0, watcher=FakeWatcher(), clock=clock)
+    (folder.local_path / "locked.pst").write_text("mail")
+    daemon.dirty.add(folder.local_path, "locked.pst")
+
+    calls = []
+
+    def locked_once(rel_paths, *args, **kwargs):
+        calls.append(rel_paths)
+        if len(calls) == 1:
+            return [], [(p, "Permission denied") for p in rel_paths]
+        return sync_files(rel_paths, *args, **kwargs)
+
+    monkeypatch.setattr(watch_daemon, "sync_files", locked_once)
+
+    clock.now = 10.0
+    assert [r.errors for r in daemon.sync_dirty()] == [[("locked.pst", "Permission denied")]]
+    assert not (folder.target_root / "locked.pst").exists()
+    assert len(daemon.dirty) == 1
+
+    # Retried after the debounce interval
+    clock.now = 20.0
+    assert [r.synced for r in daemon.sync_dirty()] == [["locked.pst"]]
+    assert (folder.target_root / "locked.pst").read_text() == "mail"
+    assert len(daemon.dirty) == 0